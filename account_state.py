@@ -0,0 +1,326 @@
+import asyncio
+import base64
+import hmac
+import json
+import logging
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+OKX_PRIVATE_WS_URL = 'wss://ws.okx.com:8443/ws/v5/private'
+BINANCE_USER_WS_URL = 'wss://fstream.binance.com/ws/'
+LISTEN_KEY_KEEPALIVE = 1800  # Binance listenKey 60分钟过期，30分钟续期一次
+OKX_PING_INTERVAL = 25
+
+
+class AccountStateService:
+    """账户状态缓存：私有WebSocket推送余额/保证金/持仓，推送失效时限流REST对账"""
+
+    def __init__(self, okx, binance, quote: str = 'USDT', stale_after: float = 60.0,
+                 min_rest_interval: float = 10.0, max_rest_age: float = 300.0,
+                 balance_params: Optional[Dict[str, Dict]] = None):
+        self.exchanges = {'okx': okx, 'binance': binance}
+        self.quote = quote
+        self.stale_after = stale_after
+        self.min_rest_interval = min_rest_interval
+        # 推送来源的数据最多隔max_rest_age秒用REST校准一次
+        self.max_rest_age = max_rest_age
+        self.balance_params = balance_params or {'okx': {'type': 'swap'}, 'binance': {'type': 'future'}}
+        self.state: Dict[str, Dict] = {
+            ex_id: {
+                'free': Decimal('0'),
+                'equity': Decimal('0'),
+                'margin': {'used': Decimal('0'), 'available': Decimal('0')},
+                'positions': {},
+                'updated': 0.0,
+                'reconciled': 0.0,
+                'source': None
+            }
+            for ex_id in self.exchanges
+        }
+        self.connected = {ex_id: False for ex_id in self.exchanges}
+        # 推送无法给出可用余额时置位，等待下一次REST对账
+        self._needs_rest = {ex_id: False for ex_id in self.exchanges}
+        self.listeners: List[Callable[[str], None]] = []
+        self.is_running = False
+        self._last_rest: Dict[str, float] = {ex_id: 0.0 for ex_id in self.exchanges}
+        self._rest_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._listen_key: Optional[str] = None
+
+    # ------------------------- 查询接口 -------------------------
+    def balance(self, exchange_id: str) -> Decimal:
+        return self.state[exchange_id]['free']
+
+    def equity(self, exchange_id: str) -> Decimal:
+        return self.state[exchange_id]['equity']
+
+    def positions(self, exchange_id: str) -> Dict[str, Dict]:
+        return self.state[exchange_id]['positions']
+
+    def balances(self) -> Dict[str, Decimal]:
+        return {ex_id: st['free'] for ex_id, st in self.state.items()}
+
+    def is_stale(self, exchange_id: str) -> bool:
+        """推送断开、从未收到数据、推送要求对账，或距上次REST对账超过阈值即视为过期"""
+        st = self.state[exchange_id]
+        if not self.connected[exchange_id]:
+            return True
+        if st['updated'] == 0 or self._needs_rest[exchange_id]:
+            return True
+        limit = self.stale_after if st['source'] == 'rest' else self.max_rest_age
+        return time.time() - st['reconciled'] > limit
+
+    def snapshot(self) -> Dict:
+        """面板展示用（含更新时间与数据来源）"""
+        return {
+            ex_id: {
+                'free': float(st['free']),
+                'equity': float(st['equity']),
+                'margin_used': float(st['margin']['used']),
+                'positions': len(st['positions']),
+                'age': round(time.time() - st['updated'], 1) if st['updated'] else None,
+                'source': st['source'],
+                'stream': self.connected[ex_id]
+            }
+            for ex_id, st in self.state.items()
+        }
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """注册账户更新回调 callback(exchange_id)"""
+        self.listeners.append(callback)
+
+    # ------------------------- 生命周期 -------------------------
+    async def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        await self.reconcile(force=True)
+        self._tasks = [
+            asyncio.create_task(self._run_okx()),
+            asyncio.create_task(self._run_binance()),
+            asyncio.create_task(self._reconcile_loop())
+        ]
+        logger.info("账户状态推送已启动")
+
+    async def stop(self):
+        self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._listen_key:
+            try:
+                await self.exchanges['binance'].fapiPrivateDeleteListenKey({'listenKey': self._listen_key})
+            except Exception as e:
+                logger.debug(f"删除listenKey失败: {str(e)}")
+            self._listen_key = None
+
+    async def ensure_fresh(self):
+        """推送正常时直接返回；过期的交易所走限流REST对账"""
+        stale = [ex_id for ex_id in self.exchanges if self.is_stale(ex_id)]
+        if stale:
+            await self.reconcile(stale)
+
+    async def _reconcile_loop(self):
+        """后台定期补做过期交易所的REST对账，保证推送来源的余额不会长期不校准"""
+        while self.is_running:
+            await asyncio.sleep(max(self.min_rest_interval, 1.0))
+            try:
+                await self.ensure_fresh()
+            except Exception as e:
+                logger.error(f"定期对账失败: {str(e)}")
+
+    async def reconcile(self, exchange_ids: Optional[List[str]] = None, force: bool = False):
+        """REST对账（同一交易所min_rest_interval内最多一次）"""
+        async with self._rest_lock:
+            now = time.time()
+            targets = [
+                ex_id for ex_id in (exchange_ids or list(self.exchanges))
+                if force or now - self._last_rest[ex_id] >= self.min_rest_interval
+            ]
+            for ex_id in targets:
+                self._last_rest[ex_id] = now
+            results = await asyncio.gather(
+                *[self.exchanges[ex_id].fetch_balance(params=self.balance_params.get(ex_id, {})) for ex_id in targets],
+                return_exceptions=True
+            )
+        for ex_id, res in zip(targets, results):
+            if isinstance(res, Exception):
+                logger.error(f"余额对账失败: {ex_id} - {str(res)}")
+                continue
+            quote = res.get(self.quote) or {}
+            st = self.state[ex_id]
+            st['free'] = Decimal(str(quote.get('free') or 0))
+            st['equity'] = Decimal(str(quote.get('total') or quote.get('free') or 0))
+            st['margin']['used'] = Decimal(str(quote.get('used') or 0))
+            st['margin']['available'] = st['free']
+            st['reconciled'] = time.time()
+            self._needs_rest[ex_id] = False
+            self._touch(ex_id, 'rest')
+
+    def _touch(self, exchange_id: str, source: str):
+        st = self.state[exchange_id]
+        st['updated'] = time.time()
+        st['source'] = source
+        for callback in self.listeners:
+            try:
+                callback(exchange_id)
+            except Exception as e:
+                logger.error(f"账户回调异常: {exchange_id} - {str(e)}")
+
+    # ------------------------- OKX -------------------------
+    def _okx_login_args(self) -> Dict:
+        okx = self.exchanges['okx']
+        timestamp = str(int(time.time()))
+        mac = hmac.new(
+            bytes(okx.secret, encoding='utf8'),
+            bytes(timestamp + 'GET' + '/users/self/verify', encoding='utf-8'),
+            digestmod='sha256'
+        )
+        return {
+            'apiKey': okx.apiKey,
+            'passphrase': okx.password,
+            'timestamp': timestamp,
+            'sign': base64.b64encode(mac.digest()).decode()
+        }
+
+    async def _run_okx(self):
+        delay = 1
+        while self.is_running:
+            try:
+                async with websockets.connect(OKX_PRIVATE_WS_URL, ping_interval=None) as ws:
+                    await ws.send(json.dumps({'op': 'login', 'args': [self._okx_login_args()]}))
+                    while self.is_running:
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=OKX_PING_INTERVAL)
+                        except asyncio.TimeoutError:
+                            await ws.send('ping')
+                            continue
+                        if raw == 'pong':
+                            continue
+                        message = json.loads(raw)
+                        event = message.get('event')
+                        if event == 'login':
+                            await ws.send(json.dumps({'op': 'subscribe', 'args': [
+                                {'channel': 'account', 'ccy': self.quote},
+                                {'channel': 'positions', 'instType': 'SWAP'}
+                            ]}))
+                        elif event == 'subscribe':
+                            self.connected['okx'] = True
+                            delay = 1
+                        elif event == 'error':
+                            logger.error(f"OKX私有推送错误: {message}")
+                        elif 'data' in message:
+                            self._handle_okx(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"OKX账户推送断开: {str(e)}")
+            self.connected['okx'] = False
+            if self.is_running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    def _handle_okx(self, message: Dict):
+        channel = message['arg']['channel']
+        st = self.state['okx']
+        if channel == 'account':
+            for account in message['data']:
+                for detail in account.get('details', []):
+                    if detail.get('ccy') != self.quote:
+                        continue
+                    st['free'] = Decimal(detail.get('availBal') or '0')
+                    st['equity'] = Decimal(detail.get('eq') or '0')
+                    st['margin']['used'] = Decimal(detail.get('frozenBal') or '0')
+                    st['margin']['available'] = Decimal(detail.get('availEq') or detail.get('availBal') or '0')
+        elif channel == 'positions':
+            for pos in message['data']:
+                key = f"{pos['instId']}:{pos.get('posSide', 'net')}"
+                size = Decimal(pos.get('pos') or '0')
+                if size == 0:
+                    st['positions'].pop(key, None)
+                    continue
+                st['positions'][key] = {
+                    'symbol': pos['instId'],
+                    'side': pos.get('posSide', 'net'),
+                    'size': size,
+                    'entry_price': Decimal(pos.get('avgPx') or '0'),
+                    'unrealized_pnl': Decimal(pos.get('upl') or '0'),
+                    'margin': Decimal(pos.get('margin') or pos.get('imr') or '0')
+                }
+        else:
+            return
+        self._touch('okx', 'ws')
+
+    # ------------------------- Binance -------------------------
+    async def _run_binance(self):
+        delay = 1
+        binance = self.exchanges['binance']
+        while self.is_running:
+            keepalive = None
+            try:
+                response = await binance.fapiPrivatePostListenKey()
+                self._listen_key = response['listenKey']
+                keepalive = asyncio.create_task(self._keep_listen_key_alive())
+                async with websockets.connect(BINANCE_USER_WS_URL + self._listen_key, ping_interval=20) as ws:
+                    self.connected['binance'] = True
+                    delay = 1
+                    # 用户数据流没有初始快照，连上后对账一次
+                    await self.reconcile(['binance'], force=True)
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        if message.get('e') == 'ACCOUNT_UPDATE':
+                            self._handle_binance(message['a'])
+                        elif message.get('e') == 'listenKeyExpired':
+                            logger.warning("Binance listenKey过期，重新连接")
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Binance账户推送断开: {str(e)}")
+            finally:
+                if keepalive:
+                    keepalive.cancel()
+            self.connected['binance'] = False
+            if self.is_running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    async def _keep_listen_key_alive(self):
+        while True:
+            await asyncio.sleep(LISTEN_KEY_KEEPALIVE)
+            try:
+                await self.exchanges['binance'].fapiPrivatePutListenKey({'listenKey': self._listen_key})
+            except Exception as e:
+                logger.error(f"listenKey续期失败: {str(e)}")
+
+    def _handle_binance(self, account: Dict):
+        st = self.state['binance']
+        for bal in account.get('B', []):
+            if bal.get('a') != self.quote:
+                continue
+            # cw为全仓钱包余额，未扣除持仓占用的保证金，不能当作可用余额；
+            # ACCOUNT_UPDATE不推送可用余额，free/available只取REST的availableBalance
+            st['equity'] = Decimal(bal.get('wb') or '0')
+        for pos in account.get('P', []):
+            key = f"{pos['s']}:{pos.get('ps', 'BOTH')}"
+            size = Decimal(pos.get('pa') or '0')
+            if size == 0:
+                st['positions'].pop(key, None)
+                continue
+            st['positions'][key] = {
+                'symbol': pos['s'],
+                'side': pos.get('ps', 'BOTH'),
+                'size': size,
+                'entry_price': Decimal(pos.get('ep') or '0'),
+                'unrealized_pnl': Decimal(pos.get('up') or '0'),
+                'margin': Decimal(pos.get('iw') or '0')
+            }
+        # 余额或持仓变化后可用余额已变，由后台对账尽快刷新
+        self._needs_rest['binance'] = True
+        self._touch('binance', 'ws')
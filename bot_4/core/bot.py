@@ -12,6 +12,8 @@ from strategies.grid import GridStrategy
 from strategies.trend import TrendStrategy
 from strategies.funding import FundingStrategy
 from core.risk_manager import RiskManager
+from core.account_state import AccountStateService
+from core.market_cache import MarketCache
 from config.settings import CONFIG
 from utils.logger import get_logger
 
@@ -31,8 +33,10 @@ class ArbitrageTrendBot:
         self.binance = self._init_binance()
         self._price_history = []  # 新增价格历史记录属性
 
-        # 共同交易对，在 run() 中异步加载
+        # 共同交易对，在 run() 中异步加载（优先读本地缓存）
         self.common_pairs = []
+        self.market_cache = MarketCache()
+        self._warm_start = False
 
         # 基础变量初始化
         self.is_running = True
@@ -43,6 +47,9 @@ class ArbitrageTrendBot:
         self.balances = {'okx': Decimal('7'), 'binance': Decimal('7')}
         self.equity = {'okx': Decimal('7'), 'binance': Decimal('7')}
         self.start_equity = {}
+        # 账户状态缓存（私有WebSocket推送）
+        self.account_state = AccountStateService(self.okx, self.binance)
+        self.account_state.add_listener(self._on_account_update)
 
         # 统计数据
         self.stats = {
@@ -100,35 +107,67 @@ class ArbitrageTrendBot:
             'funding': FundingStrategy(self, self.config)
         }
 
+    def _on_account_update(self, exchange_id: str):
+        """账户推送回调：同步余额与权益"""
+        self.balances[exchange_id] = self.account_state.balance(exchange_id).quantize(Decimal('0.01'))
+        self.equity[exchange_id] = self.account_state.equity(exchange_id).quantize(Decimal('0.01'))
+        logger.debug(f"余额更新 - {exchange_id}: {self.balances[exchange_id]}")
+
     async def update_balances(self):
+        """推送正常时只读缓存，推送失效才限流走REST对账"""
         try:
-            okx_balance = await self.okx.fetch_balance()
-            binance_balance = await self.binance.fetch_balance()
-            self.balances['okx'] = Decimal(str(okx_balance['USDT']['free'])).quantize(Decimal('0.01'))
-            self.equity['okx'] = Decimal(str(okx_balance['USDT'].get('total', okx_balance['USDT']['free']))).quantize(Decimal('0.01'))
-            self.balances['binance'] = Decimal(str(binance_balance['USDT']['free'])).quantize(Decimal('0.01'))
-            self.equity['binance'] = Decimal(str(binance_balance['USDT'].get('total', binance_balance['USDT']['free']))).quantize(Decimal('0.01'))
-            logger.info(f"余额更新 - OKX: {self.balances['okx']}，币安: {self.balances['binance']}")
+            await self.account_state.ensure_fresh()
         except Exception as e:
             logger.error(f"更新余额失败: {e}")
 
+    @staticmethod
+    def _match_common_symbols(okx_markets, binance_markets):
+        okx_symbols = {symbol for symbol, market in okx_markets.items() if market.get('type') == 'swap' and market.get('quote') == 'USDT' and market.get('active')}
+        binance_symbols = {symbol for symbol, market in binance_markets.items() if market.get('type') == 'swap' and market.get('quote') == 'USDT' and market.get('active')}
+        return sorted(okx_symbols.intersection(binance_symbols))
+
     async def _init_trading_pairs(self):
         try:
+            data = self.market_cache.load()
+            if data and all(self.market_cache.apply(ex, data) for ex in (self.okx, self.binance)):
+                self._warm_start = True
+                logger.info(f"市场缓存热启动: {len(data['common_pairs'])} 个共同交易对")
+                return data['common_pairs']
+
             okx_markets = await self.okx.load_markets()
             binance_markets = await self.binance.load_markets()
-
-            okx_symbols = {symbol for symbol, market in okx_markets.items() if market.get('type') == 'swap' and market.get('quote') == 'USDT' and market.get('active')}
-            binance_symbols = {symbol for symbol, market in binance_markets.items() if market.get('type') == 'swap' and market.get('quote') == 'USDT' and market.get('active')}
-            common_symbols = okx_symbols.intersection(binance_symbols)
+            common_symbols = self._match_common_symbols(okx_markets, binance_markets)
             if not common_symbols:
                 logger.error("未找到共同交易对")
                 raise ValueError("无有效共同交易对")
-            logger.info(f"共同交易对示例: {list(common_symbols)[:5]}")
-            return list(common_symbols)
+            self.market_cache.save([self.okx, self.binance], common_symbols)
+            logger.info(f"共同交易对示例: {common_symbols[:5]}")
+            return common_symbols
         except Exception as e:
             logger.error(f"初始化交易对异常: {e}")
             raise ValueError("无有效共同交易对")
 
+    async def sync_markets_loop(self):
+        """后台加载实时市场，对比后热替换交易对；热启动时立即执行一次"""
+        interval = self.config.get('market_sync_interval', 3600)
+        if not self._warm_start:
+            await asyncio.sleep(interval)
+        while self.is_running:
+            try:
+                okx_markets, binance_markets = await asyncio.gather(
+                    self.okx.load_markets(True), self.binance.load_markets(True)
+                )
+                common_symbols = self._match_common_symbols(okx_markets, binance_markets)
+                if common_symbols:
+                    added, removed = self.market_cache.diff(self.common_pairs, common_symbols)
+                    if added or removed:
+                        logger.info(f"交易对变化 - 新增: {added[:5]}，下架: {removed[:5]}")
+                    self.common_pairs = common_symbols
+                    self.market_cache.save([self.okx, self.binance], common_symbols)
+            except Exception as e:
+                logger.error(f"市场同步失败: {e}")
+            await asyncio.sleep(interval)
+
     async def get_orderbook(self, exchange, symbol):
         try:
             orderbook = await exchange.fetch_order_book(symbol)
@@ -234,12 +273,14 @@ class ArbitrageTrendBot:
             self.common_pairs = await self._init_trading_pairs()
             if not self.common_pairs:
                 raise RuntimeError("无有效共同交易对")
-            await self.update_balances()
+            await self.account_state.start()
+            logger.info(f"余额更新 - OKX: {self.balances['okx']}，币安: {self.balances['binance']}")
             self.start_equity = self.equity.copy()
             tasks = [
                 self.main_loop(),
                 self.update_balances_loop(),
-                self.monitor_positions()
+                self.monitor_positions(),
+                self.sync_markets_loop()
             ]
             await asyncio.gather(*tasks)
         except Exception as e:
@@ -254,6 +295,7 @@ class ArbitrageTrendBot:
         self.is_running = False
         logger.info("开始关闭系统...")
         try:
+            await self.account_state.stop()
             await asyncio.gather(
                 self.okx.close(),
                 self.binance.close(),
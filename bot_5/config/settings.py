@@ -114,44 +114,6 @@ RISK_CONTROL = {
     }
 }
 
-# 交易所规则
-EXCHANGE_RULES = {
-    'okx': {
-        'contract_values': {
-            'BTC-USDT-SWAP': Decimal('0.01'),
-            'ETH-USDT-SWAP': Decimal('0.1'),
-            'EOS-USDT-SWAP': Decimal('10')
-        },
-        'min_sizes': {
-            'BTC-USDT-SWAP': Decimal('1'),
-            'ETH-USDT-SWAP': Decimal('1'),
-            'EOS-USDT-SWAP': Decimal('1')
-        },
-        'max_leverage': {
-            'BTC-USDT-SWAP': 10,
-            'ETH-USDT-SWAP': 10,
-            'EOS-USDT-SWAP': 10
-        }
-    },
-    'binance': {
-        'min_notional': {
-            'BTC-USDT': Decimal('5.0'),
-            'ETH-USDT': Decimal('5.0'),
-            'EOS-USDT': Decimal('20.0')
-        },
-        'step_sizes': {
-            'BTC-USDT': Decimal('0.001'),
-            'ETH-USDT': Decimal('0.01'),
-            'EOS-USDT': Decimal('0.1')
-        },
-        'max_leverage': {
-            'BTC-USDT': 10,
-            'ETH-USDT': 10,
-            'EOS-USDT': 10
-        }
-    }
-}
-
 # Web服务配置
 WEB_CONFIG = {
     'host': '0.0.0.0',
@@ -159,4 +121,7 @@ WEB_CONFIG = {
     'debug': False,
     'secret_key': 'your_secret_key',
     'jwt_secret': 'your_jwt_secret'
-}
\ No newline at end of file
+}
+
+# 默认订阅WebSocket行情的交易对（ccxt统一格式）
+TRADING_SYMBOLS = ['BTC/USDT:USDT', 'ETH/USDT:USDT', 'EOS/USDT:USDT']
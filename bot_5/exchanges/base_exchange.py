@@ -2,23 +2,35 @@ from abc import ABC, abstractmethod
 from typing import Dict, Optional, List
 from decimal import Decimal
 import asyncio
-from datetime import datetime
 import logging
 from utils.logger import setup_logger
+from utils.instrument_index import InstrumentIndex
+from utils.quantity import QuantityConverter
+from utils.l2_book import L2Book
+from utils.ws_subscriptions import SubscriptionManager
 from config.settings import EXCHANGE_CONFIG
 
 class BaseExchange(ABC):
+    # 所有交易所共享的精度索引，按 (交易所, 交易对) 区分
+    instruments = InstrumentIndex()
+    # 推送是否带 OKX 风格的 CRC32 校验和（需要保留价位原文）
+    book_checksum = False
+
     def __init__(self, name: str):
         self.name = name
         self.config = EXCHANGE_CONFIG[name]
         self.logger = setup_logger(f"exchange.{name}")
         self.markets = {}
         self.positions = {}
-        self.orderbook = {}
+        self.orderbook: Dict[str, L2Book] = {}
         self.last_update = {}
         self.active = False
         self._ws = None
+        self.streams: Optional[SubscriptionManager] = None   # 公共行情订阅，由各交易所创建
+        self._stream_symbols: Dict[str, str] = {}             # 交易所ID -> ccxt统一符号
         self._ws_lock = asyncio.Lock()
+        self.quantity = QuantityConverter(self.instruments)   # 下单数量换算/校验，读共享精度索引
+        self._instrument_refresh: Optional[asyncio.Task] = None
 
     @abstractmethod
     async def connect(self) -> bool:
@@ -61,29 +73,64 @@ class BaseExchange(ABC):
         """获取账户余额"""
         pass
 
-    async def update_orderbook(self, symbol: str, data: Dict):
-        """更新订单簿"""
+    def _stream_topics(self, market_id: str) -> List:
+        """交易对需要的公共行情订阅主题，由各交易所实现"""
+        return []
+
+    def _symbol_of(self, market_id: str) -> str:
+        return self._stream_symbols.get(market_id, market_id)
+
+    async def subscribe_symbols(self, symbols: List[str]):
+        """订阅交易对的WebSocket行情（ccxt统一符号）；可重复订阅，与退订按次数抵消"""
+        topics = []
+        for symbol in symbols:
+            market = self.markets.get(symbol)
+            if market is None:
+                self.logger.warning(f"未知交易对，跳过行情订阅: {symbol}")
+                continue
+            self._stream_symbols[market['id']] = symbol
+            topics.extend(self._stream_topics(market['id']))
+        if self.streams and topics:
+            await self.streams.subscribe(topics)
+
+    async def unsubscribe_symbols(self, symbols: List[str]):
+        """退订交易对的WebSocket行情"""
+        topics = [topic for symbol in symbols if symbol in self.markets
+                  for topic in self._stream_topics(self.markets[symbol]['id'])]
+        if self.streams and topics:
+            await self.streams.unsubscribe(topics)
+
+    async def update_orderbook(self, symbol: str, data: Dict) -> bool:
+        """更新订单簿：data 含 bids/asks，可选 action('snapshot'/'update')、checksum、seq、prev_seq。
+        返回False表示订单簿已失效，调用方应重新订阅以获取快照"""
         try:
-            self.orderbook[symbol] = {
-                'bids': sorted([(Decimal(str(p)), Decimal(str(q))) 
-                              for p, q in data['bids']], reverse=True),
-                'asks': sorted([(Decimal(str(p)), Decimal(str(q))) 
-                              for p, q in data['asks']]),
-                'timestamp': datetime.utcnow()
-            }
+            book = self.orderbook.get(symbol)
+            if book is None:
+                book = self.orderbook[symbol] = L2Book(keep_text=self.book_checksum)
+            was_valid = book.valid
+            ok = book.apply(data['bids'], data['asks'], data.get('action', 'snapshot'),
+                            checksum=data.get('checksum'), seq=data.get('seq'),
+                            prev_seq=data.get('prev_seq'))
+            if not ok:
+                if was_valid:
+                    self.logger.warning(f"订单簿不连续或校验失败，等待重新同步: {symbol}")
+                return False
+            return True
         except Exception as e:
             self.logger.error(f"更新订单簿失败: {e}")
+            return False
 
     async def get_best_price(self, symbol: str) -> Dict[str, Decimal]:
         """获取最优价格"""
         try:
-            ob = self.orderbook.get(symbol)
-            if not ob or (datetime.utcnow() - ob['timestamp']).total_seconds() > 5:
+            book = self.orderbook.get(symbol)
+            if not book or not book.valid or book.age() > 5:
                 return None
 
+            bid, ask = book.best_bid, book.best_ask
             return {
-                'bid': ob['bids'][0][0] if ob['bids'] else None,
-                'ask': ob['asks'][0][0] if ob['asks'] else None
+                'bid': Decimal(str(bid)) if bid is not None else None,
+                'ask': Decimal(str(ask)) if ask is not None else None
             }
         except Exception as e:
             self.logger.error(f"获取最优价格失败: {e}")
@@ -93,25 +140,12 @@ class BaseExchange(ABC):
                                      amount: Decimal) -> Optional[Decimal]:
         """计算有效价格（考虑深度）"""
         try:
-            ob = self.orderbook.get(symbol)
-            if not ob:
-                return None
-
-            orders = ob['bids'] if side == 'sell' else ob['asks']
-            total_amount = Decimal('0')
-            weighted_price = Decimal('0')
-
-            for price, qty in orders:
-                if total_amount >= amount:
-                    break
-                available = min(qty, amount - total_amount)
-                weighted_price += price * available
-                total_amount += available
-
-            if total_amount < amount:
+            book = self.orderbook.get(symbol)
+            if not book or not book.valid:
                 return None
 
-            return weighted_price / amount
+            price = book.vwap(side, float(amount))
+            return Decimal(str(price)) if price is not None else None
 
         except Exception as e:
             self.logger.error(f"计算有效价格失败: {e}")
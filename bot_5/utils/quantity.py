@@ -1,69 +1,47 @@
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Optional
 import math
-from config.settings import EXCHANGE_RULES
+from utils.logger import setup_logger
+from utils.instrument_index import InstrumentIndex
 
-class QuantityConverter:
-    def __init__(self):
-        self.rules = EXCHANGE_RULES
+logger = setup_logger("quantity")
 
-    def normalize_okx_quantity(self, symbol: str, amount: Decimal, 
-                             price: Decimal) -> Optional[int]:
-        """标准化OKX合约数量"""
-        try:
-            contract_value = self.rules['okx']['contract_values'][symbol]
-            min_size = self.rules['okx']['min_sizes'][symbol]
+class QuantityConverter:
+    """下单数量换算与校验：步长、最小量、最小名义价值和合约面值都取自load_markets编译的精度索引"""
 
-            # 计算合约张数
-            contracts = int(amount / (contract_value * price))
-            
-            # 确保达到最小张数
-            contracts = max(contracts, min_size)
-            
-            return contracts
+    def __init__(self, instruments: InstrumentIndex):
+        self.instruments = instruments
 
-        except Exception as e:
-            logging.error(f"OKX数量标准化失败: {e}")
+    def normalize_okx_quantity(self, symbol: str, amount: Decimal,
+                             price: Decimal) -> Optional[int]:
+        """标准化OKX合约数量（amount为计价货币金额，返回张数）"""
+        inst = self.instruments.get('okx', symbol)
+        if inst is None:
+            logger.error(f"OKX数量标准化失败: 精度索引中没有 {symbol}")
             return None
+        contracts = inst.contracts_for(float(amount) / float(price))
+        # 确保达到最小张数
+        return max(int(contracts), math.ceil(inst.min_amount))
 
     def normalize_binance_quantity(self, symbol: str, amount: Decimal,
                                  price: Decimal) -> Optional[Decimal]:
-        """标准化Binance数量"""
-        try:
-            min_notional = self.rules['binance']['min_notional'][symbol]
-            step_size = self.rules['binance']['step_sizes'][symbol]
-
-            # 计算数量
-            quantity = amount / price
-            
-            # 确保达到最小名义价值
-            if quantity * price < min_notional:
-                quantity = min_notional / price
-
-            # 调整到步长
-            quantity = math.floor(float(quantity) / float(step_size)) * float(step_size)
-            
-            return Decimal(str(quantity))
-
-        except Exception as e:
-            logging.error(f"Binance数量标准化失败: {e}")
+        """标准化Binance数量（amount为计价货币金额，返回币数量）"""
+        inst = self.instruments.get('binance', symbol)
+        if inst is None:
+            logger.error(f"Binance数量标准化失败: 精度索引中没有 {symbol}")
             return None
+        price_f = float(price)
+        # 确保达到最小名义价值，再向下截断到步长
+        quantity = inst.floor_amount(max(float(amount), inst.min_notional) / price_f)
+        if quantity * price_f < inst.min_notional:
+            quantity = inst.floor_amount(quantity + inst.step_size)
+        return Decimal(repr(quantity))
 
     def validate_order_quantity(self, exchange: str, symbol: str,
                               quantity: Decimal, price: Decimal) -> bool:
-        """验证订单数量是否有效"""
-        try:
-            if exchange == 'okx':
-                min_size = self.rules['okx']['min_sizes'][symbol]
-                contract_value = self.rules['okx']['contract_values'][symbol]
-                return quantity >= min_size and quantity * contract_value * price >= 5
-
-            elif exchange == 'binance':
-                min_notional = self.rules['binance']['min_notional'][symbol]
-                return quantity * price >= min_notional
-
+        """验证订单数量是否有效（合约按张数，现货按币数量）"""
+        inst = self.instruments.get(exchange, symbol)
+        if inst is None:
+            logger.error(f"订单数量验证失败: 精度索引中没有 {exchange} {symbol}")
             return False
-
-        except Exception as e:
-            logging.error(f"订单数量验证失败: {e}")
-            return False
\ No newline at end of file
+        return inst.meets_minimums(float(quantity), float(price))
@@ -1,18 +1,53 @@
-from typing import Dict, Set
+from typing import Callable, Dict, Hashable, Optional
+from collections import OrderedDict
 from fastapi import WebSocket, WebSocketDisconnect
+import itertools
 import json
 import asyncio
 from datetime import datetime
 from utils.logger import setup_logger
 
+CLIENT_QUEUE_SIZE = 256    # 每个客户端待发送消息上限，满时丢弃最旧的
+SEND_TIMEOUT = 5.0         # 单条消息发送超时，超时视为客户端失效
+# 高频频道按键合并：同一键在队列中只保留最新一条
+COALESCE_KEYS: Dict[str, Callable[[Dict], Optional[Hashable]]] = {
+    'positions': lambda message: message.get('data', {}).get('symbol'),
+    'orders': lambda message: message.get('data', {}).get('id') or message.get('data', {}).get('order_id'),
+}
+
+class _Client:
+    """单个客户端的有界发送队列，由独立的写协程发送，慢客户端只影响自己"""
+    def __init__(self, websocket: WebSocket, maxsize: int = CLIENT_QUEUE_SIZE):
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.pending: 'OrderedDict[Hashable, str]' = OrderedDict()
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self._seq = itertools.count()
+
+    def put(self, text: str, key: Optional[Hashable] = None) -> str:
+        """入队已序列化的消息，返回 queued/coalesced/dropped"""
+        result = 'queued'
+        if key is not None and key in self.pending:
+            self.pending[key] = text
+            result = 'coalesced'
+        else:
+            if len(self.pending) >= self.maxsize:
+                self.pending.popitem(last=False)
+                result = 'dropped'
+            self.pending[key if key is not None else next(self._seq)] = text
+        self.ready.set()
+        return result
+
 class WebSocketManager:
     def __init__(self):
-        self.active_connections: Dict[str, Set[WebSocket]] = {
-            'trades': set(),
-            'orders': set(),
-            'positions': set(),
-            'system': set()
+        self.active_connections: Dict[str, Dict[WebSocket, _Client]] = {
+            'trades': {},
+            'orders': {},
+            'positions': {},
+            'system': {}
         }
+        self.stats = {'coalesced': 0, 'dropped': 0, 'slow_clients': 0}
         self.logger = setup_logger("websocket_manager")
         
     async def connect(self, websocket: WebSocket, channel: str):
@@ -20,7 +55,9 @@ class WebSocketManager:
         try:
             await websocket.accept()
             if channel in self.active_connections:
-                self.active_connections[channel].add(websocket)
+                client = _Client(websocket)
+                client.task = asyncio.create_task(self._write_loop(client, channel))
+                self.active_connections[channel][websocket] = client
                 self.logger.info(f"WebSocket连接建立: {channel}")
             else:
                 await websocket.close(code=4000, reason="Invalid channel")
@@ -31,30 +68,54 @@ class WebSocketManager:
     async def disconnect(self, websocket: WebSocket, channel: str):
         """断开WebSocket连接"""
         try:
-            self.active_connections[channel].remove(websocket)
+            client = self.active_connections[channel].pop(websocket, None)
+            if client is None:
+                return
+            if client.task and client.task is not asyncio.current_task():
+                client.task.cancel()
             self.logger.info(f"WebSocket连接断开: {channel}")
             
         except Exception as e:
             self.logger.error(f"WebSocket断开连接失败: {e}")
             
     async def broadcast(self, channel: str, message: Dict):
-        """广播消息"""
-        if channel not in self.active_connections:
+        """广播消息：只序列化一次并放入各客户端队列，不等待发送，不阻塞交易路径"""
+        clients = self.active_connections.get(channel)
+        if not clients:
             return
             
-        disconnected = set()
-        message['timestamp'] = datetime.utcnow().isoformat()
+        message = {**message, 'timestamp': datetime.utcnow().isoformat()}
+        text = json.dumps(message, ensure_ascii=False, separators=(',', ':'), default=str)
+        coalesce = COALESCE_KEYS.get(channel)
+        key = (message.get('type'), coalesce(message)) if coalesce else None
+        if key is not None and key[1] is None:
+            key = None
         
-        for connection in self.active_connections[channel]:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                self.logger.error(f"广播消息失败: {e}")
-                disconnected.add(connection)
+        for client in clients.values():
+            result = client.put(text, key)
+            if result != 'queued':
+                self.stats[result] += 1
                 
-        # 清理断开的连接
-        for connection in disconnected:
-            await self.disconnect(connection, channel)
+    async def _write_loop(self, client: _Client, channel: str):
+        """按顺序发送客户端队列中的消息；发送失败或超时即断开该客户端"""
+        try:
+            while True:
+                await client.ready.wait()
+                while client.pending:
+                    _, text = client.pending.popitem(last=False)
+                    await asyncio.wait_for(client.websocket.send_text(text), SEND_TIMEOUT)
+                client.ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats['slow_clients'] += 1
+            self.logger.error(f"广播消息失败: {e!r}")
+            await self.disconnect(client.websocket, channel)
+            try:
+                await client.websocket.close()
+            except Exception:
+                pass
             
 class WebSocketServer:
     def __init__(self, app, trading_engine):
@@ -11,7 +11,8 @@ from core.risk_manager.global_risk import GlobalRiskManager
 from core.risk_manager.position_risk import PositionRiskManager
 from core.risk_manager.strategy_risk import StrategyRiskManager
 from core.monitor.performance_monitor import PerformanceMonitor
-from core.storage.database import Database
+from core.executor.trade_executor import TradeExecutor
+from core.storage.database import DatabaseManager
 from exchanges.base_exchange import BaseExchange
 from utils.logger import setup_logger
 
@@ -26,7 +27,7 @@ class TradingBot:
         """初始化交易机器人"""
         try:
             # 初始化数据库
-            self.database = Database(self.config)
+            self.database = DatabaseManager()
             if not await self.database.initialize():
                 raise Exception("数据库初始化失败")
                 
@@ -42,6 +43,9 @@ class TradingBot:
             await self.position_risk.initialize()
             await self.strategy_risk.initialize()
             
+            # 初始化交易执行（淘汰出内存的历史订单写入数据库）
+            self.trade_executor = TradeExecutor(self, self.global_risk, self.database)
+            
             # 初始化仓位管理
             self.position_tracker = PositionTracker(self)
             await self.position_tracker.initialize()
@@ -92,7 +96,10 @@ class TradingBot:
                 # 关闭所有连接
                 for exchange in self.exchanges.values():
                     await exchange.close()
-                    
+
+                # 写完队列中的数据再关闭数据库
+                await self.database.close()
+
                 self.logger.info("交易机器人停止成功")
                 return True
             return False
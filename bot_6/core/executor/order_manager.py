@@ -3,16 +3,27 @@ from typing import Dict, Optional, List
 from datetime import datetime
 import asyncio
 from utils.logger import setup_logger
+from utils.history_store import HistoryStore
 import uuid
 
 class OrderManager:
-    def __init__(self, exchange_manager):
+    def __init__(self, exchange_manager, database=None, history_size: int = 5000):
         self.exchange_manager = exchange_manager
+        self.database = database
         self.logger = setup_logger("order_manager")
         
         # 订单存储
         self.active_orders = {}  # 活跃订单
-        self.order_history = {}  # 订单历史
+        # 订单历史：内存中只保留最近history_size笔，更早的落库后淘汰
+        self.order_history = HistoryStore(
+            history_size,
+            indexes={
+                'exchange': 'exchange',
+                'symbol': lambda order: order['params']['symbol'],
+                'status': 'status'
+            },
+            spill=self._spill_order if database else None
+        )
         self.order_updates = {}  # 订单更新队列
         
         # 订单配置
@@ -157,8 +168,26 @@ class OrderManager:
     def _move_to_history(self, order_id: str):
         """移动订单到历史记录"""
         if order_id in self.active_orders:
-            self.order_history[order_id] = self.active_orders.pop(order_id)
-            self.order_history[order_id]['closed_at'] = datetime.utcnow()
+            order = self.active_orders.pop(order_id)
+            order['closed_at'] = datetime.utcnow()
+            self.order_history[order_id] = order
+            
+    async def _spill_order(self, order_id: str, order: Dict):
+        """被淘汰出内存的历史订单写入数据库"""
+        params = order['params']
+        await self.database.save_order({
+            'order_id': order.get('exchange_order_id', order_id),
+            'exchange': order['exchange'],
+            'symbol': params['symbol'],
+            'order_type': params['type'],
+            'side': params['side'],
+            'amount': params['amount'],
+            'price': order.get('executed_price') or params.get('price'),
+            'status': order['status'],
+            'created_at': order['created_at'],
+            'updated_at': order.get('closed_at') or order['created_at'],
+            'metadata': {'client_order_id': order_id}
+        })
             
     async def update_order_status(self, order_id: str):
         """更新订单状态"""
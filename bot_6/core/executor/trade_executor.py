@@ -6,10 +6,10 @@ from utils.logger import setup_logger
 from .order_manager import OrderManager
 
 class TradeExecutor:
-    def __init__(self, exchange_manager, risk_manager):
+    def __init__(self, exchange_manager, risk_manager, database=None):
         self.exchange_manager = exchange_manager
         self.risk_manager = risk_manager
-        self.order_manager = OrderManager(exchange_manager)
+        self.order_manager = OrderManager(exchange_manager, database)
         self.logger = setup_logger("trade_executor")
         
         # 执行配置
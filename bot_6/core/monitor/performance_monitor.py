@@ -5,6 +5,7 @@ import asyncio
 import numpy as np
 import pandas as pd
 from utils.logger import setup_logger
+from utils.history_store import HistoryStore
 
 class PerformanceMonitor:
     def __init__(self, risk_manager):
@@ -25,14 +26,17 @@ class PerformanceMonitor:
             'calmar_ratio': Decimal('0')
         }
         
-        # 历史数据
-        self.trade_history = []
-        self.daily_returns = []
-        self.equity_curve = []
-        
         # 监控配置
         self.update_interval = 300  # 5分钟更新一次
         self.history_window = 90   # 保存90天的历史数据
+        self.max_trades = 10000    # 内存中最多保留的交易记录
+        
+        # 历史数据（有界，按时间顺序写入，过期数据从最旧一端淘汰）
+        self.trade_history = HistoryStore(
+            self.max_trades, indexes={'symbol': 'symbol', 'strategy': 'strategy'}
+        )
+        self.daily_returns = []
+        self.equity_curve = HistoryStore(self.history_window * 86400 // self.update_interval)
         
     async def start(self):
         """启动监控"""
@@ -79,7 +83,7 @@ class PerformanceMonitor:
         try:
             report = {
                 'metrics': self.metrics.copy(),
-                'recent_trades': self.trade_history[-10:],
+                'recent_trades': self.trade_history.recent(10),
                 'daily_stats': await self._get_daily_stats(),
                 'strategy_stats': await self._get_strategy_stats(),
                 'risk_metrics': await self._get_risk_metrics()
@@ -186,17 +190,9 @@ class PerformanceMonitor:
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=self.history_window)
             
-            # 清理交易历史
-            self.trade_history = [
-                trade for trade in self.trade_history
-                if trade['timestamp'] > cutoff_date
-            ]
-            
-            # 清理权益曲线
-            self.equity_curve = [
-                point for point in self.equity_curve
-                if point['timestamp'] > cutoff_date
-            ]
+            # 清理交易历史与权益曲线
+            self.trade_history.prune('timestamp', cutoff_date)
+            self.equity_curve.prune('timestamp', cutoff_date)
             
         except Exception as e:
             self.logger.error(f"清理过期数据失败: {e}")
@@ -205,7 +201,7 @@ class PerformanceMonitor:
         """检查异常情况"""
         try:
             # 检查连续亏损
-            recent_trades = self.trade_history[-5:]
+            recent_trades = self.trade_history.recent(5)
             losing_streak = sum(1 for trade in recent_trades if trade['pnl'] < 0)
             
             if losing_streak >= 5:
@@ -214,7 +210,7 @@ class PerformanceMonitor:
             # 检查盈利能力下降
             if len(self.trade_history) > 20:
                 recent_win_rate = sum(
-                    1 for trade in self.trade_history[-10:]
+                    1 for trade in self.trade_history.recent(10)
                     if trade['pnl'] > 0
                 ) / 10
                 
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import asyncio
 import aiosqlite
 import json
@@ -6,203 +6,313 @@ from datetime import datetime
 import pandas as pd
 from utils.logger import setup_logger
 
+# 写入语句（固定SQL文本，sqlite3按文本缓存预编译语句，同类行用executemany批量执行）
+INSERT_TRADE = """
+    INSERT INTO trades (
+        trade_id, strategy, symbol, entry_time, side,
+        entry_price, amount, status, metadata
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_ORDER = """
+    INSERT INTO orders (
+        order_id, trade_id, exchange, symbol, order_type,
+        side, amount, price, status, created_at, updated_at,
+        metadata
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_PERFORMANCE_METRICS = """
+    INSERT INTO performance_metrics (
+        timestamp, strategy, total_trades, winning_trades,
+        total_pnl, win_rate, sharpe_ratio, max_drawdown,
+        metadata
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/trading.db"):
+    """
+    SQLite持久化：一个长连接（WAL模式）+ 异步写后队列。
+    save_*/update_* 只把参数放入队列立即返回，后台写入协程每 batch_interval 秒
+    或攒满 batch_size 行提交一个事务；查询前先 flush，保证读到自己的写入
+    """
+    def __init__(self, db_path: str = "data/trading.db", batch_interval: float = 0.05,
+                 batch_size: int = 500, queue_size: int = 100000):
         self.db_path = db_path
         self.logger = setup_logger("database")
-        self._conn = None
-        self._lock = asyncio.Lock()
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self._conn: Optional[aiosqlite.Connection] = None
+        # 元素为 (sql, params)，或 flush 放入的 Future
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._writer: Optional[asyncio.Task] = None
         
     async def initialize(self):
         """初始化数据库"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # 创建交易记录表
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS trades (
-                        trade_id TEXT PRIMARY KEY,
-                        strategy TEXT NOT NULL,
-                        symbol TEXT NOT NULL,
-                        entry_time TIMESTAMP NOT NULL,
-                        exit_time TIMESTAMP,
-                        side TEXT NOT NULL,
-                        entry_price REAL NOT NULL,
-                        exit_price REAL,
-                        amount REAL NOT NULL,
-                        pnl REAL,
-                        status TEXT NOT NULL,
-                        metadata TEXT
-                    )
-                """)
-                
-                # 创建订单记录表
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS orders (
-                        order_id TEXT PRIMARY KEY,
-                        trade_id TEXT,
-                        exchange TEXT NOT NULL,
-                        symbol TEXT NOT NULL,
-                        order_type TEXT NOT NULL,
-                        side TEXT NOT NULL,
-                        amount REAL NOT NULL,
-                        price REAL,
-                        status TEXT NOT NULL,
-                        created_at TIMESTAMP NOT NULL,
-                        updated_at TIMESTAMP NOT NULL,
-                        metadata TEXT,
-                        FOREIGN KEY(trade_id) REFERENCES trades(trade_id)
-                    )
-                """)
-                
-                # 创建性能指标表
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS performance_metrics (
-                        timestamp TIMESTAMP PRIMARY KEY,
-                        strategy TEXT NOT NULL,
-                        total_trades INTEGER NOT NULL,
-                        winning_trades INTEGER NOT NULL,
-                        total_pnl REAL NOT NULL,
-                        win_rate REAL NOT NULL,
-                        sharpe_ratio REAL,
-                        max_drawdown REAL,
-                        metadata TEXT
-                    )
-                """)
-                
-                # 创建权益曲线表
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS equity_curve (
-                        timestamp TIMESTAMP NOT NULL,
-                        strategy TEXT NOT NULL,
-                        balance REAL NOT NULL,
-                        PRIMARY KEY (timestamp, strategy)
-                    )
-                """)
-                
-                await db.commit()
-                self.logger.info("数据库初始化完成")
-                
+            self._conn = await aiosqlite.connect(self.db_path)
+            await self._conn.execute("PRAGMA journal_mode=WAL")
+            await self._conn.execute("PRAGMA synchronous=NORMAL")
+            # 创建交易记录表
+            await self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS trades (
+                    trade_id TEXT PRIMARY KEY,
+                    strategy TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    entry_time TIMESTAMP NOT NULL,
+                    exit_time TIMESTAMP,
+                    side TEXT NOT NULL,
+                    entry_price REAL NOT NULL,
+                    exit_price REAL,
+                    amount REAL NOT NULL,
+                    pnl REAL,
+                    status TEXT NOT NULL,
+                    metadata TEXT
+                )
+            """)
+            
+            # 创建订单记录表
+            await self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    order_id TEXT PRIMARY KEY,
+                    trade_id TEXT,
+                    exchange TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    order_type TEXT NOT NULL,
+                    side TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    price REAL,
+                    status TEXT NOT NULL,
+                    created_at TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP NOT NULL,
+                    metadata TEXT,
+                    FOREIGN KEY(trade_id) REFERENCES trades(trade_id)
+                )
+            """)
+            
+            # 创建性能指标表
+            await self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS performance_metrics (
+                    timestamp TIMESTAMP PRIMARY KEY,
+                    strategy TEXT NOT NULL,
+                    total_trades INTEGER NOT NULL,
+                    winning_trades INTEGER NOT NULL,
+                    total_pnl REAL NOT NULL,
+                    win_rate REAL NOT NULL,
+                    sharpe_ratio REAL,
+                    max_drawdown REAL,
+                    metadata TEXT
+                )
+            """)
+            
+            # 创建权益曲线表
+            await self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS equity_curve (
+                    timestamp TIMESTAMP NOT NULL,
+                    strategy TEXT NOT NULL,
+                    balance REAL NOT NULL,
+                    PRIMARY KEY (timestamp, strategy)
+                )
+            """)
+            
+            await self._conn.commit()
+            
+            self._writer = asyncio.create_task(self._write_loop())
+            self.logger.info("数据库初始化完成")
+            return True
+            
         except Exception as e:
             self.logger.error(f"数据库初始化失败: {e}")
             raise
             
+    async def close(self):
+        """写完队列中的全部数据后关闭连接"""
+        if self._writer:
+            try:
+                await self.flush()
+            except RuntimeError as e:
+                self.logger.error(f"关闭前写入未完成: {e}")
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                # 写入任务异常退出时已在flush中记录
+                pass
+            self._writer = None
+        if self._conn:
+            await self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            await self._conn.close()
+            self._conn = None
+        self.logger.info("数据库已关闭")
+        
+    async def flush(self):
+        """等待此前放入队列的写入全部提交"""
+        if not self._writer:
+            return
+        self._check_writer()
+        if self._writer.done():
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        await self._queue.put(waiter)
+        await waiter
+        
+    def _check_writer(self):
+        """写入任务意外退出时直接报错，避免调用方在队列上无限等待"""
+        if self._writer and self._writer.done() and not self._writer.cancelled():
+            error = self._writer.exception()
+            if error is not None:
+                raise RuntimeError(f"数据库写入任务已退出: {error}") from error
+                
+    async def _enqueue(self, sql: str, params: Tuple) -> bool:
+        self._check_writer()
+        # 队列满说明磁盘跟不上，此时才让调用方等待
+        await self._queue.put((sql, params))
+        return True
+        
+    async def _write_loop(self):
+        """写后队列：攒批后一次事务提交"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            batch, waiters = [], []
+            deadline = loop.time() + self.batch_interval
+            while True:
+                if isinstance(item, asyncio.Future):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                        
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                # 单批失败不能让写入任务退出，否则后续写入会堆满队列
+                self.logger.error(f"批量写入异常，丢弃 {len(batch)} 条: {e}")
+            finally:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+                    
+    async def _write_batch(self, batch: List[Tuple[str, Tuple]]):
+        if not batch:
+            return
+        try:
+            # 相邻的同一语句合并为executemany，保持写入顺序
+            start = 0
+            for i in range(1, len(batch) + 1):
+                if i == len(batch) or batch[i][0] != batch[start][0]:
+                    await self._conn.executemany(batch[start][0], [params for _, params in batch[start:i]])
+                    start = i
+            await self._conn.commit()
+        except Exception as e:
+            # 整批失败时逐条重写，避免一行坏数据丢掉整批
+            self.logger.error(f"批量写入失败，逐条重试: {e}")
+            try:
+                await self._conn.rollback()
+            except Exception as e:
+                self.logger.error(f"回滚失败: {e}")
+            for sql, params in batch:
+                try:
+                    await self._conn.execute(sql, params)
+                except Exception as e:
+                    self.logger.error(f"写入失败: {e}")
+            await self._conn.commit()
+            
     async def save_trade(self, trade_data: Dict) -> bool:
-        """保存交易记录"""
+        """保存交易记录（放入写后队列）"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO trades (
-                        trade_id, strategy, symbol, entry_time, side,
-                        entry_price, amount, status, metadata
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    trade_data['trade_id'],
-                    trade_data['strategy'],
-                    trade_data['symbol'],
-                    trade_data['entry_time'].isoformat(),
-                    trade_data['side'],
-                    float(trade_data['entry_price']),
-                    float(trade_data['amount']),
-                    trade_data['status'],
-                    json.dumps(trade_data.get('metadata', {}))
-                ))
-                
-                await db.commit()
-                return True
-                
+            return await self._enqueue(INSERT_TRADE, (
+                trade_data['trade_id'],
+                trade_data['strategy'],
+                trade_data['symbol'],
+                trade_data['entry_time'].isoformat(),
+                trade_data['side'],
+                float(trade_data['entry_price']),
+                float(trade_data['amount']),
+                trade_data['status'],
+                json.dumps(trade_data.get('metadata', {}))
+            ))
+            
         except Exception as e:
             self.logger.error(f"保存交易记录失败: {e}")
             return False
             
     async def update_trade(self, trade_id: str, update_data: Dict) -> bool:
-        """更新交易记录"""
+        """更新交易记录（放入写后队列）"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                update_fields = []
-                params = []
-                
-                for key, value in update_data.items():
-                    if key in ['exit_price', 'exit_time', 'pnl', 'status']:
-                        update_fields.append(f"{key} = ?")
-                        params.append(
-                            value.isoformat() if isinstance(value, datetime) else float(value)
-                        )
-                        
-                if update_fields:
-                    params.append(trade_id)
-                    query = f"""
-                        UPDATE trades 
-                        SET {', '.join(update_fields)}
-                        WHERE trade_id = ?
-                    """
-                    
-                    await db.execute(query, params)
-                    await db.commit()
-                    return True
+            update_fields = []
+            params = []
+            
+            for key, value in update_data.items():
+                if key in ['exit_price', 'exit_time', 'pnl', 'status']:
+                    update_fields.append(f"{key} = ?")
+                    params.append(
+                        value.isoformat() if isinstance(value, datetime)
+                        else value if isinstance(value, str) else float(value)
+                    )
                     
-                return False
+            if update_fields:
+                params.append(trade_id)
+                query = f"""
+                    UPDATE trades 
+                    SET {', '.join(update_fields)}
+                    WHERE trade_id = ?
+                """
+                
+                return await self._enqueue(query, tuple(params))
+                
+            return False
                 
         except Exception as e:
             self.logger.error(f"更新交易记录失败: {e}")
             return False
             
     async def save_order(self, order_data: Dict) -> bool:
-        """保存订单记录"""
+        """保存订单记录（放入写后队列）"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO orders (
-                        order_id, trade_id, exchange, symbol, order_type,
-                        side, amount, price, status, created_at, updated_at,
-                        metadata
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    order_data['order_id'],
-                    order_data.get('trade_id'),
-                    order_data['exchange'],
-                    order_data['symbol'],
-                    order_data['order_type'],
-                    order_data['side'],
-                    float(order_data['amount']),
-                    float(order_data['price']) if order_data.get('price') else None,
-                    order_data['status'],
-                    order_data['created_at'].isoformat(),
-                    order_data['updated_at'].isoformat(),
-                    json.dumps(order_data.get('metadata', {}))
-                ))
-                
-                await db.commit()
-                return True
-                
+            return await self._enqueue(INSERT_ORDER, (
+                order_data['order_id'],
+                order_data.get('trade_id'),
+                order_data['exchange'],
+                order_data['symbol'],
+                order_data['order_type'],
+                order_data['side'],
+                float(order_data['amount']),
+                float(order_data['price']) if order_data.get('price') else None,
+                order_data['status'],
+                order_data['created_at'].isoformat(),
+                order_data['updated_at'].isoformat(),
+                json.dumps(order_data.get('metadata', {}))
+            ))
+            
         except Exception as e:
             self.logger.error(f"保存订单记录失败: {e}")
             return False
             
     async def save_performance_metrics(self, metrics_data: Dict) -> bool:
-        """保存性能指标"""
+        """保存性能指标（放入写后队列）"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO performance_metrics (
-                        timestamp, strategy, total_trades, winning_trades,
-                        total_pnl, win_rate, sharpe_ratio, max_drawdown,
-                        metadata
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    metrics_data['timestamp'].isoformat(),
-                    metrics_data['strategy'],
-                    metrics_data['total_trades'],
-                    metrics_data['winning_trades'],
-                    float(metrics_data['total_pnl']),
-                    float(metrics_data['win_rate']),
-                    float(metrics_data['sharpe_ratio']) if metrics_data.get('sharpe_ratio') else None,
-                    float(metrics_data['max_drawdown']) if metrics_data.get('max_drawdown') else None,
-                    json.dumps(metrics_data.get('metadata', {}))
-                ))
-                
-                await db.commit()
-                return True
-                
+            return await self._enqueue(INSERT_PERFORMANCE_METRICS, (
+                metrics_data['timestamp'].isoformat(),
+                metrics_data['strategy'],
+                metrics_data['total_trades'],
+                metrics_data['winning_trades'],
+                float(metrics_data['total_pnl']),
+                float(metrics_data['win_rate']),
+                float(metrics_data['sharpe_ratio']) if metrics_data.get('sharpe_ratio') else None,
+                float(metrics_data['max_drawdown']) if metrics_data.get('max_drawdown') else None,
+                json.dumps(metrics_data.get('metadata', {}))
+            ))
+            
         except Exception as e:
             self.logger.error(f"保存性能指标失败: {e}")
             return False
@@ -240,11 +350,12 @@ class DatabaseManager:
                 ORDER BY entry_time DESC
             """
             
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                async with db.execute(query, params) as cursor:
-                    rows = await cursor.fetchall()
-                    return [dict(row) for row in rows]
+            # 先提交队列中的写入，保证读到自己的写入
+            await self.flush()
+            async with self._conn.execute(query, params) as cursor:
+                columns = [column[0] for column in cursor.description]
+                rows = await cursor.fetchall()
+                return [dict(zip(columns, row)) for row in rows]
                     
         except Exception as e:
             self.logger.error(f"查询交易记录失败: {e}")
@@ -272,10 +383,13 @@ class DatabaseManager:
                 ORDER BY timestamp ASC
             """
             
-            async with aiosqlite.connect(self.db_path) as db:
-                df = pd.read_sql_query(query, db, params=params)
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                return df
+            await self.flush()
+            async with self._conn.execute(query, params) as cursor:
+                columns = [column[0] for column in cursor.description]
+                rows = await cursor.fetchall()
+            df = pd.DataFrame(rows, columns=columns)
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            return df
                 
         except Exception as e:
             self.logger.error(f"获取性能历史数据失败: {e}")
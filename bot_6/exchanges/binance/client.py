@@ -9,7 +9,10 @@ import time
 from datetime import datetime
 import websockets
 from exchanges.base_exchange import BaseExchange
+from utils.ws_subscriptions import SubscriptionManager
+from config.settings import TRADING_SYMBOLS
 from utils.logger import setup_logger
+from utils.order_tracker import parse_binance_order
 
 class BinanceExchange(BaseExchange):
     def __init__(self):
@@ -26,6 +29,7 @@ class BinanceExchange(BaseExchange):
         })
         self.ws_url = 'wss://fstream.binance.com/ws'
         self.ws_private_url = 'wss://fstream.binance.com/ws'
+        self.streams = SubscriptionManager('binance', self.ws_url, self._handle_ws_message)
         self.listen_key = None
         self.listen_key_timer = None
 
@@ -33,8 +37,13 @@ class BinanceExchange(BaseExchange):
         """连接交易所"""
         try:
             await self.load_markets()
+            # 重连时connect会再次调用，刷新任务只启动一次
+            if self._instrument_refresh is None or self._instrument_refresh.done():
+                self._instrument_refresh = asyncio.create_task(self.instruments.refresh_loop([self.ccxt_client]))
+            if self.recorder:
+                self.recorder.start()
             self.listen_key = await self._get_listen_key()
-            asyncio.create_task(self._maintain_ws_connection())
+            await self.subscribe_symbols(TRADING_SYMBOLS)
             asyncio.create_task(self._maintain_private_ws_connection())
             asyncio.create_task(self._keep_listen_key_alive())
             self.active = True
@@ -48,6 +57,7 @@ class BinanceExchange(BaseExchange):
         """加载市场数据"""
         try:
             self.markets = await self.ccxt_client.load_markets()
+            self.instruments.load(self.ccxt_client)
             return self.markets
         except Exception as e:
             self.logger.error(f"加载市场数据失败: {e}")
@@ -70,6 +80,9 @@ class BinanceExchange(BaseExchange):
                 # 使用当前价格的1.005倍作为市价单的价格限制
                 price = Decimal(str(ticker['last'])) * Decimal('1.005')
 
+            if price and not self.quantity.validate_order_quantity(self.name, symbol, amount, price):
+                raise ValueError(f"下单数量低于最小限制: {symbol} {amount}@{price}")
+
             order = await self.ccxt_client.create_order(
                 symbol=symbol,
                 type=order_type,
@@ -125,30 +138,9 @@ class BinanceExchange(BaseExchange):
             except Exception as e:
                 self.logger.error(f"监听密钥续期失败: {e}")
 
-    async def _maintain_ws_connection(self):
-        """维护WebSocket公共连接"""
-        while True:
-            try:
-                async with websockets.connect(self.ws_url) as ws:
-                    self._ws = ws
-                    # 订阅行情数据
-                    subscribe_message = {
-                        "method": "SUBSCRIBE",
-                        "params": [
-                            "btcusdt@depth20@100ms",  # 订单簿
-                            "btcusdt@aggTrade"        # 成交信息
-                        ],
-                        "id": 1
-                    }
-                    await ws.send(json.dumps(subscribe_message))
-                    
-                    while True:
-                        message = await ws.recv()
-                        await self._handle_ws_message(json.loads(message))
-                        
-            except Exception as e:
-                self.logger.error(f"WebSocket连接断开: {e}")
-                await asyncio.sleep(5)
+    def _stream_topics(self, market_id: str) -> List:
+        stream = market_id.lower()
+        return [f"{stream}@depth20@100ms", f"{stream}@aggTrade"]   # 订单簿、成交信息
 
     async def _maintain_private_ws_connection(self):
         """维护WebSocket私有连接"""
@@ -156,11 +148,13 @@ class BinanceExchange(BaseExchange):
             try:
                 url = f"{self.ws_private_url}/{self.listen_key}"
                 async with websockets.connect(url) as ws:
+                    self._set_private_stream_state(True)
                     while True:
                         message = await ws.recv()
                         await self._handle_private_ws_message(json.loads(message))
             except Exception as e:
                 self.logger.error(f"私有WebSocket连接断开: {e}")
+                self._set_private_stream_state(False)
                 await asyncio.sleep(5)
 
     async def _handle_ws_message(self, message: Dict):
@@ -168,14 +162,14 @@ class BinanceExchange(BaseExchange):
         try:
             if 'e' in message:
                 if message['e'] == 'depthUpdate':
-                    symbol = message['s']
+                    symbol = self._symbol_of(message['s'])
                     await self.update_orderbook(symbol, {
                         'bids': message['b'],
                         'asks': message['a']
                     })
                 elif message['e'] == 'aggTrade':
                     # 处理成交信息
-                    symbol = message['s']
+                    symbol = self._symbol_of(message['s'])
                     price = Decimal(str(message['p']))
                     quantity = Decimal(str(message['q']))
                     self.last_update[symbol] = {
@@ -183,6 +177,10 @@ class BinanceExchange(BaseExchange):
                         'quantity': quantity,
                         'timestamp': datetime.fromtimestamp(message['T'] / 1000)
                     }
+                    if self.recorder:
+                        # m为True表示买方是挂单方，即主动卖出
+                        self.recorder.record_trade(self.name, symbol, message['p'], message['q'],
+                                                   'sell' if message['m'] else 'buy', message['T'] / 1000)
         except Exception as e:
             self.logger.error(f"处理WebSocket消息失败: {e}")
 
@@ -198,6 +196,7 @@ class BinanceExchange(BaseExchange):
                     status = order_info['X']
                     
                     self.logger.info(f"订单更新: {symbol} {order_id} {status}")
+                    self._publish_order(parse_binance_order(message, self.ccxt_client))
                     
                 elif message['e'] == 'ACCOUNT_UPDATE':
                     # 处理账户更新
@@ -215,10 +214,13 @@ class BinanceExchange(BaseExchange):
     async def close(self):
         """关闭连接"""
         try:
-            if self._ws:
-                await self._ws.close()
+            if self._instrument_refresh:
+                self._instrument_refresh.cancel()
+            await self.streams.stop()
             if self.listen_key:
                 await self.ccxt_client.fapiPrivateDeleteListenKey({'listenKey': self.listen_key})
             await self.ccxt_client.close()
+            if self.recorder:
+                await asyncio.get_running_loop().run_in_executor(None, self.recorder.stop)
         except Exception as e:
             self.logger.error(f"关闭连接失败: {e}")
\ No newline at end of file
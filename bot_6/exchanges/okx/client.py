@@ -1,7 +1,7 @@
 import ccxt.async_support as ccxt
 import asyncio
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import json
 import hmac
 import base64
@@ -10,8 +10,15 @@ from datetime import datetime
 from urllib.parse import urlencode
 import websockets
 from exchanges.base_exchange import BaseExchange
+from utils.ws_subscriptions import SubscriptionManager
+from config.settings import TRADING_SYMBOLS
+from utils.order_tracker import parse_okx_order
+
+BOOK_RESYNC_MAX_DELAY = 30   # 订单簿重新订阅的最大退避（秒）
 
 class OKXExchange(BaseExchange):
+    book_checksum = True
+
     def __init__(self):
         super().__init__('okx')
         self.ccxt_client = ccxt.okx({
@@ -26,13 +33,21 @@ class OKXExchange(BaseExchange):
         })
         self.ws_url = 'wss://ws.okx.com:8443/ws/v5/public'
         self.ws_private_url = 'wss://ws.okx.com:8443/ws/v5/private'
+        self.streams = SubscriptionManager('okx', self.ws_url, self._handle_ws_message)
+        # 已发起重新订阅、等待快照的交易对 -> (下次可重试的monotonic时间, 当前退避秒数)
+        self._book_resync: Dict[str, Tuple[float, float]] = {}
         
     async def connect(self) -> bool:
         """连接交易所"""
         try:
             await self.load_markets()
-            # 启动WebSocket连接
-            asyncio.create_task(self._maintain_ws_connection())
+            # 重连时connect会再次调用，刷新任务只启动一次
+            if self._instrument_refresh is None or self._instrument_refresh.done():
+                self._instrument_refresh = asyncio.create_task(self.instruments.refresh_loop([self.ccxt_client]))
+            if self.recorder:
+                self.recorder.start()
+            # 订阅行情（按订阅数分片建立WebSocket连接）
+            await self.subscribe_symbols(TRADING_SYMBOLS)
             asyncio.create_task(self._maintain_private_ws_connection())
             self.active = True
             self.logger.info("OKX交易所连接成功")
@@ -45,6 +60,7 @@ class OKXExchange(BaseExchange):
         """加载市场数据"""
         try:
             self.markets = await self.ccxt_client.load_markets()
+            self.instruments.load(self.ccxt_client)
             return self.markets
         except Exception as e:
             self.logger.error(f"加载市场数据失败: {e}")
@@ -58,6 +74,9 @@ class OKXExchange(BaseExchange):
                 'tdMode': 'cross',  # 全仓模式
             }
             
+            if price and not self.quantity.validate_order_quantity(self.name, symbol, amount, price):
+                raise ValueError(f"下单数量低于最小限制: {symbol} {amount}@{price}")
+
             order = await self.ccxt_client.create_order(
                 symbol=symbol,
                 type=order_type,
@@ -73,31 +92,11 @@ class OKXExchange(BaseExchange):
             self.logger.error(f"创建订单失败: {e}")
             raise
 
-    async def _maintain_ws_connection(self):
-        """维护WebSocket连接"""
-        while True:
-            try:
-                async with websockets.connect(self.ws_url) as ws:
-                    self._ws = ws
-                    # 订阅行情数据
-                    subscribe_message = {
-                        "op": "subscribe",
-                        "args": [
-                            {
-                                "channel": "books",
-                                "instId": "BTC-USDT-SWAP"
-                            }
-                        ]
-                    }
-                    await ws.send(json.dumps(subscribe_message))
-                    
-                    while True:
-                        message = await ws.recv()
-                        await self._handle_ws_message(json.loads(message))
-                        
-            except Exception as e:
-                self.logger.error(f"WebSocket连接断开: {e}")
-                await asyncio.sleep(5)
+    def _stream_topics(self, market_id: str) -> List:
+        topics = [('books', market_id)]
+        if self.recorder:
+            topics.append(('trades', market_id))
+        return topics
 
     async def _handle_ws_message(self, message: Dict):
         """处理WebSocket消息"""
@@ -110,14 +109,93 @@ class OKXExchange(BaseExchange):
             elif 'data' in message:
                 # 处理订单簿数据
                 if message.get('arg', {}).get('channel') == 'books':
-                    symbol = message['arg']['instId']
-                    await self.update_orderbook(symbol, {
-                        'bids': message['data'][0]['bids'],
-                        'asks': message['data'][0]['asks']
+                    inst_id = message['arg']['instId']
+                    symbol = self._symbol_of(inst_id)
+                    data = message['data'][0]
+                    ok = await self.update_orderbook(symbol, {
+                        'bids': data['bids'],
+                        'asks': data['asks'],
+                        'action': message.get('action', 'snapshot'),
+                        'checksum': data.get('checksum'),
+                        'seq': data.get('seqId'),
+                        'prev_seq': data.get('prevSeqId') if message.get('action') == 'update' else None
                     })
+                    if ok:
+                        self._book_resync.pop(symbol, None)
+                    else:
+                        await self._resync_book(symbol, inst_id)
+                elif message.get('arg', {}).get('channel') == 'trades' and self.recorder:
+                    symbol = self._symbol_of(message['arg']['instId'])
+                    for trade in message['data']:
+                        self.recorder.record_trade(self.name, symbol, trade['px'], trade['sz'],
+                                                   trade['side'], int(trade['ts']) / 1000)
         except Exception as e:
             self.logger.error(f"处理WebSocket消息失败: {e}")
 
+    async def _maintain_private_ws_connection(self):
+        """维护WebSocket私有连接（订单频道）"""
+        while True:
+            try:
+                async with websockets.connect(self.ws_private_url) as ws:
+                    # 登录
+                    timestamp = str(int(time.time()))
+                    await ws.send(json.dumps({
+                        "op": "login",
+                        "args": [{
+                            "apiKey": self.config['api_key'],
+                            "passphrase": self.config['password'],
+                            "timestamp": timestamp,
+                            "sign": self._generate_signature(timestamp, 'GET', '/users/self/verify')
+                        }]
+                    }))
+                    response = json.loads(await ws.recv())
+                    if response.get('event') != 'login' or str(response.get('code')) != '0':
+                        raise ConnectionError(f"登录失败: {response}")
+                    
+                    # 订阅订单频道
+                    await ws.send(json.dumps({
+                        "op": "subscribe",
+                        "args": [{"channel": "orders", "instType": "SWAP"}]
+                    }))
+                    self._set_private_stream_state(True)
+                    
+                    while True:
+                        try:
+                            message = await asyncio.wait_for(ws.recv(), timeout=25)
+                        except asyncio.TimeoutError:
+                            await ws.send('ping')  # 30秒无数据会断开
+                            continue
+                        if message == 'pong':
+                            continue
+                        await self._handle_private_ws_message(json.loads(message))
+                        
+            except Exception as e:
+                self.logger.error(f"私有WebSocket连接断开: {e}")
+                self._set_private_stream_state(False)
+                await asyncio.sleep(5)
+
+    async def _handle_private_ws_message(self, message: Dict):
+        """处理WebSocket私有消息"""
+        try:
+            if message.get('event') == 'error':
+                self.logger.error(f"私有WebSocket错误: {message}")
+            elif message.get('arg', {}).get('channel') == 'orders':
+                for item in message.get('data', []):
+                    self.logger.info(f"订单更新: {item['instId']} {item['ordId']} {item['state']}")
+                    self._publish_order(parse_okx_order(item, self.ccxt_client))
+        except Exception as e:
+            self.logger.error(f"处理私有WebSocket消息失败: {e}")
+
+    async def _resync_book(self, symbol: str, inst_id: str):
+        """订单簿失效时重新订阅拿快照；快照仍校验失败或请求未送达时，按指数退避再次重新订阅"""
+        now = time.monotonic()
+        retry_at, delay = self._book_resync.get(symbol, (0.0, 0.5))
+        if now < retry_at:
+            return
+        delay = min(delay * 2, BOOK_RESYNC_MAX_DELAY)
+        self._book_resync[symbol] = (now + delay, delay)
+        await self.streams.resubscribe([('books', inst_id)])
+
     def _generate_signature(self, timestamp: str, method: str, 
                           request_path: str, body: str = '') -> str:
         """生成签名"""
@@ -132,6 +210,9 @@ class OKXExchange(BaseExchange):
 
     async def close(self):
         """关闭连接"""
-        if self._ws:
-            await self._ws.close()
-        await self.ccxt_client.close()
\ No newline at end of file
+        if self._instrument_refresh:
+            self._instrument_refresh.cancel()
+        await self.streams.stop()
+        await self.ccxt_client.close()
+        if self.recorder:
+            await asyncio.get_running_loop().run_in_executor(None, self.recorder.stop)
\ No newline at end of file
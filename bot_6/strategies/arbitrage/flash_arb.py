@@ -3,12 +3,13 @@ from typing import Dict, Optional
 import asyncio
 from datetime import datetime
 from strategies.base_strategy import BaseStrategy
-import numpy as np
+from utils.time_series import TimeSeries
+import time
 
 class FlashArbitrageStrategy(BaseStrategy):
     def __init__(self, exchange_manager, risk_manager):
         super().__init__("flash_arbitrage", exchange_manager, risk_manager)
-        self.price_windows = {}  # 价格历史窗口
+        self.price_windows = {}  # 价格历史窗口：symbol -> exchange -> TimeSeries(mid)
         self.window_size = 100   # 价格窗口大小
         self.std_threshold = Decimal('2.5')  # 标准差阈值
         self.min_spike_pct = Decimal('0.003')  # 最小价格突变比例 0.3%
@@ -83,30 +84,14 @@ class FlashArbitrageStrategy(BaseStrategy):
                         if not price_info:
                             continue
                             
-                        # 更新价格窗口
-                        if symbol not in self.price_windows:
-                            self.price_windows[symbol] = {
-                                exchange.name: {
-                                    'prices': [],
-                                    'timestamps': []
-                                }
-                            }
-                        elif exchange.name not in self.price_windows[symbol]:
-                            self.price_windows[symbol][exchange.name] = {
-                                'prices': [],
-                                'timestamps': []
-                            }
-                            
-                        window = self.price_windows[symbol][exchange.name]
+                        # 更新价格窗口（定长环形序列，满后自动覆盖最旧值）
+                        window = self.price_windows.setdefault(symbol, {}).get(exchange.name)
+                        if window is None:
+                            window = self.price_windows[symbol][exchange.name] = TimeSeries(
+                                self.window_size, ('mid',)
+                            )
                         mid_price = (price_info['bid'] + price_info['ask']) / 2
-                        
-                        window['prices'].append(float(mid_price))
-                        window['timestamps'].append(datetime.utcnow())
-                        
-                        # 保持窗口大小
-                        if len(window['prices']) > self.window_size:
-                            window['prices'].pop(0)
-                            window['timestamps'].pop(0)
+                        window.upsert(time.time_ns() // 1000, mid=float(mid_price))
                             
                 await asyncio.sleep(0.1)  # 100ms更新频率
                 
@@ -129,13 +114,12 @@ class FlashArbitrageStrategy(BaseStrategy):
                     continue
                     
                 window = self.price_windows[symbol][exchange_name]
-                if len(window['prices']) < self.window_size:
+                if len(window) < self.window_size:
                     continue
                     
                 # 计算统计指标
-                prices = np.array(window['prices'])
-                mean = np.mean(prices)
-                std = np.std(prices)
+                mean = window.mean('mid')
+                std = window.std('mid')
                 current_mid = float(price_data['mid'])
                 
                 # 计算z-score
@@ -5,8 +5,16 @@ import asyncio
 from datetime import datetime
 import logging
 from utils.logger import setup_logger
+from utils.kline_feed import KlineFeed
+from utils.time_series import TimeSeries, KLINE_FIELDS
+from config.settings import KLINE_CONFIG, TRADING_SYMBOLS
 
 class BaseStrategy(ABC):
+    # 所有策略共享的K线服务，同一 (交易所, 交易对, 周期) 只订阅一次
+    klines = KlineFeed(
+        KLINE_CONFIG['rest_concurrency'], KLINE_CONFIG['fill_interval'], KLINE_CONFIG['streams']
+    )
+
     def __init__(self, name: str, exchange_manager, risk_manager):
         self.name = name
         self.exchange_manager = exchange_manager
@@ -14,6 +22,7 @@ class BaseStrategy(ABC):
         self.logger = setup_logger(f"strategy.{name}")
         self.active = False
         self.config = {}
+        self.symbols = list(TRADING_SYMBOLS)  # 策略交易的交易对
         self.positions = {}
         self.signals = {}
         self.performance_metrics = {
@@ -25,6 +34,25 @@ class BaseStrategy(ABC):
             'sharpe_ratio': Decimal('0')
         }
 
+    def subscribe_klines(self, timeframe: str, limit: int, listener=None):
+        """在每个交易所为本策略的交易对声明K线需求，收盘时回调listener"""
+        for exchange in self.exchange_manager.exchanges.values():
+            for symbol in self.symbols:
+                if symbol in exchange.markets:
+                    self.klines.subscribe(exchange, symbol, timeframe, limit, listener)
+
+    def _store_klines(self, cache: Dict, exchange_name: str, symbol: str,
+                      klines: List[list], capacity: int) -> TimeSeries:
+        """已收盘K线写入 cache[symbol][exchange_name] 的环形序列，重复推送的K线原地覆盖"""
+        series = cache.setdefault(symbol, {}).get(exchange_name)
+        if series is None:
+            series = cache[symbol][exchange_name] = TimeSeries(capacity, KLINE_FIELDS)
+        last = series.last_timestamp or 0
+        for k in klines[:-1]:
+            if k[0] >= last:
+                series.upsert(k[0], open=k[1], high=k[2], low=k[3], close=k[4], volume=k[5])
+        return series
+
     @abstractmethod
     async def generate_signal(self, symbol: str, data: Dict) -> Optional[Dict]:
         """生成交易信号"""
@@ -32,8 +32,8 @@
             volatilities = []
             
             for exchange in self.exchange_manager.exchanges.values():
-                # 获取K线数据
-                klines = await exchange.fetch_ohlcv(symbol, '1h', limit=24)
+                # 获取K线数据（共享K线服务的本地缓存）
+                klines = self.klines.get(exchange, symbol, '1h', 24)
                 if not klines:
                     continue
                     
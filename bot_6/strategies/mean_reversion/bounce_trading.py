@@ -1,8 +1,6 @@
 from decimal import Decimal
 from typing import Dict, Optional, List, Tuple
-import asyncio
 from datetime import datetime
-import numpy as np
 from strategies.base_strategy import BaseStrategy
 
 class BounceStrategy(BaseStrategy):
@@ -19,7 +17,7 @@ class BounceStrategy(BaseStrategy):
         self.mean_reversion_threshold = Decimal('0.6')  # 回归阈值
         self.profit_take_ratio = Decimal('0.7')        # 获利比例
         
-        # 数据缓存
+        # 数据缓存：price_data 为 symbol -> exchange -> TimeSeries，均值/标准差随K线收盘更新
         self.price_data = {}
         self.mean_data = {}
         self.std_data = {}
@@ -27,8 +25,7 @@ class BounceStrategy(BaseStrategy):
     async def start(self):
         """启动策略"""
         self.active = True
-        asyncio.create_task(self._data_collector())
-        asyncio.create_task(self._mean_calculator())
+        self.subscribe_klines('1m', self.mean_period + 10, self._on_klines)
         self.logger.info("均值回归策略启动")
         
     async def generate_signal(self, symbol: str, data: Dict) -> Optional[Dict]:
@@ -90,85 +87,15 @@ class BounceStrategy(BaseStrategy):
             self.logger.error(f"计算仓位大小失败: {e}")
             return None
             
-    async def _data_collector(self):
-        """收集市场数据"""
-        while self.active:
-            try:
-                for exchange in self.exchange_manager.exchanges.values():
-                    for symbol in exchange.markets:
-                        # 获取K线数据
-                        klines = await exchange.fetch_ohlcv(symbol, '1m', limit=30)
-                        if not klines:
-                            continue
-                            
-                        # 更新价格缓存
-                        if symbol not in self.price_data:
-                            self.price_data[symbol] = {
-                                exchange.name: {
-                                    'close': [],
-                                    'high': [],
-                                    'low': [],
-                                    'volume': [],
-                                    'timestamp': []
-                                }
-                            }
-                        elif exchange.name not in self.price_data[symbol]:
-                            self.price_data[symbol][exchange.name] = {
-                                'close': [],
-                                'high': [],
-                                'low': [],
-                                'volume': [],
-                                'timestamp': []
-                            }
-                            
-                        cache = self.price_data[symbol][exchange.name]
-                        
-                        # 更新数据
-                        for kline in klines:
-                            timestamp, _, high, low, close, volume = kline
-                            cache['close'].append(Decimal(str(close)))
-                            cache['high'].append(Decimal(str(high)))
-                            cache['low'].append(Decimal(str(low)))
-                            cache['volume'].append(Decimal(str(volume)))
-                            cache['timestamp'].append(datetime.fromtimestamp(timestamp/1000))
-                            
-                        # 保持数据窗口大小
-                        max_size = self.mean_period + 10
-                        for key in cache:
-                            cache[key] = cache[key][-max_size:]
-                            
-                await asyncio.sleep(30)  # 每30秒更新一次
-                
-            except Exception as e:
-                self.logger.error(f"数据收集异常: {e}")
-                await asyncio.sleep(5)
-                
-    async def _mean_calculator(self):
-        """计算移动均值和标准差"""
-        while self.active:
-            try:
-                for symbol in self.price_data:
-                    for exchange_name, data in self.price_data[symbol].items():
-                        if len(data['close']) < self.mean_period:
-                            continue
-                            
-                        prices = np.array([float(p) for p in data['close'][-self.mean_period:]])
-                        mean = Decimal(str(np.mean(prices)))
-                        std = Decimal(str(np.std(prices)))
-                        
-                        if symbol not in self.mean_data:
-                            self.mean_data[symbol] = {}
-                        if symbol not in self.std_data:
-                            self.std_data[symbol] = {}
-                            
-                        self.mean_data[symbol][exchange_name] = mean
-                        self.std_data[symbol][exchange_name] = std
-                        
-                await asyncio.sleep(5)  # 每5秒更新一次
-                
-            except Exception as e:
-                self.logger.error(f"均值计算异常: {e}")
-                await asyncio.sleep(5)
+    def _on_klines(self, exchange_name: str, symbol: str, timeframe: str, klines: List[list]):
+        """K线收盘回调：写入价格缓存并更新移动均值和标准差"""
+        if not self.active:
+            return
+        series = self._store_klines(self.price_data, exchange_name, symbol, klines, self.mean_period + 10)
+        if len(series) < self.mean_period:
+            return
+        self.mean_data.setdefault(symbol, {})[exchange_name] = Decimal(str(series.mean('close', self.mean_period)))
+        self.std_data.setdefault(symbol, {})[exchange_name] = Decimal(str(series.std('close', self.mean_period)))
                 
     async def _get_current_stats(self, symbol: str) -> Optional[Dict]:
         """获取当前统计数据"""
@@ -249,15 +176,20 @@ class BounceStrategy(BaseStrategy):
             self.logger.error(f"检测均值回归机会失败: {e}")
             return None
             
+    def _check_data_sufficient(self, symbol: str) -> bool:
+        """检查数据是否足够"""
+        series_list = self.price_data.get(symbol, {}).values()
+        return bool(series_list) and all(len(s) >= self.mean_period for s in series_list)
+            
     async def _validate_volume(self, symbol: str) -> bool:
         """验证交易量"""
         try:
             valid_count = 0
-            for exchange_name, data in self.price_data.get(symbol, {}).items():
-                if len(data['volume']) < 3:
+            for exchange_name, series in self.price_data.get(symbol, {}).items():
+                if len(series) < 3:
                     continue
                     
-                recent_volume = sum(data['volume'][-3:]) / 3
+                recent_volume = series.mean('volume', 3)
                 if recent_volume > self.min_volume:
                     valid_count += 1
                     
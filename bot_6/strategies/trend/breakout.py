@@ -2,7 +2,6 @@ from decimal import Decimal
 from typing import Dict, Optional, List
 import asyncio
 from datetime import datetime
-import numpy as np
 from strategies.base_strategy import BaseStrategy
 
 class BreakoutStrategy(BaseStrategy):
@@ -18,10 +17,25 @@ class BreakoutStrategy(BaseStrategy):
         self.initial_stop_loss = Decimal('0.015')  # 初始止损 1.5%
         self.trailing_stop = Decimal('0.01')       # 跟踪止损 1%
         
-        # 数据缓存
+        # 数据缓存：symbol -> exchange -> TimeSeries（1小时K线）
         self.price_data = {}
-        self.volume_data = {}
-        self.range_cache = {}
+        
+    async def start(self):
+        """启动策略"""
+        self.active = True
+        self.subscribe_klines('1h', self.lookback_periods + 1, self._on_klines)
+        self.logger.info("突破策略启动")
+        
+    def _on_klines(self, exchange_name: str, symbol: str, timeframe: str, klines: List[list]):
+        """K线收盘回调：写入价格缓存"""
+        if not self.active:
+            return
+        self._store_klines(self.price_data, exchange_name, symbol, klines, self.lookback_periods + 1)
+        
+    def _check_data_sufficient(self, symbol: str) -> bool:
+        """检查数据是否足够"""
+        series_list = self.price_data.get(symbol, {}).values()
+        return bool(series_list) and all(len(s) >= self.lookback_periods for s in series_list)
         
     async def generate_signal(self, symbol: str, data: Dict) -> Optional[Dict]:
         """生成交易信号"""
@@ -86,15 +100,12 @@ class BreakoutStrategy(BaseStrategy):
         """计算价格区间"""
         try:
             ranges = {}
-            for exchange_name, data in self.price_data.get(symbol, {}).items():
-                if len(data['high']) < self.lookback_periods:
+            for exchange_name, series in self.price_data.get(symbol, {}).items():
+                if len(series) < self.lookback_periods:
                     continue
                     
-                highs = np.array([float(h) for h in data['high'][-self.lookback_periods:]])
-                lows = np.array([float(l) for l in data['low'][-self.lookback_periods:]])
-                
-                resistance = Decimal(str(np.max(highs)))
-                support = Decimal(str(np.min(lows)))
+                resistance = Decimal(str(series.values('high', self.lookback_periods).max()))
+                support = Decimal(str(series.values('low', self.lookback_periods).min()))
                 mid_price = (resistance + support) / 2
                 
                 ranges[exchange_name] = {
@@ -166,12 +177,15 @@ class BreakoutStrategy(BaseStrategy):
         """确认成交量"""
         try:
             confirmations = 0
-            for exchange_name, data in self.volume_data.get(symbol, {}).items():
-                if len(data) < self.lookback_periods:
+            for exchange_name, series in self.price_data.get(symbol, {}).items():
+                if len(series) < self.lookback_periods:
                     continue
                     
-                recent_volume = np.mean([float(v) for v in data[-3:]])  # 最近3个周期平均成交量
-                base_volume = np.mean([float(v) for v in data[-self.lookback_periods:-3]])  # 基准成交量
+                recent_volume = series.mean('volume', 3)  # 最近3个周期平均成交量
+                # 基准成交量：回看窗口中除最近3个周期以外的均值
+                base_volume = (
+                    series.mean('volume', self.lookback_periods) * self.lookback_periods - recent_volume * 3
+                ) / (self.lookback_periods - 3)
                 
                 if recent_volume > base_volume * float(self.volume_threshold):
                     confirmations += 1
@@ -1,8 +1,6 @@
 from decimal import Decimal
 from typing import Dict, Optional, List
-import asyncio
 from datetime import datetime
-import numpy as np
 from strategies.base_strategy import BaseStrategy
 
 class MATrendStrategy(BaseStrategy):
@@ -17,15 +15,13 @@ class MATrendStrategy(BaseStrategy):
         self.trend_confirm_periods = 3  # 趋势确认所需周期数
         self.min_trend_strength = Decimal('0.002')  # 最小趋势强度
         
-        # 数据缓存
-        self.price_cache = {}  # 价格缓存
-        self.ma_cache = {}    # 均线缓存
-        self.volume_cache = {}  # 成交量缓存
+        # 数据缓存：symbol -> exchange -> TimeSeries
+        self.price_cache = {}
         
     async def start(self):
         """启动策略"""
         self.active = True
-        asyncio.create_task(self._data_collector())
+        self.subscribe_klines('1m', max(self.slow_ma, self.volume_ma) + 10, self._on_klines)
         self.logger.info("MA趋势策略启动")
         
     async def generate_signal(self, symbol: str, data: Dict) -> Optional[Dict]:
@@ -78,66 +74,22 @@ class MATrendStrategy(BaseStrategy):
             self.logger.error(f"计算仓位大小失败: {e}")
             return None
             
-    async def _data_collector(self):
-        """收集市场数据"""
-        while self.active:
-            try:
-                for exchange in self.exchange_manager.exchanges.values():
-                    for symbol in exchange.markets:
-                        # 获取K线数据
-                        klines = await exchange.fetch_ohlcv(symbol, '1m', limit=30)
-                        if not klines:
-                            continue
-                            
-                        # 更新价格缓存
-                        if symbol not in self.price_cache:
-                            self.price_cache[symbol] = {
-                                exchange.name: {
-                                    'close': [],
-                                    'volume': [],
-                                    'timestamp': []
-                                }
-                            }
-                        elif exchange.name not in self.price_cache[symbol]:
-                            self.price_cache[symbol][exchange.name] = {
-                                'close': [],
-                                'volume': [],
-                                'timestamp': []
-                            }
-                            
-                        cache = self.price_cache[symbol][exchange.name]
-                        
-                        # 更新数据
-                        for kline in klines:
-                            timestamp, _, _, _, close, volume = kline
-                            cache['close'].append(Decimal(str(close)))
-                            cache['volume'].append(Decimal(str(volume)))
-                            cache['timestamp'].append(datetime.fromtimestamp(timestamp/1000))
-                            
-                        # 保持数据窗口大小
-                        max_size = max(self.slow_ma, self.volume_ma) + 10
-                        if len(cache['close']) > max_size:
-                            cache['close'] = cache['close'][-max_size:]
-                            cache['volume'] = cache['volume'][-max_size:]
-                            cache['timestamp'] = cache['timestamp'][-max_size:]
-                            
-                await asyncio.sleep(60)  # 每分钟更新一次
-                
-            except Exception as e:
-                self.logger.error(f"数据收集异常: {e}")
-                await asyncio.sleep(5)
+    def _on_klines(self, exchange_name: str, symbol: str, timeframe: str, klines: List[list]):
+        """K线收盘回调：写入价格缓存"""
+        if not self.active:
+            return
+        self._store_klines(self.price_cache, exchange_name, symbol, klines,
+                           max(self.slow_ma, self.volume_ma) + 10)
                 
     async def _calculate_ma(self, symbol: str, period: int) -> Optional[Dict[str, Decimal]]:
         """计算移动平均线"""
         try:
             ma_values = {}
-            for exchange_name, data in self.price_cache.get(symbol, {}).items():
-                if len(data['close']) < period:
+            for exchange_name, series in self.price_cache.get(symbol, {}).items():
+                if len(series) < period:
                     continue
                     
-                prices = np.array([float(p) for p in data['close']])
-                ma = np.mean(prices[-period:])
-                ma_values[exchange_name] = Decimal(str(ma))
+                ma_values[exchange_name] = Decimal(str(series.mean('close', period)))
                 
             return ma_values if ma_values else None
             
@@ -149,13 +101,11 @@ class MATrendStrategy(BaseStrategy):
         """计算成交量移动平均线"""
         try:
             volume_ma_values = {}
-            for exchange_name, data in self.price_cache.get(symbol, {}).items():
-                if len(data['volume']) < self.volume_ma:
+            for exchange_name, series in self.price_cache.get(symbol, {}).items():
+                if len(series) < self.volume_ma:
                     continue
                     
-                volumes = np.array([float(v) for v in data['volume']])
-                volume_ma = np.mean(volumes[-self.volume_ma:])
-                volume_ma_values[exchange_name] = Decimal(str(volume_ma))
+                volume_ma_values[exchange_name] = Decimal(str(series.mean('volume', self.volume_ma)))
                 
             return volume_ma_values if volume_ma_values else None
             
@@ -181,7 +131,7 @@ class MATrendStrategy(BaseStrategy):
                 
                 # 判断趋势方向
                 if trend_strength > self.min_trend_strength:
-                    current_volume = self.price_cache[symbol][exchange_name]['volume'][-1]
+                    current_volume = Decimal(str(self.price_cache[symbol][exchange_name].last('volume')))
                     
                     # 确认成交量放大
                     if current_volume > vol:
@@ -221,8 +171,8 @@ class MATrendStrategy(BaseStrategy):
                 
             required_periods = max(self.slow_ma, self.volume_ma)
             
-            for exchange_data in self.price_cache[symbol].values():
-                if len(exchange_data['close']) < required_periods:
+            for series in self.price_cache[symbol].values():
+                if len(series) < required_periods:
                     return False
                     
             return True
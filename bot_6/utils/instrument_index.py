@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TICK_SIZE = 4        # ccxt precisionMode: TICK_SIZE
+FLOOR_EPSILON = 1e-9  # 抵消 0.3 / 0.1 = 2.9999999999 之类的浮点误差
+
+
+def _scaled(step: float) -> Tuple[int, int]:
+    """把步长拆成 (整数步长, 10的幂缩放)，如 0.005 -> (5, 1000)"""
+    text = f"{step:.12f}".rstrip('0').rstrip('.')
+    decimals = len(text.split('.')[1]) if '.' in text else 0
+    scale = 10 ** decimals
+    return max(int(round(step * scale)), 1), scale
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """单个交易对的精度与限制（价格/数量步长以缩放整数保存）"""
+    exchange_id: str
+    symbol: str
+    market_id: str
+    tick: int
+    price_scale: int
+    step: int
+    amount_scale: int
+    min_amount: float
+    min_notional: float
+    contract_size: float
+    contract: bool
+
+    @property
+    def tick_size(self) -> float:
+        return self.tick / self.price_scale
+
+    @property
+    def step_size(self) -> float:
+        return self.step / self.amount_scale
+
+    def round_price(self, price: float) -> float:
+        """价格取整到最近的tick"""
+        ticks = round(price * self.price_scale / self.tick)
+        return ticks * self.tick / self.price_scale
+
+    def floor_amount(self, amount: float) -> float:
+        """数量向下截断到步长（与ccxt amount_to_precision一致）"""
+        steps = math.floor(amount * self.amount_scale / self.step + FLOOR_EPSILON)
+        return steps * self.step / self.amount_scale
+
+    def contracts_for(self, base_amount: float) -> float:
+        """币数量换算为下单数量（合约按面值换算张数）"""
+        if self.contract and self.contract_size > 0:
+            return self.floor_amount(base_amount / self.contract_size)
+        return self.floor_amount(base_amount)
+
+    def notional(self, amount: float, price: float) -> float:
+        return amount * self.contract_size * price if self.contract else amount * price
+
+    def meets_minimums(self, amount: float, price: float) -> bool:
+        return amount >= self.min_amount and self.notional(amount, price) >= self.min_notional
+
+
+class InstrumentIndex:
+    """load_markets结果预编译的精度索引，按 (交易所, 交易对) 查询，后台定期刷新"""
+
+    def __init__(self, refresh_interval: float = 3600):
+        self.refresh_interval = refresh_interval
+        self._instruments: Dict[Tuple[str, str], Instrument] = {}
+
+    def get(self, exchange_id: str, symbol: str) -> Optional[Instrument]:
+        """按ccxt统一符号或交易所原始ID查询"""
+        return self._instruments.get((exchange_id, symbol))
+
+    def load(self, exchange) -> int:
+        """从已加载的 exchange.markets 编译索引，整体替换该交易所的条目"""
+        compiled = {}
+        count = 0
+        for market in exchange.markets.values():
+            try:
+                inst = self._compile(exchange, market)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.debug(f"跳过交易对: {exchange.id} {market.get('symbol')} - {str(e)}")
+                continue
+            compiled[(exchange.id, inst.symbol)] = inst
+            compiled[(exchange.id, inst.market_id)] = inst
+            count += 1
+        instruments = {k: v for k, v in self._instruments.items() if k[0] != exchange.id}
+        instruments.update(compiled)
+        self._instruments = instruments
+        return count
+
+    async def refresh_loop(self, exchanges: Iterable):
+        """后台定期重新加载市场并替换索引"""
+        exchanges = list(exchanges)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            for exchange in exchanges:
+                try:
+                    await exchange.load_markets(True)
+                    count = self.load(exchange)
+                    logger.info(f"精度索引已刷新: {exchange.id} {count} 条")
+                except Exception as e:
+                    logger.error(f"精度索引刷新失败: {exchange.id} - {str(e)}")
+
+    @staticmethod
+    def _compile(exchange, market: Dict) -> Instrument:
+        precision = market['precision']
+        limits = market.get('limits') or {}
+        if exchange.precisionMode == TICK_SIZE:
+            tick, step = float(precision['price']), float(precision['amount'])
+        else:
+            tick, step = 10.0 ** -precision['price'], 10.0 ** -precision['amount']
+        tick_int, price_scale = _scaled(tick)
+        step_int, amount_scale = _scaled(step)
+        min_amount = (limits.get('amount') or {}).get('min') or step
+        min_notional = (limits.get('cost') or {}).get('min') or 0.0
+        return Instrument(
+            exchange_id=exchange.id,
+            symbol=market['symbol'],
+            market_id=market['id'],
+            tick=tick_int,
+            price_scale=price_scale,
+            step=step_int,
+            amount_scale=amount_scale,
+            min_amount=float(min_amount),
+            min_notional=float(min_notional),
+            contract_size=float(market.get('contractSize') or 1.0),
+            contract=bool(market.get('contract'))
+        )
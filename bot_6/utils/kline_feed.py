@@ -0,0 +1,296 @@
+import asyncio
+import bisect
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+OKX_CANDLE_WS_URL = 'wss://ws.okx.com:8443/ws/v5/business'
+BINANCE_FUTURES_WS_URL = 'wss://fstream.binance.com/ws'
+OKX_PING_INTERVAL = 25           # OKX 30秒无数据会断开，需主动ping
+OKX_ARGS_PER_SUBSCRIBE = 50      # OKX单条订阅消息的参数数量
+BINANCE_PARAMS_PER_SUBSCRIBE = 100
+STALE_GRACE_MS = 3000            # 新K线应已开盘但仍未收到的容忍时间
+
+TIMEFRAME_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '12h': 43200, '1d': 86400,
+}
+# OKX K线频道的小时/日线周期为大写
+OKX_CHANNELS = {
+    tf: 'candle' + (tf.upper() if tf[-1] in 'hd' else tf) for tf in TIMEFRAME_SECONDS
+}
+
+SeriesKey = Tuple[str, str, str]   # (交易所, 交易对, 周期)
+
+
+class _Series:
+    """单个 (交易所, 交易对, 周期) 的K线缓存，按开盘时间升序，最后一根可能未收盘"""
+
+    def __init__(self, exchange, symbol: str, timeframe: str, limit: int):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.period_ms = TIMEFRAME_SECONDS[timeframe] * 1000
+        self.limit = limit
+        self.bars: List[list] = []
+        self.listeners: List[Callable] = []
+        self.needs_fill = True   # 首次订阅或推送中断后需要REST补齐
+        self.last_closed = 0     # 最近一根已收盘K线的开盘时间
+
+    def merge(self, bars: List[list]) -> bool:
+        """按开盘时间合并（同一根原地覆盖），返回是否有新K线收盘"""
+        timestamps = [bar[0] for bar in self.bars]
+        for bar in bars:
+            index = bisect.bisect_left(timestamps, bar[0])
+            if index < len(timestamps) and timestamps[index] == bar[0]:
+                self.bars[index] = bar
+            else:
+                self.bars.insert(index, bar)
+                timestamps.insert(index, bar[0])
+        del self.bars[:-(self.limit + 1)]
+        closed = self.bars[-2][0] if len(self.bars) > 1 else 0
+        if closed > self.last_closed:
+            self.last_closed = closed
+            return True
+        return False
+
+    def stale(self, now_ms: float) -> bool:
+        """下一根K线应已开盘却还没收到（推送中断或漏推）"""
+        return not self.bars or now_ms - self.bars[-1][0] >= self.period_ms + STALE_GRACE_MS
+
+
+class KlineFeed:
+    """
+    进程内共享的K线服务：每个 (交易所, 交易对, 周期) 只有一份订阅和缓存。
+    WebSocket推送K线，首次订阅、重连和推送落后时用REST按since补齐缺口；
+    有K线收盘时回调 listener(exchange_name, symbol, timeframe, bars)。
+    策略只需声明需要的交易对和周期，读数据是本地操作
+    """
+
+    def __init__(self, rest_concurrency: int = 4, fill_interval: float = 5.0, streams: bool = True):
+        self.fill_interval = fill_interval
+        self.streams = streams
+        self.series: Dict[SeriesKey, _Series] = {}
+        self.stats = {'ws_messages': 0, 'rest_fills': 0, 'reconnects': 0}
+        self._rest_slots = asyncio.Semaphore(rest_concurrency)
+        self._exchanges: Dict[str, object] = {}
+        self._ws: Dict[str, object] = {}
+        self._ids: Dict[str, Dict[str, str]] = {}   # 交易所 -> 交易所合约ID -> 交易对
+        self._tasks: Dict[str, List[asyncio.Task]] = {}
+
+    # ------------------------- 订阅 -------------------------
+    def subscribe(self, exchange, symbol: str, timeframe: str, limit: int,
+                  listener: Optional[Callable] = None) -> _Series:
+        """声明需要的K线；同一序列的多个订阅者共享数据，缓存长度取最大需求"""
+        key = (exchange.name, symbol, timeframe)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _Series(exchange, symbol, timeframe, limit)
+            self._ensure_running(exchange)
+            if self.streams:
+                asyncio.create_task(self._send_subscribe(exchange.name, [series]))
+        elif limit > series.limit:
+            series.limit = limit
+            series.needs_fill = True
+        if listener and listener not in series.listeners:
+            series.listeners.append(listener)
+        return series
+
+    def unsubscribe(self, exchange_name: str, symbol: str, timeframe: str, listener: Callable):
+        series = self.series.get((exchange_name, symbol, timeframe))
+        if series and listener in series.listeners:
+            series.listeners.remove(listener)
+
+    def get(self, exchange, symbol: str, timeframe: str, limit: int,
+            closed_only: bool = False) -> List[list]:
+        """最近limit根K线（ccxt格式），未订阅时先登记订阅，数据到达前返回空列表"""
+        series = self.series.get((exchange.name, symbol, timeframe))
+        if series is None or series.limit < limit:
+            series = self.subscribe(exchange, symbol, timeframe, limit)
+        bars = series.bars[:-1] if closed_only else series.bars
+        return bars[-limit:]
+
+    def _notify(self, series: _Series):
+        for callback in series.listeners:
+            try:
+                callback(series.exchange.name, series.symbol, series.timeframe, series.bars)
+            except Exception as e:
+                logger.error(f"K线回调异常: {series.exchange.name} {series.symbol} - {str(e)}")
+
+    # ------------------------- 任务管理 -------------------------
+    def _ensure_running(self, exchange):
+        if exchange.name in self._tasks:
+            return
+        self._exchanges[exchange.name] = exchange
+        tasks = [asyncio.create_task(self._fill_loop(exchange.name))]
+        if self.streams and exchange.name == 'okx':
+            tasks.append(asyncio.create_task(self._run_okx()))
+        elif self.streams and exchange.name == 'binance':
+            tasks.append(asyncio.create_task(self._run_binance()))
+        self._tasks[exchange.name] = tasks
+
+    async def stop(self):
+        tasks = [task for tasks in self._tasks.values() for task in tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._ws.clear()
+
+    def _series_of(self, exchange_name: str) -> List[_Series]:
+        return [s for key, s in list(self.series.items()) if key[0] == exchange_name]
+
+    def _market_id(self, exchange_name: str, symbol: str) -> str:
+        market_id = self._exchanges[exchange_name].ccxt_client.market(symbol)['id']
+        self._ids.setdefault(exchange_name, {})[market_id] = symbol
+        return market_id
+
+    # ------------------------- REST补齐 -------------------------
+    async def _fill_loop(self, exchange_name: str):
+        """补齐首次订阅、重连期间和推送落后的K线；推送不可用时即为REST轮询"""
+        while True:
+            try:
+                now_ms = time.time() * 1000
+                pending = [
+                    s for s in self._series_of(exchange_name)
+                    if s.needs_fill or s.stale(now_ms)
+                ]
+                if pending:
+                    await asyncio.gather(*(self._fill(s) for s in pending))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"K线补齐异常: {exchange_name} - {str(e)}")
+            await asyncio.sleep(self.fill_interval)
+
+    async def _fill(self, series: _Series):
+        client = series.exchange.ccxt_client
+        # 从最后一根（可能未收盘）开始补，空缓存时取完整窗口
+        since = series.bars[-1][0] if series.bars and len(series.bars) > series.limit else None
+        async with self._rest_slots:
+            try:
+                bars = await client.fetch_ohlcv(series.symbol, series.timeframe, since=since,
+                                                limit=series.limit + 1)
+            except Exception as e:
+                logger.warning(f"K线REST补齐失败: {series.exchange.name} {series.symbol} {series.timeframe} - {str(e)}")
+                return
+        self.stats['rest_fills'] += 1
+        series.needs_fill = False
+        if bars and (series.merge(bars) or since is None):
+            self._notify(series)
+
+    def _on_bar(self, exchange_name: str, symbol: str, timeframe: str, bar: list):
+        series = self.series.get((exchange_name, symbol, timeframe))
+        if series is None:
+            return
+        self.stats['ws_messages'] += 1
+        if series.bars and bar[0] - series.bars[-1][0] > series.period_ms:
+            series.needs_fill = True   # 推送跳过了K线，交给REST补齐
+        if series.merge([bar]):
+            self._notify(series)
+
+    # ------------------------- WebSocket -------------------------
+    async def _send_subscribe(self, exchange_name: str, series_list: List[_Series]):
+        ws = self._ws.get(exchange_name)
+        if ws is None or not series_list:
+            return   # 未连接时在连接建立后统一订阅
+        try:
+            if exchange_name == 'okx':
+                args = [
+                    {'channel': OKX_CHANNELS[s.timeframe], 'instId': self._market_id('okx', s.symbol)}
+                    for s in series_list
+                ]
+                for i in range(0, len(args), OKX_ARGS_PER_SUBSCRIBE):
+                    await ws.send(json.dumps({'op': 'subscribe', 'args': args[i:i + OKX_ARGS_PER_SUBSCRIBE]}))
+            elif exchange_name == 'binance':
+                params = [
+                    f"{self._market_id('binance', s.symbol).lower()}@kline_{s.timeframe}"
+                    for s in series_list
+                ]
+                for i in range(0, len(params), BINANCE_PARAMS_PER_SUBSCRIBE):
+                    await ws.send(json.dumps({
+                        'method': 'SUBSCRIBE',
+                        'params': params[i:i + BINANCE_PARAMS_PER_SUBSCRIBE],
+                        'id': int(time.time() * 1000)
+                    }))
+        except Exception as e:
+            logger.error(f"K线订阅失败: {exchange_name} - {str(e)}")
+
+    def _on_disconnect(self, exchange_name: str):
+        self._ws.pop(exchange_name, None)
+        for series in self._series_of(exchange_name):
+            series.needs_fill = True
+        self.stats['reconnects'] += 1
+
+    async def _run_okx(self):
+        delay = 1
+        while True:
+            try:
+                async with websockets.connect(OKX_CANDLE_WS_URL, ping_interval=None) as ws:
+                    self._ws['okx'] = ws
+                    await self._send_subscribe('okx', self._series_of('okx'))
+                    delay = 1
+                    while True:
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=OKX_PING_INTERVAL)
+                        except asyncio.TimeoutError:
+                            await ws.send('ping')
+                            continue
+                        if raw == 'pong':
+                            continue
+                        self._handle_okx(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"OKX K线连接断开: {str(e)}")
+            self._on_disconnect('okx')
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _handle_okx(self, message: Dict):
+        if 'event' in message:
+            if message['event'] == 'error':
+                logger.error(f"OKX K线订阅错误: {message}")
+            return
+        arg, data = message.get('arg', {}), message.get('data')
+        symbol = self._ids.get('okx', {}).get(arg.get('instId'))
+        timeframe = next((tf for tf, ch in OKX_CHANNELS.items() if ch == arg.get('channel')), None)
+        if not data or not symbol or not timeframe:
+            return
+        for row in data:
+            # [ts, o, h, l, c, vol, volCcy, volCcyQuote, confirm]
+            bar = [int(row[0])] + [float(v) for v in row[1:6]]
+            self._on_bar('okx', symbol, timeframe, bar)
+
+    async def _run_binance(self):
+        delay = 1
+        while True:
+            try:
+                async with websockets.connect(BINANCE_FUTURES_WS_URL, ping_interval=20, max_size=None) as ws:
+                    self._ws['binance'] = ws
+                    await self._send_subscribe('binance', self._series_of('binance'))
+                    delay = 1
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        if message.get('e') == 'kline':
+                            self._handle_binance(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Binance K线连接断开: {str(e)}")
+            self._on_disconnect('binance')
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _handle_binance(self, message: Dict):
+        kline = message['k']
+        symbol = self._ids.get('binance', {}).get(message['s'])
+        if not symbol:
+            return
+        bar = [int(kline['t'])] + [float(kline[k]) for k in ('o', 'h', 'l', 'c', 'v')]
+        self._on_bar('binance', symbol, kline['i'], bar)
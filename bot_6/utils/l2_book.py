@@ -0,0 +1,211 @@
+import time
+import zlib
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+CHECKSUM_DEPTH = 25   # OKX 校验和取买卖各前25档
+
+
+class _Side:
+    """单边价位：按 key = sign*价格 升序的预分配float64数组，下标0即最优价。
+    查找价位为二分O(log n)，只改数量时原地写入；新增/删除价位为一次连续内存移动"""
+
+    def __init__(self, sign: int, capacity: int, keep_text: bool):
+        self.sign = sign
+        self.keys = np.empty(capacity, dtype=np.float64)
+        self.qty = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        # key -> (价格原文, 数量原文)，仅用于校验和
+        self.text: Optional[Dict[float, Tuple[str, str]]] = {} if keep_text else None
+
+    def load(self, levels: Sequence):
+        self.size = 0
+        if self.text is not None:
+            self.text.clear()
+        if not len(levels):
+            return
+        data = np.array([(level[0], level[1]) for level in levels], dtype=np.float64)
+        keys = data[:, 0] * self.sign
+        keep = data[:, 1] > 0
+        order = np.argsort(keys[keep], kind='stable')
+        keys, qty = keys[keep][order], data[keep, 1][order]
+        if len(keys) > len(self.keys):
+            self.keys = np.empty(len(keys) * 2, dtype=np.float64)
+            self.qty = np.empty(len(keys) * 2, dtype=np.float64)
+        self.size = len(keys)
+        self.keys[:self.size] = keys
+        self.qty[:self.size] = qty
+        if self.text is not None:
+            for level in levels:
+                if float(level[1]) > 0:
+                    self.text[float(level[0]) * self.sign] = (str(level[0]), str(level[1]))
+
+    def set(self, price, qty):
+        key = float(price) * self.sign
+        amount = float(qty)
+        n = self.size
+        i = int(np.searchsorted(self.keys[:n], key))
+        exists = i < n and self.keys[i] == key
+        if amount <= 0:
+            if exists:
+                self.keys[i:n - 1] = self.keys[i + 1:n]
+                self.qty[i:n - 1] = self.qty[i + 1:n]
+                self.size = n - 1
+                if self.text is not None:
+                    self.text.pop(key, None)
+            return
+        if not exists:
+            if n == len(self.keys):
+                self._grow()
+            self.keys[i + 1:n + 1] = self.keys[i:n]
+            self.qty[i + 1:n + 1] = self.qty[i:n]
+            self.keys[i] = key
+            self.size = n + 1
+        self.qty[i] = amount
+        if self.text is not None:
+            self.text[key] = (str(price), str(qty))
+
+    def _grow(self):
+        capacity = max(len(self.keys) * 2, 16)
+        keys = np.empty(capacity, dtype=np.float64)
+        qty = np.empty(capacity, dtype=np.float64)
+        keys[:self.size] = self.keys[:self.size]
+        qty[:self.size] = self.qty[:self.size]
+        self.keys, self.qty = keys, qty
+
+    def prices(self, n: Optional[int] = None) -> np.ndarray:
+        n = self.size if n is None else min(n, self.size)
+        return self.keys[:n] * self.sign
+
+    def amounts(self, n: Optional[int] = None) -> np.ndarray:
+        n = self.size if n is None else min(n, self.size)
+        return self.qty[:n]
+
+
+class L2Book:
+    """数组存储的L2订单簿：快照整体载入，增量按价位原地更新（数量为0即删除）。
+
+    支持按 seq/prev_seq 检查推送是否连续、按 OKX CRC32 校验和核对前25档；
+    不连续或校验失败时 valid 置为 False，之后的增量一律拒绝，直到收到新快照。
+    VWAP/滑点/深度查询都是对前缀数组的向量化计算，不逐档遍历。
+    """
+
+    def __init__(self, capacity: int = 512, keep_text: bool = False):
+        self.bids = _Side(-1, capacity, keep_text)
+        self.asks = _Side(1, capacity, keep_text)
+        self.keep_text = keep_text
+        self.valid = False
+        self.seq: Optional[int] = None
+        self.updated = 0.0           # time.monotonic()
+        self.stats = {'snapshots': 0, 'updates': 0, 'gaps': 0, 'checksum_errors': 0}
+
+    # ------------------------- 写入 -------------------------
+    def apply(self, bids: Sequence, asks: Sequence, action: str = 'snapshot',
+              checksum: Optional[int] = None, seq: Optional[int] = None,
+              prev_seq: Optional[int] = None) -> bool:
+        """应用一条推送，返回False表示订单簿已失效、需要重新订阅拿快照"""
+        if action == 'snapshot':
+            self.bids.load(bids)
+            self.asks.load(asks)
+            self.stats['snapshots'] += 1
+        else:
+            if not self.valid:
+                return False
+            if prev_seq is not None and self.seq is not None and prev_seq != self.seq:
+                self.valid = False
+                self.stats['gaps'] += 1
+                return False
+            for level in bids:
+                self.bids.set(level[0], level[1])
+            for level in asks:
+                self.asks.set(level[0], level[1])
+            self.stats['updates'] += 1
+        self.seq = seq
+        self.updated = time.monotonic()
+        if checksum is not None and self.keep_text and self.checksum() != int(checksum):
+            self.valid = False
+            self.stats['checksum_errors'] += 1
+            return False
+        self.valid = True
+        return True
+
+    def invalidate(self):
+        self.valid = False
+
+    def checksum(self) -> int:
+        """OKX 校验和：买卖前25档交替拼接 价:量，CRC32 取有符号32位整数"""
+        bids = [self.bids.text[key] for key in self.bids.keys[:min(self.bids.size, CHECKSUM_DEPTH)]]
+        asks = [self.asks.text[key] for key in self.asks.keys[:min(self.asks.size, CHECKSUM_DEPTH)]]
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts.extend(bids[i])
+            if i < len(asks):
+                parts.extend(asks[i])
+        value = zlib.crc32(':'.join(parts).encode())
+        return value - (1 << 32) if value >= (1 << 31) else value
+
+    # ------------------------- 查询 -------------------------
+    def age(self) -> float:
+        return time.monotonic() - self.updated
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return -float(self.bids.keys[0]) if self.bids.size else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.asks.keys[0]) if self.asks.size else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if not self.bids.size or not self.asks.size:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    def levels(self, side: str, n: Optional[int] = None) -> np.ndarray:
+        """前n档 [[价, 量], ...]（副本，side 为 'bids'/'asks'）"""
+        book_side = self.bids if side == 'bids' else self.asks
+        return np.column_stack((book_side.prices(n), book_side.amounts(n)))
+
+    def _taker_side(self, side: str) -> _Side:
+        # 买单吃卖盘，卖单吃买盘
+        return self.asks if side == 'buy' else self.bids
+
+    def vwap(self, side: str, amount: float) -> Optional[float]:
+        """以市价成交amount的均价，深度不足返回None"""
+        book_side = self._taker_side(side)
+        if amount <= 0 or not book_side.size:
+            return None
+        qty = book_side.amounts()
+        filled = np.cumsum(qty)
+        i = int(np.searchsorted(filled, amount))
+        if i >= len(filled):
+            return None
+        prices = book_side.prices(i + 1)
+        remaining = amount - (filled[i - 1] if i else 0.0)
+        cost = float(np.dot(prices[:i], qty[:i])) + float(prices[i]) * remaining
+        return cost / amount
+
+    def slippage(self, side: str, amount: float) -> Optional[float]:
+        """以市价成交amount相对最优价的滑点比例（不利方向为正）"""
+        price = self.vwap(side, amount)
+        if price is None:
+            return None
+        if side == 'buy':
+            return (price - self.best_ask) / self.best_ask
+        return (self.best_bid - price) / self.best_bid
+
+    def depth(self, side: str, pct: float, notional: bool = False) -> float:
+        """距最优价pct比例以内的挂单总量（side 为 'bids'/'asks'，notional为True时按计价货币）"""
+        book_side = self.bids if side == 'bids' else self.asks
+        if not book_side.size:
+            return 0.0
+        best = float(book_side.keys[0]) * book_side.sign
+        limit = best * (1 + pct) if side == 'asks' else best * (1 - pct)
+        n = int(np.searchsorted(book_side.keys[:book_side.size], limit * book_side.sign, side='right'))
+        qty = book_side.amounts(n)
+        if notional:
+            return float(np.dot(book_side.prices(n), qty))
+        return float(qty.sum())
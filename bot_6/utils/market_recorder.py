@@ -0,0 +1,218 @@
+import glob
+import io
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger("market_recorder")
+
+BLOCK_MAGIC = b'MDB1'
+_HEADER = struct.Struct('<4sI')   # 魔数 + 压缩块字节数
+FILE_SUFFIX = '.mdb'
+OHLCV_COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+TRADE_COLUMNS = ('ts', 'price', 'amount', 'side')
+
+
+def _safe_symbol(symbol: str) -> str:
+    return symbol.replace('/', '_').replace(':', '_')
+
+
+def _hour_key(ts: float) -> str:
+    return time.strftime('%Y%m%d%H', time.gmtime(ts))
+
+
+class MarketRecorder:
+    """行情录制：订单簿/成交/K线按 类型/交易所/交易对/小时 分区，追加写入压缩列式块。
+
+    交易路径只做切片与入队，浮点转换、压缩和写盘都在后台线程完成；
+    缓冲总行数有上限，超出时丢弃新数据并计数，不阻塞调用方。
+    """
+
+    def __init__(self, root: str = 'data/market', depth: int = 10, block_rows: int = 2048,
+                 max_buffered_rows: int = 200000, flush_interval: float = 5.0):
+        self.root = root
+        self.depth = depth
+        self.block_rows = block_rows
+        self.max_buffered_rows = max_buffered_rows
+        self.flush_interval = flush_interval
+        self.stats = {'rows': 0, 'dropped': 0, 'blocks': 0, 'bytes': 0, 'errors': 0}
+        self._buffers: Dict[Tuple[str, str, str], List[tuple]] = {}
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_candle: Dict[Tuple[str, str, str], float] = {}
+
+    # ------------------------- 录制接口（交易路径调用） -------------------------
+    def record_book(self, exchange_id: str, symbol: str, bids: Sequence, asks: Sequence,
+                    ts: Optional[float] = None):
+        """记录订单簿前depth档（价位可为 [价, 量, ...] 任意数值类型）"""
+        self._append(('book', exchange_id, symbol), (ts or time.time(), bids[:self.depth], asks[:self.depth]))
+
+    def record_trade(self, exchange_id: str, symbol: str, price, amount, side: str,
+                     ts: Optional[float] = None):
+        self._append(('trade', exchange_id, symbol), (ts or time.time(), price, amount, 1 if side == 'buy' else -1))
+
+    def record_ohlcv(self, exchange_id: str, symbol: str, timeframe: str, candles: Sequence):
+        """记录已收盘K线（ccxt格式，毫秒时间戳）；重复拉取的K线与最后一根未收盘K线不写入"""
+        key = (f'ohlcv_{timeframe}', exchange_id, symbol)
+        last = self._last_candle.get(key, -1)
+        closed = [c for c in candles[:-1] if c[0] > last]
+        if not closed:
+            return
+        self._last_candle[key] = closed[-1][0]
+        for candle in closed:
+            self._append(key, (candle[0] / 1000, *candle[1:6]))
+
+    def _append(self, key: Tuple[str, str, str], row: tuple):
+        with self._lock:
+            if self._buffered >= self.max_buffered_rows:
+                self.stats['dropped'] += 1
+                return
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append(row)
+            self._buffered += 1
+            full = len(buffer) >= self.block_rows
+        if full:
+            self._wake.set()
+
+    # ------------------------- 后台写盘 -------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='market-recorder', daemon=True)
+        self._thread.start()
+        logger.info(f"行情录制已启动: {self.root}")
+
+    def stop(self, timeout: float = 10.0):
+        """停止后台线程并写出剩余缓冲"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+            self._buffered = 0
+        if not buffers:
+            return
+        with self._io_lock:
+            for (kind, exchange_id, symbol), rows in buffers.items():
+                try:
+                    self._write(kind, exchange_id, symbol, rows)
+                    self.stats['rows'] += len(rows)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"行情写盘失败: {kind} {exchange_id} {symbol} - {str(e)}")
+
+    def _write(self, kind: str, exchange_id: str, symbol: str, rows: List[tuple]):
+        columns = self._columns(kind, rows)
+        hours = np.array([_hour_key(ts) for ts in columns['ts']])
+        directory = os.path.join(self.root, kind, exchange_id, _safe_symbol(symbol))
+        os.makedirs(directory, exist_ok=True)
+        for hour in np.unique(hours):
+            mask = hours == hour
+            block = io.BytesIO()
+            np.savez_compressed(block, **{name: values[mask] for name, values in columns.items()})
+            payload = block.getvalue()
+            with open(os.path.join(directory, hour + FILE_SUFFIX), 'ab') as f:
+                f.write(_HEADER.pack(BLOCK_MAGIC, len(payload)))
+                f.write(payload)
+            self.stats['blocks'] += 1
+            self.stats['bytes'] += len(payload) + _HEADER.size
+
+    def _columns(self, kind: str, rows: List[tuple]) -> Dict[str, np.ndarray]:
+        if kind != 'book':
+            names = TRADE_COLUMNS if kind == 'trade' else OHLCV_COLUMNS
+            data = np.array(rows, dtype=np.float64)
+            return {name: data[:, i] for i, name in enumerate(names)}
+        n, depth = len(rows), self.depth
+        columns = {'ts': np.empty(n, dtype=np.float64)}
+        for name in ('bid_px', 'bid_qty', 'ask_px', 'ask_qty'):
+            columns[name] = np.full((n, depth), np.nan, dtype=np.float64)
+        for i, (ts, bids, asks) in enumerate(rows):
+            columns['ts'][i] = ts
+            for j, level in enumerate(bids):
+                columns['bid_px'][i, j] = float(level[0])
+                columns['bid_qty'][i, j] = float(level[1])
+            for j, level in enumerate(asks):
+                columns['ask_px'][i, j] = float(level[0])
+                columns['ask_qty'][i, j] = float(level[1])
+        return columns
+
+
+# ------------------------- 读取 -------------------------
+def read_blocks(path: str) -> Iterator[Dict[str, np.ndarray]]:
+    """逐块读取分区文件；进程中断留下的残缺尾块直接忽略"""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            magic, size = _HEADER.unpack(header)
+            payload = f.read(size)
+            if magic != BLOCK_MAGIC or len(payload) < size:
+                logger.warning(f"行情文件尾部残缺: {path}")
+                return
+            with np.load(io.BytesIO(payload), allow_pickle=False) as block:
+                yield {name: block[name] for name in block.files}
+
+
+def load(root: str, kind: str, exchange_id: str, symbol: str,
+         start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """读取时间范围内的数据，只打开覆盖该范围的小时分区"""
+    directory = os.path.join(root, kind, exchange_id, _safe_symbol(symbol))
+    first = _hour_key(start) if start is not None else ''
+    last = _hour_key(end) if end is not None else '~'
+    blocks = []
+    for path in sorted(glob.glob(os.path.join(directory, '*' + FILE_SUFFIX))):
+        hour = os.path.basename(path)[:-len(FILE_SUFFIX)]
+        if first <= hour <= last:
+            blocks.extend(read_blocks(path))
+    if not blocks:
+        return {}
+    data = {name: np.concatenate([b[name] for b in blocks]) for name in blocks[0]}
+    order = np.argsort(data['ts'], kind='stable')
+    mask = np.ones(len(order), dtype=bool)
+    ts = data['ts'][order]
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts <= end
+    return {name: values[order][mask] for name, values in data.items()}
+
+
+def book_events(root: str, exchange_id: str, symbol: str,
+                start: Optional[float] = None, end: Optional[float] = None) -> List[Dict]:
+    """订单簿录制转换为回放事件（replay_backtest 的事件格式）"""
+    data = load(root, 'book', exchange_id, symbol, start, end)
+    events = []
+    for i in range(len(data.get('ts', ()))):
+        bid_ok = ~np.isnan(data['bid_px'][i])
+        ask_ok = ~np.isnan(data['ask_px'][i])
+        events.append({
+            'ts': float(data['ts'][i]),
+            'exchange': exchange_id,
+            'symbol': symbol,
+            'bids': np.column_stack([data['bid_px'][i][bid_ok], data['bid_qty'][i][bid_ok]]).tolist(),
+            'asks': np.column_stack([data['ask_px'][i][ask_ok], data['ask_qty'][i][ask_ok]]).tolist()
+        })
+    return events
@@ -0,0 +1,339 @@
+import asyncio
+import base64
+import hmac
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+OKX_PRIVATE_WS_URL = 'wss://ws.okx.com:8443/ws/v5/private'
+BINANCE_USER_WS_URL = 'wss://fstream.binance.com/ws/'
+
+OKX_PING_INTERVAL = 25            # OKX 30秒无数据会断开，需主动ping
+BINANCE_KEEPALIVE_INTERVAL = 1800  # listenKey 60分钟过期，30分钟续期一次
+MAX_EARLY_UPDATES = 1000          # 下单响应返回前先到达的推送缓冲上限
+
+TERMINAL_STATUSES = ('closed', 'canceled', 'expired', 'rejected')
+
+OKX_STATES = {
+    'live': 'open',
+    'partially_filled': 'open',
+    'filled': 'closed',
+    'canceled': 'canceled',
+    'mmp_canceled': 'canceled',
+}
+BINANCE_STATES = {
+    'NEW': 'open',
+    'PARTIALLY_FILLED': 'open',
+    'FILLED': 'closed',
+    'CANCELED': 'canceled',
+    'EXPIRED': 'expired',
+    'EXPIRED_IN_MATCH': 'expired',
+    'REJECTED': 'rejected',
+}
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_okx_order(item: Dict, exchange) -> Dict:
+    """OKX orders频道推送 -> ccxt订单结构（exchange为ccxt客户端，用于换算交易对）"""
+    amount = _float(item.get('sz'))
+    filled = _float(item.get('accFillSz'))
+    return {
+        'id': item['ordId'],
+        'clientOrderId': item.get('clOrdId') or None,
+        'symbol': exchange.safe_symbol(item['instId']),
+        'side': item.get('side'),
+        'price': _float(item.get('px')),
+        'average': _float(item.get('avgPx')),
+        'amount': amount,
+        'filled': filled,
+        'remaining': amount - filled if amount is not None and filled is not None else None,
+        'status': OKX_STATES.get(item.get('state'), item.get('state')),
+        'timestamp': int(item['uTime']) if item.get('uTime') else None,
+    }
+
+
+def parse_binance_order(event: Dict, exchange) -> Dict:
+    """Binance ORDER_TRADE_UPDATE 事件 -> ccxt订单结构"""
+    item = event['o']
+    amount = _float(item.get('q'))
+    filled = _float(item.get('z'))
+    return {
+        'id': str(item['i']),
+        'clientOrderId': item.get('c'),
+        'symbol': exchange.safe_symbol(item['s'], None, None, 'swap'),
+        'side': item.get('S', '').lower() or None,
+        'price': _float(item.get('p')) or None,
+        'average': _float(item.get('ap')) or None,
+        'amount': amount,
+        'filled': filled,
+        'remaining': amount - filled if amount is not None and filled is not None else None,
+        'status': BINANCE_STATES.get(item.get('X'), item.get('X')),
+        'timestamp': item.get('T') or event.get('E'),
+    }
+
+
+def okx_login_message(api_key: str, secret: str, passphrase: str) -> str:
+    """OKX私有频道登录消息"""
+    timestamp = str(int(time.time()))
+    sign = base64.b64encode(hmac.new(
+        secret.encode(), f"{timestamp}GET/users/self/verify".encode(), 'sha256'
+    ).digest()).decode()
+    return json.dumps({
+        'op': 'login',
+        'args': [{'apiKey': api_key, 'passphrase': passphrase, 'timestamp': timestamp, 'sign': sign}]
+    })
+
+
+class OrderTracker:
+    """订单状态跟踪：私有WebSocket推送（OKX orders频道 / Binance用户数据流）为主，
+    推送不可用时按交易对批量 fetch_open_orders 兜底，REST请求数与挂单数量无关。
+    状态或成交量变化时回调 callback(exchange_id, order)，终态订单回调后移出跟踪。
+    streams=False 时不自建连接，由已有的私有连接调用 feed / set_stream_state 喂入推送"""
+
+    def __init__(self, exchanges: Dict, poll_interval: float = 2.0, reconcile_interval: float = 60.0,
+                 streams: bool = True):
+        self.exchanges = exchanges
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.streams = streams
+        self.orders: Dict[Tuple[str, str], Dict] = {}
+        self.listeners: List[Callable[[str, Dict], None]] = []
+        self.stats = {'ws_updates': 0, 'polls': 0, 'rest_calls': 0, 'reconnects': 0}
+        self.is_running = False
+        self._tasks: List[asyncio.Task] = []
+        self._streams_up: set = set()   # 私有推送已连接（并完成登录/订阅）的交易所
+        self._last_poll: Dict[str, float] = {}
+        self._early: 'OrderedDict[Tuple[str, str], Dict]' = OrderedDict()
+
+    def add_listener(self, callback: Callable[[str, Dict], None]):
+        """注册订单状态变化回调 callback(exchange_id, order)"""
+        self.listeners.append(callback)
+
+    def track(self, exchange_id: str, order: Dict):
+        """登记下单返回的订单；推送可能先于下单响应到达，此时立即合并"""
+        key = (exchange_id, str(order['id']))
+        self.orders[key] = dict(order)
+        early = self._early.pop(key, None)
+        if early:
+            self._apply(exchange_id, early)
+
+    def untrack(self, exchange_id: str, order_id: str):
+        self.orders.pop((exchange_id, str(order_id)), None)
+
+    def get(self, exchange_id: str, order_id: str) -> Optional[Dict]:
+        return self.orders.get((exchange_id, str(order_id)))
+
+    def active(self, exchange_id: Optional[str] = None) -> List[Dict]:
+        return [o for (ex_id, _), o in self.orders.items() if exchange_id in (None, ex_id)]
+
+    def ws_connected(self, exchange_id: str) -> bool:
+        return exchange_id in self._streams_up
+
+    def set_stream_state(self, exchange_id: str, connected: bool):
+        """私有推送连接状态；断开期间按poll_interval批量查询挂单"""
+        if connected:
+            self._streams_up.add(exchange_id)
+        else:
+            self._streams_up.discard(exchange_id)
+
+    def feed(self, exchange_id: str, update: Dict):
+        """喂入一条已解析的订单推送"""
+        self.stats['ws_updates'] += 1
+        self._apply(exchange_id, update)
+
+    async def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        for exchange_id, exchange in self.exchanges.items():
+            if not self.streams or not exchange.apiKey:
+                continue
+            if exchange_id == 'okx':
+                self._tasks.append(asyncio.create_task(self._run_okx(exchange)))
+            elif exchange_id == 'binance':
+                self._tasks.append(asyncio.create_task(self._run_binance(exchange)))
+        self._tasks.append(asyncio.create_task(self._poll_loop()))
+        logger.info(f"订单跟踪已启动: {', '.join(self.exchanges)}")
+
+    async def stop(self):
+        self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self.streams:
+            self._streams_up.clear()
+        logger.info("订单跟踪已停止")
+
+    # ------------------------- 状态合并 -------------------------
+    def _apply(self, exchange_id: str, update: Dict):
+        key = (exchange_id, str(update['id']))
+        order = self.orders.get(key)
+        if order is None:
+            self._early[key] = update
+            if len(self._early) > MAX_EARLY_UPDATES:
+                self._early.popitem(last=False)
+            return
+
+        changed = (update.get('status') != order.get('status') or
+                   (update.get('filled') or 0) > (order.get('filled') or 0))
+        if not changed:
+            return
+        # 推送乱序时不回退成交量
+        if (update.get('filled') or 0) < (order.get('filled') or 0):
+            update = {k: v for k, v in update.items() if k not in ('filled', 'remaining', 'average')}
+        order.update({k: v for k, v in update.items() if v is not None and k != 'symbol'})
+
+        if order.get('status') in TERMINAL_STATUSES:
+            del self.orders[key]
+        self._notify(exchange_id, order)
+
+    def _notify(self, exchange_id: str, order: Dict):
+        for callback in self.listeners:
+            try:
+                callback(exchange_id, order)
+            except Exception as e:
+                logger.error(f"订单回调异常: {exchange_id} {order.get('id')} - {str(e)}")
+
+    # ------------------------- REST兜底 -------------------------
+    async def _poll_loop(self):
+        """推送正常时只做低频对账；推送断开时按交易对批量查询挂单"""
+        while self.is_running:
+            now = time.time()
+            tasks = []
+            for exchange_id in self.exchanges:
+                interval = self.reconcile_interval if self.ws_connected(exchange_id) else self.poll_interval
+                if self.active(exchange_id) and now - self._last_poll.get(exchange_id, 0) >= interval:
+                    self._last_poll[exchange_id] = now
+                    tasks.append(self._poll(exchange_id))
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _poll(self, exchange_id: str):
+        exchange = self.exchanges[exchange_id]
+        by_symbol = defaultdict(list)
+        for order in self.active(exchange_id):
+            by_symbol[order['symbol']].append(str(order['id']))
+        self.stats['polls'] += 1
+
+        async def poll_symbol(symbol: str, order_ids: List[str]):
+            try:
+                self.stats['rest_calls'] += 1
+                open_orders = await exchange.fetch_open_orders(symbol)
+            except Exception as e:
+                logger.error(f"批量查询挂单失败: {exchange_id} {symbol} - {str(e)}")
+                return
+            open_ids = set()
+            for order in open_orders:
+                open_ids.add(str(order['id']))
+                if (exchange_id, str(order['id'])) in self.orders:
+                    self._apply(exchange_id, order)
+            # 不在挂单列表中的订单已进入终态，只对这些单独查询一次
+            for order_id in order_ids:
+                if order_id in open_ids or (exchange_id, order_id) not in self.orders:
+                    continue
+                try:
+                    self.stats['rest_calls'] += 1
+                    self._apply(exchange_id, await exchange.fetch_order(order_id, symbol))
+                except Exception as e:
+                    logger.error(f"查询订单失败: {exchange_id} {order_id} - {str(e)}")
+
+        await asyncio.gather(*[poll_symbol(s, ids) for s, ids in by_symbol.items()])
+
+    # ------------------------- OKX -------------------------
+    async def _run_okx(self, exchange):
+        delay = 1
+        while self.is_running:
+            try:
+                async with websockets.connect(OKX_PRIVATE_WS_URL, ping_interval=None) as ws:
+                    await ws.send(okx_login_message(exchange.apiKey, exchange.secret, exchange.password))
+                    response = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+                    if response.get('event') != 'login' or str(response.get('code')) != '0':
+                        raise ConnectionError(f"OKX登录失败: {response}")
+                    await ws.send(json.dumps({
+                        'op': 'subscribe',
+                        'args': [{'channel': 'orders', 'instType': 'ANY'}]
+                    }))
+                    delay = 1
+                    self.set_stream_state('okx', True)
+                    while self.is_running:
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=OKX_PING_INTERVAL)
+                        except asyncio.TimeoutError:
+                            await ws.send('ping')
+                            continue
+                        if raw == 'pong':
+                            continue
+                        self._handle_okx(exchange, json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"OKX私有连接断开: {str(e)}")
+            self.set_stream_state('okx', False)
+            if self.is_running:
+                self.stats['reconnects'] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _handle_okx(self, exchange, message: Dict):
+        if 'event' in message:
+            if message['event'] == 'error':
+                logger.error(f"OKX订阅错误: {message}")
+            return
+        if message.get('arg', {}).get('channel') != 'orders':
+            return
+        for item in message.get('data', []):
+            self.feed('okx', parse_okx_order(item, exchange))
+
+    # ------------------------- Binance -------------------------
+    async def _run_binance(self, exchange):
+        delay = 1
+        while self.is_running:
+            keepalive = None
+            try:
+                listen_key = (await exchange.fapiPrivatePostListenKey())['listenKey']
+                keepalive = asyncio.create_task(self._binance_keepalive(exchange, listen_key))
+                async with websockets.connect(BINANCE_USER_WS_URL + listen_key, ping_interval=20) as ws:
+                    delay = 1
+                    self.set_stream_state('binance', True)
+                    async for raw in ws:
+                        event = json.loads(raw)
+                        if event.get('e') == 'listenKeyExpired':
+                            raise ConnectionError("listenKey已过期")
+                        if event.get('e') == 'ORDER_TRADE_UPDATE':
+                            self.feed('binance', parse_binance_order(event, exchange))
+                        if not self.is_running:
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Binance用户数据流断开: {str(e)}")
+            finally:
+                if keepalive:
+                    keepalive.cancel()
+            self.set_stream_state('binance', False)
+            if self.is_running:
+                self.stats['reconnects'] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def _binance_keepalive(self, exchange, listen_key: str):
+        while True:
+            await asyncio.sleep(BINANCE_KEEPALIVE_INTERVAL)
+            try:
+                await exchange.fapiPrivatePutListenKey({'listenKey': listen_key})
+            except Exception as e:
+                logger.error(f"listenKey续期失败: {str(e)}")
@@ -0,0 +1,138 @@
+import math
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+KLINE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class TimeSeries:
+    """
+    按时间戳写入的定长环形序列（预分配float64，多列共用时间轴）。
+    upsert 同一时间戳原地覆盖最新一根、新时间戳追加、旧时间戳忽略，
+    因此重复推送同一根K线不会产生重复数据。
+    滚动均值/标准差基于前缀和，任意窗口O(1)；前缀和以最近值为基准去中心化，
+    每写满一圈重算一次，避免长期运行的累积误差
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str] = ('close',)):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._column: Dict[str, int] = {name: i for i, name in enumerate(self.fields)}
+        slots = capacity + 1   # 多留一格保存最旧数据之前的前缀和
+        self._slots = slots
+        self._ts = np.zeros(slots, dtype=np.int64)
+        self._values = np.full((len(self.fields), slots), np.nan)
+        self._cum = np.zeros((len(self.fields), slots))
+        self._cum_sq = np.zeros((len(self.fields), slots))
+        self._offset = np.zeros(len(self.fields))
+        self._count = 0          # 累计写入次数（逻辑下标 = count-1）
+        self._since_rebase = 0
+
+    # ------------------------- 写入 -------------------------
+    def upsert(self, timestamp: int, **values: float) -> bool:
+        """写入一根数据，返回是否被接受（早于最新时间戳的数据被忽略）。
+        新时间戳须给出全部字段，否则该格会残留上一圈的旧值；覆盖最新一根时可只给部分字段"""
+        if self._count:
+            last = self._ts[(self._count - 1) % self._slots]
+            if timestamp < last:
+                return False
+            if timestamp == last:
+                self._write((self._count - 1), values)
+                return True
+        missing = [name for name in self.fields if name not in values]
+        if missing:
+            raise ValueError(f"缺少字段: {', '.join(missing)}")
+        if self._count == 0:
+            self._offset[:] = [values[name] for name in self.fields]
+        self._count += 1
+        self._ts[(self._count - 1) % self._slots] = timestamp
+        self._write(self._count - 1, values)
+        self._since_rebase += 1
+        if self._since_rebase >= self._slots:
+            self._rebase()
+        return True
+
+    def _write(self, index: int, values: Dict[str, float]):
+        slot = index % self._slots
+        prev = (index - 1) % self._slots
+        for name, value in values.items():
+            column = self._column[name]
+            self._values[column, slot] = value
+            delta = value - self._offset[column]
+            if index > 0 and self._count - index <= self.capacity:
+                self._cum[column, slot] = self._cum[column, prev] + delta
+                self._cum_sq[column, slot] = self._cum_sq[column, prev] + delta * delta
+            else:
+                self._cum[column, slot] = delta
+                self._cum_sq[column, slot] = delta * delta
+
+    def _rebase(self):
+        """以最新值为基准重算保留区间的前缀和"""
+        size = len(self)
+        start = self._count - size
+        order = np.arange(start, self._count) % self._slots
+        self._offset = self._values[:, order[-1]].copy()
+        centered = self._values[:, order] - self._offset[:, None]
+        self._cum[:, order] = np.cumsum(centered, axis=1)
+        self._cum_sq[:, order] = np.cumsum(centered * centered, axis=1)
+        self._cum[:, (start - 1) % self._slots] = 0.0
+        self._cum_sq[:, (start - 1) % self._slots] = 0.0
+        self._since_rebase = 0
+
+    def clear(self):
+        self._count = 0
+        self._since_rebase = 0
+        self._values[:] = np.nan
+
+    # ------------------------- 读取 -------------------------
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._ts[(self._count - 1) % self._slots]) if self._count else None
+
+    def last(self, field: str = 'close') -> float:
+        if not self._count:
+            return math.nan
+        return float(self._values[self._column[field], (self._count - 1) % self._slots])
+
+    def values(self, field: str = 'close', n: Optional[int] = None) -> np.ndarray:
+        """最近n个值（按时间升序的副本）"""
+        n = len(self) if n is None else min(n, len(self))
+        order = np.arange(self._count - n, self._count) % self._slots
+        return self._values[self._column[field], order]
+
+    def timestamps(self, n: Optional[int] = None) -> np.ndarray:
+        n = len(self) if n is None else min(n, len(self))
+        return self._ts[np.arange(self._count - n, self._count) % self._slots]
+
+    def _window_sums(self, field: str, window: int):
+        column = self._column[field]
+        end = (self._count - 1) % self._slots
+        if window < self._count:
+            begin = (self._count - 1 - window) % self._slots
+            total = self._cum[column, end] - self._cum[column, begin]
+            total_sq = self._cum_sq[column, end] - self._cum_sq[column, begin]
+        else:
+            total = self._cum[column, end]
+            total_sq = self._cum_sq[column, end]
+        return column, total, total_sq
+
+    def mean(self, field: str = 'close', window: Optional[int] = None) -> float:
+        """最近window个值的均值，数据不足时为NaN"""
+        window = len(self) if window is None else window
+        if window <= 0 or window > len(self):
+            return math.nan
+        column, total, _ = self._window_sums(field, window)
+        return float(self._offset[column] + total / window)
+
+    def std(self, field: str = 'close', window: Optional[int] = None) -> float:
+        """最近window个值的总体标准差（同 np.std），数据不足时为NaN"""
+        window = len(self) if window is None else window
+        if window <= 0 or window > len(self):
+            return math.nan
+        _, total, total_sq = self._window_sums(field, window)
+        mean = total / window
+        return math.sqrt(max(total_sq / window - mean * mean, 0.0))
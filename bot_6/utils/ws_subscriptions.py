@@ -0,0 +1,221 @@
+import asyncio
+import itertools
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+import websockets
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:   # 未安装orjson时退回标准库
+    json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# 单连接订阅数上限（保守值）与单条订阅消息的参数数量
+VENUE_LIMITS = {
+    'okx': {'per_conn': 200, 'per_message': 50},
+    'binance': {'per_conn': 200, 'per_message': 100},
+}
+OKX_PING_INTERVAL = 25           # OKX 30秒无数据会断开，需主动ping
+BINANCE_SEND_INTERVAL = 0.1      # Binance 单连接每秒最多10条上行消息
+DISPATCH_QUEUE_SIZE = 10000      # 单连接待处理消息上限，满时丢弃最旧的
+MAX_BACKOFF = 30
+
+# OKX: (频道, instId)；Binance: 流名称，如 btcusdt@depth20@100ms
+Topic = Hashable
+
+
+class _Connection:
+    """一条WebSocket连接：读协程只收包入队，分发协程解码后回调，慢回调不会阻塞收包"""
+
+    def __init__(self, manager: 'SubscriptionManager', index: int):
+        self.manager = manager
+        self.index = index
+        self.topics: set = set()
+        self.ws = None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=manager.queue_size)
+        self.tasks: List[asyncio.Task] = []
+        self._send_lock = asyncio.Lock()
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._dispatch())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.ws = None
+
+    async def send(self, op: str, topics: Iterable[Topic]):
+        """op 为 subscribe/unsubscribe；未连接时跳过，连接建立后会统一订阅"""
+        ws, topics = self.ws, list(topics)
+        if ws is None or not topics:
+            return
+        venue = self.manager.venue
+        per_message = VENUE_LIMITS[venue]['per_message']
+        async with self._send_lock:
+            for i in range(0, len(topics), per_message):
+                chunk = topics[i:i + per_message]
+                if venue == 'okx':
+                    payload = {'op': op, 'args': [{'channel': c, 'instId': s} for c, s in chunk]}
+                else:
+                    payload = {'method': op.upper(), 'params': chunk, 'id': next(self.manager._request_ids)}
+                    await asyncio.sleep(BINANCE_SEND_INTERVAL)
+                await ws.send(json.dumps(payload))
+
+    async def _run(self):
+        manager = self.manager
+        okx = manager.venue == 'okx'
+        delay = 1
+        while True:
+            try:
+                async with websockets.connect(manager.url, ping_interval=None if okx else 20,
+                                              max_size=None) as ws:
+                    self.ws = ws
+                    await self.send('subscribe', self.topics)
+                    delay = 1
+                    while True:
+                        if okx:
+                            try:
+                                raw = await asyncio.wait_for(ws.recv(), timeout=OKX_PING_INTERVAL)
+                            except asyncio.TimeoutError:
+                                await ws.send('ping')
+                                continue
+                            if raw == 'pong':
+                                continue
+                        else:
+                            raw = await ws.recv()
+                        self._enqueue(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{manager.venue} 行情连接#{self.index} 断开: {str(e)}")
+            self.ws = None
+            manager.stats['reconnects'] += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_BACKOFF)
+
+    def _enqueue(self, raw):
+        stats = self.manager.stats
+        stats['messages'] += 1
+        if self.queue.full():
+            self.queue.get_nowait()
+            stats['dropped'] += 1
+        self.queue.put_nowait(raw)
+
+    async def _dispatch(self):
+        handler = self.manager.handler
+        while True:
+            raw = await self.queue.get()
+            try:
+                await handler(json_loads(raw))
+            except Exception as e:
+                logger.error(f"{self.manager.venue} 行情消息处理失败: {str(e)}")
+
+
+class SubscriptionManager:
+    """单个交易所的公共行情订阅：主题按单连接上限分片到多条连接，可随时增减订阅。
+
+    同一主题可被多处订阅，按引用计数只在首次订阅/最后一次退订时发送请求；
+    连接断开后按指数退避重连并重新订阅该连接上的全部主题。
+    每条连接有自己的分发队列，handler(message) 收到的是已解码的消息。
+    """
+
+    def __init__(self, venue: str, url: str, handler: Callable[[Dict], Awaitable],
+                 per_conn: Optional[int] = None, queue_size: int = DISPATCH_QUEUE_SIZE):
+        self.venue = venue
+        self.url = url
+        self.handler = handler
+        self.per_conn = per_conn or VENUE_LIMITS[venue]['per_conn']
+        self.queue_size = queue_size
+        self.stats = {'messages': 0, 'dropped': 0, 'reconnects': 0}
+        self._refs: Dict[Topic, int] = {}
+        self._owner: Dict[Topic, _Connection] = {}
+        self._connections: List[_Connection] = []
+        self._request_ids = itertools.count(1)
+        self._conn_ids = itertools.count()
+        self._lock = asyncio.Lock()
+
+    @property
+    def topics(self) -> List[Topic]:
+        return list(self._owner)
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    async def subscribe(self, topics: Iterable[Topic]):
+        async with self._lock:
+            added: Dict[_Connection, List[Topic]] = {}
+            for topic in topics:
+                self._refs[topic] = self._refs.get(topic, 0) + 1
+                if self._refs[topic] > 1:
+                    continue
+                conn = self._shard()
+                conn.topics.add(topic)
+                self._owner[topic] = conn
+                added.setdefault(conn, []).append(topic)
+            for conn, new in added.items():
+                if not conn.tasks:
+                    conn.start()
+                else:
+                    await self._send(conn, 'subscribe', new)
+
+    async def unsubscribe(self, topics: Iterable[Topic]):
+        async with self._lock:
+            removed: Dict[_Connection, List[Topic]] = {}
+            for topic in topics:
+                refs = self._refs.get(topic)
+                if not refs:
+                    continue
+                if refs > 1:
+                    self._refs[topic] = refs - 1
+                    continue
+                del self._refs[topic]
+                conn = self._owner.pop(topic)
+                conn.topics.discard(topic)
+                removed.setdefault(conn, []).append(topic)
+            for conn, old in removed.items():
+                if conn.topics:
+                    await self._send(conn, 'unsubscribe', old)
+                else:
+                    await conn.stop()
+                    self._connections.remove(conn)
+
+    async def resubscribe(self, topics: Iterable[Topic]):
+        """退订后重新订阅，用于让服务端重新推送快照"""
+        grouped: Dict[_Connection, List[Topic]] = {}
+        for topic in topics:
+            conn = self._owner.get(topic)
+            if conn is not None:
+                grouped.setdefault(conn, []).append(topic)
+        for conn, items in grouped.items():
+            await self._send(conn, 'unsubscribe', items)
+            await self._send(conn, 'subscribe', items)
+
+    async def stop(self):
+        async with self._lock:
+            for conn in self._connections:
+                await conn.stop()
+            self._connections.clear()
+            self._owner.clear()
+            self._refs.clear()
+
+    def _shard(self) -> _Connection:
+        for conn in self._connections:
+            if len(conn.topics) < self.per_conn:
+                return conn
+        conn = _Connection(self, next(self._conn_ids))
+        self._connections.append(conn)
+        return conn
+
+    async def _send(self, conn: _Connection, op: str, topics: List[Topic]):
+        try:
+            await conn.send(op, topics)
+        except Exception as e:
+            # 发送失败通常意味着连接已断，重连后会按当前主题重新订阅
+            logger.error(f"{self.venue} {op} 失败: {str(e)}")
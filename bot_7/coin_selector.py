@@ -1,4 +1,6 @@
-from typing import List, Dict, Tuple
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import time
 import pandas as pd
 import numpy as np
 from config import Config
@@ -9,71 +11,141 @@ class CoinSelector:
     def __init__(self, exchange_id: str):
         self.logger = Logger("CoinSelector")
         self.market_data = MarketData(exchange_id)
-        
-    def select_coins(self, max_coins: int = 3) -> List[str]:
+        self.params = Config.COIN_SELECTOR
+
+        # 评分缓存（按交易对集合）与合约列表缓存
+        self._scores: Optional[pd.DataFrame] = None
+        self._scores_key: Optional[tuple] = None
+        self._scored_at = 0.0
+        self._universe: List[str] = []
+        self._universe_loaded_at = 0.0
+
+    def select_coins(self, max_coins: int = 3, scan_universe: Optional[bool] = None) -> List[str]:
         """
         根据多个指标选择合适的交易币对
+        scan_universe为True时扫描交易所全部线性永续合约，否则只在Config.TRADING_PAIRS中选择
         """
         try:
-            coin_metrics = []
-            
-            for symbol in Config.TRADING_PAIRS:
-                try:
-                    metrics = self._calculate_coin_metrics(symbol)
-                    coin_metrics.append({
-                        'symbol': symbol,
-                        **metrics
-                    })
-                except Exception as e:
-                    self.logger.warning(f"Error calculating metrics for {symbol}: {str(e)}")
-                    continue
-            
-            if not coin_metrics:
+            if scan_universe is None:
+                scan_universe = self.params['scan_universe']
+            symbols = self.get_universe() if scan_universe else list(Config.TRADING_PAIRS)
+
+            df = self.score_symbols(symbols)
+            if df.empty:
                 self.logger.warning("No valid coins found for selection")
                 return []
-            
-            # 转换为DataFrame进行排序
-            df = pd.DataFrame(coin_metrics)
-            
-            # 根据综合得分排序
-            df['total_score'] = (
-                df['volume_score'] * 0.3 +
-                df['volatility_score'] * 0.3 +
-                df['liquidity_score'] * 0.4
-            )
-            
-            selected_coins = df.nlargest(max_coins, 'total_score')['symbol'].tolist()
-            
-            self.logger.info(f"Selected coins: {selected_coins}")
+
+            selected_coins = df.nlargest(max_coins, 'total_score').index.tolist()
+
+            self.logger.info(f"Selected coins: {selected_coins} (scored {len(df)} symbols)")
             return selected_coins
-            
+
         except Exception as e:
             self.logger.error(f"Error in coin selection: {str(e)}")
             return []
-    
-    def _calculate_coin_metrics(self, symbol: str) -> Dict[str, float]:
+
+    def get_universe(self, reload: bool = False) -> List[str]:
+        """
+        交易所全部活跃的线性永续合约（按结算币过滤），合约列表按universe_ttl缓存
+        """
+        now = time.time()
+        if not reload and self._universe and now - self._universe_loaded_at < self.params['universe_ttl']:
+            return self._universe
+
+        markets = self.market_data.exchange.load_markets(reload=bool(self._universe) or reload)
+        self._universe = sorted(
+            symbol for symbol, market in markets.items()
+            if market.get('swap') and market.get('linear')
+            and market.get('active') is not False
+            and market.get('settle') == self.params['settle']
+        )
+        self._universe_loaded_at = now
+        self.logger.info(f"Loaded {len(self._universe)} perpetual contracts")
+        return self._universe
+
+    def score_symbols(self, symbols: List[str]) -> pd.DataFrame:
+        """
+        批量计算评分，返回以交易对为索引的DataFrame，结果按score_ttl缓存
+        """
+        key = tuple(sorted(symbols))
+        if (self._scores is not None and key == self._scores_key
+                and time.time() - self._scored_at < self.params['score_ttl']):
+            return self._scores
+
+        metrics = self._fetch_metrics(list(key))
+        scores = self._score(metrics)
+
+        self._scores, self._scores_key, self._scored_at = scores, key, time.time()
+        return scores
+
+    def _fetch_metrics(self, symbols: List[str]) -> pd.DataFrame:
         """
-        计算币对的各项指标
+        一次fetch_tickers取全部行情，缺少买一卖一的交易对再批量补取盘口
         """
-        df = self.market_data.update_market_data(symbol, Config.BASE_TIMEFRAME)
-        
-        # 计算成交量得分
-        volume = df['volume'].mean()
-        volume_std = df['volume'].std()
-        volume_score = volume / (volume_std + 1e-8)
-        
-        # 计算波动性得分
-        returns = df['close'].pct_change()
-        volatility = returns.std() * np.sqrt(len(df))
-        volatility_score = volatility
-        
-        # 计算流动性得分
-        orderbook = self.market_data.get_orderbook(symbol)
-        spread = (orderbook['asks'][0][0] - orderbook['bids'][0][0]) / orderbook['bids'][0][0]
-        liquidity_score = 1 / (spread + 1e-8)
-        
-        return {
-            'volume_score': volume_score,
-            'volatility_score': volatility_score,
-            'liquidity_score': liquidity_score
-        }
\ No newline at end of file
+        exchange = self.market_data.exchange
+        tickers = exchange.fetch_tickers(symbols)
+
+        df = pd.DataFrame.from_dict(
+            {s: tickers[s] for s in symbols if s in tickers}, orient='index'
+        ).reindex(columns=['last', 'high', 'low', 'bid', 'ask', 'quoteVolume'])
+        df = df.apply(pd.to_numeric, errors='coerce')
+
+        missing = df.index[df['bid'].isna() | df['ask'].isna()].tolist()
+        if missing:
+            df.update(self._fetch_top_of_book(missing))
+
+        skipped = len(symbols) - len(df.dropna())
+        if skipped:
+            self.logger.warning(f"Skipped {skipped} symbols with incomplete market data")
+        return df.dropna()
+
+    def _fetch_top_of_book(self, symbols: List[str]) -> pd.DataFrame:
+        """
+        批量获取买一卖一：优先用fetch_bids_asks一次取回，否则并发拉取浅盘口
+        """
+        exchange = self.market_data.exchange
+        if exchange.has.get('fetchBidsAsks'):
+            quotes = exchange.fetch_bids_asks(symbols)
+            return pd.DataFrame.from_dict(
+                {s: {'bid': q.get('bid'), 'ask': q.get('ask')} for s, q in quotes.items()},
+                orient='index', dtype=float
+            )
+
+        def top_of_book(symbol):
+            try:
+                book = exchange.fetch_order_book(symbol, self.params['book_depth'])
+                return symbol, book['bids'][0][0], book['asks'][0][0]
+            except Exception as e:
+                self.logger.warning(f"Error fetching orderbook for {symbol}: {str(e)}")
+                return symbol, np.nan, np.nan
+
+        with ThreadPoolExecutor(max_workers=self.params['book_workers']) as pool:
+            rows = list(pool.map(top_of_book, symbols))
+        return pd.DataFrame(rows, columns=['symbol', 'bid', 'ask']).set_index('symbol')
+
+    def _score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        向量化评分：成交额、日内波动、买卖价差三项取百分位排名后加权
+        """
+        df = df[(df['quoteVolume'] >= self.params['min_quote_volume']) & (df['bid'] > 0)].copy()
+        if df.empty:
+            return df
+
+        # 成交量得分（24h成交额）
+        df['volume_score'] = np.log1p(df['quoteVolume'].to_numpy())
+
+        # 波动性得分（24h振幅）
+        df['volatility_score'] = (df['high'] - df['low']).to_numpy() / df['last'].to_numpy()
+
+        # 流动性得分（相对价差越小越好）
+        spread = (df['ask'] - df['bid']).to_numpy() / df['bid'].to_numpy()
+        df['liquidity_score'] = 1 / (spread + 1e-8)
+
+        # 各项量纲不同，先转为百分位排名再加权
+        ranks = df[['volume_score', 'volatility_score', 'liquidity_score']].rank(pct=True)
+        df['total_score'] = (
+            ranks['volume_score'] * 0.3 +
+            ranks['volatility_score'] * 0.3 +
+            ranks['liquidity_score'] * 0.4
+        )
+        return df
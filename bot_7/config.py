@@ -72,6 +72,26 @@ class Config:
     # 套利策略参数
     MIN_ARBITRAGE_SPREAD: float = 0.002  # 最小套利价差
     
+    # 选币参数：一次fetch_tickers批量取行情，向量化评分，评分按TTL缓存
+    COIN_SELECTOR: Dict = {
+        "scan_universe": False,       # True时扫描交易所全部线性永续合约
+        "settle": "USDT",
+        "min_quote_volume": 1e6,      # 24h成交额下限
+        "score_ttl": 300,             # 秒
+        "universe_ttl": 3600,         # 秒
+        "book_depth": 5,
+        "book_workers": 8             # 无批量盘口接口时的并发数
+    }
+    
+    # 交易所健康探测：REST/WebSocket延迟分位数、错误率、限速余量、盘口新鲜度
+    EXCHANGE_HEALTH: Dict = {
+        "probe_interval": 5,          # 秒
+        "window": 300,                # 统计窗口（秒）
+        "latency_reference": 0.2,     # 尾延迟等于该值时延迟得分为0.5（秒）
+        "max_book_age": 2.0,          # 盘口超过该时长视为陈旧（秒）
+        "selection_weight": 0.4       # 选择交易所时健康得分的权重
+    }
+    
     # 重试参数
     MAX_RETRIES: int = 3
     RETRY_DELAY: float = 1.0  # 秒
@@ -1,12 +1,15 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import ccxt
 from config import Config, ExchangeConfig
 from logger import Logger
+from exchange_health import ExchangeHealth
 
 class ExchangeSelector:
     def __init__(self):
         self.logger = Logger("ExchangeSelector")
         self._exchanges = {}
+        self._static_scores: Dict[str, float] = {}
+        self.health = ExchangeHealth()
         
     def select_exchange(self) -> Tuple[str, ExchangeConfig]:
         """
@@ -17,8 +20,11 @@ class ExchangeSelector:
             
             for exchange_id, config in Config.EXCHANGES.items():
                 try:
-                    score = self._evaluate_exchange(exchange_id, config)
-                    exchange_scores[exchange_id] = score
+                    self._static_scores[exchange_id] = self._evaluate_exchange(exchange_id, config)
+                    self.health.watch(exchange_id, self._get_exchange(exchange_id, config),
+                                      Config.TRADING_PAIRS[0])
+                    self.health.probe(exchange_id)
+                    exchange_scores[exchange_id] = self._combined_score(exchange_id)
                 except Exception as e:
                     self.logger.warning(f"Error evaluating exchange {exchange_id}: {str(e)}")
                     continue
@@ -26,6 +32,9 @@ class ExchangeSelector:
             if not exchange_scores:
                 raise Exception("No viable exchanges found")
             
+            # 后台持续探测，之后可通过best_exchange获取当前最优交易所
+            self.health.start()
+            
             # 选择得分最高的交易所
             selected_exchange = max(exchange_scores.items(), key=lambda x: x[1])[0]
             
@@ -67,6 +76,19 @@ class ExchangeSelector:
         
         return total_score
     
+    def _combined_score(self, exchange_id: str) -> float:
+        """
+        静态得分（手续费、交易对支持、状态）与实时健康得分（延迟、错误率、限速余量）加权
+        """
+        weight = Config.EXCHANGE_HEALTH['selection_weight']
+        return self._static_scores[exchange_id] * (1 - weight) + self.health.score(exchange_id) * weight
+    
+    def best_exchange(self) -> Optional[str]:
+        """
+        当前综合得分最高的交易所，供下单路由实时查询（只读缓存的健康快照）
+        """
+        return max(self._static_scores, key=self._combined_score, default=None)
+    
     def _get_exchange(self, exchange_id: str, config: ExchangeConfig) -> ccxt.Exchange:
         """
         获取或创建交易所实例
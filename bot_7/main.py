@@ -19,8 +19,8 @@ class TradingBot:
         
         try:
             # 初始化交易所选择器
-            exchange_selector = ExchangeSelector()
-            self.exchange_id, self.exchange_config = exchange_selector.select_exchange()
+            self.exchange_selector = ExchangeSelector()
+            self.exchange_id, self.exchange_config = self.exchange_selector.select_exchange()
             
             # 初始化其他组件
             self.coin_selector = CoinSelector(self.exchange_id)
@@ -156,6 +156,9 @@ class TradingBot:
         for symbol in list(self.position_manager.positions.keys()):
             self.position_manager.close_position(symbol, "Bot shutdown")
         
+        # 停止交易所健康探测
+        self.exchange_selector.health.stop()
+        
         self.logger.info("Trading bot shutdown completed")
 
 if __name__ == "__main__":
@@ -1,13 +1,30 @@
 import ccxt
+import threading
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 from datetime import datetime, timedelta
 from config import Config, MarketState
 from logger import Logger
+from indicators import IndicatorSet, Spec
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
 
 class MarketData:
+    """按交易所单例：所有组件共用一个ccxt客户端（同一限速器）和一份K线缓存，
+    同一 (symbol, timeframe) 的并发请求合并为一次"""
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __new__(cls, exchange_id: str):
+        with cls._lock:
+            if exchange_id not in cls._instances:
+                cls._instances[exchange_id] = super().__new__(cls)
+            return cls._instances[exchange_id]
+
     def __init__(self, exchange_id: str):
+        if hasattr(self, 'initialized'):
+            return
         self.logger = Logger("MarketData")
         self.exchange = getattr(ccxt, exchange_id)({
             'apiKey': Config.EXCHANGES[exchange_id].api_key,
@@ -15,61 +32,119 @@ class MarketData:
             'enableRateLimit': True,
             'options': {'defaultType': 'future'}
         })
-        self.cached_data: Dict[str, Dict[str, pd.DataFrame]] = {}
-        self.last_update: Dict[str, datetime] = {}
+        self.cached_data: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self.cached_rows: Dict[Tuple[str, str], np.ndarray] = {}
+        self.indicator_sets: Dict[Tuple[str, str], IndicatorSet] = {}
+        self.last_update: Dict[Tuple[str, str], datetime] = {}
+        self.subscribers: List[Callable[[str, str, pd.DataFrame], None]] = []
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0}
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.initialized = True
+
+    def subscribe(self, callback: Callable[[str, str, pd.DataFrame], None]):
+        """注册K线更新回调 callback(symbol, timeframe, df)，df为共享缓存，只读"""
+        self.subscribers.append(callback)
+
+    def _is_fresh(self, key: Tuple[str, str]) -> bool:
+        updated = self.last_update.get(key)
+        return updated is not None and datetime.now() - updated < timedelta(seconds=Config.MARKET_UPDATE_INTERVAL)
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
     
     def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
         """
         获取K线数据
         """
+        return self._to_frame(self._fetch_rows(symbol, timeframe, limit))
+
+    def _fetch_rows(self, symbol: str, timeframe: str, limit: int = 100) -> np.ndarray:
         try:
             ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            return df
+            return np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
         except Exception as e:
             self.logger.error(f"Error fetching OHLCV data: {str(e)}")
             raise
+
+    @staticmethod
+    def _to_frame(rows: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(
+            rows[:, 1:],
+            index=pd.DatetimeIndex(pd.to_datetime(rows[:, 0], unit='ms'), name='timestamp'),
+            columns=OHLCV_COLUMNS[1:]
+        )
     
     def update_market_data(self, symbol: str, timeframe: str) -> pd.DataFrame:
         """
-        更新市场数据
-        """
-        current_time = datetime.now()
-        if (symbol in self.last_update and 
-            current_time - self.last_update[symbol] < timedelta(seconds=Config.MARKET_UPDATE_INTERVAL)):
-            return self.cached_data[symbol][timeframe]
-        
-        df = self.fetch_ohlcv(symbol, timeframe)
-        if symbol not in self.cached_data:
-            self.cached_data[symbol] = {}
-        self.cached_data[symbol][timeframe] = df
-        self.last_update[symbol] = current_time
+        更新市场数据（返回副本，调用方可自由添加列）
+        """
+        return self.refresh(symbol, timeframe).copy()
+
+    def refresh(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """
+        数据过期时重新拉取，返回共享缓存（只读）
+        """
+        key = (symbol, timeframe)
+        if self._is_fresh(key):
+            self.stats['cache_hits'] += 1
+            return self.cached_data[key]
+
+        with self._key_lock(key):
+            # 等锁期间其他组件已拉取过，直接复用
+            if self._is_fresh(key):
+                self.stats['coalesced'] += 1
+                return self.cached_data[key]
+            self.stats['requests'] += 1
+            rows = self._fetch_rows(symbol, timeframe)
+            df = self._to_frame(rows)
+            self.cached_rows[key] = rows
+            self.cached_data[key] = df
+            self.last_update[key] = datetime.now()
+
+        for callback in self.subscribers:
+            try:
+                callback(symbol, timeframe, df)
+            except Exception as e:
+                self.logger.error(f"Market data subscriber error: {str(e)}")
         return df
+
+    def indicators(self, symbol: str, timeframe: str, specs: Iterable[Spec]) -> Mapping[Spec, float]:
+        """
+        增量指标的最新值 {spec: value}（只读）。各组件共用同一份指标状态，相同spec只计算一次
+        """
+        specs = list(specs)
+        self.refresh(symbol, timeframe)
+        key = (symbol, timeframe)
+        with self._key_lock(key):
+            indicator_set = self.indicator_sets.setdefault(key, IndicatorSet())
+            indicator_set.require(specs)
+            indicator_set.sync(self.cached_rows[key])
+            return indicator_set.values(specs)
+
+    def latest_close(self, symbol: str, timeframe: str, offset: int = 1) -> float:
+        """倒数第offset根K线的收盘价（使用缓存，不触发请求）"""
+        return self.cached_rows[(symbol, timeframe)][-offset, 4]
     
     def get_market_state(self, symbol: str) -> Tuple[MarketState, dict]:
         """
         判断市场状态
         """
         try:
-            df = self.update_market_data(symbol, Config.BASE_TIMEFRAME)
+            df = self.refresh(symbol, Config.BASE_TIMEFRAME)
+            values = self.indicators(symbol, Config.BASE_TIMEFRAME, [('atr', 14), ('sma', 20, 'close'), ('sma', 50, 'close')])
             
             # 计算技术指标
             returns = df['close'].pct_change()
             volatility = returns.std() * np.sqrt(len(df))
-            ma20 = df['close'].rolling(window=20).mean()
-            ma50 = df['close'].rolling(window=50).mean()
-            
-            atr = self.calculate_atr(df)
             trend_strength = self.calculate_trend_strength(df)
             
             indicators = {
                 'volatility': volatility,
                 'trend_strength': trend_strength,
-                'atr': atr,
-                'ma20': ma20.iloc[-1],
-                'ma50': ma50.iloc[-1]
+                'atr': values[('atr', 14)],
+                'ma20': values[('sma', 20, 'close')],
+                'ma50': values[('sma', 50, 'close')]
             }
             
             # 判断市场状态
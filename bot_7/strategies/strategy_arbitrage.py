@@ -1,6 +1,5 @@
 import numpy as np
 from .strategy_base import StrategyBase
-from config import Config
 
 class ArbitrageStrategy(StrategyBase):
     def __init__(self, exchange_id: str, symbol: str, 
@@ -20,12 +19,9 @@ class ArbitrageStrategy(StrategyBase):
             
             if spread > self.min_spread:
                 # 检查价格趋势
-                df = self.market_data.update_market_data(
-                    self.symbol, Config.BASE_TIMEFRAME
-                )
-                price_trend = (
-                    df['close'].iloc[-1] - df['close'].iloc[-5]
-                ) / df['close'].iloc[-5]
+                price_trend = self.indicator_values(
+                    {'price_trend': ('roc', 4, 'close')}
+                )['price_trend']
                 
                 if price_trend > 0:
                     return {
@@ -4,6 +4,7 @@ import pandas as pd
 from config import Config
 from logger import Logger
 from market_data import MarketData
+from indicators import Spec
 
 class StrategyBase(ABC):
     def __init__(self, exchange_id: str, symbol: str):
@@ -22,6 +23,11 @@ class StrategyBase(ABC):
         - 'reason': str
         """
         pass
+
+    def indicator_values(self, specs: Dict[str, Spec], timeframe: str = Config.BASE_TIMEFRAME) -> Dict[str, float]:
+        """按名称取增量指标最新值，指标状态由同一交易所的所有策略共享"""
+        values = self.market_data.indicators(self.symbol, timeframe, specs.values())
+        return {name: values[spec] for name, spec in specs.items()}
     
     def get_position_size(self, price: float) -> float:
         """
@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 from .strategy_base import StrategyBase
 from config import Config
 
@@ -9,35 +8,29 @@ class BreakoutStrategy(StrategyBase):
         super().__init__(exchange_id, symbol)
         self.period = period
         self.threshold = threshold
+        self.indicator_specs = {
+            'atr': ('atr', period),
+            'prev_upper': ('lag', 1, ('max', period, 'high')),
+            'prev_lower': ('lag', 1, ('min', period, 'low'))
+        }
     
     def generate_signal(self) -> dict:
         try:
-            df = self.market_data.update_market_data(self.symbol, Config.BASE_TIMEFRAME)
+            # ATR与上一根K线的通道
+            values = self.indicator_values(self.indicator_specs)
             
-            # 计算ATR
-            df['TR'] = pd.DataFrame({
-                'HL': df['high'] - df['low'],
-                'HC': abs(df['high'] - df['close'].shift(1)),
-                'LC': abs(df['low'] - df['close'].shift(1))
-            }).max(axis=1)
-            df['ATR'] = df['TR'].rolling(window=self.period).mean()
-            
-            # 计算通道
-            df['Upper'] = df['high'].rolling(window=self.period).max()
-            df['Lower'] = df['low'].rolling(window=self.period).min()
-            
-            current_price = df['close'].iloc[-1]
-            current_atr = df['ATR'].iloc[-1]
+            current_price = self.market_data.latest_close(self.symbol, Config.BASE_TIMEFRAME)
+            current_atr = values['atr']
             
             # 判断突破
-            if (current_price > df['Upper'].iloc[-2] + 
+            if (current_price > values['prev_upper'] + 
                 self.threshold * current_atr):
                 return {
                     'action': 'buy',
                     'price': current_price,
                     'reason': 'Upward breakout detected'
                 }
-            elif (current_price < df['Lower'].iloc[-2] - 
+            elif (current_price < values['prev_lower'] - 
                   self.threshold * current_atr):
                 return {
                     'action': 'sell',
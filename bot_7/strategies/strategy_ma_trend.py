@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 from .strategy_base import StrategyBase
 from config import Config
 
@@ -9,27 +8,31 @@ class MATrendStrategy(StrategyBase):
         super().__init__(exchange_id, symbol)
         self.fast_period = fast_period
         self.slow_period = slow_period
+        fast, slow = ('sma', fast_period, 'close'), ('sma', slow_period, 'close')
+        self.indicator_specs = {
+            'fast': fast,
+            'slow': slow,
+            'prev_fast': ('lag', 1, fast),
+            'prev_slow': ('lag', 1, slow)
+        }
     
     def generate_signal(self) -> dict:
         try:
-            df = self.market_data.update_market_data(self.symbol, Config.BASE_TIMEFRAME)
+            # 快速和慢速均线（当前与上一根K线）
+            ma = self.indicator_values(self.indicator_specs)
             
-            # 计算快速和慢速均线
-            df['FastMA'] = df['close'].rolling(window=self.fast_period).mean()
-            df['SlowMA'] = df['close'].rolling(window=self.slow_period).mean()
-            
-            current_price = df['close'].iloc[-1]
+            current_price = self.market_data.latest_close(self.symbol, Config.BASE_TIMEFRAME)
             
             # 判断趋势方向
-            if (df['FastMA'].iloc[-1] > df['SlowMA'].iloc[-1] and 
-                df['FastMA'].iloc[-2] <= df['SlowMA'].iloc[-2]):
+            if (ma['fast'] > ma['slow'] and 
+                ma['prev_fast'] <= ma['prev_slow']):
                 return {
                     'action': 'buy',
                     'price': current_price,
                     'reason': 'Fast MA crossed above Slow MA'
                 }
-            elif (df['FastMA'].iloc[-1] < df['SlowMA'].iloc[-1] and 
-                  df['FastMA'].iloc[-2] >= df['SlowMA'].iloc[-2]):
+            elif (ma['fast'] < ma['slow'] and 
+                  ma['prev_fast'] >= ma['prev_slow']):
                 return {
                     'action': 'sell',
                     'price': current_price,
@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 from .strategy_base import StrategyBase
 from config import Config
 
@@ -12,23 +11,19 @@ class MeanReversionStrategy(StrategyBase):
     
     def generate_signal(self) -> dict:
         try:
-            df = self.market_data.update_market_data(self.symbol, Config.BASE_TIMEFRAME)
-            
             # 计算布林带
-            df['MA'] = df['close'].rolling(window=self.period).mean()
-            df['STD'] = df['close'].rolling(window=self.period).std()
-            df['Upper'] = df['MA'] + (self.std_dev * df['STD'])
-            df['Lower'] = df['MA'] - (self.std_dev * df['STD'])
+            bands = ('bbands', self.period, self.std_dev, 'close')
+            _, upper, lower = self.market_data.indicators(self.symbol, Config.BASE_TIMEFRAME, [bands])[bands]
             
-            current_price = df['close'].iloc[-1]
+            current_price = self.market_data.latest_close(self.symbol, Config.BASE_TIMEFRAME)
             
-            if current_price < df['Lower'].iloc[-1]:
+            if current_price < lower:
                 return {
                     'action': 'buy',
                     'price': current_price,
                     'reason': 'Price below lower Bollinger Band'
                 }
-            elif current_price > df['Upper'].iloc[-1]:
+            elif current_price > upper:
                 return {
                     'action': 'sell',
                     'price': current_price,
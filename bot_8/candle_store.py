@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+class CandleStore:
+    """单个 (symbol, timeframe) 的K线环形缓冲。
+
+    底层数组长度为 2*capacity，每根K线同时写入 i 和 i+capacity 两个位置，
+    因此最近任意 n 根K线始终是一段连续内存，可直接返回视图而无需拷贝。
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, len(COLUMNS)), dtype=np.float64)
+        self._head = 0  # 累计写入的K线数
+
+    def __len__(self) -> int:
+        return min(self._head, self.capacity)
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """最后一根K线的开盘时间（毫秒），空时为None"""
+        if self._head == 0:
+            return None
+        return int(self._data[(self._head - 1) % self.capacity, 0])
+
+    def update(self, candles: Sequence[Sequence[float]]) -> int:
+        """合并ccxt格式K线：同一时间戳原地覆盖（未收盘K线），更新的追加，更旧的忽略。返回新增根数"""
+        appended = 0
+        for candle in candles:
+            last = self.last_timestamp
+            ts = candle[0]
+            if last is not None and ts < last:
+                continue
+            if last is not None and ts == last:
+                self._write((self._head - 1) % self.capacity, candle)
+                continue
+            self._write(self._head % self.capacity, candle)
+            self._head += 1
+            appended += 1
+        return appended
+
+    def _write(self, slot: int, candle: Sequence[float]):
+        row = candle[:len(COLUMNS)]
+        self._data[slot] = row
+        self._data[slot + self.capacity] = row
+
+    def array(self, n: Optional[int] = None) -> np.ndarray:
+        """最近n根K线的只读视图，形状 (n, 6)，列顺序同COLUMNS"""
+        count = len(self) if n is None else min(n, len(self))
+        end = self._head % self.capacity + self.capacity
+        view = self._data[end - count:end]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        return self.array(n)[:, COLUMNS.index(name)]
+
+    def frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """最近n根K线的DataFrame（时间索引）。
+        数据为副本：环形缓冲区会被后续K线覆盖，缓存的DataFrame不能引用其内存"""
+        arr = self.array(n)
+        return pd.DataFrame(
+            arr[:, 1:],
+            index=pd.DatetimeIndex(pd.to_datetime(arr[:, 0], unit='ms'), name='timestamp'),
+            columns=COLUMNS[1:],
+            copy=True
+        )
+
+    def to_list(self, n: Optional[int] = None) -> List[List[float]]:
+        return self.array(n).tolist()
@@ -89,6 +89,47 @@ class Config:
         "log_level": "INFO",
         "max_memory_usage": 1024      # MB
     }
+    MARKET_UPDATE_INTERVAL = SYSTEM_PARAMS["market_update_interval"]
+    STRATEGY_INTERVAL = SYSTEM_PARAMS["strategy_interval"]
+    RISK_CHECK_INTERVAL = SYSTEM_PARAMS["risk_check_interval"]
+    ORDER_QUERY_INTERVAL = 2          # seconds
+    
+    # 异步流水线：行情 -> 策略 -> 风控 -> 执行，阶段之间为有界队列，下游处理不过来时上游等待
+    PIPELINE = {
+        "strategy_queue_size": 50,    # 待评估的交易对
+        "signal_queue_size": 50,      # 待风控的信号
+        "order_queue_size": 20,       # 待执行的订单
+        "strategy_workers": 4,
+        "risk_workers": 4,            # 风控检查含同步REST调用，在线程池中执行
+        "execution_workers": 2
+    }
+    
+    # 选币：一次fetch_tickers批量取行情，向量化评分，评分按TTL缓存
+    COIN_SELECTOR = {
+        "scan_universe": False,       # True时扫描交易所全部线性永续合约
+        "settle": "USDT",
+        "min_quote_volume": 1e6,      # 24h成交额下限
+        "score_ttl": 300,             # seconds
+        "universe_ttl": 3600,         # seconds
+        "book_depth": 5,
+        "book_workers": 8             # 无批量盘口接口时的并发数
+    }
+    
+    # 交易所健康探测：REST/WebSocket延迟分位数、错误率、限速余量、盘口新鲜度
+    EXCHANGE_HEALTH = {
+        "probe_interval": 5,          # seconds
+        "window": 300,                # 统计窗口（seconds）
+        "latency_reference": 0.2,     # 尾延迟等于该值时延迟得分为0.5（seconds）
+        "max_book_age": 2.0,          # 盘口超过该时长视为陈旧（seconds）
+        "selection_weight": 0.4       # 选择交易所时健康得分的权重
+    }
+    
+    # 行情录制（K线按 类型/交易所/交易对/小时 分区写入压缩列式块）
+    MARKET_RECORDER = {
+        "enabled": False,
+        "root": "data/market",
+        "flush_interval": 5           # seconds
+    }
     
     # 数据库配置
     DATABASE_CONFIG = {
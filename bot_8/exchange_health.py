@@ -0,0 +1,261 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+from config import Config
+from logger import Logger
+
+# 已知的限速权重响应头：(header, 每分钟上限)
+RATE_LIMIT_HEADERS = {
+    'binance': ('x-mbx-used-weight-1m', 2400),
+}
+
+class LatencyHistogram:
+    """HDR风格的对数-线性直方图（微秒），相对误差约 1/half_count。
+    记录为O(1)，分位数为一次cumsum，内存固定"""
+
+    def __init__(self, max_seconds: float = 60.0, sub_bits: int = 7):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.half_count = self.sub_count >> 1
+        self.max_value = int(max_seconds * 1e6)
+        self.counts = np.zeros(self._index(self.max_value) + 1, dtype=np.int64)
+        self.total = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def _value(self, index: int) -> int:
+        """桶的上界（微秒）"""
+        if index < self.sub_count:
+            return index
+        shift, sub = divmod(index - self.sub_count, self.half_count)
+        shift += 1
+        return ((sub + self.half_count + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        value = min(max(int(seconds * 1e6), 0), self.max_value)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+
+    def merge(self, other: 'LatencyHistogram'):
+        self.counts += other.counts
+        self.total += other.total
+
+    def reset(self):
+        self.counts[:] = 0
+        self.total = 0
+
+    def percentile(self, q: float) -> float:
+        """第q百分位（秒），无样本时为NaN"""
+        if not self.total:
+            return float('nan')
+        rank = max(int(np.ceil(self.total * q / 100)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return self._value(index) / 1e6
+
+class _Channel:
+    """滑动窗口统计：当前与上一个半窗口两组直方图轮换，旧样本自然淘汰"""
+
+    def __init__(self, window: float):
+        self.half_window = window / 2
+        self.current = LatencyHistogram()
+        self.previous = LatencyHistogram()
+        self.errors = [0, 0]   # 当前 / 上一个半窗口
+        self.started = time.time()
+
+    def _rotate(self, now: float):
+        if now - self.started < self.half_window:
+            return
+        self.current, self.previous = self.previous, self.current
+        self.current.reset()
+        self.errors = [0, self.errors[0]]
+        self.started = now
+
+    def record(self, seconds: Optional[float], ok: bool, now: float):
+        self._rotate(now)
+        if ok:
+            self.current.record(seconds)
+        else:
+            self.errors[0] += 1
+
+    def summary(self, now: float) -> Tuple[float, float, float, int]:
+        """(p50, p99, 错误率, 样本数)"""
+        self._rotate(now)
+        merged = LatencyHistogram()
+        merged.merge(self.current)
+        merged.merge(self.previous)
+        errors = sum(self.errors)
+        total = merged.total + errors
+        error_rate = errors / total if total else 0.0
+        return merged.percentile(50), merged.percentile(99), error_rate, total
+
+@dataclass(frozen=True)
+class HealthSnapshot:
+    exchange_id: str
+    rest_p50: float               # 秒
+    rest_p99: float
+    ws_p50: float
+    ws_p99: float
+    error_rate: float
+    rate_limit_headroom: float    # 1为未使用，未知时为1
+    book_age: float               # 最近一次盘口距今（秒），未知时为NaN
+    score: float
+    updated_at: float
+
+class ExchangeHealth:
+    """进程内单例：后台线程定期探测各交易所REST延迟、错误率、限速余量和盘口新鲜度；
+    其他组件也可随时上报真实请求和WebSocket消息的延迟。
+    快照在每轮探测后重算，查询只是字典读取"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+            return cls._instance
+
+    def __init__(self):
+        if hasattr(self, 'initialized'):
+            return
+        self.logger = Logger("ExchangeHealth")
+        self.params = Config.EXCHANGE_HEALTH
+        self._clients: Dict[str, object] = {}
+        self._probe_symbols: Dict[str, str] = {}
+        self._rest: Dict[str, _Channel] = {}
+        self._ws: Dict[str, _Channel] = {}
+        self._headroom: Dict[str, float] = {}
+        self._book_ts: Dict[str, float] = {}
+        self._snapshots: Dict[str, HealthSnapshot] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.initialized = True
+
+    def watch(self, exchange_id: str, exchange, probe_symbol: str):
+        """登记需要探测的交易所（ccxt同步客户端）"""
+        with self._lock:
+            self._clients[exchange_id] = exchange
+            self._probe_symbols[exchange_id] = probe_symbol
+            self._rest.setdefault(exchange_id, _Channel(self.params['window']))
+            self._ws.setdefault(exchange_id, _Channel(self.params['window']))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='exchange-health', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            for exchange_id in list(self._clients):
+                self.probe(exchange_id)
+            self._stopping.wait(self.params['probe_interval'])
+
+    # ---- 上报 ----
+
+    def record_rest(self, exchange_id: str, seconds: Optional[float], ok: bool = True):
+        """上报一次REST请求的耗时；失败时seconds可为None"""
+        channel = self._rest.get(exchange_id)
+        if channel is not None:
+            with self._lock:
+                channel.record(seconds, ok, time.time())
+
+    def record_ws(self, exchange_id: str, event_ts_ms: Optional[float] = None, ok: bool = True):
+        """上报一条WebSocket消息，延迟为本地接收时间减去交易所事件时间"""
+        channel = self._ws.get(exchange_id)
+        if channel is not None:
+            now = time.time()
+            seconds = now - event_ts_ms / 1000 if event_ts_ms else None
+            with self._lock:
+                channel.record(seconds, ok and seconds is not None, now)
+
+    def record_book(self, exchange_id: str, book_ts_ms: float):
+        """上报收到的盘口时间戳（毫秒），用于计算盘口新鲜度"""
+        self._book_ts[exchange_id] = book_ts_ms / 1000
+
+    def probe(self, exchange_id: str):
+        """一次探测：拉取浅盘口计时，读取限速响应头，然后重算快照"""
+        exchange = self._clients[exchange_id]
+        started = time.perf_counter()
+        try:
+            book = exchange.fetch_order_book(self._probe_symbols[exchange_id], 5)
+            self.record_rest(exchange_id, time.perf_counter() - started)
+            self.record_book(exchange_id, book.get('timestamp') or exchange.milliseconds())
+            self._update_headroom(exchange_id, exchange)
+        except Exception as e:
+            self.record_rest(exchange_id, None, ok=False)
+            self.logger.warning(f"Health probe failed for {exchange_id}: {str(e)}")
+        self._refresh(exchange_id)
+
+    def _update_headroom(self, exchange_id: str, exchange):
+        header = RATE_LIMIT_HEADERS.get(exchange_id)
+        headers = getattr(exchange, 'last_response_headers', None)
+        if not header or not headers:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+        used = headers.get(header[0])
+        if used is not None:
+            self._headroom[exchange_id] = max(1 - float(used) / header[1], 0.0)
+
+    def _refresh(self, exchange_id: str):
+        now = time.time()
+        with self._lock:
+            rest_p50, rest_p99, rest_errors, _ = self._rest[exchange_id].summary(now)
+            ws_p50, ws_p99, ws_errors, ws_count = self._ws[exchange_id].summary(now)
+        error_rate = max(rest_errors, ws_errors) if ws_count else rest_errors
+        headroom = self._headroom.get(exchange_id, 1.0)
+        book_ts = self._book_ts.get(exchange_id)
+        book_age = now - book_ts if book_ts else float('nan')
+
+        self._snapshots[exchange_id] = HealthSnapshot(
+            exchange_id=exchange_id,
+            rest_p50=rest_p50,
+            rest_p99=rest_p99,
+            ws_p50=ws_p50,
+            ws_p99=ws_p99,
+            error_rate=error_rate,
+            rate_limit_headroom=headroom,
+            book_age=book_age,
+            score=self._score(rest_p99, ws_p99, error_rate, headroom, book_age),
+            updated_at=now
+        )
+
+    def _score(self, rest_p99: float, ws_p99: float, error_rate: float,
+               headroom: float, book_age: float) -> float:
+        """0~1：尾延迟、错误率、限速余量、盘口新鲜度相乘，任一项差都会拉低总分"""
+        if np.isnan(rest_p99):
+            return 0.0
+        reference = self.params['latency_reference']
+        latency = rest_p99 if np.isnan(ws_p99) else max(rest_p99, ws_p99)
+        latency_score = reference / (reference + latency)
+        max_age = self.params['max_book_age']
+        freshness = 1.0 if np.isnan(book_age) or book_age <= max_age else max_age / book_age
+        return latency_score * (1 - error_rate) * min(headroom * 2, 1.0) * freshness
+
+    # ---- 查询（O(1)）----
+
+    def snapshot(self, exchange_id: str) -> Optional[HealthSnapshot]:
+        return self._snapshots.get(exchange_id)
+
+    def score(self, exchange_id: str) -> float:
+        snapshot = self._snapshots.get(exchange_id)
+        return snapshot.score if snapshot else 0.0
+
+    def best(self, candidates: Optional[Iterable[str]] = None) -> Optional[str]:
+        """当前得分最高的交易所，没有任何快照时返回None"""
+        snapshots = self._snapshots
+        ids = snapshots.keys() if candidates is None else [c for c in candidates if c in snapshots]
+        return max(ids, key=lambda exchange_id: snapshots[exchange_id].score, default=None)
@@ -1,14 +1,15 @@
-import threading
-import queue
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
 import time
+from collections import deque
 from decimal import Decimal
 from dataclasses import dataclass
 import asyncio
+import ccxt.async_support as ccxt_async
 
 from logger import Logger
 from config import Config
+import rate_limiter
 
 @dataclass
 class OrderRequest:
@@ -29,8 +30,8 @@ class ExecutionManager:
         self.exchange_id = exchange_id
         self.exchange = self._initialize_exchange()
         
-        # 订单队列和执行状态
-        self.order_queue = queue.PriorityQueue()
+        # 订单队列（有界，满时submit_order等待）和执行状态
+        self.order_queue = asyncio.PriorityQueue(maxsize=Config.PIPELINE['order_queue_size'])
         self.active_orders = {}
         self.pending_orders = {}
         
@@ -41,16 +42,36 @@ class ExecutionManager:
             'failed_orders': 0,
             'avg_execution_time': 0,
             'avg_slippage': 0,
-            'execution_times': []
+            'execution_times': deque(maxlen=1000)  # 最近1000次执行耗时
         }
         
-        # 限流控制
-        self.rate_limiter = self._initialize_rate_limiter()
+    def _initialize_exchange(self):
+        """初始化异步交易所接口（ccxt.async_support）"""
+        exchange_class = getattr(ccxt_async, self.exchange_id)
+        return rate_limiter.install(exchange_class({
+            'apiKey': Config.EXCHANGES[self.exchange_id]['apiKey'],
+            'secret': Config.EXCHANGES[self.exchange_id]['secret'],
+            'enableRateLimit': True,
+            'options': Config.EXCHANGES[self.exchange_id]['options']
+        }))
         
-        # 启动执行线程
-        self._start_execution_threads()
+    async def run(self):
+        """执行协程：按优先级从队列取订单执行，可启动多个并发执行"""
+        while True:
+            priority, order_id, order_request = await self.order_queue.get()
+            try:
+                if order_id not in self.pending_orders:
+                    continue  # 排队期间已取消
+                del self.pending_orders[order_id]
+                self.active_orders[order_id] = order_request
+                await self.execute_order(order_id, order_request)
+            except Exception:
+                pass  # execute_order 已记录
+            finally:
+                self.active_orders.pop(order_id, None)
+                self.order_queue.task_done()
         
-    def submit_order(self, order_request: OrderRequest) -> str:
+    async def submit_order(self, order_request: OrderRequest) -> str:
         """提交订单请求"""
         try:
             # 验证订单参数
@@ -63,9 +84,9 @@ class ExecutionManager:
             # 获取优先级
             priority = self._calculate_order_priority(order_request)
             
-            # 添加到订单队列
-            self.order_queue.put((priority, order_id, order_request))
+            # 添加到订单队列（队列满时等待，形成背压）
             self.pending_orders[order_id] = order_request
+            await self.order_queue.put((priority, order_id, order_request))
             
             self.logger.info(f"Order submitted: {order_id} - {order_request}")
             
@@ -215,11 +236,11 @@ class ExecutionManager:
             else:
                 self.execution_stats['failed_orders'] += 1
                 
-            # 更新平均执行时间
+            # 更新平均执行时间（增量均值，不依赖保留的样本）
             self.execution_stats['execution_times'].append(execution_time)
-            self.execution_stats['avg_execution_time'] = (
-                sum(self.execution_stats['execution_times']) /
-                len(self.execution_stats['execution_times'])
+            self.execution_stats['avg_execution_time'] += (
+                (execution_time - self.execution_stats['avg_execution_time']) /
+                self.execution_stats['total_orders']
             )
             
             # 计算滑点
@@ -261,7 +282,10 @@ class ExecutionManager:
         """获取执行统计信息"""
         return self.execution_stats
 
-    def cancel_order(self, order_id: str) -> bool:
+    async def close(self):
+        await self.exchange.close()
+
+    async def cancel_order(self, order_id: str) -> bool:
         """取消订单"""
         try:
             if order_id in self.pending_orders:
@@ -269,7 +293,7 @@ class ExecutionManager:
                 return True
                 
             if order_id in self.active_orders:
-                self.exchange.cancel_order(order_id)
+                await self.exchange.cancel_order(order_id, self.active_orders[order_id].symbol)
                 del self.active_orders[order_id]
                 return True
                 
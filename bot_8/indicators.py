@@ -0,0 +1,624 @@
+"""增量技术指标：每根K线O(1)更新，按规格(spec)去重共享。
+
+spec为元组，首项是指标类型，其余为构造参数，例如：
+    ('ema', 20, 'close')                      收盘价EMA20
+    ('std', 20, ('roc', 1, 'close'))          收益率的20周期标准差（指标可嵌套作为输入）
+    ('atr', 14)                               真实波幅14周期均值
+数据源可以是K线字段（open/high/low/close/volume）、派生值（typical/hl2/close_location）或另一个spec。
+未收盘K线原地更新时调用 replace() 回滚上一步再重算，结果与全量重算一致。
+"""
+import math
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+NAN = math.nan
+Spec = Tuple
+FIELDS = {'timestamp': 0, 'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5}
+
+
+def _field(row, source: str) -> float:
+    if source == 'typical':
+        return (row[2] + row[3] + row[4]) / 3
+    if source == 'hl2':
+        return (row[2] + row[3]) / 2
+    if source == 'close_location':
+        span = row[2] - row[3]
+        return (row[4] - row[3]) / span if span else NAN
+    return row[FIELDS[source]]
+
+
+class Indicator:
+    """增量指标基类：update追加一根K线，replace替换最后一根"""
+    source = 'close'   # None 表示直接读取整根K线
+
+    def __init__(self):
+        self.value = NAN
+        self._updated = False
+
+    def update(self, x):
+        raise NotImplementedError
+
+    def rollback(self):
+        """撤销最近一次update"""
+        raise NotImplementedError
+
+    def replace(self, x):
+        if self._updated:
+            self.rollback()
+        self.update(x)
+
+
+class _Window:
+    """定长窗口，push返回被挤出的元素，undo恢复"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.items = deque()
+
+    def push(self, x):
+        self.items.append(x)
+        return self.items.popleft() if len(self.items) > self.size else None
+
+    def undo(self, evicted):
+        self.items.pop()
+        if evicted is not None:
+            self.items.appendleft(evicted)
+
+    def full(self) -> bool:
+        return len(self.items) == self.size
+
+
+class RollingSum(Indicator):
+    """滚动求和（窗口未满或含NaN时为NaN，与pandas rolling一致）"""
+
+    def __init__(self, period: int, source='close'):
+        super().__init__()
+        self.period = period
+        self.source = source
+        self._window = _Window(period)
+        self._sum = 0.0
+        self._nans = 0
+        self._undo = None
+
+    def update(self, x):
+        evicted = self._window.push(x)
+        self._undo = (self._sum, self._nans, evicted)
+        if math.isnan(x):
+            self._nans += 1
+        else:
+            self._sum += x
+        if evicted is not None:
+            if math.isnan(evicted):
+                self._nans -= 1
+            else:
+                self._sum -= evicted
+        self.value = self._result()
+        self._updated = True
+
+    def rollback(self):
+        self._sum, self._nans, evicted = self._undo
+        self._window.undo(evicted)
+        self.value = self._result()
+        self._updated = False
+
+    def _result(self) -> float:
+        return self._sum if self._window.full() and self._nans == 0 else NAN
+
+
+class SMA(RollingSum):
+    def _result(self) -> float:
+        total = super()._result()
+        return total / self.period if not math.isnan(total) else NAN
+
+
+class RollingStd(Indicator):
+    """滚动样本标准差（ddof=1），Welford增删"""
+
+    def __init__(self, period: int, source='close'):
+        super().__init__()
+        self.period = period
+        self.source = source
+        self._window = _Window(period)
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._nans = 0
+        self._undo = None
+
+    def _add(self, x):
+        self._n += 1
+        delta = x - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (x - self._mean)
+
+    def _remove(self, x):
+        if self._n == 1:
+            self._n, self._mean, self._m2 = 0, 0.0, 0.0
+            return
+        self._n -= 1
+        delta = x - self._mean
+        self._mean -= delta / self._n
+        self._m2 -= delta * (x - self._mean)
+
+    def update(self, x):
+        evicted = self._window.push(x)
+        self._undo = (self._n, self._mean, self._m2, self._nans, evicted)
+        if math.isnan(x):
+            self._nans += 1
+        else:
+            self._add(x)
+        if evicted is not None:
+            if math.isnan(evicted):
+                self._nans -= 1
+            else:
+                self._remove(evicted)
+        self.value = self._result()
+        self._updated = True
+
+    def rollback(self):
+        self._n, self._mean, self._m2, self._nans, evicted = self._undo
+        self._window.undo(evicted)
+        self.value = self._result()
+        self._updated = False
+
+    def _result(self) -> float:
+        if not self._window.full() or self._nans or self._n < 2:
+            return NAN
+        return math.sqrt(max(self._m2, 0.0) / (self._n - 1))
+
+
+class EMA(Indicator):
+    """指数均线，等价于 pandas ewm(span=period, adjust=False)"""
+
+    def __init__(self, period: int, source='close'):
+        super().__init__()
+        self.period = period
+        self.source = source
+        self.alpha = 2.0 / (period + 1)
+        self._prev = NAN
+
+    def update(self, x):
+        self._prev = self.value
+        if math.isnan(x):
+            pass
+        elif math.isnan(self.value):
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        self._updated = True
+
+    def rollback(self):
+        self.value = self._prev
+        self._updated = False
+
+
+class MACD(Indicator):
+    """MACD线 EMA(fast) - EMA(slow)；信号线用 ('ema', 9, ('macd', 12, 26, 'close'))"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, source='close'):
+        super().__init__()
+        self.source = source
+        self._fast = EMA(fast, None)
+        self._slow = EMA(slow, None)
+
+    def update(self, x):
+        self._fast.update(x)
+        self._slow.update(x)
+        self.value = self._fast.value - self._slow.value
+        self._updated = True
+
+    def rollback(self):
+        self._fast.rollback()
+        self._slow.rollback()
+        self.value = self._fast.value - self._slow.value
+        self._updated = False
+
+
+class ROC(Indicator):
+    """变化率 x / x[-period] - 1（pandas pct_change(period)）"""
+
+    def __init__(self, period: int, source='close'):
+        super().__init__()
+        self.period = period
+        self.source = source
+        self._window = _Window(period + 1)
+        self._undo = None
+
+    def update(self, x):
+        self._undo = self._window.push(x)
+        self.value = self._result()
+        self._updated = True
+
+    def rollback(self):
+        self._window.undo(self._undo)
+        self.value = self._result()
+        self._updated = False
+
+    def _result(self) -> float:
+        if not self._window.full():
+            return NAN
+        base = self._window.items[0]
+        return self._window.items[-1] / base - 1 if base else NAN
+
+
+class Lag(Indicator):
+    """period根K线之前的值，例如上一根K线的通道上轨 ('lag', 1, ('max', 20, 'high'))"""
+
+    def __init__(self, period: int, source='close'):
+        super().__init__()
+        self.period = period
+        self.source = source
+        self._window = _Window(period + 1)
+        self._undo = None
+
+    def update(self, x):
+        self._undo = self._window.push(x)
+        self.value = self._window.items[0] if self._window.full() else NAN
+        self._updated = True
+
+    def rollback(self):
+        self._window.undo(self._undo)
+        self.value = self._window.items[0] if self._window.full() else NAN
+        self._updated = False
+
+
+class _Extremum(Indicator):
+    """单调队列滚动极值，摊还O(1)"""
+    _better = None
+
+    def __init__(self, period: int, source='close'):
+        super().__init__()
+        self.period = period
+        self.source = source
+        self._queue = deque()   # (序号, 值)，值单调
+        self._index = 0
+        self._undo = None
+
+    def update(self, x):
+        popped = []
+        while self._queue and not self._better(self._queue[-1][1], x):
+            popped.append(self._queue.pop())
+        self._queue.append((self._index, x))
+        expired = self._queue.popleft() if self._queue[0][0] <= self._index - self.period else None
+        self._undo = (popped, expired)
+        self._index += 1
+        self.value = self._queue[0][1] if self._index >= self.period else NAN
+        self._updated = True
+
+    def rollback(self):
+        popped, expired = self._undo
+        if expired is not None:
+            self._queue.appendleft(expired)
+        self._queue.pop()
+        self._queue.extend(reversed(popped))
+        self._index -= 1
+        self.value = self._queue[0][1] if self._queue and self._index >= self.period else NAN
+        self._updated = False
+
+
+class RollingMax(_Extremum):
+    _better = staticmethod(lambda kept, new: kept > new)
+
+
+class RollingMin(_Extremum):
+    _better = staticmethod(lambda kept, new: kept < new)
+
+
+class RSI(Indicator):
+    """RSI：wilder=True 为Wilder平滑，False 为涨跌幅简单滚动均值（原策略算法）"""
+
+    def __init__(self, period: int = 14, source='close', wilder: bool = True):
+        super().__init__()
+        self.period = period
+        self.source = source
+        self.wilder = wilder
+        self._last = NAN
+        self._gain = RollingSum(period, None)
+        self._loss = RollingSum(period, None)
+        self._avg = (NAN, NAN)
+        self._undo = None
+
+    def update(self, x):
+        self._undo = (self._last, self._avg)
+        if math.isnan(self._last):
+            self._last = x
+            self._updated = True
+            self._undo_sums = False
+            return
+        delta = x - self._last
+        self._last = x
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        avg_gain, avg_loss = self._avg
+        if self.wilder and not math.isnan(avg_gain):
+            self._avg = (
+                (avg_gain * (self.period - 1) + gain) / self.period,
+                (avg_loss * (self.period - 1) + loss) / self.period
+            )
+            self._undo_sums = False
+        else:
+            self._gain.update(gain)
+            self._loss.update(loss)
+            self._undo_sums = True
+            if not math.isnan(self._gain.value):
+                self._avg = (self._gain.value / self.period, self._loss.value / self.period)
+        self.value = self._result()
+        self._updated = True
+
+    def rollback(self):
+        self._last, self._avg = self._undo
+        if self._undo_sums:
+            self._gain.rollback()
+            self._loss.rollback()
+        self.value = self._result()
+        self._updated = False
+
+    def _result(self) -> float:
+        avg_gain, avg_loss = self._avg
+        if math.isnan(avg_gain) or (avg_gain == 0 and avg_loss == 0):
+            return NAN
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class TrueRange(Indicator):
+    source = None
+
+    def __init__(self):
+        super().__init__()
+        self._prev_close = NAN
+        self._undo = NAN
+
+    def update(self, row):
+        high, low, close = row[2], row[3], row[4]
+        self._undo = self._prev_close
+        if math.isnan(self._prev_close):
+            self.value = high - low
+        else:
+            self.value = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        self._updated = True
+
+    def rollback(self):
+        self._prev_close = self._undo
+        self._updated = False
+
+
+class ATR(Indicator):
+    """真实波幅的简单滚动均值（与原策略 rolling(14).mean() 一致）"""
+    source = None
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self._tr = TrueRange()
+        self._sma = SMA(period, None)
+
+    def update(self, row):
+        self._tr.update(row)
+        self._sma.update(self._tr.value)
+        self.value = self._sma.value
+        self._updated = True
+
+    def rollback(self):
+        self._sma.rollback()
+        self._tr.rollback()
+        self.value = self._sma.value
+        self._updated = False
+
+
+class DX(Indicator):
+    """方向指数 100*|+DI - -DI| / (+DI + -DI)，DI按period滚动求和"""
+    source = None
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self._tr = TrueRange()
+        self._tr_sum = RollingSum(period, None)
+        self._pos = RollingSum(period, None)
+        self._neg = RollingSum(period, None)
+        self._prev = None
+        self._undo = None
+
+    def update(self, row):
+        high, low = row[2], row[3]
+        self._undo = self._prev
+        if self._prev is None:
+            pos_dm = neg_dm = NAN
+        else:
+            up, down = high - self._prev[0], self._prev[1] - low
+            pos_dm = up if up > down and up > 0 else 0.0
+            neg_dm = down if down > up and down > 0 else 0.0
+        self._prev = (high, low)
+        self._tr.update(row)
+        self._tr_sum.update(self._tr.value)
+        self._pos.update(pos_dm)
+        self._neg.update(neg_dm)
+        self.value = self._result()
+        self._updated = True
+
+    def rollback(self):
+        for part in (self._neg, self._pos, self._tr_sum, self._tr):
+            part.rollback()
+        self._prev = self._undo
+        self.value = self._result()
+        self._updated = False
+
+    def _result(self) -> float:
+        tr = self._tr_sum.value
+        if math.isnan(tr) or math.isnan(self._pos.value) or math.isnan(self._neg.value) or tr == 0:
+            return NAN
+        pos, neg = self._pos.value / tr, self._neg.value / tr
+        return 100.0 * abs(pos - neg) / (pos + neg) if pos + neg else NAN
+
+
+class OBV(Indicator):
+    source = None
+
+    def __init__(self):
+        super().__init__()
+        self._prev_close = NAN
+        self._undo = None
+
+    def update(self, row):
+        close, volume = row[4], row[5]
+        self._undo = (self.value, self._prev_close)
+        obv = 0.0 if math.isnan(self.value) else self.value
+        if not math.isnan(self._prev_close):
+            if close > self._prev_close:
+                obv += volume
+            elif close < self._prev_close:
+                obv -= volume
+        self.value = obv
+        self._prev_close = close
+        self._updated = True
+
+    def rollback(self):
+        self.value, self._prev_close = self._undo
+        self._updated = False
+
+
+class VWAP(Indicator):
+    """成交量加权价：period>0为滚动窗口，0为累计"""
+    source = None
+
+    def __init__(self, period: int = 0, price: str = 'typical'):
+        super().__init__()
+        self.price = price
+        self._pv = RollingSum(period, None) if period else None
+        self._vol = RollingSum(period, None) if period else None
+        self._cum = (0.0, 0.0)
+        self._undo = None
+
+    def update(self, row):
+        price, volume = _field(row, self.price), row[5]
+        if self._pv is not None:
+            self._pv.update(price * volume)
+            self._vol.update(volume)
+            pv, vol = self._pv.value, self._vol.value
+        else:
+            self._undo = self._cum
+            pv, vol = self._cum[0] + price * volume, self._cum[1] + volume
+            self._cum = (pv, vol)
+        self.value = pv / vol if vol else NAN
+        self._updated = True
+
+    def rollback(self):
+        if self._pv is not None:
+            self._pv.rollback()
+            self._vol.rollback()
+            pv, vol = self._pv.value, self._vol.value
+        else:
+            self._cum = self._undo
+            pv, vol = self._cum
+        self.value = pv / vol if vol and not math.isnan(vol) else NAN
+        self._updated = False
+
+
+class Bollinger(Indicator):
+    """布林带，value为 (中轨, 上轨, 下轨)"""
+
+    def __init__(self, period: int = 20, k: float = 2.0, source='close'):
+        super().__init__()
+        self.source = source
+        self.k = k
+        self._mean = SMA(period, None)
+        self._std = RollingStd(period, None)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, x):
+        self._mean.update(x)
+        self._std.update(x)
+        self.value = self._result()
+        self._updated = True
+
+    def rollback(self):
+        self._mean.rollback()
+        self._std.rollback()
+        self.value = self._result()
+        self._updated = False
+
+    def _result(self) -> Tuple[float, float, float]:
+        mid, std = self._mean.value, self._std.value
+        return (mid, mid + self.k * std, mid - self.k * std)
+
+
+KINDS = {
+    'sum': RollingSum,
+    'sma': SMA,
+    'std': RollingStd,
+    'ema': EMA,
+    'macd': MACD,
+    'roc': ROC,
+    'lag': Lag,
+    'max': RollingMax,
+    'min': RollingMin,
+    'rsi': RSI,
+    'tr': TrueRange,
+    'atr': ATR,
+    'dx': DX,
+    'obv': OBV,
+    'vwap': VWAP,
+    'bbands': Bollinger,
+}
+
+
+class IndicatorSet:
+    """单个 (symbol, timeframe) 的指标集合。相同spec只计算一次，被依赖的指标先于使用者更新"""
+
+    def __init__(self):
+        self._specs: List[Spec] = []
+        self._indicators: Dict[Spec, Indicator] = {}
+        self._last_ts: Optional[float] = None
+
+    def require(self, specs: Iterable[Spec]) -> bool:
+        """登记所需指标；有新增时清空状态，下次sync从头回放K线预热"""
+        added = False
+        for spec in specs:
+            if spec not in self._indicators:
+                self._register(spec)
+                added = True
+        if added:
+            self._reset()
+        return added
+
+    def _register(self, spec: Spec):
+        indicator = KINDS[spec[0]](*spec[1:])
+        if isinstance(indicator.source, tuple) and indicator.source not in self._indicators:
+            self._register(indicator.source)
+        self._indicators[spec] = indicator
+        self._specs.append(spec)
+
+    def _reset(self):
+        self._indicators = {spec: KINDS[spec[0]](*spec[1:]) for spec in self._specs}
+        self._last_ts = None
+
+    def sync(self, rows: np.ndarray):
+        """按时间戳合并K线 (timestamp, open, high, low, close, volume)：只处理最后一根及之后的K线"""
+        if len(rows) == 0:
+            return
+        start = 0 if self._last_ts is None else int(np.searchsorted(rows[:, 0], self._last_ts, side='left'))
+        for row in rows[start:]:
+            ts = row[0]
+            if self._last_ts is not None and ts < self._last_ts:
+                continue
+            replace = ts == self._last_ts
+            for spec in self._specs:
+                indicator = self._indicators[spec]
+                if indicator.source is None:
+                    x = row
+                elif isinstance(indicator.source, tuple):
+                    x = self._indicators[indicator.source].value
+                else:
+                    x = _field(row, indicator.source)
+                if replace:
+                    indicator.replace(x)
+                else:
+                    indicator.update(x)
+            self._last_ts = ts
+
+    def values(self, specs: Iterable[Spec]) -> Mapping[Spec, float]:
+        """只读结果 {spec: value}"""
+        return MappingProxyType({spec: self._indicators[spec].value for spec in specs})
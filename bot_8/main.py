@@ -1,11 +1,8 @@
 import sys
 import signal
-import time
+import asyncio
 from datetime import datetime, timezone
-import threading
-from typing import Dict, Optional
-import json
-import queue
+from typing import Dict, List, Optional
 
 from market_data import MarketData
 from order_manager import OrderManager
@@ -16,37 +13,36 @@ from strategies.strategy_ma_trend import MATrendStrategy
 from strategies.strategy_breakout import BreakoutStrategy
 from strategies.strategy_arbitrage import ArbitrageStrategy
 from data_storage import DataStorage
+from exchange_health import ExchangeHealth
 from logger import Logger
 from config import Config
 
 class TradingSystem:
+    """异步交易系统：行情 -> 策略 -> 风控 -> 执行 四个阶段由有界队列串联。
+    每个交易对一个行情任务并发运行；下游队列满时上游await等待（背压），不会无限堆积。"""
+
     def __init__(self):
         self.logger = Logger("TradingSystem")
         self.running = True
         self.initialized = False
+        self._tasks: List[asyncio.Task] = []
         
         # 初始化数据存储
         self.data_storage = DataStorage()
         
-        # 初始化消息队列
-        self.message_queue = queue.Queue()
+        # 消息队列与流水线队列在事件循环中创建（见run）
+        self.message_queue: Optional[asyncio.Queue] = None
         
         try:
             # 初始化各个组件
             self._initialize_components()
             
-            # 设置信号处理
-            self._setup_signal_handlers()
-            
-            # 启动监控线程
-            self._start_monitor_threads()
-            
             self.initialized = True
             self.logger.info("Trading system initialized successfully")
             
         except Exception as e:
             self.logger.critical(f"Failed to initialize trading system: {str(e)}")
-            self.shutdown()
+            asyncio.run(self.shutdown())
             sys.exit(1)
             
     def _initialize_components(self):
@@ -64,114 +60,170 @@ class TradingSystem:
             # 仓位管理模块
             self.position_manager = PositionManager(Config.PRIMARY_EXCHANGE)
             
-            # 策略实例化
-            self.strategies = {
-                'mean_reversion': MeanReversionStrategy(Config.PRIMARY_EXCHANGE, None),
-                'ma_trend': MATrendStrategy(Config.PRIMARY_EXCHANGE, None),
-                'breakout': BreakoutStrategy(Config.PRIMARY_EXCHANGE, None),
-                'arbitrage': ArbitrageStrategy(Config.PRIMARY_EXCHANGE, None)
-            }
-            
             # 加载交易对配置
             self.trading_pairs = Config.TRADING_PAIRS
             
+            # 交易所健康探测（后台线程，下单延迟也会上报）
+            self.exchange_health = ExchangeHealth()
+            self.exchange_health.watch(Config.PRIMARY_EXCHANGE, self.market_data.exchange, self.trading_pairs[0])
+            
+            # 策略实例化（每个交易对一组）
+            self.strategies = {
+                symbol: {
+                    'mean_reversion': MeanReversionStrategy(Config.PRIMARY_EXCHANGE, symbol),
+                    'ma_trend': MATrendStrategy(Config.PRIMARY_EXCHANGE, symbol),
+                    'breakout': BreakoutStrategy(Config.PRIMARY_EXCHANGE, symbol),
+                    'arbitrage': ArbitrageStrategy(Config.PRIMARY_EXCHANGE, symbol)
+                }
+                for symbol in self.trading_pairs
+            }
+            
         except Exception as e:
             self.logger.error(f"Error initializing components: {str(e)}")
             raise
             
+    async def run(self):
+        """启动流水线并运行到收到停止信号"""
+        params = Config.PIPELINE
+        self.strategy_queue = asyncio.Queue(maxsize=params['strategy_queue_size'])
+        self.signal_queue = asyncio.Queue(maxsize=params['signal_queue_size'])
+        self.order_queue = asyncio.Queue(maxsize=params['order_queue_size'])
+        self.message_queue = asyncio.Queue(maxsize=1000)
+        self._queued_symbols = set()
+        self._last_evaluated: Dict[str, float] = {}
+        self._stopped = asyncio.Event()
+        
+        # 设置信号处理
+        self._setup_signal_handlers()
+        self.exchange_health.start()
+        
+        coroutines = [self._market_data_loop(symbol) for symbol in self.trading_pairs]
+        coroutines += [self._strategy_worker() for _ in range(params['strategy_workers'])]
+        coroutines += [self._risk_worker() for _ in range(params['risk_workers'])]
+        coroutines += [self._execution_worker() for _ in range(params['execution_workers'])]
+        coroutines += [
+            self._risk_monitor_loop(),
+            self._message_processing_loop(),
+            self.order_manager.monitor_orders(),
+            self.risk_manager.run_periodic_checks(Config.RISK_CHECK_INTERVAL)
+        ]
+        self._tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+        self.logger.info(f"Trading pipeline started: {len(self.trading_pairs)} symbols")
+        
+        await self._stopped.wait()
+        await self.shutdown()
+            
     def _setup_signal_handlers(self):
         """设置信号处理器"""
-        def signal_handler(signum, frame):
+        def signal_handler():
             self.logger.info("Received termination signal")
-            self.shutdown()
+            self.stop()
             
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, signal_handler)
+        loop.add_signal_handler(signal.SIGTERM, signal_handler)
         
-    def _start_monitor_threads(self):
-        """启动监控线程"""
-        # 市场数据更新线程
-        threading.Thread(
-            target=self._market_data_update_loop,
-            daemon=True
-        ).start()
-        
-        # 策略执行线程
-        threading.Thread(
-            target=self._strategy_execution_loop,
-            daemon=True
-        ).start()
-        
-        # 风控监控线程
-        threading.Thread(
-            target=self._risk_monitor_loop,
-            daemon=True
-        ).start()
-        
-        # 消息处理线程
-        threading.Thread(
-            target=self._message_processing_loop,
-            daemon=True
-        ).start()
+    def stop(self):
+        self.running = False
+        self._stopped.set()
         
-    def _market_data_update_loop(self):
-        """市场数据更新循环"""
+    async def _market_data_loop(self, symbol: str):
+        """单个交易对的行情任务：按固定节拍刷新K线，到策略间隔时把交易对送入策略队列"""
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
         while self.running:
             try:
-                for symbol in self.trading_pairs:
-                    self.market_data.update_market_data(symbol, Config.BASE_TIMEFRAME)
-                    
-                time.sleep(Config.MARKET_UPDATE_INTERVAL)
+                await self.market_data.refresh_async(symbol, Config.BASE_TIMEFRAME)
                 
+                last = self._last_evaluated.get(symbol)
+                due = last is None or loop.time() - last >= Config.STRATEGY_INTERVAL
+                if due and symbol not in self._queued_symbols:
+                    self._queued_symbols.add(symbol)
+                    await self.strategy_queue.put(symbol)
+                    
             except Exception as e:
-                self.logger.error(f"Error updating market data: {str(e)}")
-                self.message_queue.put({
-                    'type': 'error',
-                    'component': 'market_data',
-                    'message': str(e)
-                })
+                self.logger.error(f"Error updating market data for {symbol}: {str(e)}")
+                self._report_error('market_data', e)
                 
-    def _strategy_execution_loop(self):
-        """策略执行循环"""
-        while self.running:
+            next_run = max(next_run + Config.MARKET_UPDATE_INTERVAL, loop.time())
+            await asyncio.sleep(next_run - loop.time())
+                
+    async def _strategy_worker(self):
+        """策略阶段：缓存过期时指标计算会同步拉取K线并持有线程锁，放到线程池执行"""
+        loop = asyncio.get_running_loop()
+        while True:
+            symbol = await self.strategy_queue.get()
+            self._queued_symbols.discard(symbol)
+            self._last_evaluated[symbol] = loop.time()
             try:
-                for symbol in self.trading_pairs:
-                    # 获取市场状态
-                    market_state = self.market_data.get_market_state(symbol)
-                    
-                    # 选择合适的策略
-                    strategy = self._select_strategy(market_state)
+                signal = await asyncio.to_thread(self._evaluate_strategy, symbol)
+                if signal['action'] != 'hold':
+                    await self.signal_queue.put((symbol, signal))
                     
-                    # 检查风控状态
-                    if not self.risk_manager.check_trading_allowed(symbol):
-                        continue
-                        
-                    # 生成交易信号
-                    signal = strategy.generate_signal()
-                    
-                    # 执行交易
-                    if signal['action'] != 'hold':
-                        self._execute_trade(symbol, signal)
-                        
-                time.sleep(Config.STRATEGY_INTERVAL)
+            except Exception as e:
+                self.logger.error(f"Error in strategy execution for {symbol}: {str(e)}")
+                self._report_error('strategy', e)
+            finally:
+                self.strategy_queue.task_done()
                 
+    async def _risk_worker(self):
+        """风控阶段：风控与仓位计算含同步REST调用，放到线程池执行"""
+        while True:
+            symbol, signal = await self.signal_queue.get()
+            try:
+                amount = await asyncio.to_thread(self._check_trade_risk, symbol, signal)
+                if amount:
+                    await self.order_queue.put((symbol, signal, amount))
             except Exception as e:
-                self.logger.error(f"Error in strategy execution: {str(e)}")
-                self.message_queue.put({
-                    'type': 'error',
-                    'component': 'strategy',
-                    'message': str(e)
-                })
+                self.logger.error(f"Error in risk check for {symbol}: {str(e)}")
+                self._report_error('risk', e)
+            finally:
+                self.signal_queue.task_done()
                 
-    def _risk_monitor_loop(self):
+    def _evaluate_strategy(self, symbol: str) -> Dict:
+        """获取市场状态，选择合适的策略并生成交易信号"""
+        market_state = self.market_data.get_market_state(symbol)
+        strategy = self._select_strategy(symbol, market_state)
+        return strategy.generate_signal()
+        
+    def _check_trade_risk(self, symbol: str, signal: Dict) -> Optional[float]:
+        """验证信号并通过风控，返回下单数量；不允许交易时返回None"""
+        # 验证信号
+        if not self._validate_signal(signal):
+            return None
+            
+        # 检查风控状态
+        if not self.risk_manager.check_trading_allowed(symbol):
+            return None
+            
+        # 计算交易量
+        amount = self.position_manager.calculate_position_size(
+            symbol,
+            signal['price'],
+            signal.get('size_factor', 1.0)
+        )
+        
+        # 检查风控限制
+        if not self.risk_manager.check_position_risk(symbol, signal['action'], amount, signal['price']):
+            return None
+        return amount
+                
+    async def _execution_worker(self):
+        """执行阶段"""
+        while True:
+            symbol, signal, amount = await self.order_queue.get()
+            try:
+                await self._execute_trade(symbol, signal, amount)
+            finally:
+                self.order_queue.task_done()
+                
+    async def _risk_monitor_loop(self):
         """风控监控循环"""
         while self.running:
             try:
-                # 检查账户风险
-                account_risk = self.risk_manager.check_account_risk()
-                
-                # 检查持仓风险
-                position_risk = self.risk_manager.check_position_risks()
+                # 检查账户风险与持仓风险（同步REST调用，放到线程池）
+                account_risk = await asyncio.to_thread(self.risk_manager.check_account_risk)
+                position_risk = await asyncio.to_thread(self.risk_manager.check_position_risks)
                 
                 # 记录风险指标
                 self.data_storage.save_risk_metrics({
@@ -180,26 +232,28 @@ class TradingSystem:
                     'position_risk': position_risk
                 })
                 
-                time.sleep(Config.RISK_CHECK_INTERVAL)
-                
             except Exception as e:
                 self.logger.error(f"Error in risk monitoring: {str(e)}")
-                self.message_queue.put({
-                    'type': 'error',
-                    'component': 'risk',
-                    'message': str(e)
-                })
+                self._report_error('risk', e)
+                
+            await asyncio.sleep(Config.RISK_CHECK_INTERVAL)
                 
-    def _message_processing_loop(self):
+    async def _message_processing_loop(self):
         """消息处理循环"""
-        while self.running:
-            try:
-                message = self.message_queue.get(timeout=1)
-                self._handle_message(message)
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.error(f"Error processing message: {str(e)}")
+        while True:
+            message = await self.message_queue.get()
+            self._handle_message(message)
+            
+    def _report_error(self, component: str, error: Exception):
+        """错误消息入队；队列满时丢弃，不阻塞出错的阶段"""
+        try:
+            self.message_queue.put_nowait({
+                'type': 'error',
+                'component': component,
+                'message': str(error)
+            })
+        except asyncio.QueueFull:
+            self.logger.warning(f"Message queue full, dropped error from {component}")
                 
     def _handle_message(self, message: Dict):
         """处理系统消息"""
@@ -213,36 +267,22 @@ class TradingSystem:
         except Exception as e:
             self.logger.error(f"Error handling message: {str(e)}")
             
-    def _select_strategy(self, market_state: str) -> object:
+    def _select_strategy(self, symbol: str, market_state: str) -> object:
         """根据市场状态选择策略"""
+        strategies = self.strategies[symbol]
         strategy_mapping = {
-            'ranging': self.strategies['mean_reversion'],
-            'trending': self.strategies['ma_trend'],
-            'volatile': self.strategies['breakout'],
-            'sideways': self.strategies['arbitrage']
+            'ranging': strategies['mean_reversion'],
+            'trending': strategies['ma_trend'],
+            'volatile': strategies['breakout'],
+            'sideways': strategies['arbitrage']
         }
-        return strategy_mapping.get(market_state, self.strategies['mean_reversion'])
+        return strategy_mapping.get(market_state, strategies['mean_reversion'])
         
-    def _execute_trade(self, symbol: str, signal: Dict):
+    async def _execute_trade(self, symbol: str, signal: Dict, amount: float):
         """执行交易"""
         try:
-            # 验证信号
-            if not self._validate_signal(signal):
-                return
-                
-            # 计算交易量
-            amount = self.position_manager.calculate_position_size(
-                symbol,
-                signal['price'],
-                signal.get('size_factor', 1.0)
-            )
-            
-            # 检查风控限制
-            if not self.risk_manager.check_position_risk(symbol, signal['action'], amount):
-                return
-                
             # 执行订单
-            order = self.order_manager.place_order(
+            order = await self.order_manager.place_order_async(
                 symbol=symbol,
                 order_type='market',
                 side=signal['action'],
@@ -267,17 +307,22 @@ class TradingSystem:
         required_fields = ['action', 'price']
         return all(field in signal for field in required_fields)
         
-    def shutdown(self):
+    async def shutdown(self):
         """关闭交易系统"""
         self.logger.info("Shutting down trading system...")
         self.running = False
         
+        # 停止流水线任务
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        
         try:
             # 关闭所有持仓
-            self.position_manager.close_all_positions("System shutdown")
+            await asyncio.to_thread(self.position_manager.close_all_positions, "System shutdown")
             
             # 取消所有未完成订单
-            self.order_manager.cancel_all_orders()
+            await asyncio.to_thread(self.order_manager.cancel_all_orders)
             
             # 保存最终状态
             self._save_final_state()
@@ -285,6 +330,17 @@ class TradingSystem:
             # 关闭数据存储连接
             self.data_storage.close()
             
+            # 关闭异步交易所连接
+            await self.order_manager.close()
+            await self.market_data.close()
+            
+            # 停止健康探测
+            await asyncio.to_thread(self.exchange_health.stop)
+            
+            # 写出剩余行情录制
+            if MarketData.recorder:
+                await asyncio.to_thread(MarketData.recorder.stop)
+            
         except Exception as e:
             self.logger.error(f"Error during shutdown: {str(e)}")
             
@@ -308,10 +364,9 @@ def main():
         sys.exit(1)
         
     try:
-        while trading_system.running:
-            time.sleep(1)
+        asyncio.run(trading_system.run())
     except KeyboardInterrupt:
-        trading_system.shutdown()
+        pass
         
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,48 +1,221 @@
+import asyncio
+import ccxt
+import ccxt.async_support as ccxt_async
+import threading
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 from config import Config
 from logger import Logger
+from market_recorder import MarketRecorder
+from candle_store import CandleStore
+from indicators import IndicatorSet, Spec
+import rate_limiter
+
+OHLCV_WINDOW = 200      # 指标计算使用的K线根数
+CANDLE_CAPACITY = 1000  # 每个 (symbol, timeframe) 保留的K线根数
+
+async def _acquire_threading_lock(lock: threading.Lock):
+    """在事件循环中等待线程锁：先非阻塞尝试，拿不到再到线程池里等。
+    等待的任务被取消时，线程池拿到锁后立即释放，避免锁泄漏导致该key之后全部死锁"""
+    if lock.acquire(blocking=False):
+        return
+    future = asyncio.get_running_loop().run_in_executor(None, lock.acquire)
+    try:
+        await asyncio.shield(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(lambda f: lock.release() if not f.cancelled() and f.result() else None)
+        raise
 
 class MarketData:
+    """按交易所单例：所有组件共用一个ccxt客户端（同一限速器）和一份K线缓存，
+    同一 (symbol, timeframe) 的并发请求合并为一次"""
+    _instances = {}
+    _lock = threading.Lock()
+    # 各实例共享一个录制器（后台线程写盘）
+    recorder: Optional[MarketRecorder] = None
+
+    def __new__(cls, exchange_id: str):
+        with cls._lock:
+            if exchange_id not in cls._instances:
+                cls._instances[exchange_id] = super().__new__(cls)
+            return cls._instances[exchange_id]
+
     def __init__(self, exchange_id: str):
+        if hasattr(self, 'initialized'):
+            return
         self.logger = Logger("MarketData")
-        self.exchange = getattr(ccxt, exchange_id)({
-            'apiKey': Config.EXCHANGES[exchange_id].api_key,
-            'secret': Config.EXCHANGES[exchange_id].api_secret,
+        self.exchange_id = exchange_id
+        if Config.MARKET_RECORDER["enabled"] and MarketData.recorder is None:
+            MarketData.recorder = MarketRecorder(
+                Config.MARKET_RECORDER["root"], flush_interval=Config.MARKET_RECORDER["flush_interval"]
+            )
+            MarketData.recorder.start()
+        self.exchange = rate_limiter.install(getattr(ccxt, exchange_id)(self._exchange_config()))
+        self._async_exchange = None
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.data_cache: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self.candles: Dict[Tuple[str, str], CandleStore] = {}
+        self.indicator_sets: Dict[Tuple[str, str], IndicatorSet] = {}
+        self.last_update: Dict[Tuple[str, str], datetime] = {}
+        self.subscribers: List[Callable[[str, str, pd.DataFrame], None]] = []
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0}
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.initialized = True
+
+    def _exchange_config(self) -> dict:
+        return {
+            'apiKey': Config.EXCHANGES[self.exchange_id].api_key,
+            'secret': Config.EXCHANGES[self.exchange_id].api_secret,
             'enableRateLimit': True,
             'options': {'defaultType': 'future'}
-        })
-        self.data_cache = {}
-        self.last_update = {}
-        
+        }
+
+    @property
+    def async_exchange(self):
+        """ccxt.async_support客户端，首次在事件循环中使用时创建"""
+        if self._async_exchange is None:
+            self._async_exchange = rate_limiter.install(getattr(ccxt_async, self.exchange_id)(self._exchange_config()))
+        return self._async_exchange
+
+    async def close(self):
+        if self._async_exchange is not None:
+            await self._async_exchange.close()
+            self._async_exchange = None
+
+    def subscribe(self, callback: Callable[[str, str, pd.DataFrame], None]):
+        """注册K线更新回调 callback(symbol, timeframe, df)，df为共享缓存，只读"""
+        self.subscribers.append(callback)
+
+    def _is_fresh(self, key: Tuple[str, str]) -> bool:
+        updated = self.last_update.get(key)
+        return updated is not None and datetime.now() - updated < timedelta(seconds=Config.MARKET_UPDATE_INTERVAL)
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
     def update_market_data(self, symbol: str, timeframe: str) -> pd.DataFrame:
-        """获取并更新市场数据"""
+        """获取并更新市场数据（返回副本，调用方可自由添加列）"""
+        return self.refresh(symbol, timeframe).copy()
+
+    def refresh(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """数据过期时增量拉取K线并重算基础指标，返回共享缓存（只读）"""
+        key = (symbol, timeframe)
+        if self._is_fresh(key):
+            self.stats['cache_hits'] += 1
+            return self.data_cache[key]
         try:
-            current_time = datetime.now()
-            if (symbol in self.last_update and 
-                current_time - self.last_update[symbol] < timedelta(seconds=Config.MARKET_UPDATE_INTERVAL)):
-                return self.data_cache[symbol][timeframe]
-
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=200)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-
-            # 计算基础技术指标
-            df = self.calculate_technical_indicators(df)
-            
-            if symbol not in self.data_cache:
-                self.data_cache[symbol] = {}
-            self.data_cache[symbol][timeframe] = df
-            self.last_update[symbol] = current_time
-            
-            return df
+            with self._key_lock(key):
+                # 等锁期间其他组件已拉取过，直接复用
+                if self._is_fresh(key):
+                    self.stats['coalesced'] += 1
+                    return self.data_cache[key]
+
+                self.stats['requests'] += 1
+                since = self._since(key)
+                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=OHLCV_WINDOW)
+                df = self._store_candles(symbol, timeframe, since, ohlcv)
         except Exception as e:
             self.logger.error(f"Error updating market data: {str(e)}")
             raise
 
+        self._notify(symbol, timeframe, df)
+        return df
+
+    async def refresh_async(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """refresh的异步版本：通过ccxt.async_support拉取，不阻塞事件循环；同一key的并发调用合并为一次"""
+        key = (symbol, timeframe)
+        if self._is_fresh(key):
+            self.stats['cache_hits'] += 1
+            return self.data_cache[key]
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(inflight)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            self.stats['requests'] += 1
+            since = self._since(key)
+            ohlcv = await self.async_exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=OHLCV_WINDOW)
+            # 线程池中的同步refresh可能正持有该key锁并等待REST，不在事件循环里阻塞等锁
+            lock = self._key_lock(key)
+            await _acquire_threading_lock(lock)
+            try:
+                df = self._store_candles(symbol, timeframe, since, ohlcv)
+            finally:
+                lock.release()
+            future.set_result(df)
+        except Exception as e:
+            self.logger.error(f"Error updating market data: {str(e)}")
+            future.set_exception(e)
+            future.exception()  # 无人等待时避免 "exception never retrieved"
+            raise
+        finally:
+            del self._inflight[key]
+
+        self._notify(symbol, timeframe, df)
+        return df
+
+    def _notify(self, symbol: str, timeframe: str, df: pd.DataFrame):
+        for callback in self.subscribers:
+            try:
+                callback(symbol, timeframe, df)
+            except Exception as e:
+                self.logger.error(f"Market data subscriber error: {str(e)}")
+
+    def indicators(self, symbol: str, timeframe: str, specs: Iterable[Spec]) -> Mapping[Spec, float]:
+        """增量指标的最新值 {spec: value}（只读）。各组件共用同一份指标状态，相同spec只计算一次"""
+        return self.indicators_with_bars(symbol, timeframe, specs, 0)[0]
+
+    def indicators_with_bars(self, symbol: str, timeframe: str, specs: Iterable[Spec],
+                             n: int) -> Tuple[Mapping[Spec, float], np.ndarray]:
+        """指标最新值与最近n根K线的副本，在同一次持锁内取得，二者对应同一根K线"""
+        specs = list(specs)
+        self.refresh(symbol, timeframe)
+        key = (symbol, timeframe)
+        with self._key_lock(key):
+            indicator_set = self.indicator_sets.setdefault(key, IndicatorSet())
+            indicator_set.require(specs)
+            store = self.candles[key]
+            indicator_set.sync(store.array())
+            bars = store.array(n).copy() if n else np.empty((0, 6))
+            return indicator_set.values(specs), bars
+
+    def _since(self, key: Tuple[str, str]) -> Optional[int]:
+        """增量拉取起点：最后一根（可能未收盘）K线；首次或断档超过一个窗口时返回None，全量拉取以免窗口中间出现缺口"""
+        store = self.candles.get(key)
+        since = store.last_timestamp if store else None
+        timeframe_ms = self.exchange.parse_timeframe(key[1]) * 1000
+        if since is None or self.exchange.milliseconds() - since >= OHLCV_WINDOW * timeframe_ms:
+            return None
+        return since
+
+    def _store_candles(self, symbol: str, timeframe: str, since: Optional[int], ohlcv: List) -> pd.DataFrame:
+        """合并K线（原地覆盖未收盘K线后追加新K线）并重算基础指标，调用方持有key锁"""
+        key = (symbol, timeframe)
+        if since is None:
+            self.candles[key] = CandleStore(CANDLE_CAPACITY)
+        store = self.candles[key]
+        store.update(ohlcv)
+        if self.recorder:
+            self.recorder.record_ohlcv(self.exchange_id, symbol, timeframe, ohlcv)
+
+        # 计算基础技术指标
+        df = self.calculate_technical_indicators(store.frame(OHLCV_WINDOW))
+        self.data_cache[key] = df
+        self.last_update[key] = datetime.now()
+        return df
+
+    def get_candles(self, symbol: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        """最近n根K线的副本 (timestamp, open, high, low, close, volume)，持key锁复制，不触发网络请求"""
+        key = (symbol, timeframe)
+        with self._key_lock(key):
+            store = self.candles.get(key)
+            return store.array(n).copy() if store else np.empty((0, 6))
+
     def calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """计算关键技术指标"""
         # 价格动量指标
@@ -1,6 +1,8 @@
+import asyncio
 import time
 import json
-import threading
+import ccxt
+import ccxt.async_support as ccxt_async
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_DOWN
@@ -8,12 +10,16 @@ from collections import deque
 import numpy as np
 from config import Config
 from logger import Logger
+from exchange_health import ExchangeHealth
+from order_tracker import OrderTracker
+import rate_limiter
 
 class OrderManager:
     def __init__(self, exchange_id: str):
         self.logger = Logger("OrderManager")
         self.exchange_id = exchange_id
         self.exchange = self._initialize_exchange()
+        self.health = ExchangeHealth()
         
         # 订单管理
         self.active_orders = {}
@@ -23,38 +29,53 @@ class OrderManager:
         
         # 性能统计
         self.execution_stats = {
-            'slippage': [],
-            'execution_time': [],
-            'fill_rates': [],
+            'slippage': deque(maxlen=1000),
+            'execution_time': deque(maxlen=1000),
+            'fill_rates': deque(maxlen=1000),
             'rejection_reasons': {}
         }
         
-        # 限流控制
-        self.rate_limiter = self._initialize_rate_limiter()
+        # 异步客户端（订单状态由 monitor_orders 协程跟踪）
+        self._async_exchange = None
+        self.order_tracker = OrderTracker({}, poll_interval=Config.ORDER_QUERY_INTERVAL)
+        self.order_tracker.add_listener(self._on_order_update)
         
-        # 启动订单监控线程
-        self._start_order_monitor()
+    def _exchange_config(self) -> Dict:
+        return {
+            'apiKey': Config.EXCHANGES[self.exchange_id]['apiKey'],
+            'secret': Config.EXCHANGES[self.exchange_id]['secret'],
+            'enableRateLimit': True,
+            'options': {
+                'defaultType': 'future',
+                'adjustForTimeDifference': True,
+                'recvWindow': 60000
+            }
+        }
         
     def _initialize_exchange(self):
         """初始化交易所接口"""
         try:
             exchange_class = getattr(ccxt, self.exchange_id)
-            exchange = exchange_class({
-                'apiKey': Config.EXCHANGES[self.exchange_id]['apiKey'],
-                'secret': Config.EXCHANGES[self.exchange_id]['secret'],
-                'enableRateLimit': True,
-                'options': {
-                    'defaultType': 'future',
-                    'adjustForTimeDifference': True,
-                    'recvWindow': 60000
-                }
-            })
+            exchange = rate_limiter.install(exchange_class(self._exchange_config()))
             exchange.load_markets()
             return exchange
         except Exception as e:
             self.logger.error(f"Failed to initialize exchange: {str(e)}")
             raise
 
+    @property
+    def async_exchange(self):
+        """ccxt.async_support客户端，共用同步客户端已加载的市场信息"""
+        if self._async_exchange is None:
+            self._async_exchange = rate_limiter.install(getattr(ccxt_async, self.exchange_id)(self._exchange_config()))
+            self._async_exchange.set_markets(self.exchange.markets)
+        return self._async_exchange
+
+    async def close(self):
+        if self._async_exchange is not None:
+            await self._async_exchange.close()
+            self._async_exchange = None
+
     def place_order(self, symbol: str, 
                    order_type: str,
                    side: str, 
@@ -70,10 +91,6 @@ class OrderManager:
             if price:
                 price = self._normalize_price(symbol, price)
             
-            # 检查限流
-            if not self.rate_limiter.check_rate_limit('place_order'):
-                raise Exception("Rate limit exceeded")
-            
             # 记录下单时间
             order_start_time = time.time()
             
@@ -90,15 +107,45 @@ class OrderManager:
                     symbol, side, amount, price, order_params
                 )
             
-            # 记录订单
+            # 记录订单（由 monitor_orders 跟踪状态）
             self._record_order(order, order_start_time)
             
-            # 启动订单监控
-            self._monitor_order(order['id'], symbol)
+            return order
             
+        except Exception as e:
+            self.logger.error(f"Error placing order: {str(e)}")
+            self._record_order_failure(symbol, side, amount, str(e))
+            raise
+
+    async def place_order_async(self, symbol: str, 
+                                order_type: str,
+                                side: str, 
+                                amount: float,
+                                price: Optional[float] = None,
+                                params: Dict = None) -> Dict:
+        """
+        异步下单（ccxt.async_support），参数同place_order
+        """
+        try:
+            amount = self._normalize_amount(symbol, amount)
+            if price:
+                price = self._normalize_price(symbol, price)
+            
+            order_start_time = time.time()
+            order_params = self._build_order_params(symbol, side, params)
+            order = await self.async_exchange.create_order(
+                symbol, order_type, side, amount,
+                None if order_type == 'market' else price,
+                order_params
+            )
+            
+            self.health.record_rest(self.exchange_id, time.time() - order_start_time)
+            self._record_order(order, order_start_time)
             return order
             
         except Exception as e:
+            if isinstance(e, ccxt.NetworkError):
+                self.health.record_rest(self.exchange_id, None, ok=False)
             self.logger.error(f"Error placing order: {str(e)}")
             self._record_order_failure(symbol, side, amount, str(e))
             raise
@@ -110,6 +157,7 @@ class OrderManager:
         try:
             result = self.exchange.cancel_order(order_id, symbol)
             self._update_order_status(order_id, 'canceled')
+            self.order_tracker.untrack(self.exchange_id, order_id)
             self.logger.info(f"Order {order_id} canceled successfully")
             return True
         except Exception as e:
@@ -192,37 +240,11 @@ class OrderManager:
         
         self.order_history.append(order_info)
         self.active_orders[order['id']] = order_info
+        self.order_tracker.track(self.exchange_id, order)
         
         # 更新执行统计
         self.execution_stats['execution_time'].append(order_info['execution_time'])
 
-    def _monitor_order(self, order_id: str, symbol: str):
-        """
-        监控订单状态
-        """
-        def monitor():
-            try:
-                max_retries = 10
-                retry_count = 0
-                
-                while retry_count < max_retries:
-                    order = self.exchange.fetch_order(order_id, symbol)
-                    
-                    if order['status'] in ['closed', 'filled']:
-                        self._process_filled_order(order)
-                        break
-                    elif order['status'] in ['canceled', 'expired', 'rejected']:
-                        self._process_failed_order(order)
-                        break
-                        
-                    time.sleep(Config.ORDER_QUERY_INTERVAL)
-                    retry_count += 1
-                    
-            except Exception as e:
-                self.logger.error(f"Error monitoring order {order_id}: {str(e)}")
-                
-        threading.Thread(target=monitor, daemon=True).start()
-
     def _process_filled_order(self, order: Dict):
         """
         处理已成交订单
@@ -289,69 +311,47 @@ class OrderManager:
             'rejection_reasons': dict(self.execution_stats['rejection_reasons'])
         }
 
-    def _initialize_rate_limiter(self):
+    async def monitor_orders(self):
         """
-        初始化限流控制器
+        订单状态跟踪（由交易系统事件循环驱动）：私有WebSocket推送为主，
+        推送断开时按交易对批量查询挂单，不再逐单fetch_order
         """
-        return {
-            'place_order': {
-                'max_requests': 10,
-                'time_window': 1,  # 秒
-                'requests': deque(),
-            }
-        }
+        self.order_tracker.exchanges[self.exchange_id] = self.async_exchange
+        await self.order_tracker.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.order_tracker.stop()
 
-    def check_rate_limit(self, action: str) -> bool:
+    def _on_order_update(self, exchange_id: str, order: Dict):
         """
-        检查是否超过限流
+        订单状态变化回调，终态订单处理后移出活动列表
         """
-        limiter = self.rate_limiter.get(action)
-        if not limiter:
-            return True
-            
-        current_time = time.time()
-        
-        # 清理过期请求
-        while (limiter['requests'] and 
-               current_time - limiter['requests'][0] > limiter['time_window']):
-            limiter['requests'].popleft()
-            
-        # 检查是否可以发送新请求
-        if len(limiter['requests']) < limiter['max_requests']:
-            limiter['requests'].append(current_time)
-            return True
+        order_info = self.active_orders.get(order['id'])
+        if not order_info:
+            return
+        order_info['order'].update(order)
+        order = order_info['order']
             
-        return False
+        if order['status'] in ['closed', 'filled']:
+            self._process_filled_order(order)
+        elif order['status'] in ['canceled', 'expired', 'rejected']:
+            self._process_failed_order(order)
+            self._update_order_status(order['id'], order['status'])
+        else:
+            self._update_order_status(order['id'], order['status'])
 
-    def _start_order_monitor(self):
+    def _update_order_status(self, order_id: str, status: str):
         """
-        启动订单监控线程
+        更新本地订单状态，终态订单移出活动列表
         """
-        def monitor_orders():
-            while True:
-                try:
-                    self._check_active_orders()
-                    time.sleep(Config.ORDER_QUERY_INTERVAL)
-                except Exception as e:
-                    self.logger.error(f"Error in order monitor: {str(e)}")
-                    
-        threading.Thread(target=monitor_orders, daemon=True).start()
-
-    def _check_active_orders(self):
-        """
-        检查活动订单状态
-        """
-        for order_id in list(self.active_orders.keys()):
-            order_info = self.active_orders[order_id]
-            
-            try:
-                order = self.exchange.fetch_order(
-                    order_id,
-                    order_info['order']['symbol']
-                )
-                
-                if order['status'] != order_info['order']['status']:
-                    self._update_order_status(order_id, order['status'])
-                    
-            except Exception as e:
-                self.logger.error(f"Error checking order {order_id}: {str(e)}")
+        order_info = self.active_orders.get(order_id)
+        if not order_info:
+            return
+        order_info['order']['status'] = status
+        order_info['status_updates'].append({
+            'status': status,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+        if status in ['closed', 'filled', 'canceled', 'expired', 'rejected']:
+            del self.active_orders[order_id]
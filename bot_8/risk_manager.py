@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Optional, List
 from datetime import datetime, timedelta
+import asyncio
 import json
 import threading
 from decimal import Decimal
@@ -21,9 +22,6 @@ class RiskManager:
         # 加载风控配置
         self.load_risk_config()
         
-        # 初始化风控检查定时器
-        self._start_risk_check_timer()
-        
     def _init_daily_stats(self) -> Dict:
         """初始化每日统计数据"""
         return {
@@ -239,19 +237,16 @@ class RiskManager:
         }
         self.logger.critical(f"Risk alert: {json.dumps(alert, indent=2)}")
 
-    def _start_risk_check_timer(self):
+    async def run_periodic_checks(self, interval: float = 60):
         """
-        启动定期风险检查定时器
+        定期风险检查（由交易系统事件循环驱动），默认每分钟一次
         """
-        def risk_check():
-            while True:
-                try:
-                    self._periodic_risk_check()
-                    time.sleep(60)  # 每分钟检查一次
-                except Exception as e:
-                    self.logger.error(f"Error in periodic risk check: {str(e)}")
-                
-        threading.Thread(target=risk_check, daemon=True).start()
+        while True:
+            try:
+                self._periodic_risk_check()
+            except Exception as e:
+                self.logger.error(f"Error in periodic risk check: {str(e)}")
+            await asyncio.sleep(interval)
 
     def _periodic_risk_check(self):
         """
@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 from typing import Dict, List, Tuple
 from datetime import datetime
 from .strategy_base import StrategyBase
@@ -12,19 +11,25 @@ class ArbitrageStrategy(StrategyBase):
         self.price_threshold = 0.002  # 价格偏离阈值
         self.min_profit_threshold = 0.003  # 最小利润阈值
         self.position_holding_time = 3600  # 最大持仓时间（秒）
+        self.indicator_specs = {
+            'vwap': ('vwap', 20, 'close'),
+            'price_ma': ('sma', 20, 'close'),
+            'price_std': ('std', 20, 'close'),
+            'returns_std': ('std', 20, ('roc', 1, 'close')),
+            'volume_ma': ('sma', 20, 'volume'),
+            'pressure_ma': ('sma', 20, 'close_location')
+        }
         
     def generate_signal(self) -> dict:
         try:
-            df = self.market_data.update_market_data(self.symbol, Config.BASE_TIMEFRAME)
-            
             # 计算套利指标
-            indicators = self._calculate_arbitrage_indicators(df)
+            indicators = self._calculate_arbitrage_indicators()
             
             # 评估套利机会
-            arb_opportunity = self._evaluate_arbitrage_opportunity(df, indicators)
+            arb_opportunity = self._evaluate_arbitrage_opportunity(indicators)
             
-            current_price = df['close'].iloc[-1]
-            signal = self._generate_arbitrage_signal(df, indicators, arb_opportunity, current_price)
+            current_price = indicators['close']
+            signal = self._generate_arbitrage_signal(indicators, arb_opportunity, current_price)
             
             self.logger.info(
                 f"Arbitrage Signal - Price: {current_price:.2f}, "
@@ -40,53 +45,39 @@ class ArbitrageStrategy(StrategyBase):
             self.logger.error(f"Error generating arbitrage signal: {str(e)}")
             raise
             
-    def _calculate_arbitrage_indicators(self, df: pd.DataFrame) -> Dict:
+    def _calculate_arbitrage_indicators(self) -> Dict:
         """
-        计算套利相关指标
+        计算套利相关指标（增量更新）
         """
-        # 计算VWAP
-        df['vwap'] = (df['close'] * df['volume']).rolling(window=20).sum() / \
-                     df['volume'].rolling(window=20).sum()
-        
-        # 计算价格均值和标准差
-        df['price_ma'] = df['close'].rolling(window=20).mean()
-        df['price_std'] = df['close'].rolling(window=20).std()
-        df['z_score'] = (df['close'] - df['price_ma']) / df['price_std']
-        
-        # 计算价格波动率
-        df['returns'] = df['close'].pct_change()
-        df['volatility'] = df['returns'].rolling(window=20).std() * np.sqrt(365 * 24)
-        
-        # 计算流动性指标
-        df['volume_ma'] = df['volume'].rolling(window=20).mean()
-        df['liquidity_score'] = df['volume'] / df['volume_ma']
-        
-        # 计算价格压力
-        df['buying_pressure'] = (df['close'] - df['low']) / (df['high'] - df['low'])
-        df['pressure_ma'] = df['buying_pressure'].rolling(window=20).mean()
-        
-        # 计算市场效率系数
-        price_distance = abs(df['close'] - df['close'].shift(20))
-        path_length = df['returns'].abs().rolling(window=20).sum()
-        df['efficiency_ratio'] = price_distance / path_length
-        
-        current_price = df['close'].iloc[-1]
-        fair_value = df['vwap'].iloc[-1]
+        values, bars = self.indicator_snapshot(self.indicator_specs, 21)
+        closes = bars[:, 4]
+        current_price = closes[-1]
+        volume = bars[-1, 5]
+        
+        # 计算价格Z分数
+        z_score = (current_price - values['price_ma']) / values['price_std'] if values['price_std'] else np.nan
+        
+        # 计算市场效率系数（最近20根，固定长度切片）
+        price_distance = abs(current_price - closes[0])
+        path_length = np.abs(np.diff(closes) / closes[:-1]).sum()
+        efficiency_ratio = price_distance / path_length if len(closes) == 21 and path_length else np.nan
+        
+        fair_value = values['vwap']
         price_deviation = (current_price - fair_value) / fair_value
         
         return {
+            'close': current_price,
             'fair_value': fair_value,
             'price_deviation': price_deviation,
-            'z_score': df['z_score'].iloc[-1],
-            'volatility': df['volatility'].iloc[-1],
-            'liquidity_score': df['liquidity_score'].iloc[-1],
-            'buying_pressure': df['pressure_ma'].iloc[-1],
-            'efficiency_ratio': df['efficiency_ratio'].iloc[-1],
-            'vwap': df['vwap'].iloc[-1]
+            'z_score': z_score,
+            'volatility': values['returns_std'] * np.sqrt(365 * 24),
+            'liquidity_score': volume / values['volume_ma'] if values['volume_ma'] else np.nan,
+            'buying_pressure': values['pressure_ma'],
+            'efficiency_ratio': efficiency_ratio,
+            'vwap': fair_value
         }
         
-    def _evaluate_arbitrage_opportunity(self, df: pd.DataFrame, 
-                                     indicators: Dict) -> Dict:
+    def _evaluate_arbitrage_opportunity(self, indicators: Dict) -> Dict:
         """
         评估套利机会质量
         """
@@ -123,8 +114,7 @@ class ArbitrageStrategy(StrategyBase):
             'expected_profit': expected_profit
         }
         
-    def _generate_arbitrage_signal(self, df: pd.DataFrame, 
-                                 indicators: Dict,
+    def _generate_arbitrage_signal(self, indicators: Dict,
                                  arb_opportunity: Dict,
                                  current_price: float) -> Dict:
         """
@@ -1,9 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
 from config import Config
 from logger import Logger
 from market_data import MarketData
+from indicators import Spec
 
 class StrategyBase(ABC):
     def __init__(self, exchange_id: str, symbol: str):
@@ -22,6 +24,17 @@ class StrategyBase(ABC):
         - 'reason': str
         """
         pass
+
+    def indicator_values(self, specs: Dict[str, Spec], timeframe: str = Config.BASE_TIMEFRAME) -> Dict[str, float]:
+        """按名称取增量指标最新值，指标状态由同一交易所的所有策略共享"""
+        values = self.market_data.indicators(self.symbol, timeframe, specs.values())
+        return {name: values[spec] for name, spec in specs.items()}
+
+    def indicator_snapshot(self, specs: Dict[str, Spec], bars: int,
+                           timeframe: str = Config.BASE_TIMEFRAME) -> Tuple[Dict[str, float], np.ndarray]:
+        """指标最新值与最近bars根K线（副本），二者取自同一根K线，不会读到更新到一半的数据"""
+        values, candles = self.market_data.indicators_with_bars(self.symbol, timeframe, specs.values(), bars)
+        return {name: values[spec] for name, spec in specs.items()}, candles
     
     def get_position_size(self, price: float) -> float:
         """
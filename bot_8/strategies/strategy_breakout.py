@@ -1,9 +1,7 @@
 import numpy as np
-import pandas as pd
 from typing import Dict, List, Tuple
 from datetime import datetime
 from .strategy_base import StrategyBase
-from config import Config
 
 class BreakoutStrategy(StrategyBase):
     def __init__(self, exchange_id: str, symbol: str):
@@ -12,19 +10,26 @@ class BreakoutStrategy(StrategyBase):
         self.breakout_period = 20
         self.volume_threshold = 2.0  # 突破确认的成交量放大倍数
         self.volatility_filter = 0.02  # 最小波动率阈值
+        self.indicator_specs = {
+            'upper_channel': ('max', self.breakout_period, 'high'),
+            'lower_channel': ('min', self.breakout_period, 'low'),
+            'atr': ('atr', 14),
+            'volume_ma': ('sma', 20, 'volume'),
+            'volume_std': ('std', 20, 'volume'),
+            'momentum': ('roc', 5, 'close'),
+            'momentum_ma': ('sma', 10, ('roc', 5, 'close'))
+        }
         
     def generate_signal(self) -> dict:
         try:
-            df = self.market_data.update_market_data(self.symbol, Config.BASE_TIMEFRAME)
-            
             # 计算突破指标
-            indicators = self._calculate_breakout_indicators(df)
+            indicators, bars = self._calculate_breakout_indicators()
             
             # 评估突破质量
-            breakout_quality = self._evaluate_breakout_quality(df, indicators)
+            breakout_quality = self._evaluate_breakout_quality(bars, indicators)
             
-            current_price = df['close'].iloc[-1]
-            signal = self._generate_breakout_signal(df, indicators, breakout_quality, current_price)
+            current_price = bars[-1, 4]
+            signal = self._generate_breakout_signal(bars, indicators, breakout_quality, current_price)
             
             self.logger.info(
                 f"Breakout Signal - Price: {current_price:.2f}, "
@@ -40,66 +45,36 @@ class BreakoutStrategy(StrategyBase):
             self.logger.error(f"Error generating breakout signal: {str(e)}")
             raise
             
-    def _calculate_breakout_indicators(self, df: pd.DataFrame) -> Dict:
+    def _calculate_breakout_indicators(self) -> Tuple[Dict, np.ndarray]:
         """
-        计算突破相关指标
+        计算突破相关指标（增量更新），同时返回计算所用的最近两根K线
         """
-        # 计算关键价格水平
-        df['high_ma'] = df['high'].rolling(window=self.breakout_period).mean()
-        df['low_ma'] = df['low'].rolling(window=self.breakout_period).mean()
-        df['pivot'] = (df['high'] + df['low'] + df['close']) / 3
-        
-        # 计算波动性指标
-        df['tr'] = self._calculate_true_range(df)
-        df['atr'] = df['tr'].rolling(window=14).mean()
-        df['atr_pct'] = df['atr'] / df['close']
-        
-        # 计算成交量指标
-        df['volume_ma'] = df['volume'].rolling(window=20).mean()
-        df['volume_std'] = df['volume'].rolling(window=20).std()
-        df['volume_z_score'] = (df['volume'] - df['volume_ma']) / df['volume_std']
+        values, bars = self.indicator_snapshot(self.indicator_specs, 2)
+        _, _, high, low, close, volume = bars[-1]
         
-        # 计算价格通道
-        df['upper_channel'] = df['high'].rolling(window=self.breakout_period).max()
-        df['lower_channel'] = df['low'].rolling(window=self.breakout_period).min()
-        df['channel_width'] = df['upper_channel'] - df['lower_channel']
-        
-        # 计算动量指标
-        df['momentum'] = df['close'].pct_change(5)
-        df['momentum_ma'] = df['momentum'].rolling(window=10).mean()
-        
-        # 计算成交量压力
-        df['volume_price_high'] = df['high'] * df['volume']
-        df['volume_price_low'] = df['low'] * df['volume']
-        df['volume_price_mean'] = (df['volume_price_high'] + df['volume_price_low']) / 2
+        # 成交量Z分数
+        volume_std = values['volume_std']
+        volume_z_score = (volume - values['volume_ma']) / volume_std if volume_std else np.nan
         
         return {
-            'upper_channel': df['upper_channel'].iloc[-1],
-            'lower_channel': df['lower_channel'].iloc[-1],
-            'channel_width': df['channel_width'].iloc[-1],
-            'atr': df['atr'].iloc[-1],
-            'atr_pct': df['atr_pct'].iloc[-1],
-            'volume_surge': df['volume_z_score'].iloc[-1],
-            'momentum': df['momentum'].iloc[-1],
-            'momentum_ma': df['momentum_ma'].iloc[-1],
-            'volume_pressure': df['volume_price_mean'].iloc[-1]
+            'upper_channel': values['upper_channel'],
+            'lower_channel': values['lower_channel'],
+            'channel_width': values['upper_channel'] - values['lower_channel'],
+            'atr': values['atr'],
+            'atr_pct': values['atr'] / close,
+            'volume_surge': volume_z_score,
+            'momentum': values['momentum'],
+            'momentum_ma': values['momentum_ma'],
+            'volume_pressure': (high + low) / 2 * volume
         }
         
-    def _calculate_true_range(self, df: pd.DataFrame) -> pd.Series:
-        """计算真实波幅"""
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        return ranges.max(axis=1)
-        
-    def _evaluate_breakout_quality(self, df: pd.DataFrame, 
+    def _evaluate_breakout_quality(self, bars: np.ndarray, 
                                  indicators: Dict) -> Dict:
         """
         评估突破质量
         """
-        current_price = df['close'].iloc[-1]
-        prev_price = df['close'].iloc[-2]
+        current_price = bars[-1, 4]
+        prev_price = bars[-2, 4]
         
         # 判断突破方向
         if current_price > indicators['upper_channel']:
@@ -137,7 +112,7 @@ class BreakoutStrategy(StrategyBase):
             'volume_confirmation': volume_confirmation if breakout_direction != 0 else 0
         }
         
-    def _generate_breakout_signal(self, df: pd.DataFrame, 
+    def _generate_breakout_signal(self, bars: np.ndarray, 
                                 indicators: Dict, 
                                 breakout_quality: Dict,
                                 current_price: float) -> Dict:
@@ -1,9 +1,8 @@
 import numpy as np
-import pandas as pd
 from typing import Dict, List, Tuple
 from datetime import datetime
 from .strategy_base import StrategyBase
-from config import Config
+from market_data import OHLCV_WINDOW
 
 class MATrendStrategy(StrategyBase):
     def __init__(self, exchange_id: str, symbol: str):
@@ -11,19 +10,29 @@ class MATrendStrategy(StrategyBase):
         self.required_history = 100
         self.trend_confirmation_periods = 3
         self.volume_threshold = 1.5  # 成交量放大阈值
+        self.indicator_specs = {
+            'ema10': ('ema', 10, 'close'),
+            'ema20': ('ema', 20, 'close'),
+            'ema50': ('ema', 50, 'close'),
+            'momentum': ('roc', 10, 'close'),
+            'volatility': ('std', 20, ('roc', 1, 'close')),
+            'macd': ('macd', 12, 26, 'close'),
+            'signal_line': ('ema', 9, ('macd', 12, 26, 'close')),
+            'volume_ma': ('sma', 20, 'volume'),
+            'adx': ('sma', 14, ('dx', 14)),
+            'close_mean': ('sma', OHLCV_WINDOW, 'close')
+        }
         
     def generate_signal(self) -> dict:
         try:
-            df = self.market_data.update_market_data(self.symbol, Config.BASE_TIMEFRAME)
-            
             # 计算趋势指标
-            indicators = self._calculate_trend_indicators(df)
+            indicators = self._calculate_trend_indicators()
             
             # 评估趋势质量
-            trend_quality = self._evaluate_trend_quality(df, indicators)
+            trend_quality = self._evaluate_trend_quality(indicators)
             
-            current_price = df['close'].iloc[-1]
-            signal = self._generate_trend_signal(df, indicators, trend_quality, current_price)
+            current_price = indicators['close']
+            signal = self._generate_trend_signal(indicators, trend_quality, current_price)
             
             self.logger.info(
                 f"MA Trend Signal - Price: {current_price:.2f}, "
@@ -39,80 +48,34 @@ class MATrendStrategy(StrategyBase):
             self.logger.error(f"Error generating trend signal: {str(e)}")
             raise
             
-    def _calculate_trend_indicators(self, df: pd.DataFrame) -> Dict:
+    def _calculate_trend_indicators(self) -> Dict:
         """
-        计算趋势相关指标
+        计算趋势相关指标（增量更新）
         """
-        # 计算多周期均线
-        df['ema10'] = df['close'].ewm(span=10, adjust=False).mean()
-        df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
-        df['ema50'] = df['close'].ewm(span=50, adjust=False).mean()
-        
-        # 计算趋势强度
-        df['trend_strength'] = ((df['ema10'] - df['ema50']) / df['ema50'] * 100)
-        
-        # 计算价格动量
-        df['momentum'] = df['close'].pct_change(10)
-        
-        # 计算波动率
-        df['volatility'] = df['close'].pct_change().rolling(window=20).std() * np.sqrt(252)
-        
-        # MACD计算（不使用ta-lib）
-        df['ema12'] = df['close'].ewm(span=12, adjust=False).mean()
-        df['ema26'] = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = df['ema12'] - df['ema26']
-        df['signal_line'] = df['macd'].ewm(span=9, adjust=False).mean()
-        df['macd_hist'] = df['macd'] - df['signal_line']
+        values, bars = self.indicator_snapshot(self.indicator_specs, 1)
+        _, _, _, _, close, volume = bars[-1]
         
-        # 计算成交量趋势
-        df['volume_ma'] = df['volume'].rolling(window=20).mean()
-        df['volume_ratio'] = df['volume'] / df['volume_ma']
-        
-        # ADX计算（使用简化版本）
-        df['tr'] = self._calculate_true_range(df)
-        df['dx'] = self._calculate_directional_index(df)
-        df['adx'] = df['dx'].rolling(window=14).mean()
+        # 趋势强度
+        trend_strength = (values['ema10'] - values['ema50']) / values['ema50'] * 100
         
         return {
-            'trend_strength': df['trend_strength'].iloc[-1],
-            'momentum': df['momentum'].iloc[-1],
-            'volatility': df['volatility'].iloc[-1],
-            'macd': df['macd'].iloc[-1],
-            'macd_hist': df['macd_hist'].iloc[-1],
-            'volume_ratio': df['volume_ratio'].iloc[-1],
-            'adx': df['adx'].iloc[-1],
+            'close': close,
+            'close_mean': values['close_mean'],
+            'trend_strength': trend_strength,
+            'momentum': values['momentum'],
+            'volatility': values['volatility'] * np.sqrt(252),
+            'macd': values['macd'],
+            'macd_hist': values['macd'] - values['signal_line'],
+            'volume_ratio': volume / values['volume_ma'] if values['volume_ma'] else np.nan,
+            'adx': values['adx'],
             'ema_values': {
-                'ema10': df['ema10'].iloc[-1],
-                'ema20': df['ema20'].iloc[-1],
-                'ema50': df['ema50'].iloc[-1]
+                'ema10': values['ema10'],
+                'ema20': values['ema20'],
+                'ema50': values['ema50']
             }
         }
         
-    def _calculate_true_range(self, df: pd.DataFrame) -> pd.Series:
-        """计算真实波幅"""
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        return ranges.max(axis=1)
-        
-    def _calculate_directional_index(self, df: pd.DataFrame) -> pd.Series:
-        """计算方向指数"""
-        up_move = df['high'] - df['high'].shift()
-        down_move = df['low'].shift() - df['low']
-        
-        pos_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
-        neg_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
-        
-        tr14 = self._calculate_true_range(df).rolling(window=14).sum()
-        pos_di14 = 100 * pd.Series(pos_dm).rolling(window=14).sum() / tr14
-        neg_di14 = 100 * pd.Series(neg_dm).rolling(window=14).sum() / tr14
-        
-        dx = 100 * np.abs(pos_di14 - neg_di14) / (pos_di14 + neg_di14)
-        return dx
-        
-    def _evaluate_trend_quality(self, df: pd.DataFrame, 
-                              indicators: Dict) -> Dict:
+    def _evaluate_trend_quality(self, indicators: Dict) -> Dict:
         """
         评估趋势质量
         """
@@ -132,7 +95,7 @@ class MATrendStrategy(StrategyBase):
         volume_support = min(indicators['volume_ratio'] - 1, 1) if indicators['volume_ratio'] > 1 else 0
         
         # MACD动量
-        macd_score = abs(indicators['macd_hist']) / df['close'].mean() * 100
+        macd_score = abs(indicators['macd_hist']) / indicators['close_mean'] * 100
         
         # 计算综合趋势得分
         trend_score = (
@@ -152,8 +115,7 @@ class MATrendStrategy(StrategyBase):
             'volume_support': volume_support > 0.5
         }
         
-    def _generate_trend_signal(self, df: pd.DataFrame, 
-                             indicators: Dict, 
+    def _generate_trend_signal(self, indicators: Dict, 
                              trend_quality: Dict,
                              current_price: float) -> Dict:
         """
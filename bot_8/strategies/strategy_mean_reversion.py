@@ -1,8 +1,8 @@
 import numpy as np
-import pandas as pd
 from typing import Dict
 from .strategy_base import StrategyBase
 from config import Config
+from market_data import OHLCV_WINDOW
 
 class MeanReversionStrategy(StrategyBase):
     def __init__(self, exchange_id: str, symbol: str):
@@ -13,13 +13,11 @@ class MeanReversionStrategy(StrategyBase):
         
     def generate_signal(self) -> dict:
         try:
-            df = self.market_data.update_market_data(self.symbol, Config.BASE_TIMEFRAME)
-            
             # 计算核心指标
-            indicators = self._calculate_advanced_indicators(df)
+            indicators = self._calculate_advanced_indicators()
             
-            current_price = df['close'].iloc[-1]
-            signal = self._evaluate_trading_conditions(df, indicators, current_price)
+            current_price = indicators['close']
+            signal = self._evaluate_trading_conditions(indicators, current_price)
             
             # 记录信号生成的详细信息
             self.logger.info(
@@ -37,55 +35,52 @@ class MeanReversionStrategy(StrategyBase):
             self.logger.error(f"Error generating mean reversion signal: {str(e)}")
             raise
             
-    def _calculate_advanced_indicators(self, df: pd.DataFrame) -> Dict:
+    def _calculate_advanced_indicators(self) -> Dict:
         """
-        计算高级技术指标
+        计算高级技术指标（增量更新）
         """
         # 自适应波动率周期
-        volatility = df['close'].pct_change().std()
+        volatility = self.indicator_values({'volatility': ('std', OHLCV_WINDOW - 1, ('roc', 1, 'close'))})['volatility']
+        if np.isnan(volatility):
+            raise ValueError("Not enough candles for adaptive lookback")
         lookback = int(20 * (1 + volatility))  # 根据波动率调整回看周期
         
-        # 计算动态均值
-        df['ema'] = df['close'].ewm(span=lookback, adjust=False).mean()
-        df['std'] = df['close'].rolling(window=lookback).std()
-        
-        # 考虑成交量的价格压力
-        volume_price_mean = (df['close'] * df['volume']).rolling(window=lookback).sum() / \
-                           df['volume'].rolling(window=lookback).sum()
+        # 回看周期变化时按新周期登记指标（首次使用时回放K线预热）
+        values, bars = self.indicator_snapshot({
+            'ema': ('ema', lookback, 'close'),
+            'std': ('std', lookback, 'close'),
+            # 考虑成交量的价格压力
+            'volume_price_mean': ('vwap', lookback, 'close'),
+            'rsi': ('rsi', 14, 'close', False),
+            'momentum': ('roc', 5, 'close'),
+            'volume_ma20': ('sma', 20, 'volume'),
+            'volume_ma50': ('sma', 50, 'volume')
+        }, 1)
+        close = bars[-1, 4]
         
         # 计算布林带
-        upper_band = df['ema'] + (self.entry_threshold * df['std'])
-        lower_band = df['ema'] - (self.entry_threshold * df['std'])
-        
-        # 计算RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        # 计算价格动量
-        momentum = df['close'].diff(5) / df['close'].shift(5)
+        upper_band = values['ema'] + (self.entry_threshold * values['std'])
+        lower_band = values['ema'] - (self.entry_threshold * values['std'])
         
         # 计算成交量趋势
-        volume_trend = df['volume'].rolling(window=20).mean() / \
-                      df['volume'].rolling(window=50).mean()
+        volume_trend = values['volume_ma20'] / values['volume_ma50'] if values['volume_ma50'] else np.nan
         
         return {
-            'upper_band': upper_band.iloc[-1],
-            'lower_band': lower_band.iloc[-1],
-            'mean': df['ema'].iloc[-1],
-            'std': df['std'].iloc[-1],
-            'volume_price_mean': volume_price_mean.iloc[-1],
-            'rsi': rsi.iloc[-1],
-            'momentum': momentum.iloc[-1],
-            'volume_trend': volume_trend.iloc[-1],
-            'position_score': self._calculate_position_score(df, rsi.iloc[-1], 
-                                                          momentum.iloc[-1], 
-                                                          volume_trend.iloc[-1])
+            'close': close,
+            'upper_band': upper_band,
+            'lower_band': lower_band,
+            'mean': values['ema'],
+            'std': values['std'],
+            'volume_price_mean': values['volume_price_mean'],
+            'rsi': values['rsi'],
+            'momentum': values['momentum'],
+            'volume_trend': volume_trend,
+            'position_score': self._calculate_position_score(volatility, values['rsi'], 
+                                                          values['momentum'], 
+                                                          volume_trend)
         }
         
-    def _calculate_position_score(self, df: pd.DataFrame, 
+    def _calculate_position_score(self, returns_std: float, 
                                 rsi: float, momentum: float, 
                                 volume_trend: float) -> float:
         """
@@ -101,7 +96,7 @@ class MeanReversionStrategy(StrategyBase):
         volume_score = 1 if volume_trend > 1.2 else -1 if volume_trend < 0.8 else 0
         
         # 价格波动率权重
-        volatility = df['close'].pct_change().std() * np.sqrt(252)
+        volatility = returns_std * np.sqrt(252)
         volatility_score = 1 - min(volatility * 10, 1)  # 波动率越低越好
         
         # 综合得分
@@ -114,8 +109,7 @@ class MeanReversionStrategy(StrategyBase):
         
         return total_score
         
-    def _evaluate_trading_conditions(self, df: pd.DataFrame, 
-                                   indicators: Dict, 
+    def _evaluate_trading_conditions(self, indicators: Dict, 
                                    current_price: float) -> Dict:
         """
         评估交易条件并生成信号
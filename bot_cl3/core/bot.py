@@ -10,6 +10,8 @@ from strategies.grid import GridStrategy
 from strategies.trend import TrendStrategy
 from strategies.funding import FundingStrategy
 from core.risk_manager import RiskManager
+from core.account_state import AccountStateService
+from core.market_cache import MarketCache
 from config.settings import CONFIG
 from utils.logger import get_logger
 from dotenv import load_dotenv
@@ -29,10 +31,8 @@ class ArbitrageTrendBot:
         self.okx = self._init_okx()
         self.binance = self._init_binance()
 
-        # 初始化交易对
-        self.trading_pairs = self.load_common_pairs()
-        if not self.trading_pairs:
-            raise ValueError("无有效共同交易对")
+        # 交易对在 run() 中异步加载（优先读本地缓存）
+        self.trading_pairs: List[str] = []
 
         # 初始化基础变量
         self.is_running = True
@@ -42,6 +42,11 @@ class ArbitrageTrendBot:
         self.balances = {'okx': Decimal('0'), 'binance': Decimal('0')}
         self.equity = {'okx': Decimal('0'), 'binance': Decimal('0')}
         self.start_equity = {}
+        self.market_cache = MarketCache()
+        self._warm_start = False
+        # 账户状态缓存（私有WebSocket推送）
+        self.account_state = AccountStateService(self.okx, self.binance)
+        self.account_state.add_listener(self._on_account_update)
         self.common_pairs = []
         
         # 初始化统计数据
@@ -104,89 +109,111 @@ class ArbitrageTrendBot:
             'funding': FundingStrategy(self, self.config)
         }
 
+    def _on_account_update(self, exchange_id: str):
+        """账户推送回调：同步余额与权益"""
+        self.balances[exchange_id] = self.account_state.balance(exchange_id).quantize(Decimal('0.01'))
+        self.equity[exchange_id] = self.account_state.equity(exchange_id).quantize(Decimal('0.01'))
+        logger.debug(f"余额更新 - {exchange_id}: {self.balances[exchange_id]}")
+
     async def update_balances(self):
-        """更新账户余额"""
+        """推送正常时只读缓存，推送失效才限流走REST对账"""
         try:
-            okx_balance = await self.okx.fetch_balance()
-            binance_balance = await self.binance.fetch_balance()
-            
-            self.balances['okx'] = Decimal(str(okx_balance['USDT']['free'])).quantize(Decimal('0.01'))
-            self.equity['okx'] = Decimal(str(okx_balance['USDT'].get('total', okx_balance['USDT']['free']))).quantize(Decimal('0.01'))
-            self.balances['binance'] = Decimal(str(binance_balance['USDT']['free'])).quantize(Decimal('0.01'))
-            self.equity['binance'] = Decimal(str(binance_balance['USDT'].get('total', binance_balance['USDT']['free']))).quantize(Decimal('0.01'))
-            
-            logger.info(f"余额更新 - OKX: {self.balances['okx']}, Binance: {self.balances['binance']}")
+            await self.account_state.ensure_fresh()
         except Exception as e:
             logger.error(f"更新余额失败: {e}")
 
+    async def update_balances_loop(self):
+        """定期检查账户推送是否失效"""
+        while self.is_running:
+            await self.update_balances()
+            await asyncio.sleep(self.config.get('check_interval', 1))
+
+    @staticmethod
+    def _match_common_symbols(okx_markets, binance_markets) -> List[str]:
+        """两个交易所都上线的USDT永续合约"""
+        okx_symbols = {
+            symbol for symbol, market in okx_markets.items()
+            if market.get('type') == 'swap' and market.get('settled') and
+            market.get('quote') == 'USDT' and market.get('active')
+        }
+        binance_symbols = {
+            symbol for symbol, market in binance_markets.items()
+            if market.get('type') == 'swap' and market.get('quote') == 'USDT' and market.get('active')
+        }
+        return sorted(okx_symbols.intersection(binance_symbols))
+
     async def _init_trading_pairs(self):
         """初始化交易对"""
         try:
-            # 获取OKX可用交易对
-            okx_markets = await self.exchange_manager.okx.load_markets()
-            okx_symbols = set()
-
-            # 筛选OKX的USDT永续合约
-            for symbol, market in okx_markets.items():
-                if (market.get('type') == 'swap' and
-                    market.get('settled') and
-                    market.get('quote') == 'USDT' and
-                    market.get('active')):
-                    okx_symbols.add(symbol)
-
-            if not okx_symbols:
-                self.logger.error("未找到OKX有效交易对")
-                raise ValueError("无有效共同交易对")
-
-            # 获取Binance可用交易对
-            binance_markets = await self.exchange_manager.binance.load_markets()
-            binance_symbols = set()
-
-            # 筛选Binance的USDT永续合约
-            for symbol, market in binance_markets.items():
-                if (market.get('type') == 'swap' and
-                    market.get('quote') == 'USDT' and
-                    market.get('active')):
-                    binance_symbols.add(symbol)
-
-            if not binance_symbols:
-                self.logger.error("未找到Binance有效交易对")
-                raise ValueError("无有效共同交易对")
-
-            # 找出两个交易所的交集
-            common_symbols = okx_symbols.intersection(binance_symbols)
+            # 优先使用本地缓存（毫秒级热启动），实时市场由 sync_markets_loop 在后台校验
+            exchanges = (self.okx, self.binance)
+            data = self.market_cache.load()
+            if data and all(self.market_cache.apply(ex, data) for ex in exchanges):
+                self._warm_start = True
+                logger.info(f"市场缓存热启动: {len(data['common_pairs'])} 个共同交易对")
+                return data['common_pairs']
 
+            okx_markets = await self.okx.load_markets()
+            binance_markets = await self.binance.load_markets()
+            common_symbols = self._match_common_symbols(okx_markets, binance_markets)
             if not common_symbols:
-                self.logger.error("未找到交易所间的共同交易对")
+                logger.error("未找到交易所间的共同交易对")
                 raise ValueError("无有效共同交易对")
 
-            self.logger.info(f"OKX交易对数量: {len(okx_symbols)}")
-            self.logger.info(f"Binance交易对数量: {len(binance_symbols)}")
-            self.logger.info(f"共同交易对数量: {len(common_symbols)}")
-            self.logger.info(f"部分共同交易对示例: {list(common_symbols)[:5]}...")  # 只显示前5个作为示例
+            logger.info(f"共同交易对数量: {len(common_symbols)}")
+            logger.info(f"部分共同交易对示例: {common_symbols[:5]}...")  # 只显示前5个作为示例
 
-            return list(common_symbols)
+            self.market_cache.save(exchanges, common_symbols)
+            return common_symbols
         except Exception as e:
-            self.logger.error(f"初始化交易对异常: {str(e)}")
+            logger.error(f"初始化交易对异常: {str(e)}")
             raise ValueError("无有效共同交易对")
 
+    def _set_trading_pairs(self, symbols: List[str]):
+        # 两个交易所的统一符号相同，common_pairs 为主循环使用的 (OKX, Binance) 对
+        self.trading_pairs = list(symbols)
+        self.common_pairs = [(symbol, symbol) for symbol in self.trading_pairs]
+
+    async def sync_markets_loop(self):
+        """后台加载实时市场，对比后热替换交易对；热启动时立即执行一次"""
+        interval = self.config.get('market_sync_interval', 3600)
+        if not self._warm_start:
+            await asyncio.sleep(interval)
+        while self.is_running:
+            try:
+                okx_markets, binance_markets = await asyncio.gather(
+                    self.okx.load_markets(True), self.binance.load_markets(True)
+                )
+                common_symbols = self._match_common_symbols(okx_markets, binance_markets)
+                if common_symbols:
+                    added, removed = self.market_cache.diff(self.trading_pairs, common_symbols)
+                    if added or removed:
+                        logger.info(f"交易对变化 - 新增: {added[:5]}，下架: {removed[:5]}")
+                    self._set_trading_pairs(common_symbols)
+                    self.market_cache.save([self.okx, self.binance], common_symbols)
+            except Exception as e:
+                logger.error(f"市场同步失败: {e}")
+            await asyncio.sleep(interval)
+
     async def run(self):
         """主运行函数"""
         try:
             # 初始化市场数据
-            await self.load_common_pairs()
+            self._set_trading_pairs(await self._init_trading_pairs())
             if not self.common_pairs:
                 raise RuntimeError("无有效共同交易对")
                 
-            # 初始化账户数据
-            await self.update_balances()
+            # 初始化账户数据（REST快照 + 启动私有推送）
+            await self.account_state.start()
+            logger.info(f"余额更新 - OKX: {self.balances['okx']}, Binance: {self.balances['binance']}")
             self.start_equity = self.equity.copy()
             
             # 启动所有任务
             tasks = [
                 self.main_loop(),
                 self.update_balances_loop(),
-                self.monitor_positions()
+                self.monitor_positions(),
+                self.sync_markets_loop()
             ]
             
             await asyncio.gather(*tasks)
@@ -231,6 +258,7 @@ class ArbitrageTrendBot:
         logger.info("开始关闭系统...")
         
         try:
+            await self.account_state.stop()
             # 关闭交易所连接
             await asyncio.gather(
                 self.okx.close(),
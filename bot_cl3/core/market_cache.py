@@ -0,0 +1,72 @@
+import gzip
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_VERSION = 1
+
+
+class MarketCache:
+    """市场数据与共同交易对的本地缓存（gzip JSON，带版本号，原子写入）"""
+
+    def __init__(self, path: str = 'cache/bot_cl3/markets.json.gz', max_age: float = 7 * 86400):
+        self.path = path
+        self.max_age = max_age
+
+    def load(self) -> Optional[Dict]:
+        """读取缓存，版本不符、过期或损坏时返回None"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"市场缓存损坏，忽略: {str(e)}")
+            return None
+        if data.get('version') != CACHE_VERSION:
+            logger.info(f"市场缓存版本不符: {data.get('version')} != {CACHE_VERSION}")
+            return None
+        if time.time() - data.get('saved_at', 0) > self.max_age:
+            logger.info("市场缓存已过期")
+            return None
+        data['common_pairs'] = [tuple(p) if isinstance(p, list) else p for p in data['common_pairs']]
+        return data
+
+    def save(self, exchanges: List, common_pairs: List[tuple]):
+        data = {
+            'version': CACHE_VERSION,
+            'saved_at': time.time(),
+            'markets': {ex.id: list(ex.markets.values()) for ex in exchanges},
+            'common_pairs': list(common_pairs)
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=3) as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            logger.info(f"市场缓存已保存: {len(common_pairs)} 个共同交易对")
+        except OSError as e:
+            logger.error(f"市场缓存保存失败: {str(e)}")
+
+    @staticmethod
+    def apply(exchange, data: Dict) -> bool:
+        """把缓存的市场写入ccxt实例（不走网络）"""
+        markets = data['markets'].get(exchange.id)
+        if not markets:
+            return False
+        exchange.set_markets(markets)
+        return True
+
+    @staticmethod
+    def diff(old_pairs: List[tuple], new_pairs: List[tuple]) -> Tuple[List[tuple], List[tuple]]:
+        """返回 (新增, 下架) 交易对"""
+        old, new = set(old_pairs), set(new_pairs)
+        return sorted(new - old), sorted(old - new)
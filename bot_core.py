@@ -3,10 +3,18 @@ import logging
 from decimal import Decimal, getcontext
 from datetime import datetime
 import signal
-from typing import Dict, Optional, List, Any
+from typing import Callable, Dict, Optional, List, Any
 from contextlib import suppress
 
 from exchange_tools import CryptoExchangeTools
+from orderbook_stream import OrderBookStream
+from spread_scanner import VectorSpreadScanner
+from account_state import AccountStateService
+from order_tracker import OrderTracker
+from instrument_index import InstrumentIndex
+from market_cache import MarketCache
+from funding_service import FundingRateService
+from market_recorder import MarketRecorder
 from config import TRADE_CONFIG, FEES_CONFIG, SYSTEM_CONFIG
 from tenacity import retry, stop_after_attempt, wait_exponential
 import os
@@ -28,6 +36,8 @@ class ArbitrageBot:
         self.is_running = True
         self.is_paused = False
         self.balances = {'okx': Decimal('0'), 'binance': Decimal('0')}
+        self.balances_updated = datetime.min
+        self._balance_refresh_task: Optional[asyncio.Task] = None
         self.profits = {'total': Decimal('0'), 'today': Decimal('0'), 'realized': Decimal('0')}
         self.trades: List[Dict[str, Any]] = []
         self.active_orders: List[Dict[str, Any]] = []
@@ -40,9 +50,40 @@ class ArbitrageBot:
         }
         self.optimal_opportunities: List[Dict[str, Any]] = []
         self.common_pairs: List[tuple] = []
-        self.funding_fees: Dict[str, Dict[str, Decimal]] = {'okx': {}, 'binance': {}}
-        self.last_funding_update = datetime.min
         self.semaphore = asyncio.Semaphore(self.trade_config['max_concurrent_checks'])
+        self.book_stream = OrderBookStream(
+            self.okx_tools.exchange, self.binance_tools.exchange,
+            depth=self.trade_config['orderbook_depth']
+        )
+        self.scanner = VectorSpreadScanner(
+            self.fees_config, self.trade_config['min_profit_margin'],
+            self.trade_config['slippage_allowance'], self.trade_config['initial_trade_usdt'],
+            max_age=self.book_stream.stale_after
+        )
+        # 资金费率服务（funding_fees与服务共享同一字典）
+        self.funding = FundingRateService(
+            self.okx_tools.exchange, self.binance_tools.exchange,
+            base_interval=self.system_config['funding_rate_interval']
+        )
+        self.funding_fees: Dict[str, Dict[str, Decimal]] = self.funding.rates
+        self.funding.add_listener(self.on_funding_update)
+        self.account_state = AccountStateService(
+            self.okx_tools.exchange, self.binance_tools.exchange,
+            min_rest_interval=self.system_config['balance_rest_interval']
+        )
+        self.account_state.add_listener(self.on_account_update)
+        # 订单跟踪（私有推送为主，推送断开时批量查询挂单兜底），双腿执行按推送等待成交
+        self.order_tracker = OrderTracker({'okx': self.okx_tools.exchange, 'binance': self.binance_tools.exchange})
+        # 行情录制（后台线程写盘，回调只入队）
+        self.recorder: Optional[MarketRecorder] = None
+        if self.system_config['record_market_data']:
+            self.recorder = MarketRecorder(self.system_config['record_dir'], depth=self.trade_config['orderbook_depth'])
+            self.book_stream.add_listener(self.record_book)
+            self.book_stream.add_trade_listener(self.recorder.record_trade)
+        # 预编译精度索引（下单路径不再查询ccxt market）
+        self.instruments = InstrumentIndex()
+        # 市场与共同交易对本地缓存（热启动）
+        self.market_cache = MarketCache()
         self.runner: Optional[web.AppRunner] = None
         self.site: Optional[web.TCPSite] = None
 
@@ -50,6 +91,12 @@ class ArbitrageBot:
         logger.info("启动关闭流程...")
         self.is_running = False
 
+        await self.book_stream.stop()
+        await self.account_state.stop()
+        await self.order_tracker.stop()
+        self.funding.stop()
+        if self.recorder:
+            await asyncio.get_running_loop().run_in_executor(None, self.recorder.stop)
         await self.okx_tools.exchange.close()
         await self.binance_tools.exchange.close()
         logger.info("交易所连接已关闭")
@@ -70,73 +117,114 @@ class ArbitrageBot:
 
         await asyncio.sleep(0.5)
 
+    def _check_min_notional(self, exchange, symbol: str, orderbook: Dict) -> bool:
+        if exchange.id == 'binance':
+            min_notional = Decimal('5.0')
+            best_ask = Decimal(str(orderbook['asks'][0][0]))
+            if best_ask * self.trade_config['initial_trade_usdt'] < min_notional:
+                logger.debug(f"名义价值不足: {symbol} (需要至少5U)")
+                return False
+        return True
+
+    def get_local_orderbook(self, exchange, symbol: str) -> Optional[Dict]:
+        """读取本地订单簿镜像（不走网络）"""
+        symbol = symbol.upper() if exchange.id == 'binance' else symbol
+        orderbook = self.book_stream.get_orderbook(exchange.id, symbol)
+        if not orderbook or not orderbook['asks'] or not orderbook['bids']:
+            return None
+        return orderbook if self._check_min_notional(exchange, symbol, orderbook) else None
+
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=5))
     async def get_orderbook(self, exchange, symbol: str) -> Optional[Dict]:
         try:
             symbol = symbol.upper() if exchange.id == 'binance' else symbol
-            orderbook = await exchange.fetch_order_book(symbol, limit=self.trade_config['orderbook_depth'])
-
-            if exchange.id == 'binance':
-                min_notional = Decimal('5.0')
-                best_ask = Decimal(str(orderbook['asks'][0][0]))
-                best_bid = Decimal(str(orderbook['bids'][0][0]))
-                if best_ask * self.trade_config['initial_trade_usdt'] < min_notional:
-                    logger.debug(f"名义价值不足: {symbol} (需要至少5U)")
-                    return None
+            orderbook = self.book_stream.get_orderbook(exchange.id, symbol)
+            if orderbook is None:
+                orderbook = await exchange.fetch_order_book(symbol, limit=self.trade_config['orderbook_depth'])
+                if self.recorder:
+                    self.recorder.record_book(exchange.id, symbol, orderbook['bids'], orderbook['asks'])
 
-            return orderbook
+            return orderbook if self._check_min_notional(exchange, symbol, orderbook) else None
         except ccxt.BadSymbol:
             logger.debug(f"交易对不存在: {exchange.id} {symbol}")
             return None
 
+    def record_book(self, exchange_id: str, symbol: str):
+        """订单簿推送回调：录制本地镜像"""
+        orderbook = self.book_stream.get_orderbook(exchange_id, symbol)
+        if orderbook:
+            self.recorder.record_book(exchange_id, symbol, orderbook['bids'], orderbook['asks'])
+
+    def on_account_update(self, exchange_id: str):
+        """账户推送回调：同步余额缓存"""
+        self.balances[exchange_id] = self.account_state.balance(exchange_id)
+        self.balances_updated = datetime.now()
+
     async def update_balances(self):
+        """推送正常时只读缓存，过期才限流走REST"""
         try:
-            okx_balance = await self.okx_tools.exchange.fetch_balance(params={'type': 'swap'})
-            binance_balance = await self.binance_tools.exchange.fetch_balance(params={'type': 'future'})
-            self.balances['okx'] = Decimal(str(okx_balance['USDT']['free']))
-            self.balances['binance'] = Decimal(str(binance_balance['USDT']['free']))
+            await self.account_state.ensure_fresh()
         except Exception as e:
             logger.error(f"余额更新失败: {str(e)}")
 
-    async def fetch_funding_rate(self, exchange, symbol: str) -> Decimal:
-        try:
-            if symbol in self.funding_fees[exchange.id]:
-                return self.funding_fees[exchange.id][symbol]
-            else:
-                if exchange.id == 'okx':
-                    res = await exchange.public_get_public_funding_rate({'instId': symbol})
-                    return Decimal(res['data'][0]['fundingRate'])
-                elif exchange.id == 'binance':
-                    res = await exchange.fetch_funding_rate(symbol)
-                    return Decimal(res['fundingRate'])
-                else:
-                    return Decimal('0')
-        except Exception as e:
-            logger.error(f"获取资金费率失败: {exchange.id} {symbol} - {str(e)}")
-            return Decimal('0')
+    def refresh_balances_soon(self):
+        """成交后异步校验余额缓存（不阻塞交易路径）"""
+        if self._balance_refresh_task is None or self._balance_refresh_task.done():
+            self._balance_refresh_task = asyncio.create_task(self.update_balances())
 
     async def update_funding_fees(self):
+        """资金费率调度（批量接口，临近结算时加密刷新）"""
+        await self.funding.run()
+
+    def on_funding_update(self, exchange_id: str, updated: Dict[str, Decimal]):
+        self.scanner.set_funding(exchange_id, self.funding.aligned(exchange_id, self.scanner.index[exchange_id]))
+
+    @property
+    def _exchanges(self) -> List:
+        return [self.okx_tools.exchange, self.binance_tools.exchange]
+
+    def warm_start(self) -> bool:
+        """从本地缓存恢复市场与共同交易对，不等待load_markets"""
+        data = self.market_cache.load()
+        if not data or not all(self.market_cache.apply(ex, data) for ex in self._exchanges):
+            return False
+        self.common_pairs = data['common_pairs']
+        logger.info(f"市场缓存热启动: {len(self.common_pairs)} 个共同交易对")
+        return True
+
+    async def cold_start(self):
+        """完整加载市场并写入缓存"""
+        await asyncio.gather(*[ex.load_markets() for ex in self._exchanges])
+        await self.load_common_pairs()
+        self.market_cache.save(self._exchanges, self.common_pairs)
+
+    async def sync_markets(self, on_change: Optional[Callable[[], None]] = None):
+        """加载实时市场，与当前交易对对比后热替换"""
+        await asyncio.gather(*[ex.load_markets(True) for ex in self._exchanges])
+        for ex in self._exchanges:
+            self.instruments.load(ex)
+        old_pairs = list(self.common_pairs)
+        await self.load_common_pairs()
+        self.market_cache.save(self._exchanges, self.common_pairs)
+
+        added, removed = self.market_cache.diff(old_pairs, self.common_pairs)
+        if added or removed:
+            logger.info(f"交易对变化: 新增 {added[:5]} 共{len(added)}个, 下架 {removed[:5]} 共{len(removed)}个")
+            if on_change:
+                on_change()
+            self.book_stream.set_pairs(self.common_pairs)
+            await self.book_stream.restart()
+
+    async def market_sync_loop(self, warm: bool, on_change: Optional[Callable[[], None]] = None):
+        """后台市场同步：热启动后立即校验一次，之后定期刷新"""
+        if not warm:
+            await asyncio.sleep(self.instruments.refresh_interval)
         while self.is_running:
             try:
-                current_time = datetime.now()
-                if (current_time - self.last_funding_update).total_seconds() >= 3600:
-                    tasks = []
-                    for okx_sym, binance_sym in self.common_pairs:
-                        tasks.append(self._update_fee(self.okx_tools.exchange, okx_sym))
-                        tasks.append(self._update_fee(self.binance_tools.exchange, binance_sym))
-                    await asyncio.gather(*tasks)
-                    self.last_funding_update = current_time
-                    logger.info("资金费率已更新")
-                else:
-                    logger.debug("资金费率缓存有效，跳过更新")
+                await self.sync_markets(on_change)
             except Exception as e:
-                logger.error(f"资金费率更新失败: {str(e)}")
-            await asyncio.sleep(60)
-
-    async def _update_fee(self, exchange, symbol: str):
-        fee = await self.fetch_funding_rate(exchange, symbol)
-        self.funding_fees[exchange.id][symbol] = fee
-        logger.info(f"更新费率 {exchange.id} {symbol}: {fee:.4%}")
+                logger.error(f"市场同步失败: {str(e)}")
+            await asyncio.sleep(self.instruments.refresh_interval)
 
     async def load_common_pairs(self):
         def normalize_symbol(exchange_id: str, symbol: str) -> Optional[str]:
@@ -180,18 +268,23 @@ class ArbitrageBot:
         logger.info(f"Binance永续合约数: {len(binance_coins)} 样例: {list(binance_coins.values())[:5]}")
         logger.info(f"有效共同交易对: {len(self.common_pairs)} 样例: {self.common_pairs[:5]}")
 
-    async def arbitrage_loop(self):
+    async def arbitrage_loop(self, strategy, trading):
+        """事件驱动套利循环：订单簿越过阈值时取当前最优机会执行"""
+        last_executed: Dict[str, float] = {}
         while self.is_running:
-            if self.is_paused:
-                await asyncio.sleep(1)
-                continue
-            
             try:
-                opp = await self.find_best_arbitrage_opportunity()
-                if opp:
-                    logger.info(f"发现机会: {opp['strategy']} 利差: {opp['spread']:.2f}%")
-                    await self.execute_arbitrage(opp)
-                await asyncio.sleep(0.1)
+                opp = await strategy.next_opportunity()
+                if not opp or self.is_paused:
+                    continue
+                key = opp['okx_symbol']
+                now = asyncio.get_running_loop().time()
+                if now - last_executed.get(key, 0) < self.trade_config['event_cooldown']:
+                    continue
+                last_executed[key] = now
+                logger.info(f"发现机会: {opp['strategy']} 利差: {opp['spread']:.2f}%")
+                await trading.execute_arbitrage(opp)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"主循环异常: {str(e)}")
 
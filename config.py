@@ -19,7 +19,8 @@ TRADE_CONFIG = {
     'compound_enabled': True,              # 是否启用复利
     'slippage_allowance': Decimal('0.001'),  # 滑点容忍度
     'orderbook_depth': 20,                 # 订单簿深度
-    'max_concurrent_checks': 10            # 最大并发检查数
+    'max_concurrent_checks': 10,           # 最大并发检查数
+    'event_cooldown': 0.5                  # 同一交易对两次执行的最小间隔（秒）
 }
 
 # 手续费配置
@@ -31,8 +32,10 @@ FEES_CONFIG = {
 # 系统配置
 SYSTEM_CONFIG = {
     'webserver_port': 5000,                # Web服务端口
-    'balance_refresh_interval': 30,        # 余额刷新间隔（秒）
-    'funding_rate_interval': 4 * 3600,     # 资金费率更新间隔（秒）
+    'balance_rest_interval': 10,           # 账户推送失效时REST对账最小间隔（秒）
+    'funding_rate_interval': 900,          # 资金费率常规刷新间隔（秒），临近结算时加密
+    'record_market_data': False,           # 录制订单簿供回放/研究
+    'record_dir': 'data/market',           # 录制目录（按 类型/交易所/交易对/小时 分区）
     'health_check_interval': 60            # 健康检查间隔（秒）
 }
 
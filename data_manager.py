@@ -1,7 +1,5 @@
-import asyncio
 import logging
 from decimal import Decimal
-from datetime import datetime
 from typing import Dict, Optional, List, Any
 from exchange_tools import CryptoExchangeTools
 from config import TRADE_CONFIG, SYSTEM_CONFIG
@@ -15,7 +13,9 @@ class DataManager:
     async def get_orderbook(self, exchange, symbol: str) -> Optional[Dict]:
         try:
             symbol = symbol.upper() if exchange.id == 'binance' else symbol
-            orderbook = await exchange.fetch_order_book(symbol, limit=self.bot.trade_config['orderbook_depth'])
+            orderbook = self.bot.book_stream.get_orderbook(exchange.id, symbol)
+            if orderbook is None:
+                orderbook = await exchange.fetch_order_book(symbol, limit=self.bot.trade_config['orderbook_depth'])
 
             if exchange.id == 'binance':
                 min_notional = Decimal('5.0')
@@ -39,45 +39,10 @@ class DataManager:
         except Exception as e:
             logger.error(f"余额更新失败: {str(e)}")
 
-    async def fetch_funding_rate(self, exchange, symbol: str) -> Decimal:
-        try:
-            if symbol in self.bot.funding_fees[exchange.id]:
-                return self.bot.funding_fees[exchange.id][symbol]
-            else:
-                if exchange.id == 'okx':
-                    res = await exchange.public_get_public_funding_rate({'instId': symbol})
-                    return Decimal(res['data'][0]['fundingRate'])
-                elif exchange.id == 'binance':
-                    res = await exchange.fetch_funding_rate(symbol)
-                    return Decimal(res['fundingRate'])
-                else:
-                    return Decimal('0')
-        except Exception as e:
-            logger.error(f"获取资金费率失败: {exchange.id} {symbol} - {str(e)}")
-            return Decimal('0')
-
     async def update_funding_fees(self):
-        while self.bot.is_running:
-            try:
-                current_time = datetime.now()
-                if (current_time - self.bot.last_funding_update).total_seconds() >= 3600:
-                    tasks = []
-                    for okx_sym, binance_sym in self.bot.common_pairs:
-                        tasks.append(self._update_fee(self.bot.okx_tools.exchange, okx_sym))
-                        tasks.append(self._update_fee(self.bot.binance_tools.exchange, binance_sym))
-                    await asyncio.gather(*tasks)
-                    self.bot.last_funding_update = current_time
-                    logger.info("资金费率已更新")
-                else:
-                    logger.debug("资金费率缓存有效，跳过更新")
-            except Exception as e:
-                logger.error(f"资金费率更新失败: {str(e)}")
-            await asyncio.sleep(60)
-
-    async def _update_fee(self, exchange, symbol: str):
-        fee = await self.fetch_funding_rate(exchange, symbol)
-        self.bot.funding_fees[exchange.id][symbol] = fee
-        logger.info(f"更新费率 {exchange.id} {symbol}: {fee:.4%}")
+        """资金费率由bot.funding批量调度"""
+        self.bot.funding.set_symbols(self.bot.common_pairs)
+        await self.bot.funding.run()
 
     async def load_common_pairs(self):
         def normalize_symbol(exchange_id: str, symbol: str) -> Optional[str]:
@@ -6,6 +6,7 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 from tenacity import retry, stop_after_attempt, wait_exponential
+import rate_limiter
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -35,9 +36,9 @@ class CryptoExchangeTools:
             exchange_config['password'] = self.password
 
         if self.exchange_name == 'okx':
-            return ccxt.okx(exchange_config)
+            return rate_limiter.install(ccxt.okx(exchange_config))
         elif self.exchange_name == 'binance':
-            return ccxt.binance(exchange_config)
+            return rate_limiter.install(ccxt.binance(exchange_config))
         else:
             raise ValueError(f"不支持的交易所: {self.exchange_name}")
 
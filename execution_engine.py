@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('closed', 'canceled', 'expired', 'rejected')
+
+
+@dataclass
+class OrderLeg:
+    """单腿下单参数（下单前已完成校验与精度取整）"""
+    exchange: Any
+    symbol: str
+    side: str
+    amount: float
+    price: float
+    params: Dict = field(default_factory=dict)
+    close_params: Dict = field(default_factory=dict)  # 反向平仓时附加的参数
+
+    @property
+    def opposite(self) -> str:
+        return 'sell' if self.side == 'buy' else 'buy'
+
+    @property
+    def market_params(self) -> Dict:
+        """市价补单参数（去掉限价专用字段）"""
+        return {k: v for k, v in self.params.items() if k != 'timeInForce'}
+
+
+class TwoLegExecutor:
+    """双腿并发下单，单腿成交时自动市价对冲或回滚"""
+
+    def __init__(self, fill_timeout: float = 2.0, poll_interval: float = 0.2,
+                 hedge_first: bool = True, instruments=None, tracker=None):
+        self.fill_timeout = fill_timeout
+        self.poll_interval = poll_interval
+        self.hedge_first = hedge_first  # True: 先补齐落后腿；失败再回滚领先腿
+        self.instruments = instruments  # InstrumentIndex，可选
+        # OrderTracker，可选；运行中时按私有推送等待成交，未启动时退回轮询fetch_order
+        self.tracker = tracker
+        self.stats = {'both_filled': 0, 'hedged': 0, 'unwound': 0, 'failed': 0}
+        self._waiters: Dict[Tuple[str, str], asyncio.Future] = {}
+        if tracker is not None:
+            tracker.add_listener(self._on_order_update)
+
+    async def execute(self, buy: OrderLeg, sell: OrderLeg) -> Dict:
+        """同时提交买卖两腿，返回成交结果"""
+        results = await asyncio.gather(self._submit(buy), self._submit(sell), return_exceptions=True)
+        buy_order, sell_order = [r if isinstance(r, dict) else None for r in results]
+        for leg, res in zip((buy, sell), results):
+            if isinstance(res, Exception):
+                logger.error(f"下单失败: {leg.exchange.id} {leg.symbol} {leg.side} - {str(res)}")
+
+        result = {'status': 'failed', 'buy_order': buy_order, 'sell_order': sell_order,
+                  'filled_amount': 0.0}
+        if not buy_order and not sell_order:
+            self.stats['failed'] += 1
+            return result
+
+        if not buy_order or not sell_order:
+            # 单腿下单成功：撤单并市价平掉已成交部分
+            leg, order = (buy, buy_order) if buy_order else (sell, sell_order)
+            await self._unwind(leg, order)
+            self.stats['unwound'] += 1
+            result['status'] = 'unwound'
+            return result
+
+        buy_filled, sell_filled = await asyncio.gather(
+            self._wait_fill(buy, buy_order), self._wait_fill(sell, sell_order)
+        )
+        if buy_filled == sell_filled:
+            result['filled_amount'] = buy_filled
+            result['status'] = 'filled' if buy_filled > 0 else 'unfilled'
+            if buy_filled > 0:
+                self.stats['both_filled'] += 1
+            return result
+
+        status, matched = await self._rebalance(buy, buy_filled, sell, sell_filled)
+        result['status'] = status
+        result['filled_amount'] = matched
+        return result
+
+    async def _submit(self, leg: OrderLeg) -> Dict:
+        return await leg.exchange.create_order(
+            symbol=leg.symbol,
+            type='limit',
+            side=leg.side,
+            amount=leg.amount,
+            price=leg.price,
+            params=leg.params
+        )
+
+    async def _wait_fill(self, leg: OrderLeg, order: Dict) -> float:
+        """等待成交直到超时，超时后撤掉剩余部分，返回已成交数量"""
+        current = order
+        if current.get('status') not in TERMINAL_STATUSES:
+            if self.tracker is not None and self.tracker.is_running:
+                current = await self._wait_tracked(leg, order)
+            else:
+                current = await self._poll_fill(leg, order)
+        return await self._cancel_remaining(leg, current)
+
+    async def _wait_tracked(self, leg: OrderLeg, order: Dict) -> Dict:
+        """等待订单跟踪器推送终态，等待期间不发REST请求；超时返回已知的最新状态"""
+        exchange_id, order_id = leg.exchange.id, str(order['id'])
+        waiter = self._waiters[(exchange_id, order_id)] = asyncio.get_running_loop().create_future()
+        # 推送可能先于下单响应到达，track 时会立即合并并触发回调
+        self.tracker.track(exchange_id, order)
+        try:
+            return await asyncio.wait_for(waiter, self.fill_timeout)
+        except asyncio.TimeoutError:
+            return dict(self.tracker.get(exchange_id, order_id) or order)
+        finally:
+            del self._waiters[(exchange_id, order_id)]
+            self.tracker.untrack(exchange_id, order_id)
+
+    def _on_order_update(self, exchange_id: str, order: Dict):
+        """订单跟踪器回调：等待中的订单进入终态时唤醒对应的腿"""
+        if order.get('status') not in TERMINAL_STATUSES:
+            return
+        waiter = self._waiters.get((exchange_id, str(order['id'])))
+        if waiter is not None and not waiter.done():
+            waiter.set_result(dict(order))
+
+    async def _poll_fill(self, leg: OrderLeg, order: Dict) -> Dict:
+        """无订单跟踪器时按poll_interval轮询fetch_order直到终态或超时"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.fill_timeout
+        current = order
+        while current.get('status') not in TERMINAL_STATUSES and loop.time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                current = await leg.exchange.fetch_order(order['id'], leg.symbol)
+            except Exception as e:
+                logger.warning(f"查询订单失败: {leg.exchange.id} {order['id']} - {str(e)}")
+        return current
+
+    async def _cancel_remaining(self, leg: OrderLeg, order: Dict) -> float:
+        """撤掉未成交部分，再查询一次最终状态，返回最终成交数量"""
+        if order.get('status') not in TERMINAL_STATUSES:
+            try:
+                await leg.exchange.cancel_order(order['id'], leg.symbol)
+            except Exception as e:
+                # 撤单失败通常是订单刚好成交或已撤，以下面的查询结果为准
+                logger.warning(f"撤单失败: {leg.exchange.id} {order['id']} - {str(e)}")
+            try:
+                order = await leg.exchange.fetch_order(order['id'], leg.symbol)
+            except Exception as e:
+                logger.warning(f"查询订单失败: {leg.exchange.id} {order['id']} - {str(e)}")
+        if order.get('status') == 'closed':
+            return float(order.get('filled') or leg.amount)
+        return float(order.get('filled') or 0)
+
+    async def _unwind(self, leg: OrderLeg, order: Dict):
+        """撤掉单腿订单并市价平掉已成交部分"""
+        filled = await self._cancel_remaining(leg, order)
+        if filled > 0:
+            await self._market(leg, leg.opposite, filled, leg.close_params)
+
+    async def _rebalance(self, buy: OrderLeg, buy_filled: float,
+                         sell: OrderLeg, sell_filled: float) -> Tuple[str, float]:
+        """两腿成交量不一致：优先市价补齐落后腿，失败则回滚领先腿"""
+        if buy_filled > sell_filled:
+            ahead, behind, diff = buy, sell, buy_filled - sell_filled
+        else:
+            ahead, behind, diff = sell, buy, sell_filled - buy_filled
+        logger.warning(
+            f"单腿成交: {ahead.exchange.id} 多成交 {diff}，"
+            f"{'补齐' if self.hedge_first else '回滚'}处理"
+        )
+
+        if self.hedge_first and await self._market(behind, behind.side, diff, behind.market_params):
+            self.stats['hedged'] += 1
+            return 'hedged', max(buy_filled, sell_filled)
+
+        if await self._market(ahead, ahead.opposite, diff, ahead.close_params):
+            self.stats['unwound'] += 1
+            return 'unwound', min(buy_filled, sell_filled)
+
+        self.stats['failed'] += 1
+        logger.error(f"对冲失败，存在敞口: {ahead.exchange.id} {ahead.symbol} {diff}")
+        return 'exposed', min(buy_filled, sell_filled)
+
+    async def _market(self, leg: OrderLeg, side: str, amount: float, params: Dict) -> Optional[Dict]:
+        try:
+            inst = self.instruments.get(leg.exchange.id, leg.symbol) if self.instruments else None
+            if inst is not None:
+                amount = inst.floor_amount(amount)
+            else:
+                amount = float(leg.exchange.amount_to_precision(leg.symbol, amount))
+            if amount <= 0:
+                return None
+            order = await leg.exchange.create_order(
+                symbol=leg.symbol, type='market', side=side, amount=amount, params=params
+            )
+            logger.info(f"市价对冲: {leg.exchange.id} {leg.symbol} {side} {amount}")
+            return order
+        except Exception as e:
+            logger.error(f"市价对冲失败: {leg.exchange.id} {leg.symbol} {side} {amount} - {str(e)}")
+            return None
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OKX_BATCH_SIZE = 10      # OKX资金费率接口 20次/2秒，逐个查询时分批
+OKX_BATCH_PAUSE = 1.0
+
+
+class FundingRateService:
+    """资金费率批量获取：Binance premiumIndex一次取全量，OKX instId=ANY（不可用时分批逐个）。
+    距下次结算越近刷新越频繁。"""
+
+    def __init__(self, okx, binance, base_interval: float = 900, near_interval: float = 60,
+                 near_window: float = 600, tick: float = 15):
+        self.exchanges = {'okx': okx, 'binance': binance}
+        self.base_interval = base_interval
+        self.near_interval = near_interval
+        self.near_window = near_window
+        self.tick = tick
+        self.rates: Dict[str, Dict[str, Decimal]] = {'okx': {}, 'binance': {}}
+        self.next_funding: Dict[str, Dict[str, float]] = {'okx': {}, 'binance': {}}   # 秒级时间戳
+        self.fetched_at: Dict[str, Dict[str, float]] = {'okx': {}, 'binance': {}}
+        self.symbols: Dict[str, List[str]] = {'okx': [], 'binance': []}
+        self.listeners: List[Callable[[str, Dict[str, Decimal]], None]] = []
+        self.stats = {'requests': 0, 'errors': 0}
+        self.is_running = False
+        self._okx_bulk = True
+
+    def set_symbols(self, pairs: List[tuple]):
+        """设置需要跟踪的共同交易对"""
+        self.symbols['okx'] = [okx_sym for okx_sym, _ in pairs]
+        self.symbols['binance'] = [binance_sym for _, binance_sym in pairs]
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Decimal]], None]):
+        """注册费率更新回调 callback(exchange_id, {symbol: rate})"""
+        self.listeners.append(callback)
+
+    def get(self, exchange_id: str, symbol: str) -> Decimal:
+        return self.rates[exchange_id].get(symbol, Decimal('0'))
+
+    def aligned(self, exchange_id: str, symbols: Iterable[str]) -> np.ndarray:
+        """按给定顺序返回费率数组（缺失为0），供向量化价差计算"""
+        rates = self.rates[exchange_id]
+        return np.array([float(rates.get(s, 0)) for s in symbols], dtype=np.float64)
+
+    def last_update(self, exchange_id: str) -> float:
+        fetched = self.fetched_at[exchange_id]
+        return min((fetched.get(s, 0.0) for s in self.symbols[exchange_id]), default=0.0)
+
+    def due_symbols(self, exchange_id: str, now: Optional[float] = None) -> List[str]:
+        """需要刷新的交易对：临近结算的按near_interval，其余按base_interval"""
+        now = now or time.time()
+        fetched = self.fetched_at[exchange_id]
+        next_funding = self.next_funding[exchange_id]
+        due = []
+        for symbol in self.symbols[exchange_id]:
+            age = now - fetched.get(symbol, 0.0)
+            near = 0 <= next_funding.get(symbol, 0.0) - now <= self.near_window
+            if age >= (self.near_interval if near else self.base_interval):
+                due.append(symbol)
+        return due
+
+    async def run(self):
+        """调度循环：每tick检查到期交易对，按交易所批量刷新"""
+        self.is_running = True
+        while self.is_running:
+            for exchange_id in self.exchanges:
+                due = self.due_symbols(exchange_id)
+                if due:
+                    try:
+                        await self.refresh(exchange_id, due)
+                    except Exception as e:
+                        self.stats['errors'] += 1
+                        logger.error(f"资金费率更新失败: {exchange_id} - {str(e)}")
+            await asyncio.sleep(self.tick)
+
+    def stop(self):
+        self.is_running = False
+
+    async def refresh(self, exchange_id: str, symbols: Optional[List[str]] = None):
+        symbols = symbols if symbols is not None else self.symbols[exchange_id]
+        if exchange_id == 'binance':
+            updated = await self._fetch_binance()
+        elif self._okx_bulk:
+            updated = await self._fetch_okx_bulk()
+            if updated is None:
+                updated = await self._fetch_okx_batched(symbols)
+        else:
+            updated = await self._fetch_okx_batched(symbols)
+
+        tracked = set(self.symbols[exchange_id])
+        updated = {s: v for s, v in updated.items() if s in tracked}
+        # 本轮已请求过的交易对都记为已刷新（无数据的不重复拉取）
+        now = time.time()
+        for symbol in set(symbols) | set(updated):
+            self.fetched_at[exchange_id][symbol] = now
+        self.rates[exchange_id].update(updated)
+        if updated:
+            logger.info(f"资金费率已更新: {exchange_id} {len(updated)} 个")
+            for callback in self.listeners:
+                try:
+                    callback(exchange_id, updated)
+                except Exception as e:
+                    logger.error(f"资金费率回调异常: {exchange_id} - {str(e)}")
+
+    async def _fetch_binance(self) -> Dict[str, Decimal]:
+        """premiumIndex不带symbol返回全部合约"""
+        self.stats['requests'] += 1
+        items = await self.exchanges['binance'].fapiPublicGetPremiumIndex()
+        updated = {}
+        for item in items:
+            rate = item.get('lastFundingRate')
+            if rate in (None, ''):
+                continue
+            updated[item['symbol']] = Decimal(rate)
+            if item.get('nextFundingTime'):
+                self.next_funding['binance'][item['symbol']] = int(item['nextFundingTime']) / 1000
+        return updated
+
+    async def _fetch_okx_bulk(self) -> Optional[Dict[str, Decimal]]:
+        """instId=ANY一次返回全部永续合约，不支持时返回None并切换为分批模式"""
+        try:
+            self.stats['requests'] += 1
+            res = await self.exchanges['okx'].public_get_public_funding_rate({'instId': 'ANY'})
+        except Exception as e:
+            logger.warning(f"OKX批量资金费率不可用，改为分批查询: {str(e)}")
+            self._okx_bulk = False
+            return None
+        return self._parse_okx(res.get('data', []))
+
+    async def _fetch_okx_batched(self, symbols: List[str]) -> Dict[str, Decimal]:
+        updated = {}
+        okx = self.exchanges['okx']
+        for i in range(0, len(symbols), OKX_BATCH_SIZE):
+            batch = symbols[i:i + OKX_BATCH_SIZE]
+            self.stats['requests'] += len(batch)
+            results = await asyncio.gather(
+                *[okx.public_get_public_funding_rate({'instId': s}) for s in batch],
+                return_exceptions=True
+            )
+            for symbol, res in zip(batch, results):
+                if isinstance(res, Exception):
+                    self.stats['errors'] += 1
+                    logger.error(f"获取资金费率失败: okx {symbol} - {str(res)}")
+                    continue
+                updated.update(self._parse_okx(res.get('data', [])))
+            if i + OKX_BATCH_SIZE < len(symbols):
+                await asyncio.sleep(OKX_BATCH_PAUSE)
+        return updated
+
+    def _parse_okx(self, data: List[Dict]) -> Dict[str, Decimal]:
+        updated = {}
+        for item in data:
+            rate = item.get('fundingRate')
+            if rate in (None, ''):
+                continue
+            updated[item['instId']] = Decimal(rate)
+            if item.get('fundingTime'):
+                self.next_funding['okx'][item['instId']] = int(item['fundingTime']) / 1000
+        return updated
@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+IndexKey = Union[str, Callable[[Dict], Any]]
+
+
+class HistoryStore:
+    """固定容量的历史记录：按写入顺序的有界缓冲 + 二级索引。
+    超出容量时最旧的记录先交给 spill(key, record)（可为协程函数，用于落库）再淘汰，
+    内存占用与运行时长无关。既可按键读写（dict用法），也可 append 追加（list用法）"""
+
+    def __init__(self, capacity: int, indexes: Optional[Dict[str, IndexKey]] = None,
+                 spill: Optional[Callable[[Hashable, Dict], Any]] = None):
+        self.capacity = capacity
+        self.spill = spill
+        self._records: 'OrderedDict[Hashable, Dict]' = OrderedDict()
+        self._index_keys: Dict[str, Callable[[Dict], Any]] = {
+            name: (lambda record, field=key: record.get(field)) if isinstance(key, str) else key
+            for name, key in (indexes or {}).items()
+        }
+        # 索引名 -> 值 -> {记录键: None}（有序集合，保持写入顺序）
+        self._indexes: Dict[str, Dict[Any, Dict[Hashable, None]]] = {name: {} for name in self._index_keys}
+        self._seq = itertools.count()
+        self._pending: set = set()
+        self.evicted = 0
+
+    # ------------------------- 写入 -------------------------
+    def __setitem__(self, key: Hashable, record: Dict):
+        if key in self._records:
+            self._unindex(key, self._records.pop(key))
+        self._records[key] = record
+        self._index(key, record)
+        while len(self._records) > self.capacity:
+            self._evict()
+
+    def append(self, record: Dict) -> Hashable:
+        key = next(self._seq)
+        self[key] = record
+        return key
+
+    def update(self, key: Hashable, **fields):
+        """修改记录字段；被索引的字段须经由这里修改才能保持索引一致"""
+        record = self._records[key]
+        self._unindex(key, record)
+        record.update(fields)
+        self._index(key, record)
+
+    def pop(self, key: Hashable, default=None) -> Optional[Dict]:
+        record = self._records.pop(key, None)
+        if record is None:
+            return default
+        self._unindex(key, record)
+        return record
+
+    def prune(self, field: str, cutoff) -> int:
+        """从最旧一端淘汰 record[field] < cutoff 的记录（写入顺序即时间顺序时为O(淘汰数)）"""
+        count = 0
+        while self._records:
+            key, record = next(iter(self._records.items()))
+            if not record[field] < cutoff:
+                break
+            self._evict()
+            count += 1
+        return count
+
+    def _evict(self):
+        key, record = self._records.popitem(last=False)
+        self._unindex(key, record)
+        self.evicted += 1
+        if self.spill is None:
+            return
+        try:
+            result = self.spill(key, record)
+            if asyncio.iscoroutine(result):
+                task = asyncio.get_running_loop().create_task(result)
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+        except Exception as e:
+            logger.error(f"历史记录落库失败: {key} - {str(e)}")
+
+    def _index(self, key: Hashable, record: Dict):
+        for name, index_key in self._index_keys.items():
+            self._indexes[name].setdefault(index_key(record), {})[key] = None
+
+    def _unindex(self, key: Hashable, record: Dict):
+        for name, index_key in self._index_keys.items():
+            value = index_key(record)
+            keys = self._indexes[name].get(value)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._indexes[name][value]
+
+    # ------------------------- 查询 -------------------------
+    def __getitem__(self, key: Hashable) -> Dict:
+        return self._records[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """按写入顺序遍历记录（最旧在前）"""
+        return iter(self._records.values())
+
+    def get(self, key: Hashable, default=None) -> Optional[Dict]:
+        return self._records.get(key, default)
+
+    def items(self):
+        return self._records.items()
+
+    def recent(self, n: int) -> List[Dict]:
+        """最近n条记录（最旧在前，同 list[-n:]）"""
+        n = min(n, len(self._records))
+        records = list(itertools.islice(reversed(self._records.values()), n))
+        records.reverse()
+        return records
+
+    def find(self, index: str, value) -> List[Dict]:
+        """按二级索引查询，结果按写入顺序"""
+        keys = self._indexes[index].get(value, {})
+        return [self._records[key] for key in keys]
+
+    def count(self, index: str, value) -> int:
+        return len(self._indexes[index].get(value, {}))
+
+    def values_of(self, index: str) -> List:
+        """索引中出现过的全部取值"""
+        return list(self._indexes[index])
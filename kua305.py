@@ -6,6 +6,8 @@ import logging
 from datetime import datetime
 from aiohttp import web
 from tenacity import retry, stop_after_attempt, wait_exponential
+from order_tracker import OrderTracker
+import rate_limiter
 
 # 配置日志
 logging.basicConfig(
@@ -35,7 +37,10 @@ class ArbitrageBot:
         self.start_time = datetime.now()
         self.total_profit = 0.0
         self.daily_profit = 0.0
-        self.active_orders = {}
+        
+        # 订单跟踪：私有推送为主，批量查询挂单兜底
+        self.order_tracker = OrderTracker({'okx': self.okx, 'binance': self.binance}, poll_interval=5)
+        self.order_tracker.add_listener(self.on_order_update)
         
         # Web服务器
         self.web_port = 5000
@@ -43,21 +48,21 @@ class ArbitrageBot:
         self.setup_routes()
 
     def init_okx(self):
-        return ccxt.okx({
+        return rate_limiter.install(ccxt.okx({
             'apiKey': os.getenv('OKX_API_KEY'),
             'secret': os.getenv('OKX_SECRET'),
             'password': os.getenv('OKX_PASSWORD'),
             'enableRateLimit': True,
             'options': {'defaultType': 'swap'}
-        })
+        }))
 
     def init_binance(self):
-        return ccxt.binance({
+        return rate_limiter.install(ccxt.binance({
             'apiKey': os.getenv('BINANCE_API_KEY'),
             'secret': os.getenv('BINANCE_SECRET'),
             'enableRateLimit': True,
             'options': {'defaultType': 'future'}
-        })
+        }))
 
     def setup_routes(self):
         self.app.add_routes([
@@ -73,7 +78,7 @@ class ArbitrageBot:
         return web.json_response({
             'total_profit': round(self.total_profit, 2),
             'daily_profit': round(self.daily_profit, 2),
-            'active_orders': len(self.active_orders),
+            'active_orders': len(self.order_tracker.orders),
             'status': 'RUNNING' if self.is_running else 'STOPPED'
         })
 
@@ -167,27 +172,18 @@ class ArbitrageBot:
                 params=params
             )
             if order:
-                self.active_orders[order['id']] = order
+                self.order_tracker.track(exchange.id, order)
             return order
         except Exception as e:
             logger.error(f"Order failed: {str(e)}")
             return None
 
-    async def monitor_orders(self):
-        while self.is_running:
-            for order_id in list(self.active_orders.keys()):
-                order = self.active_orders[order_id]
-                updated = await self.safe_api_call(
-                    self.okx.fetch_order if order_id.startswith('OKX') else self.binance.fetch_order,
-                    order_id,
-                    order['symbol']
-                )
-                if updated and updated['status'] == 'closed':
-                    del self.active_orders[order_id]
-            await asyncio.sleep(5)
+    def on_order_update(self, exchange_id, order):
+        logger.info(f"Order {exchange_id} {order['id']}: {order['status']} filled={order.get('filled')}")
 
     async def shutdown(self):
         self.is_running = False
+        await self.order_tracker.stop()
         await self.okx.close()
         await self.binance.close()
         logger.info("System shutdown complete")
@@ -201,11 +197,13 @@ class ArbitrageBot:
         await site.start()
         logger.info(f"Web interface: http://localhost:{self.web_port}")
 
+        # 启动订单跟踪
+        await self.order_tracker.start()
+
         # 启动交易循环
         symbols = ['BTC', 'ETH', 'SOL', 'XRP', 'ADA']
         tasks = [
             self.trading_loop(symbols),
-            self.monitor_orders(),
             self.risk_check_loop()
         ]
         await asyncio.gather(*tasks)
@@ -7,11 +7,25 @@ import signal
 from aiohttp import web
 from typing import Dict, Optional, List, Any
 from contextlib import suppress
-from decimal import Decimal, getcontext
+from decimal import Context, Decimal, getcontext
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from orderbook_stream import OrderBookStream
+from opportunity_queue import OpportunityRanking, OpportunityTrigger
+from spread_scanner import VectorSpreadScanner
+from execution_engine import OrderLeg, TwoLegExecutor
+from order_tracker import OrderTracker
+from account_state import AccountStateService
+from instrument_index import InstrumentIndex
+from market_cache import MarketCache
+from funding_service import FundingRateService
+from market_recorder import MarketRecorder
+from history_store import HistoryStore
+import rate_limiter
+
 # ------------------------- 全局配置 -------------------------
 getcontext().prec = 8
+QTY_CONTEXT = Context(prec=28)  # 数量量化到1e-8时整数位会超出全局8位精度
 CONFIG = {
     'initial_capital': Decimal('100'),
     'max_position_ratio': Decimal('0.8'),
@@ -19,8 +33,11 @@ CONFIG = {
     'slippage_tolerance': Decimal('0.001'),
     'orderbook_depth': 20,
     'max_retries': 3,
-    'balance_refresh': 30,
-    'funding_rate_interval': 4 * 3600,
+    'balance_rest_interval': 10,
+    'funding_rate_interval': 900,
+    'record_market_data': False,  # 录制订单簿供回放/研究
+    'record_dir': 'data/market',
+    'order_history_size': 2000,   # 内存中保留的最近订单数
     'webserver_port': 5000,
     'health_check_interval': 60
 }
@@ -54,30 +71,12 @@ logger.addHandler(mem_handler)
 
 # ------------------------- 套利机器人核心类 -------------------------
 class ArbitrageBot:
-    def __init__(self):
-        # 环境变量验证
-        required_env_vars = ['OKX_API_KEY', 'OKX_SECRET', 'OKX_PASSWORD', 'BINANCE_API_KEY', 'BINANCE_SECRET']
-        missing = [var for var in required_env_vars if not os.environ.get(var)]
-        if missing:
-            logger.error(f"缺少环境变量: {', '.join(missing)}")
-            raise RuntimeError("API凭证缺失")
-
-        # 初始化交易所（带连接优化）
-        self.okx = ccxt.okx({
-            'apiKey': os.environ['OKX_API_KEY'],
-            'secret': os.environ['OKX_SECRET'],
-            'password': os.environ['OKX_PASSWORD'],
-            'options': {'defaultType': 'swap', 'adjustForTimeDifference': True},
-            'enableRateLimit': True,
-            'timeout': 15000
-        })
-        self.binance = ccxt.binance({
-            'apiKey': os.environ['BINANCE_API_KEY'],
-            'secret': os.environ['BINANCE_SECRET'],
-            'options': {'defaultType': 'future', 'adjustForTimeDifference': True},
-            'enableRateLimit': True,
-            'timeout': 15000
-        })
+    def __init__(self, okx=None, binance=None):
+        """okx/binance 可注入ccxt兼容的交易所对象（回放回测用），缺省按环境变量创建"""
+        if okx is not None and binance is not None:
+            self.okx, self.binance = okx, binance
+        else:
+            self.okx, self.binance = self._create_exchanges()
 
         # 交易配置（Decimal类型）
         self.config = {
@@ -89,7 +88,8 @@ class ArbitrageBot:
             'compound_enabled': True,  # 启用复利
             'slippage_allowance': Decimal('0.001'),  # 滑点容忍度
             'orderbook_depth': 20,  # 订单簿深度
-            'max_concurrent_checks': 10  # 最大并发检查数
+            'event_driven': True,  # 订单簿事件驱动（关闭则回退定时扫描）
+            'event_cooldown': 0.5  # 同一交易对两次执行的最小间隔（秒）
         }
         self.trade_usdt = self.config['initial_trade_usdt']
 
@@ -103,9 +103,19 @@ class ArbitrageBot:
         self.is_running = True
         self.is_paused = False
         self.balances = {'okx': Decimal('0'), 'binance': Decimal('0')}
+        self.balances_updated = datetime.min
+        self._balance_refresh_task: Optional[asyncio.Task] = None
+        # 账户状态缓存（私有推送为主，推送失效时限流REST对账）
+        self.account_state = AccountStateService(
+            self.okx, self.binance, min_rest_interval=CONFIG['balance_rest_interval']
+        )
+        self.account_state.add_listener(self.on_account_update)
         self.profits = {'total': Decimal('0'), 'today': Decimal('0'), 'realized': Decimal('0')}
         self.trades: List[Dict[str, Any]] = []
-        self.active_orders: List[Dict[str, Any]] = []
+        # 最近订单（有界，按交易所/交易对索引；状态为下单时的快照，不建索引）
+        self.active_orders = HistoryStore(
+            CONFIG['order_history_size'], indexes={'exchange': 'exchange', 'symbol': 'symbol'}
+        )
         self.stats = {
             'start_time': datetime.now(),
             'total_checks': 0,
@@ -115,17 +125,81 @@ class ArbitrageBot:
         }
         self.optimal_opportunities: List[Dict[str, Any]] = []
         self.common_pairs: List[tuple] = []
-        self.funding_fees: Dict[str, Dict[str, Decimal]] = {'okx': {}, 'binance': {}}
-        self.last_funding_update = datetime.min
-        self.semaphore = asyncio.Semaphore(self.config['max_concurrent_checks'])
+        # 资金费率服务（funding_fees与服务共享同一字典）
+        self.funding = FundingRateService(self.okx, self.binance, base_interval=CONFIG['funding_rate_interval'])
+        self.funding_fees: Dict[str, Dict[str, Decimal]] = self.funding.rates
+        # 本地订单簿镜像（WebSocket推送）
+        self.book_stream = OrderBookStream(self.okx, self.binance, depth=self.config['orderbook_depth'])
+        # 事件驱动：单个交易对更新即重算，排行增量维护
+        self.ranking = OpportunityRanking(capacity=30)
+        self.trigger = OpportunityTrigger(self.ranking)
+        self.pair_index: Dict[tuple, tuple] = {}
+        self.last_executed: Dict[str, float] = {}
+        # 批量向量化扫描（定时扫描模式）
+        self.scanner = VectorSpreadScanner(
+            self.fees, self.config['min_profit_margin'], self.config['slippage_allowance'],
+            self.config['initial_trade_usdt'], max_age=self.book_stream.stale_after
+        )
+        self.book_stream.add_listener(self.on_book_update)
+        self.funding.add_listener(self.on_funding_update)
+        # 行情录制（后台线程写盘，回调只入队）
+        self.recorder: Optional[MarketRecorder] = None
+        if CONFIG['record_market_data']:
+            self.recorder = MarketRecorder(CONFIG['record_dir'], depth=self.config['orderbook_depth'])
+            self.book_stream.add_listener(self.record_book)
+            self.book_stream.add_trade_listener(self.recorder.record_trade)
+        # 预编译精度索引（下单路径不再查询ccxt market）
+        self.instruments = InstrumentIndex()
+        # 市场与共同交易对本地缓存（热启动）
+        self.market_cache = MarketCache('cache/kua966/markets.json.gz')
+        # 订单跟踪（私有推送为主，推送断开时批量查询挂单兜底）
+        self.order_tracker = OrderTracker({'okx': self.okx, 'binance': self.binance})
+        # 双腿并发执行（按订单推送等待成交，超时撤单后查询一次）
+        self.executor = TwoLegExecutor(instruments=self.instruments, tracker=self.order_tracker)
         self.runner: Optional[web.AppRunner] = None
         self.site: Optional[web.TCPSite] = None
 
+    @staticmethod
+    def _create_exchanges():
+        # 环境变量验证
+        required_env_vars = ['OKX_API_KEY', 'OKX_SECRET', 'OKX_PASSWORD', 'BINANCE_API_KEY', 'BINANCE_SECRET']
+        missing = [var for var in required_env_vars if not os.environ.get(var)]
+        if missing:
+            logger.error(f"缺少环境变量: {', '.join(missing)}")
+            raise RuntimeError("API凭证缺失")
+
+        # 初始化交易所（带连接优化）
+        okx = ccxt.okx({
+            'apiKey': os.environ['OKX_API_KEY'],
+            'secret': os.environ['OKX_SECRET'],
+            'password': os.environ['OKX_PASSWORD'],
+            'options': {'defaultType': 'swap', 'adjustForTimeDifference': True},
+            'enableRateLimit': True,
+            'timeout': 15000
+        })
+        binance = ccxt.binance({
+            'apiKey': os.environ['BINANCE_API_KEY'],
+            'secret': os.environ['BINANCE_SECRET'],
+            'options': {'defaultType': 'future', 'adjustForTimeDifference': True},
+            'enableRateLimit': True,
+            'timeout': 15000
+        })
+        # 两个客户端的请求统一经过进程共享的限速器（按权重/接口限额，下单优先）
+        return rate_limiter.install(okx), rate_limiter.install(binance)
+
     async def shutdown(self):
         """增强版关闭流程"""
         logger.info("启动关闭流程...")
         self.is_running = False
 
+        # 停止订单簿与账户推送
+        await self.book_stream.stop()
+        await self.account_state.stop()
+        await self.order_tracker.stop()
+        self.funding.stop()
+        if self.recorder:
+            await asyncio.get_running_loop().run_in_executor(None, self.recorder.stop)
+
         # 关闭交易所连接
         if hasattr(self, 'okx'):
             await self.okx.close()
@@ -150,78 +224,75 @@ class ArbitrageBot:
         # 防止Event Loop提前关闭
         await asyncio.sleep(0.5)
 
+    def _check_min_notional(self, exchange, symbol: str, orderbook: Dict) -> bool:
+        """过滤名义价值不足的交易对"""
+        if exchange.id == 'binance':
+            min_notional = Decimal('5.0')  # Binance最小名义价值5U
+            best_ask = Decimal(str(orderbook['asks'][0][0]))
+            if best_ask * self.config['initial_trade_usdt'] < min_notional:
+                logger.debug(f"名义价值不足: {symbol} (需要至少5U)")
+                return False
+        return True
+
+    def get_local_orderbook(self, exchange, symbol: str) -> Optional[Dict]:
+        """读取本地订单簿镜像（不走网络）"""
+        symbol = symbol.upper() if exchange.id == 'binance' else symbol
+        orderbook = self.book_stream.get_orderbook(exchange.id, symbol)
+        if not orderbook or not orderbook['asks'] or not orderbook['bids']:
+            return None
+        return orderbook if self._check_min_notional(exchange, symbol, orderbook) else None
+
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=5))
     async def get_orderbook(self, exchange, symbol: str) -> Optional[Dict]:
-        """获取订单簿（兼容Binance名义价值限制）"""
+        """获取订单簿（优先本地镜像，未同步时回退REST）"""
         try:
             # Binance期货需要全大写（如BTCUSDT）
             symbol = symbol.upper() if exchange.id == 'binance' else symbol
-            orderbook = await exchange.fetch_order_book(symbol, limit=self.config['orderbook_depth'])
-
-            # 过滤名义价值不足的交易对
-            if exchange.id == 'binance':
-                min_notional = Decimal('5.0')  # Binance最小名义价值5U
-                best_ask = Decimal(str(orderbook['asks'][0][0]))
-                best_bid = Decimal(str(orderbook['bids'][0][0]))
-                if best_ask * self.config['initial_trade_usdt'] < min_notional:
-                    logger.debug(f"名义价值不足: {symbol} (需要至少5U)")
-                    return None
+            orderbook = self.book_stream.get_orderbook(exchange.id, symbol)
+            if orderbook is None:
+                orderbook = await exchange.fetch_order_book(symbol, limit=self.config['orderbook_depth'])
+                if self.recorder:
+                    self.recorder.record_book(exchange.id, symbol, orderbook['bids'], orderbook['asks'])
 
-            return orderbook
+            return orderbook if self._check_min_notional(exchange, symbol, orderbook) else None
         except ccxt.BadSymbol:  # 显式捕获无效交易对
             logger.debug(f"交易对不存在: {exchange.id} {symbol}")
             return None
 
+    def on_account_update(self, exchange_id: str):
+        """账户推送回调：同步余额缓存"""
+        self.balances[exchange_id] = self.account_state.balance(exchange_id)
+        self.balances_updated = datetime.now()
+
     async def update_balances(self):
-        """更新账户余额（严格类型转换）"""
+        """更新账户余额（推送正常时只读缓存，过期才限流走REST）"""
         try:
-            okx_balance = await self.okx.fetch_balance(params={'type': 'swap'})
-            binance_balance = await self.binance.fetch_balance(params={'type': 'future'})
-            self.balances['okx'] = Decimal(str(okx_balance['USDT']['free']))
-            self.balances['binance'] = Decimal(str(binance_balance['USDT']['free']))
+            await self.account_state.ensure_fresh()
         except Exception as e:
             logger.error(f"余额更新失败: {str(e)}")
 
-    async def fetch_funding_rate(self, exchange, symbol: str) -> Decimal:
-        """获取资金费率（交易所兼容）"""
-        try:
-            if exchange.id == 'okx':
-                res = await exchange.public_get_public_funding_rate({'instId': symbol})
-                return Decimal(res['data'][0]['fundingRate'])
-            elif exchange.id == 'binance':
-                res = await exchange.fetch_funding_rate(symbol)
-                return Decimal(res['fundingRate'])
-            return Decimal('0')
-        except Exception as e:
-            logger.error(f"获取资金费率失败: {exchange.id} {symbol} - {str(e)}")
-            return Decimal('0')
+    def refresh_balances_soon(self):
+        """成交后异步校验余额缓存（不阻塞交易路径）"""
+        if self._balance_refresh_task is None or self._balance_refresh_task.done():
+            self._balance_refresh_task = asyncio.create_task(self.update_balances())
 
     async def update_funding_fees(self):
-        """资金费率定时更新"""
-        while self.is_running:
-            try:
-                tasks = []
-                for okx_sym, binance_sym in self.common_pairs:
-                    tasks.append(self._update_fee(self.okx, okx_sym))
-                    tasks.append(self._update_fee(self.binance, binance_sym))
-                await asyncio.gather(*tasks)
-                self.last_funding_update = datetime.now()
-            except Exception as e:
-                logger.error(f"资金费率更新失败: {str(e)}")
-            await asyncio.sleep(4 * 3600)
+        """资金费率调度（批量接口，临近结算时加密刷新）"""
+        await self.funding.run()
 
-    async def _update_fee(self, exchange, symbol: str):
-        """更新单个交易对资金费率"""
-        fee = await self.fetch_funding_rate(exchange, symbol)
-        self.funding_fees[exchange.id][symbol] = fee
-        logger.info(f"更新费率 {exchange.id} {symbol}: {fee:.4%}")
+    def on_funding_update(self, exchange_id: str, updated: Dict[str, Decimal]):
+        """资金费率回调：整列刷新扫描器的费率数组"""
+        self.scanner.set_funding(exchange_id, self.funding.aligned(exchange_id, self.scanner.index[exchange_id]))
 
     async def place_order(self, exchange, symbol: str, side: str, amount: Decimal, price: Decimal) -> Optional[Dict]:
         """下单（严格精度处理）"""
         try:
-            market = exchange.market(symbol)
-            precise_amount = exchange.amount_to_precision(symbol, float(amount))
-            precise_price = exchange.price_to_precision(symbol, float(price))
+            inst = self.instruments.get(exchange.id, symbol)
+            if inst is None:
+                logger.error(f"下单失败: 无精度信息 {exchange.id} {symbol}")
+                return None
+            precise_amount = inst.floor_amount(float(amount))
+            precise_price = inst.round_price(float(price))
 
             params = {'timeInForce': 'GTC'} if exchange.id == 'binance' else {}
             order = await exchange.create_order(
@@ -242,118 +313,145 @@ class ArbitrageBot:
                 'status': order['status'],
                 'timestamp': datetime.now().isoformat()
             }
-            self.active_orders.append(order_info)
+            self.active_orders[order_info['id']] = order_info
             logger.info(f"下单成功: {exchange.id} {symbol} {side} {amount:.4f}@{price:.4f}")
             return order_info
         except Exception as e:
             logger.error(f"下单失败: {str(e)}")
             return None
 
+    def _record_order(self, leg: OrderLeg, order: Dict):
+        """记录并发执行引擎提交的订单"""
+        self.active_orders[order['id']] = {
+            'id': order['id'],
+            'exchange': leg.exchange.id,
+            'symbol': leg.symbol,
+            'side': leg.side,
+            'amount': Decimal(str(leg.amount)),
+            'price': Decimal(str(leg.price)),
+            'status': order.get('status'),
+            'timestamp': datetime.now().isoformat()
+        }
+        logger.info(f"下单成功: {leg.exchange.id} {leg.symbol} {leg.side} {leg.amount}@{leg.price}")
+
     def calc_dynamic_spread(self, ex1: str, ex2: str, symbol1: str, symbol2: str) -> Decimal:
         """动态计算价差阈值"""
         fee_total = self.fees[ex1]['taker'] + self.fees[ex2]['taker']
         funding_fee = self.funding_fees[ex1].get(symbol1, Decimal('0')) + self.funding_fees[ex2].get(symbol2, Decimal('0'))
         return fee_total + funding_fee + self.config['min_profit_margin']
 
-    async def execute_arbitrage(self, opp: Dict) -> bool:
-        """执行套利交易（完全Decimal化版本）"""
-        try:
-            # ================== 初始化交易方向 ==================
-            if opp['strategy'] == 'OKX买入->Binance卖出':
-                buy_ex, sell_ex = self.okx, self.binance
-                buy_sym, sell_sym = opp['okx_symbol'], opp['binance_symbol']
-            else:
-                buy_ex, sell_ex = self.binance, self.okx
-                buy_sym, sell_sym = opp['binance_symbol'], opp['okx_symbol']
+    async def prepare_arbitrage(self, opp: Dict) -> Optional[Dict]:
+        """下单前预计算：方向、价格、数量、精度全部在提交前完成"""
+        # ================== 初始化交易方向 ==================
+        if opp['strategy'] == 'OKX买入->Binance卖出':
+            buy_ex, sell_ex = self.okx, self.binance
+            buy_sym, sell_sym = opp['okx_symbol'], opp['binance_symbol']
+        else:
+            buy_ex, sell_ex = self.binance, self.okx
+            buy_sym, sell_sym = opp['binance_symbol'], opp['okx_symbol']
+
+        # ================== 订单簿（优先本地镜像） ==================
+        buy_book = self.get_local_orderbook(buy_ex, buy_sym)
+        sell_book = self.get_local_orderbook(sell_ex, sell_sym)
+        if not buy_book or not sell_book:
+            buy_book, sell_book = await asyncio.gather(
+                self.get_orderbook(buy_ex, buy_sym),
+                self.get_orderbook(sell_ex, sell_sym)
+            )
+        if not buy_book or not sell_book:
+            return None
 
-            # ================== 获取订单簿（强制类型转换） ==================
-            buy_book_task = self.get_orderbook(buy_ex, buy_sym)
-            sell_book_task = self.get_orderbook(sell_ex, sell_sym)
-            buy_book, sell_book = await asyncio.gather(buy_book_task, sell_book_task)
+        # 显式转换所有数值为Decimal（防御式编程）
+        def to_decimal(value, _type: str):
+            """安全转换函数"""
+            if isinstance(value, Decimal):
+                return value
+            try:
+                return Decimal(str(value)) if _type == 'price' else Decimal(str(value)).quantize(Decimal('1e-8'), context=QTY_CONTEXT)
+            except Exception as e:
+                logger.error(f"数值转换失败: {value} | {str(e)}")
+                raise ValueError("Invalid numeric type")
+
+        buy_ask_price = to_decimal(buy_book['asks'][0][0], 'price')
+        buy_ask_qty = to_decimal(buy_book['asks'][0][1], 'qty')
+        sell_bid_price = to_decimal(sell_book['bids'][0][0], 'price')
+        sell_bid_qty = to_decimal(sell_book['bids'][0][1], 'qty')
+
+        # ================== 计算利差（全Decimal运算） ==================
+        spread = (sell_bid_price - buy_ask_price) / buy_ask_price
+        threshold = self.calc_dynamic_spread(buy_ex.id, sell_ex.id, buy_sym, sell_sym)
+        required_spread = threshold + self.config['slippage_allowance']
+        if spread <= required_spread:
+            logger.info(f"利差不足: {spread:.4%} < 要求: {required_spread:.4%}")
+            return None
 
-            if not buy_book or not sell_book:
-                return False
+        # ================== 计算交易量（读取缓存余额，不走网络） ==================
+        balance = self.balances[buy_ex.id]
+        amount_candidates = [
+            self.trade_usdt / buy_ask_price,  # 初始资金限制
+            buy_ask_qty * Decimal('0.8'),      # 买盘深度限制
+            sell_bid_qty * Decimal('0.8'),     # 卖盘深度限制
+            (balance * self.config['position_risk']) / buy_ask_price  # 风险控制
+        ]
+        raw_amount = min(amount_candidates)
 
-            # 显式转换所有数值为Decimal（防御式编程）
-            def to_decimal(value, _type: str):
-                """安全转换函数"""
-                if isinstance(value, Decimal):
-                    return value
-                try:
-                    return Decimal(str(value)) if _type == 'price' else Decimal(str(value)).quantize(Decimal('1e-8'))
-                except Exception as e:
-                    logger.error(f"数值转换失败: {value} | {str(e)}")
-                    raise ValueError("Invalid numeric type")
-
-            # 处理买方向订单簿
-            buy_ask_price = to_decimal(buy_book['asks'][0][0], 'price')
-            buy_ask_qty = to_decimal(buy_book['asks'][0][1], 'qty')
-
-            # 处理卖方向订单簿
-            sell_bid_price = to_decimal(sell_book['bids'][0][0], 'price')
-            sell_bid_qty = to_decimal(sell_book['bids'][0][1], 'qty')
-
-            # ================== 计算利差（全Decimal运算） ==================
-            spread = (sell_bid_price - buy_ask_price) / buy_ask_price
-            threshold = self.calc_dynamic_spread(
-                buy_ex.id, sell_ex.id, 
-                buy_sym, sell_sym
-            )  # 确保此方法返回Decimal
-
-            # 利差检查（增加容差缓冲）
-            required_spread = threshold + self.config['slippage_allowance']
-            if spread <= required_spread:
-                logger.info(f"利差不足: {spread:.4%} < 要求: {required_spread:.4%}")
-                return False
+        # 精度处理（预编译索引，不走ccxt）
+        buy_inst = self.instruments.get(buy_ex.id, buy_sym)
+        sell_inst = self.instruments.get(sell_ex.id, sell_sym)
+        if buy_inst is None or sell_inst is None:
+            logger.info(f"无精度信息: {buy_sym} / {sell_sym}")
+            return None
+        final_amount = buy_inst.floor_amount(float(raw_amount))
+        if final_amount < buy_inst.min_amount:
+            logger.info(f"交易量过小: {final_amount} < {buy_inst.min_amount}")
+            return None
 
-            # ================== 计算交易量（严格类型控制） ==================
-            # 获取当前可用余额
-            await self.update_balances()
-            balance = self.balances[buy_ex.id]
-
-            # 计算最大可交易量（四要素取最小）
-            amount_candidates = [
-                self.trade_usdt / buy_ask_price,  # 初始资金限制
-                buy_ask_qty * Decimal('0.8'),      # 买盘深度限制
-                sell_bid_qty * Decimal('0.8'),     # 卖盘深度限制
-                (balance * self.config['position_risk']) / buy_ask_price  # 风险控制
-            ]
-            raw_amount = min(amount_candidates)
-
-            # 精度处理（按交易所要求）
-            market = buy_ex.market(buy_sym)
-            precise_amount = buy_ex.amount_to_precision(
-                buy_sym, 
-                float(raw_amount)  # CCXT要求传入float
-            )
-            final_amount = Decimal(str(precise_amount))  # 转回Decimal保持类型统一
+        buy_leg = OrderLeg(
+            buy_ex, buy_sym, 'buy', final_amount, buy_inst.round_price(float(buy_ask_price)),
+            params=self._order_params(buy_ex), close_params={'reduceOnly': True}
+        )
+        sell_leg = OrderLeg(
+            sell_ex, sell_sym, 'sell', final_amount, sell_inst.round_price(float(sell_bid_price)),
+            params=self._order_params(sell_ex), close_params={'reduceOnly': True}
+        )
+        return {
+            'buy_leg': buy_leg,
+            'sell_leg': sell_leg,
+            'amount': final_amount,
+            'buy_price': buy_ask_price,
+            'sell_price': sell_bid_price
+        }
 
-            if final_amount < Decimal(str(market['limits']['amount']['min'])):
-                logger.info(f"交易量过小: {final_amount} < {market['limits']['amount']['min']}")
-                return False
+    def _order_params(self, exchange) -> Dict:
+        return {'timeInForce': 'GTC'} if exchange.id == 'binance' else {}
 
-            # ================== 执行交易 ==================
-            buy_order = await self.place_order(
-                buy_ex, buy_sym, 'buy', 
-                final_amount, buy_ask_price
-            )
-            if not buy_order:
+    async def execute_arbitrage(self, opp: Dict) -> bool:
+        """执行套利交易（双腿并发提交，单腿成交自动对冲）"""
+        try:
+            plan = await self.prepare_arbitrage(opp)
+            if not plan:
                 return False
+            buy_leg, sell_leg = plan['buy_leg'], plan['sell_leg']
+            buy_ask_price, sell_bid_price = plan['buy_price'], plan['sell_price']
 
-            sell_order = await self.place_order(
-                sell_ex, sell_sym, 'sell', 
-                final_amount, sell_bid_price
-            )
-
-            if not sell_order:
-                await buy_ex.cancel_order(buy_order['id'], buy_sym)
+            # ================== 执行交易 ==================
+            result = await self.executor.execute(buy_leg, sell_leg)
+            for leg, order in ((buy_leg, result['buy_order']), (sell_leg, result['sell_order'])):
+                if order:
+                    self._record_order(leg, order)
+            self.refresh_balances_soon()
+
+            final_amount = Decimal(str(result['filled_amount']))
+            if result['status'] not in ('filled', 'hedged') or final_amount <= 0:
+                logger.info(f"套利未完成: {result['status']}")
+                self.stats['failed_trades'] += 1
                 return False
 
             # ================== 利润计算（Decimal精确计算） ==================
             gross_profit = (sell_bid_price - buy_ask_price) * final_amount
             fee_cost = (
-                (buy_ask_price * final_amount * self.fees[buy_ex.id]['taker']) +
-                (sell_bid_price * final_amount * self.fees[sell_ex.id]['taker'])
+                (buy_ask_price * final_amount * self.fees[buy_leg.exchange.id]['taker']) +
+                (sell_bid_price * final_amount * self.fees[sell_leg.exchange.id]['taker'])
             )
             net_profit = gross_profit - fee_cost
 
@@ -439,69 +537,151 @@ class ArbitrageBot:
         logger.info(f"有效共同交易对: {len(self.common_pairs)} 样例: {self.common_pairs[:5]}")
 
     
+    def evaluate_pair(self, okx_sym: str, binance_sym: str) -> Optional[Dict]:
+        """基于本地订单簿计算单个交易对的双向价差"""
+        try:
+            okx_book = self.get_local_orderbook(self.okx, okx_sym)
+            binance_book = self.get_local_orderbook(self.binance, binance_sym)
+            if not okx_book or not binance_book:
+                return None
+
+            # 策略1: OKX -> Binance
+            okx_ask = okx_book['asks'][0][0]
+            binance_bid = binance_book['bids'][0][0]
+            spread1 = (binance_bid - okx_ask) / okx_ask
+            threshold1 = self.calc_dynamic_spread('okx', 'binance', okx_sym, binance_sym)
+
+            # 策略2: Binance -> OKX
+            binance_ask = binance_book['asks'][0][0]
+            okx_bid = okx_book['bids'][0][0]
+            spread2 = (okx_bid - binance_ask) / binance_ask
+            threshold2 = self.calc_dynamic_spread('binance', 'okx', binance_sym, okx_sym)
+
+            best_opp = None
+            if spread1 > threshold1 + self.config['slippage_allowance']:
+                best_opp = {
+                    'okx_symbol': okx_sym,
+                    'binance_symbol': binance_sym,
+                    'strategy': 'OKX买入->Binance卖出',
+                    'spread': float(spread1 * 100),
+                    'entry_price': float(okx_ask),
+                    'exit_price': float(binance_bid)
+                }
+            if spread2 > threshold2 + self.config['slippage_allowance']:
+                current_opp = {
+                    'okx_symbol': okx_sym,
+                    'binance_symbol': binance_sym,
+                    'strategy': 'Binance买入->OKX卖出',
+                    'spread': float(spread2 * 100),
+                    'entry_price': float(binance_ask),
+                    'exit_price': float(okx_bid)
+                }
+                if not best_opp or current_opp['spread'] > best_opp['spread']:
+                    best_opp = current_opp
+            return best_opp
+        except Exception as e:
+            logger.error(f"检查交易对失败: {okx_sym}-{binance_sym} - {str(e)}")
+            return None
+
     async def find_best_arbitrage_opportunity(self) -> Optional[Dict]:
-        """寻找最佳套利机会"""
+        """寻找最佳套利机会（向量化扫描本地订单簿，不走网络）"""
         self.stats['total_checks'] += 1
-        opportunities = []
-
-        async def check_pair(okx_sym: str, binance_sym: str):
-            async with self.semaphore:
-                try:
-                    okx_book, binance_book = await asyncio.gather(
-                        self.get_orderbook(self.okx, okx_sym),
-                        self.get_orderbook(self.binance, binance_sym)
-                    )
-                    if not okx_book or not binance_book:
-                        return None
-
-                    # 策略1: OKX -> Binance
-                    okx_ask = okx_book['asks'][0][0]
-                    binance_bid = binance_book['bids'][0][0]
-                    spread1 = (binance_bid - okx_ask) / okx_ask
-                    threshold1 = self.calc_dynamic_spread('okx', 'binance', okx_sym, binance_sym)
-                    
-                    # 策略2: Binance -> OKX 
-                    binance_ask = binance_book['asks'][0][0]
-                    okx_bid = okx_book['bids'][0][0]
-                    spread2 = (okx_bid - binance_ask) / binance_ask
-                    threshold2 = self.calc_dynamic_spread('binance', 'okx', binance_sym, okx_sym)
-
-                    best_opp = None
-                    if spread1 > threshold1 + self.config['slippage_allowance']:
-                        best_opp = {
-                            'okx_symbol': okx_sym,
-                            'binance_symbol': binance_sym,
-                            'strategy': 'OKX买入->Binance卖出',
-                            'spread': float(spread1 * 100),
-                            'entry_price': float(okx_ask),
-                            'exit_price': float(binance_bid)
-                        }
-                    if spread2 > threshold2 + self.config['slippage_allowance']:
-                        current_opp = {
-                            'okx_symbol': okx_sym,
-                            'binance_symbol': binance_sym,
-                            'strategy': 'Binance买入->OKX卖出',
-                            'spread': float(spread2 * 100),
-                            'entry_price': float(binance_ask),
-                            'exit_price': float(okx_bid)
-                        }
-                        if not best_opp or current_opp['spread'] > best_opp['spread']:
-                            best_opp = current_opp
-                    return best_opp
-                except Exception as e:
-                    logger.error(f"检查交易对失败: {okx_sym}-{binance_sym} - {str(e)}")
-                    return None
-
-        tasks = [check_pair(okx_sym, binance_sym) for okx_sym, binance_sym in self.common_pairs]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # 过滤有效机会
-        valid_opps = [res for res in results if isinstance(res, dict)]
-        self.optimal_opportunities = sorted(valid_opps, key=lambda x: x['spread'], reverse=True)[:30]
+        self.optimal_opportunities = self.scanner.scan(top_k=30)
         return self.optimal_opportunities[0] if self.optimal_opportunities else None
 
+    def warm_start(self) -> bool:
+        """从本地缓存恢复市场与共同交易对，不等待load_markets"""
+        data = self.market_cache.load()
+        if not data or not all(self.market_cache.apply(ex, data) for ex in (self.okx, self.binance)):
+            return False
+        self.common_pairs = data['common_pairs']
+        logger.info(f"市场缓存热启动: {len(self.common_pairs)} 个共同交易对")
+        return True
+
+    async def sync_markets(self):
+        """加载实时市场，与当前交易对对比后热替换"""
+        await asyncio.gather(self.okx.load_markets(True), self.binance.load_markets(True))
+        self.instruments.load(self.okx)
+        self.instruments.load(self.binance)
+        old_pairs = list(self.common_pairs)
+        await self.load_common_pairs()
+        self.market_cache.save([self.okx, self.binance], self.common_pairs)
+
+        added, removed = self.market_cache.diff(old_pairs, self.common_pairs)
+        if added or removed:
+            logger.info(f"交易对变化: 新增 {added[:5]} 共{len(added)}个, 下架 {removed[:5]} 共{len(removed)}个")
+            self.build_pair_index()
+            self.book_stream.set_pairs(self.common_pairs)
+            await self.book_stream.restart()
+
+    async def market_sync_loop(self, warm: bool):
+        """后台市场同步：热启动后立即校验一次，之后定期刷新"""
+        if not warm:
+            await asyncio.sleep(self.instruments.refresh_interval)
+        while self.is_running:
+            try:
+                await self.sync_markets()
+            except Exception as e:
+                logger.error(f"市场同步失败: {str(e)}")
+            await asyncio.sleep(self.instruments.refresh_interval)
+
+    def build_pair_index(self):
+        """(交易所, 交易对) -> 共同交易对，供订单簿回调定位"""
+        self.pair_index = {}
+        for okx_sym, binance_sym in self.common_pairs:
+            self.pair_index[('okx', okx_sym)] = (okx_sym, binance_sym)
+            self.pair_index[('binance', binance_sym)] = (okx_sym, binance_sym)
+        self.ranking.clear()
+        self.scanner.set_pairs(self.common_pairs)
+        self.scanner.load_funding(self.funding_fees)
+        self.funding.set_symbols(self.common_pairs)
+
+    def on_book_update(self, exchange_id: str, symbol: str):
+        """订单簿推送回调：只重算该交易对的双向价差"""
+        pair = self.pair_index.get((exchange_id, symbol))
+        if pair is None:
+            return
+        self.scanner.update_book(exchange_id, symbol, self.book_stream.get_orderbook(exchange_id, symbol))
+        if not self.config['event_driven']:
+            return
+        okx_sym, binance_sym = pair
+        opp = self.evaluate_pair(okx_sym, binance_sym)
+        if self.ranking.update(okx_sym, opp):
+            self.optimal_opportunities = self.ranking.top()
+        if opp:
+            self.trigger.notify()
+
+    def record_book(self, exchange_id: str, symbol: str):
+        """订单簿推送回调：录制本地镜像（复用on_book_update已生成的视图）"""
+        orderbook = self.book_stream.get_orderbook(exchange_id, symbol)
+        if orderbook:
+            self.recorder.record_book(exchange_id, symbol, orderbook['bids'], orderbook['asks'])
+
+    async def event_arbitrage_loop(self):
+        """事件驱动套利循环：每条订单簿消息即可触发执行"""
+        while self.is_running:
+            try:
+                opp = await self.trigger.wait_best()
+                if not opp or self.is_paused:
+                    continue
+                self.stats['total_checks'] += 1
+                key = opp['okx_symbol']
+                now = asyncio.get_running_loop().time()
+                if now - self.last_executed.get(key, 0) < self.config['event_cooldown']:
+                    continue
+                self.last_executed[key] = now
+                logger.info(f"发现机会: {opp['strategy']} 利差: {opp['spread']:.2f}%")
+                await self.execute_arbitrage(opp)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"事件循环异常: {str(e)}")
+
     async def arbitrage_loop(self):
         """主套利循环"""
+        if self.config['event_driven']:
+            await self.event_arbitrage_loop()
+            return
         while self.is_running:
             if self.is_paused:
                 await asyncio.sleep(1)
@@ -569,6 +749,7 @@ class ArbitrageBot:
                     'current_amount': float(self.trade_usdt),
                     'max_amount': float(self.config['max_trade_usdt'])
                 },
+                'account': self.account_state.snapshot(),
                 'opportunities': self.optimal_opportunities[:10]
             })
 
@@ -617,20 +798,35 @@ async def main():
     signal.signal(signal.SIGTERM, signal_handler)
 
     try:
-        # 初始化交易所
-        await asyncio.gather(
-            bot.okx.load_markets(),
-            bot.binance.load_markets()
-        )
-        await bot.load_common_pairs()
+        # 初始化交易所（优先使用本地缓存，实时市场在后台校验）
+        warm = bot.warm_start()
+        if not warm:
+            await asyncio.gather(
+                bot.okx.load_markets(),
+                bot.binance.load_markets()
+            )
+            await bot.load_common_pairs()
+            bot.market_cache.save([bot.okx, bot.binance], bot.common_pairs)
+        bot.instruments.load(bot.okx)
+        bot.instruments.load(bot.binance)
         if not bot.common_pairs:
             raise RuntimeError("无有效交易对")
+
+        # 启动订单簿推送（扫描只读本地镜像）
+        bot.build_pair_index()
+        bot.book_stream.set_pairs(bot.common_pairs)
+        await bot.book_stream.start()
+        await bot.account_state.start()
+        await bot.order_tracker.start()
+        if bot.recorder:
+            bot.recorder.start()
         
         # 启动核心任务
         await asyncio.gather(
             bot.arbitrage_loop(),
             bot.run_web_server(),
-            bot.update_funding_fees()
+            bot.update_funding_fees(),
+            bot.market_sync_loop(warm)
         )
     except asyncio.CancelledError:
         pass
@@ -8,11 +8,13 @@ logger = logging.getLogger(__name__)
 
 from bot_core import ArbitrageBot
 from strategies import ArbitrageStrategy
+from trading import TradingManager
 from web_server import run_web_server
 
 async def main():
     bot = ArbitrageBot()
     strategy = ArbitrageStrategy(bot)
+    trading = TradingManager(bot)
 
     def signal_handler(signum, frame):
         logger.info("收到终止信号")
@@ -22,18 +24,28 @@ async def main():
     signal.signal(signal.SIGTERM, signal_handler)
 
     try:
-        await asyncio.gather(
-            bot.okx_tools.exchange.load_markets(),
-            bot.binance_tools.exchange.load_markets()
-        )
-        await bot.load_common_pairs()
+        # 优先使用本地缓存热启动，实时市场在后台校验
+        warm = bot.warm_start()
+        if not warm:
+            await bot.cold_start()
+        bot.instruments.load(bot.okx_tools.exchange)
+        bot.instruments.load(bot.binance_tools.exchange)
         if not bot.common_pairs:
             raise RuntimeError("无有效交易对")
+
+        strategy.attach()
+        bot.book_stream.set_pairs(bot.common_pairs)
+        await bot.book_stream.start()
+        await bot.account_state.start()
+        await bot.order_tracker.start()
+        if bot.recorder:
+            bot.recorder.start()
         
         await asyncio.gather(
-            strategy.find_best_arbitrage_opportunity(),
+            bot.arbitrage_loop(strategy, trading),
             bot.run_web_server(),
-            bot.update_funding_fees()
+            bot.update_funding_fees(),
+            bot.market_sync_loop(warm, on_change=strategy.rebuild_index)
         )
     except Exception as e:
         logger.error(f"致命错误: {str(e)}", exc_info=True)
@@ -0,0 +1,77 @@
+import asyncio
+import bisect
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+
+class OpportunityRanking:
+    """增量维护的套利机会排行（按利差降序，单次更新O(log n)定位）"""
+
+    def __init__(self, capacity: int = 30):
+        self.capacity = capacity
+        self._order: List[Tuple[float, int, str]] = []   # (-spread, 序号, key) 升序
+        self._entries: Dict[str, Tuple[float, int, str]] = {}
+        self._opps: Dict[str, Dict] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _rank(self, entry: Tuple[float, int, str]) -> int:
+        return bisect.bisect_left(self._order, entry)
+
+    def update(self, key: str, opp: Optional[Dict]) -> bool:
+        """更新单个交易对的机会（None表示机会消失），返回前N名是否变化"""
+        if opp is None:
+            return self.remove(key)
+
+        old = self._entries.get(key)
+        old_rank = None
+        if old is not None:
+            old_rank = self._rank(old)
+            del self._order[old_rank]
+
+        entry = (-opp['spread'], next(self._seq), key)
+        new_rank = self._rank(entry)
+        self._order.insert(new_rank, entry)
+        self._entries[key] = entry
+        self._opps[key] = opp
+        return new_rank < self.capacity or (old_rank is not None and old_rank < self.capacity)
+
+    def remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        rank = self._rank(entry)
+        del self._order[rank]
+        del self._opps[key]
+        return rank < self.capacity
+
+    def best(self) -> Optional[Dict]:
+        return self._opps[self._order[0][2]] if self._order else None
+
+    def top(self, n: Optional[int] = None) -> List[Dict]:
+        n = self.capacity if n is None else n
+        return [self._opps[key] for _, _, key in self._order[:n]]
+
+    def clear(self):
+        self._order.clear()
+        self._entries.clear()
+        self._opps.clear()
+
+
+class OpportunityTrigger:
+    """订单簿事件驱动的机会触发器：去重排队，消费者按利差优先取出"""
+
+    def __init__(self, ranking: OpportunityRanking):
+        self.ranking = ranking
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._event.set()
+
+    async def wait_best(self) -> Optional[Dict]:
+        """等待下一次触发并返回当前最优机会"""
+        await self._event.wait()
+        self._event.clear()
+        return self.ranking.best()
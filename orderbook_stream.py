@@ -0,0 +1,346 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+OKX_PUBLIC_WS_URL = 'wss://ws.okx.com:8443/ws/v5/public'
+BINANCE_FUTURES_WS_URL = 'wss://fstream.binance.com/stream?streams='
+
+BINANCE_STREAMS_PER_CONN = 200   # Binance组合流单连接上限
+OKX_SYMBOLS_PER_CONN = 200       # OKX单连接订阅数（保守值）
+OKX_ARGS_PER_SUBSCRIBE = 50      # OKX单条订阅消息的参数数量
+BINANCE_SNAPSHOT_LIMIT = 100     # Binance快照深度
+MAX_PENDING_EVENTS = 1000        # 快照同步期间的缓冲上限
+OKX_PING_INTERVAL = 25           # OKX 30秒无数据会断开，需主动ping
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class LocalOrderBook:
+    """单个交易对的本地深度镜像（价格->数量）"""
+
+    def __init__(self, exchange_id: str, symbol: str, depth: int):
+        self.exchange_id = exchange_id
+        self.symbol = symbol
+        self.depth = depth
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.last_update_id = 0
+        self.timestamp = 0.0
+        self.synced = False
+        self.awaiting_bridge = False  # Binance: 快照后等待第一条衔接事件
+        self._view: Optional[Dict] = None
+
+    def reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = 0
+        self.synced = False
+        self.awaiting_bridge = False
+        self._view = None
+
+    def apply_snapshot(self, bids, asks, update_id: int):
+        """全量快照覆盖"""
+        self.bids = {float(level[0]): float(level[1]) for level in bids if float(level[1]) > 0}
+        self.asks = {float(level[0]): float(level[1]) for level in asks if float(level[1]) > 0}
+        self.last_update_id = update_id
+        self.synced = True
+        self._touch()
+
+    def apply_diff(self, bids, asks, update_id: int):
+        """增量更新（数量为0表示删除价位）"""
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            for level in levels:
+                price = float(level[0])
+                qty = float(level[1])
+                if qty == 0:
+                    side.pop(price, None)
+                else:
+                    side[price] = qty
+        self.last_update_id = update_id
+        self._touch()
+
+    def _touch(self):
+        self.timestamp = time.time()
+        self._view = None
+
+    def view(self) -> Dict:
+        """ccxt兼容格式，按需排序并缓存到下一次更新"""
+        if self._view is None:
+            bids = heapq.nlargest(self.depth, self.bids.items())
+            asks = heapq.nsmallest(self.depth, self.asks.items())
+            self._view = {
+                'symbol': self.symbol,
+                'bids': [[p, q] for p, q in bids],
+                'asks': [[p, q] for p, q in asks],
+                'timestamp': int(self.timestamp * 1000),
+                'nonce': self.last_update_id
+            }
+        return self._view
+
+
+class OrderBookStream:
+    """推送式订单簿引擎：OKX books5 / Binance depth@100ms 本地镜像"""
+
+    def __init__(self, okx, binance, depth: int = 20, stale_after: float = 30.0):
+        self.exchanges = {'okx': okx, 'binance': binance}
+        self.depth = depth
+        self.stale_after = stale_after
+        self.books: Dict[str, Dict[str, LocalOrderBook]] = {'okx': {}, 'binance': {}}
+        self.listeners: List[Callable[[str, str], None]] = []
+        self.trade_listeners: List[Callable] = []
+        self.stats = {'messages': 0, 'gaps': 0, 'resyncs': 0, 'reconnects': 0}
+        self.is_running = False
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, List[Dict]] = {}
+        self._resyncing: set = set()
+
+    def set_pairs(self, pairs: List[tuple]):
+        """设置需要镜像的共同交易对 [(okx_id, binance_id), ...]"""
+        old_okx, old_binance = self.books['okx'], self.books['binance']
+        self.books['okx'] = {
+            okx_sym: old_okx.get(okx_sym) or LocalOrderBook('okx', okx_sym, self.depth)
+            for okx_sym, _ in pairs
+        }
+        self.books['binance'] = {
+            binance_sym: old_binance.get(binance_sym) or LocalOrderBook('binance', binance_sym, self.depth)
+            for _, binance_sym in pairs
+        }
+
+    def add_listener(self, callback: Callable[[str, str], None]):
+        """注册订单簿更新回调 callback(exchange_id, symbol)"""
+        self.listeners.append(callback)
+
+    def add_trade_listener(self, callback: Callable):
+        """注册逐笔成交回调 callback(exchange_id, symbol, price, amount, side, ts)，须在start前注册"""
+        self.trade_listeners.append(callback)
+
+    def get_orderbook(self, exchange_id: str, symbol: str) -> Optional[Dict]:
+        """读取本地订单簿（未同步或过期返回None，不走网络）"""
+        book = self.books.get(exchange_id, {}).get(symbol)
+        if not book or not book.synced:
+            return None
+        if time.time() - book.timestamp > self.stale_after:
+            return None
+        return book.view()
+
+    def synced_count(self) -> Dict[str, int]:
+        return {
+            ex_id: sum(1 for b in books.values() if b.synced)
+            for ex_id, books in self.books.items()
+        }
+
+    async def start(self):
+        """按连接上限分片启动所有WebSocket连接"""
+        if self.is_running:
+            return
+        self.is_running = True
+        for chunk in _chunks(list(self.books['okx']), OKX_SYMBOLS_PER_CONN):
+            self._tasks.append(asyncio.create_task(self._run_okx(chunk)))
+        # 订阅成交时每个交易对占两路流
+        per_conn = BINANCE_STREAMS_PER_CONN // 2 if self.trade_listeners else BINANCE_STREAMS_PER_CONN
+        for chunk in _chunks(list(self.books['binance']), per_conn):
+            self._tasks.append(asyncio.create_task(self._run_binance(chunk)))
+        logger.info(
+            f"订单簿推送已启动: OKX {len(self.books['okx'])} 个, "
+            f"Binance {len(self.books['binance'])} 个, 连接数 {len(self._tasks)}"
+        )
+
+    async def stop(self):
+        self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        logger.info("订单簿推送已停止")
+
+    async def restart(self):
+        """交易对变化后重建连接"""
+        await self.stop()
+        await self.start()
+
+    def _notify(self, exchange_id: str, symbol: str):
+        for callback in self.listeners:
+            try:
+                callback(exchange_id, symbol)
+            except Exception as e:
+                logger.error(f"订单簿回调异常: {exchange_id} {symbol} - {str(e)}")
+
+    def _notify_trade(self, exchange_id: str, symbol: str, price, amount, side: str, ts: float):
+        for callback in self.trade_listeners:
+            try:
+                callback(exchange_id, symbol, price, amount, side, ts)
+            except Exception as e:
+                logger.error(f"成交回调异常: {exchange_id} {symbol} - {str(e)}")
+
+    def _mark_unsynced(self, exchange_id: str, symbols: List[str]):
+        for symbol in symbols:
+            book = self.books[exchange_id].get(symbol)
+            if book:
+                book.reset()
+
+    # ------------------------- OKX -------------------------
+    async def _run_okx(self, symbols: List[str]):
+        delay = 1
+        while self.is_running:
+            try:
+                async with websockets.connect(OKX_PUBLIC_WS_URL, ping_interval=None) as ws:
+                    for chunk in _chunks(symbols, OKX_ARGS_PER_SUBSCRIBE):
+                        args = [{'channel': 'books5', 'instId': s} for s in chunk]
+                        if self.trade_listeners:
+                            args += [{'channel': 'trades', 'instId': s} for s in chunk]
+                        await ws.send(json.dumps({'op': 'subscribe', 'args': args}))
+                    delay = 1
+                    while self.is_running:
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=OKX_PING_INTERVAL)
+                        except asyncio.TimeoutError:
+                            await ws.send('ping')
+                            continue
+                        if raw == 'pong':
+                            continue
+                        self._handle_okx(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"OKX订单簿连接断开: {str(e)}")
+            self._mark_unsynced('okx', symbols)
+            if self.is_running:
+                self.stats['reconnects'] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _handle_okx(self, message: Dict):
+        if 'event' in message:
+            if message['event'] == 'error':
+                logger.error(f"OKX订阅错误: {message}")
+            return
+        data = message.get('data')
+        if not data:
+            return
+        if message['arg'].get('channel') == 'trades':
+            for trade in data:
+                self._notify_trade('okx', trade['instId'], trade['px'], trade['sz'],
+                                   trade['side'], int(trade['ts']) / 1000)
+            return
+        symbol = message['arg']['instId']
+        book = self.books['okx'].get(symbol)
+        if book is None:
+            return
+        self.stats['messages'] += 1
+        item = data[0]
+        seq_id = int(item.get('seqId', 0))
+        prev_seq_id = int(item.get('prevSeqId', -1))
+        if book.synced and seq_id and seq_id <= book.last_update_id:
+            return  # 乱序旧消息
+        if book.synced and prev_seq_id > 0 and prev_seq_id != book.last_update_id:
+            # books5每次推送都是完整快照，缺口只记录不影响状态
+            self.stats['gaps'] += 1
+            logger.debug(f"OKX序列缺口: {symbol} {book.last_update_id} -> {prev_seq_id}")
+        book.apply_snapshot(item['bids'], item['asks'], seq_id)
+        self._notify('okx', symbol)
+
+    # ------------------------- Binance -------------------------
+    async def _run_binance(self, symbols: List[str]):
+        streams = '/'.join(f"{s.lower()}@depth@100ms" for s in symbols)
+        if self.trade_listeners:
+            streams += '/' + '/'.join(f"{s.lower()}@aggTrade" for s in symbols)
+        url = BINANCE_FUTURES_WS_URL + streams
+        delay = 1
+        while self.is_running:
+            try:
+                async with websockets.connect(url, ping_interval=20, max_size=None) as ws:
+                    delay = 1
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        data = message.get('data')
+                        if data and data.get('e') == 'depthUpdate':
+                            self.stats['messages'] += 1
+                            self._handle_binance(data)
+                        elif data and data.get('e') == 'aggTrade':
+                            # m 为True表示买方是挂单方，即主动卖出
+                            self._notify_trade('binance', data['s'], data['p'], data['q'],
+                                               'sell' if data['m'] else 'buy', data['T'] / 1000)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Binance订单簿连接断开: {str(e)}")
+            self._mark_unsynced('binance', symbols)
+            for symbol in symbols:
+                self._pending.pop(symbol, None)
+            if self.is_running:
+                self.stats['reconnects'] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _handle_binance(self, event: Dict):
+        symbol = event['s']
+        book = self.books['binance'].get(symbol)
+        if book is None:
+            return
+
+        if not book.synced:
+            self._buffer_event(symbol, event)
+            return
+
+        if book.awaiting_bridge:
+            if event['u'] < book.last_update_id:
+                return
+            if event['U'] > book.last_update_id:
+                self._on_gap(book, event)
+                return
+            book.awaiting_bridge = False
+        elif event['pu'] != book.last_update_id:
+            self._on_gap(book, event)
+            return
+
+        book.apply_diff(event['b'], event['a'], event['u'])
+        self._notify('binance', symbol)
+
+    def _buffer_event(self, symbol: str, event: Dict):
+        pending = self._pending.setdefault(symbol, [])
+        pending.append(event)
+        if len(pending) > MAX_PENDING_EVENTS:
+            del pending[0]
+        if symbol not in self._resyncing:
+            self._resyncing.add(symbol)
+            asyncio.create_task(self._resync_binance(symbol))
+
+    def _on_gap(self, book: LocalOrderBook, event: Dict):
+        self.stats['gaps'] += 1
+        logger.warning(f"Binance序列缺口: {book.symbol} 本地 {book.last_update_id} 推送 pu={event['pu']}，重新同步快照")
+        book.reset()
+        self._buffer_event(book.symbol, event)
+
+    async def _resync_binance(self, symbol: str):
+        """REST快照 + 缓冲事件衔接"""
+        book = self.books['binance'].get(symbol)
+        try:
+            snapshot = await self.exchanges['binance'].fetch_order_book(
+                symbol, limit=max(BINANCE_SNAPSHOT_LIMIT, self.depth)
+            )
+            if book is None or not self.is_running:
+                return
+            self.stats['resyncs'] += 1
+            book.apply_snapshot(snapshot['bids'], snapshot['asks'], int(snapshot['nonce']))
+            book.awaiting_bridge = True
+            for event in self._pending.pop(symbol, []):
+                if not book.synced:
+                    break
+                self._handle_binance(event)
+        except Exception as e:
+            logger.error(f"Binance快照同步失败: {symbol} - {str(e)}")
+            if book:
+                book.reset()
+            self._pending.pop(symbol, None)
+        finally:
+            self._resyncing.discard(symbol)
@@ -0,0 +1,270 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ccxt.base.errors import DDoSProtection
+
+logger = logging.getLogger(__name__)
+
+# 请求类别：下单/撤单优先，其次账户与订单查询，行情轮询最后
+PRIORITY_ORDER, PRIORITY_ACCOUNT, PRIORITY_MARKET = 0, 1, 2
+# 各类别取令牌时桶内至少要保留的比例，留给更高优先级的请求
+RESERVE = {PRIORITY_ORDER: 0.0, PRIORITY_ACCOUNT: 0.1, PRIORITY_MARKET: 0.25}
+
+# Binance U本位合约：IP权重 2400/分钟，下单 300/10秒、1200/分钟（按账户）
+BINANCE_BUCKETS = {
+    'weight': (2400, 60),
+    'orders_10s': (300, 10),
+    'orders_1m': (1200, 60),
+}
+# 响应头中的已用额度 -> 对应的桶
+BINANCE_USAGE_HEADERS = {
+    'x-mbx-used-weight-1m': 'weight',
+    'x-mbx-order-count-10s': 'orders_10s',
+    'x-mbx-order-count-1m': 'orders_1m',
+}
+BINANCE_ORDER_PATHS = ('order', 'batchOrders', 'allOpenOrders', 'countdownCancelAll')
+
+# OKX 按接口限速：路径 -> (次数, 窗口秒)
+OKX_ENDPOINT_LIMITS = {
+    'trade/order': (60, 2),
+    'trade/batch-orders': (300, 2),
+    'trade/cancel-order': (60, 2),
+    'trade/cancel-batch-orders': (300, 2),
+    'trade/amend-order': (60, 2),
+    'trade/orders-pending': (60, 2),
+    'trade/orders-history': (40, 2),
+    'trade/fills': (60, 2),
+    'account/balance': (10, 2),
+    'account/positions': (10, 2),
+    'account/bills': (5, 1),
+    'market/books': (40, 2),
+    'market/tickers': (20, 2),
+    'market/ticker': (20, 2),
+    'market/candles': (40, 2),
+    'market/history-candles': (20, 2),
+    'public/funding-rate': (20, 2),
+    'public/instruments': (20, 2),
+    'public/time': (10, 2),
+}
+OKX_DEFAULT_LIMIT = (10, 2)
+
+DEFAULT_BUCKETS = {'weight': (1200, 60)}
+
+# 当前请求的 (类别, 桶与消耗)，在 calculate_rate_limiter_cost 中设置，throttle 中读取
+_request: contextvars.ContextVar = contextvars.ContextVar('rate_limit_request', default=None)
+
+
+class TokenBucket:
+    """令牌桶：容量 capacity，每 window 秒补满；可按交易所返回的已用额度校准"""
+
+    def __init__(self, capacity: float, window: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / window
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, reserve: float, now: float) -> float:
+        """取 amount 个令牌且保留 reserve 比例还需等待的秒数，0 表示可立即取"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        floor = self.capacity * reserve if amount < self.capacity * (1 - reserve) else 0.0
+        missing = amount + floor - self.tokens
+        return max(missing / self.rate, 0.0)
+
+    def take(self, amount: float):
+        self.tokens -= amount
+
+    def sync(self, used: float, now: float):
+        """交易所统计的已用额度比本地多时向下校准（只收紧，不放宽）"""
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    @property
+    def headroom(self) -> float:
+        return max(self.tokens, 0.0) / self.capacity
+
+
+class RateLimiter:
+    """进程内共享的限速器：同一交易所的所有ccxt客户端（同步/异步）共用一组令牌桶。
+    install(exchange) 接管 ccxt 的 throttle，按接口权重扣减令牌，按优先级预留额度，
+    并用响应头校准、在429/418时按 Retry-After 暂停该交易所的全部请求"""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+            return cls._instance
+
+    def __init__(self):
+        if hasattr(self, 'initialized'):
+            return
+        self._buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {'waits': 0, 'waited': 0.0, 'throttled': 0}
+        self.initialized = True
+
+    # ------------------------- 接入ccxt -------------------------
+    def install(self, exchange):
+        """让ccxt客户端的所有REST请求经过本限速器"""
+        exchange.enableRateLimit = True
+        exchange_id = exchange.id
+        calculate_cost = exchange.calculate_rate_limiter_cost
+
+        def calculate_rate_limiter_cost(api, method, path, params, config={}):
+            cost = calculate_cost(api, method, path, params, config)
+            _request.set(self.classify(exchange_id, api, method, path, cost))
+            return cost
+
+        exchange.calculate_rate_limiter_cost = calculate_rate_limiter_cost
+        fetch = exchange.fetch
+
+        if asyncio.iscoroutinefunction(fetch):
+            async def throttle(cost=None):
+                priority, costs = _request.get() or (PRIORITY_MARKET, [('weight', cost or 1)])
+                await self.acquire_async(exchange_id, priority, costs)
+
+            async def fetch_with_limits(url, method='GET', headers=None, body=None):
+                try:
+                    return await fetch(url, method, headers, body)
+                except DDoSProtection:
+                    self._on_throttled(exchange_id, exchange.last_response_headers)
+                    raise
+                finally:
+                    self._sync_headers(exchange_id, exchange.last_response_headers)
+        else:
+            def throttle(cost=None):
+                priority, costs = _request.get() or (PRIORITY_MARKET, [('weight', cost or 1)])
+                self.acquire(exchange_id, priority, costs)
+
+            def fetch_with_limits(url, method='GET', headers=None, body=None):
+                try:
+                    return fetch(url, method, headers, body)
+                except DDoSProtection:
+                    self._on_throttled(exchange_id, exchange.last_response_headers)
+                    raise
+                finally:
+                    self._sync_headers(exchange_id, exchange.last_response_headers)
+
+        exchange.throttle = throttle
+        exchange.fetch = fetch_with_limits
+        return exchange
+
+    def classify(self, exchange_id: str, api, method: str, path: str,
+                 cost: float) -> Tuple[int, List[Tuple[str, float]]]:
+        """请求 -> (优先级, [(桶, 消耗), ...])"""
+        api = api if isinstance(api, str) else '/'.join(api)
+        private = 'private' in api.lower()
+        if exchange_id == 'binance':
+            costs = [('weight', cost or 1)]
+            if path in BINANCE_ORDER_PATHS and method != 'GET':
+                if method == 'POST':
+                    costs += [('orders_10s', 1), ('orders_1m', 1)]
+                return PRIORITY_ORDER, costs
+            return (PRIORITY_ACCOUNT if private else PRIORITY_MARKET), costs
+        if exchange_id == 'okx':
+            if path.startswith('trade/'):
+                priority = PRIORITY_ORDER if method == 'POST' else PRIORITY_ACCOUNT
+            else:
+                priority = PRIORITY_ACCOUNT if private else PRIORITY_MARKET
+            return priority, [(path, 1)]
+        return (PRIORITY_ACCOUNT if private else PRIORITY_MARKET), [('weight', cost or 1)]
+
+    # ------------------------- 取令牌 -------------------------
+    def _bucket(self, exchange_id: str, name: str) -> TokenBucket:
+        buckets = self._buckets.setdefault(exchange_id, {})
+        bucket = buckets.get(name)
+        if bucket is None:
+            if exchange_id == 'binance':
+                limit = BINANCE_BUCKETS.get(name, BINANCE_BUCKETS['weight'])
+            elif exchange_id == 'okx':
+                limit = OKX_ENDPOINT_LIMITS.get(name, OKX_DEFAULT_LIMIT)
+            else:
+                limit = DEFAULT_BUCKETS.get(name, DEFAULT_BUCKETS['weight'])
+            bucket = buckets[name] = TokenBucket(*limit)
+        return bucket
+
+    def _try_acquire(self, exchange_id: str, priority: int, costs: List[Tuple[str, float]]) -> float:
+        """全部桶都够时一次性扣减并返回0，否则返回需要等待的秒数（不扣减）"""
+        now = time.monotonic()
+        with self._lock:
+            blocked = self._blocked_until.get(exchange_id, 0.0) - now
+            if blocked > 0:
+                return blocked
+            reserve = RESERVE[priority]
+            wait = max(self._bucket(exchange_id, name).wait_time(amount, reserve, now)
+                       for name, amount in costs)
+            if wait <= 0:
+                for name, amount in costs:
+                    self._bucket(exchange_id, name).take(amount)
+            return wait
+
+    def acquire(self, exchange_id: str, priority: int, costs: List[Tuple[str, float]]):
+        while True:
+            wait = self._try_acquire(exchange_id, priority, costs)
+            if wait <= 0:
+                return
+            self._record_wait(wait)
+            time.sleep(wait)
+
+    async def acquire_async(self, exchange_id: str, priority: int, costs: List[Tuple[str, float]]):
+        while True:
+            wait = self._try_acquire(exchange_id, priority, costs)
+            if wait <= 0:
+                return
+            self._record_wait(wait)
+            await asyncio.sleep(wait)
+
+    def _record_wait(self, wait: float):
+        self.stats['waits'] += 1
+        self.stats['waited'] += wait
+
+    # ------------------------- 响应头校准 -------------------------
+    def _sync_headers(self, exchange_id: str, headers: Optional[Dict]):
+        if exchange_id != 'binance' or not headers:
+            return
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.monotonic()
+        with self._lock:
+            for header, name in BINANCE_USAGE_HEADERS.items():
+                used = headers.get(header)
+                if used is not None:
+                    self._bucket(exchange_id, name).sync(float(used), now)
+
+    def _on_throttled(self, exchange_id: str, headers: Optional[Dict]):
+        """429/418：按Retry-After暂停该交易所的所有请求"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        try:
+            retry_after = float(headers.get('retry-after', 0)) or 10.0
+        except ValueError:
+            retry_after = 10.0
+        with self._lock:
+            self._blocked_until[exchange_id] = time.monotonic() + retry_after
+        self.stats['throttled'] += 1
+        logger.warning(f"{exchange_id} 触发限速，暂停请求 {retry_after:.0f} 秒")
+
+    def headroom(self, exchange_id: str) -> float:
+        """该交易所最紧张的桶的剩余比例"""
+        buckets = self._buckets.get(exchange_id)
+        if not buckets:
+            return 1.0
+        with self._lock:
+            now = time.monotonic()
+            for bucket in buckets.values():
+                bucket._refill(now)
+            return min(bucket.headroom for bucket in buckets.values())
+
+
+def install(exchange):
+    """接入进程共享的限速器，返回原客户端"""
+    return RateLimiter().install(exchange)
@@ -0,0 +1,505 @@
+"""kua966 套利引擎离线回放回测
+
+用录制的订单簿快照与资金费率驱动 ArbitrageBot 的事件驱动扫描与双腿执行，
+交易所由 SimExchange 模拟（ccxt 异步接口子集），带请求延迟与部分成交。
+事件循环使用虚拟时钟，无需真实等待，可远快于实时回放。
+
+事件格式（JSONL，可gzip）:
+    {"ts": 1700000000.123, "exchange": "okx", "symbol": "BTC-USDT-SWAP", "bids": [[p, q], ...], "asks": [[p, q], ...]}
+    {"ts": 1700000000.500, "exchange": "binance", "symbol": "BTCUSDT", "funding": 0.0001}
+"""
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import logging
+import random
+import selectors
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from kua966 import ArbitrageBot
+from market_cache import MarketCache
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------- 虚拟时钟事件循环 -------------------------
+class _VirtualSelector(selectors.BaseSelector):
+    """包装真实selector：没有就绪IO时直接把虚拟时钟推进到下一个定时器"""
+
+    def __init__(self, loop: 'VirtualTimeEventLoop'):
+        self._loop = loop
+        self._selector = selectors.DefaultSelector()
+
+    def register(self, fileobj, events, data=None):
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._selector.modify(fileobj, events, data)
+
+    def get_map(self):
+        return self._selector.get_map()
+
+    def close(self):
+        self._selector.close()
+
+    def select(self, timeout=None):
+        ready = self._selector.select(0)
+        if ready:
+            return ready
+        if timeout is None:
+            raise RuntimeError("虚拟时钟死锁：没有可运行任务也没有定时器")
+        self._loop.advance(timeout)
+        return []
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """loop.time()返回从0开始的虚拟秒数，sleep不占用真实时间"""
+
+    def __init__(self):
+        self._virtual_now = 0.0
+        super().__init__(selector=_VirtualSelector(self))
+
+    def time(self) -> float:
+        return self._virtual_now
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            self._virtual_now += seconds
+
+
+# ------------------------- 延迟与成交模型 -------------------------
+class LatencyModel:
+    """请求往返延迟：基础值 + 指数分布抖动（固定种子，可复现）"""
+
+    def __init__(self, base_ms: float = 30.0, jitter_ms: float = 10.0, seed: int = 0):
+        self.base = base_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self._rng = random.Random(seed)
+
+    def sample(self) -> float:
+        return self.base + (self._rng.expovariate(1 / self.jitter) if self.jitter > 0 else 0.0)
+
+
+# ------------------------- 模拟交易所 -------------------------
+class SimExchange:
+    """ccxt异步接口的回测替身：按当前快照撮合，限价单剩余部分挂单等待后续快照"""
+
+    precisionMode = 4  # TICK_SIZE
+
+    def __init__(self, exchange_id: str, markets: Dict[str, Dict], balance: float = 1000.0,
+                 taker_fee: float = 0.0005, latency: Optional[LatencyModel] = None,
+                 participation: float = 0.5, leverage: float = 1.0):
+        self.id = exchange_id
+        self.apiKey = self.secret = self.password = ''
+        self.markets = markets
+        self.markets_by_id = {m['id']: m for m in markets.values()}
+        self.taker_fee = taker_fee
+        self.latency = latency or LatencyModel()
+        self.participation = participation  # 每档可吃到的挂单比例（模拟同档竞争）
+        self.leverage = leverage
+        self.initial_balance = balance
+        self.cash = balance
+        self.fees_paid = 0.0
+        self.positions: Dict[str, float] = {}
+        self.books: Dict[str, Dict] = {}
+        self.orders: Dict[str, Dict] = {}
+        self.open_orders: Dict[str, Dict] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self._ids = itertools.count(1)
+
+    # ---------- 行情输入（回放驱动） ----------
+    def on_book(self, symbol: str, bids: List, asks: List, timestamp: float):
+        self.books[symbol] = {
+            'bids': [[float(p), float(q)] for p, q in bids],
+            'asks': [[float(p), float(q)] for p, q in asks],
+            'timestamp': timestamp
+        }
+        for order in [o for o in self.open_orders.values() if o['symbol'] == symbol]:
+            self._match(order)
+
+    def mid(self, symbol: str) -> Optional[float]:
+        book = self.books.get(symbol)
+        if not book or not book['bids'] or not book['asks']:
+            return None
+        return (book['bids'][0][0] + book['asks'][0][0]) / 2
+
+    def equity(self) -> float:
+        return self.cash + sum(qty * (self.mid(sym) or 0.0) for sym, qty in self.positions.items())
+
+    # ---------- ccxt 接口 ----------
+    async def _delay(self, method: str):
+        latency = self.latency.sample()
+        self.latencies.setdefault(method, []).append(latency)
+        await asyncio.sleep(latency)
+
+    def _now_ms(self) -> int:
+        return int(asyncio.get_running_loop().time() * 1000)
+
+    async def load_markets(self, reload: bool = False) -> Dict[str, Dict]:
+        return self.markets
+
+    def set_markets(self, markets):
+        values = markets.values() if isinstance(markets, dict) else markets
+        self.markets = {m['symbol']: m for m in values}
+        self.markets_by_id = {m['id']: m for m in self.markets.values()}
+
+    def market(self, symbol: str) -> Dict:
+        return self.markets.get(symbol) or self.markets_by_id[symbol]
+
+    def amount_to_precision(self, symbol: str, amount: float) -> str:
+        step = float(self.market(symbol)['precision']['amount'])
+        return repr(int(amount / step + 1e-9) * step)
+
+    def price_to_precision(self, symbol: str, price: float) -> str:
+        tick = float(self.market(symbol)['precision']['price'])
+        return repr(round(price / tick) * tick)
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None, params=None) -> Dict:
+        await self._delay('fetch_order_book')
+        book = self.books.get(symbol) or {'bids': [], 'asks': [], 'timestamp': 0}
+        return {
+            'symbol': symbol,
+            'bids': book['bids'][:limit],
+            'asks': book['asks'][:limit],
+            'timestamp': self._now_ms(),
+            'nonce': None
+        }
+
+    async def fetch_balance(self, params=None) -> Dict:
+        await self._delay('fetch_balance')
+        equity = self.equity()
+        used = sum(abs(qty) * (self.mid(sym) or 0.0) for sym, qty in self.positions.items()) / self.leverage
+        usdt = {'free': max(equity - used, 0.0), 'used': used, 'total': equity}
+        return {'USDT': usdt, 'free': {'USDT': usdt['free']}, 'total': {'USDT': equity}}
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float,
+                           price: Optional[float] = None, params=None) -> Dict:
+        await self._delay('create_order')
+        if symbol not in self.books:
+            raise ValueError(f"无行情: {self.id} {symbol}")
+        order = {
+            'id': str(next(self._ids)),
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'price': float(price) if price is not None else None,
+            'amount': float(amount),
+            'filled': 0.0,
+            'remaining': float(amount),
+            'cost': 0.0,
+            'average': None,
+            'status': 'open',
+            'timestamp': self._now_ms(),
+            'fee': {'currency': 'USDT', 'cost': 0.0},
+            'params': dict(params or {}),
+            'done_at': None
+        }
+        self.orders[order['id']] = order
+        self._match(order)
+        if order['status'] == 'open':
+            if type == 'market':
+                order['status'] = 'canceled'  # 深度不足，剩余部分作废
+                order['done_at'] = order['timestamp']
+            else:
+                self.open_orders[order['id']] = order
+        return dict(order)
+
+    async def fetch_order(self, order_id: str, symbol: Optional[str] = None, params=None) -> Dict:
+        await self._delay('fetch_order')
+        return dict(self.orders[order_id])
+
+    async def cancel_order(self, order_id: str, symbol: Optional[str] = None, params=None) -> Dict:
+        await self._delay('cancel_order')
+        order = self.orders[order_id]
+        if order['status'] == 'open':
+            order['status'] = 'canceled'
+            order['done_at'] = self._now_ms()
+            self.open_orders.pop(order_id, None)
+        return dict(order)
+
+    async def close(self):
+        pass
+
+    # ---------- 撮合 ----------
+    def _match(self, order: Dict):
+        book = self.books.get(order['symbol'])
+        if not book:
+            return
+        buy = order['side'] == 'buy'
+        levels = book['asks'] if buy else book['bids']
+        limit = order['price'] if order['type'] == 'limit' else None
+        share = 1.0 if order['type'] == 'market' else self.participation
+        for level in levels:
+            price, qty = level
+            if order['remaining'] <= 1e-12:
+                break
+            if limit is not None and (price > limit if buy else price < limit):
+                break
+            take = min(order['remaining'], qty * share)
+            if take <= 0:
+                continue
+            level[1] -= take  # 本快照内已被吃掉的数量
+            self._fill(order, take, price)
+        if order['remaining'] <= 1e-12:
+            order['remaining'] = 0.0
+            order['status'] = 'closed'
+            order['done_at'] = self._now_ms()
+            self.open_orders.pop(order['id'], None)
+
+    def _fill(self, order: Dict, qty: float, price: float):
+        order['filled'] += qty
+        order['remaining'] -= qty
+        order['cost'] += qty * price
+        order['average'] = order['cost'] / order['filled']
+        fee = qty * price * self.taker_fee
+        order['fee']['cost'] += fee
+        sign = 1.0 if order['side'] == 'buy' else -1.0
+        self.positions[order['symbol']] = self.positions.get(order['symbol'], 0.0) + sign * qty
+        self.cash -= sign * qty * price + fee
+        self.fees_paid += fee
+
+    # ---------- 资金费率（供FundingRateService直接调用时使用） ----------
+    async def public_get_public_funding_rate(self, params: Dict) -> Dict:
+        await self._delay('funding')
+        return {'data': []}
+
+    async def fapiPublicGetPremiumIndex(self, params=None) -> List:
+        await self._delay('funding')
+        return []
+
+
+# ------------------------- 事件与市场数据 -------------------------
+def load_events(path: str) -> List[Dict]:
+    """读取JSONL(.gz)事件并按时间排序"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    events.sort(key=lambda e: e['ts'])
+    return events
+
+
+def synthesize_markets(exchange_id: str, symbols: Iterable[str]) -> Dict[str, Dict]:
+    """没有市场缓存时按事件中的交易对生成最小市场定义"""
+    markets = {}
+    for symbol in symbols:
+        markets[symbol] = {
+            'id': symbol,
+            'symbol': symbol,
+            'type': 'swap',
+            'quote': 'USDT',
+            'active': True,
+            'contract': True,
+            'contractSize': 1.0,
+            'precision': {'price': 1e-8, 'amount': 1e-6},
+            'limits': {'amount': {'min': 1e-6}, 'cost': {'min': None}}
+        }
+    return markets
+
+
+def _percentiles(values: List[float], scale: float = 1000.0) -> Dict[str, float]:
+    if not values:
+        return {}
+    arr = np.asarray(values) * scale
+    p50, p90, p99 = np.percentile(arr, [50, 90, 99])
+    return {'count': len(values), 'p50': float(p50), 'p90': float(p90), 'p99': float(p99), 'max': float(arr.max())}
+
+
+# ------------------------- 回测驱动 -------------------------
+class ReplayBacktest:
+    """把事件按虚拟时间灌入 ArbitrageBot，结束后汇总PnL、成交率与延迟"""
+
+    def __init__(self, events: List[Dict], markets: Optional[Dict[str, Dict[str, Dict]]] = None,
+                 config: Optional[Dict] = None, balances: Optional[Dict[str, float]] = None,
+                 latency_ms: float = 30.0, jitter_ms: float = 10.0, seed: int = 0, participation: float = 0.5,
+                 drain: float = 10.0, bot_factory: Callable = ArbitrageBot):
+        self.events = events
+        self.config = config or {}
+        self.drain = drain
+        self.bot_factory = bot_factory
+        balances = balances or {}
+        self.exchanges: Dict[str, SimExchange] = {}
+        # 每次回测重新播种，参数网格中各组合看到相同的延迟序列
+        for offset, exchange_id in enumerate(('okx', 'binance')):
+            ex_markets = (markets or {}).get(exchange_id) or synthesize_markets(
+                exchange_id, {e['symbol'] for e in events if e['exchange'] == exchange_id}
+            )
+            self.exchanges[exchange_id] = SimExchange(
+                exchange_id, ex_markets, balance=balances.get(exchange_id, 1000.0),
+                latency=LatencyModel(latency_ms, jitter_ms, seed=seed + offset), participation=participation
+            )
+        self.bot = None
+
+    def _build_bot(self):
+        bot = self.bot_factory(self.exchanges['okx'], self.exchanges['binance'])
+        for key, value in self.config.items():
+            bot.config[key] = value
+        for exchange_id, ex in self.exchanges.items():
+            bot.fees[exchange_id]['taker'] = Decimal(str(ex.taker_fee))
+        bot.trade_usdt = bot.config['initial_trade_usdt']
+        bot.scanner.min_profit_margin = float(bot.config['min_profit_margin'])
+        bot.scanner.slippage_allowance = float(bot.config['slippage_allowance'])
+        bot.account_state.min_rest_interval = 0  # 余额对账不受真实时间节流影响，保证可复现
+        for ex in self.exchanges.values():
+            bot.instruments.load(ex)
+        return bot
+
+    async def run(self) -> Dict:
+        loop = asyncio.get_running_loop()
+        wall_start = time.perf_counter()
+        bot = self.bot = self._build_bot()
+        await bot.load_common_pairs()
+        bot.build_pair_index()
+        bot.book_stream.set_pairs(bot.common_pairs)
+        await bot.update_balances()
+
+        arb_task = asyncio.create_task(bot.arbitrage_loop())
+        t0 = self.events[0]['ts'] if self.events else 0.0
+        for seq, event in enumerate(self.events, 1):
+            delay = (event['ts'] - t0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._apply(bot, event, seq)
+            await asyncio.sleep(0)
+
+        await asyncio.sleep(self.drain)
+        bot.is_running = False
+        arb_task.cancel()
+        await asyncio.gather(arb_task, return_exceptions=True)
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return self.report(loop.time(), time.perf_counter() - wall_start)
+
+    def _apply(self, bot, event: Dict, seq: int):
+        exchange_id, symbol = event['exchange'], event['symbol']
+        if 'funding' in event:
+            rate = Decimal(str(event['funding']))
+            bot.funding.rates[exchange_id][symbol] = rate
+            bot.on_funding_update(exchange_id, {symbol: rate})
+            return
+        self.exchanges[exchange_id].on_book(symbol, event['bids'], event['asks'], event['ts'])
+        book = bot.book_stream.books[exchange_id].get(symbol)
+        if book is None:
+            return
+        book.apply_snapshot(event['bids'], event['asks'], seq)
+        bot.on_book_update(exchange_id, symbol)
+
+    def report(self, virtual_seconds: float, wall_seconds: float) -> Dict:
+        bot = self.bot
+        orders = [o for ex in self.exchanges.values() for o in ex.orders.values()]
+        limit_orders = [o for o in orders if o['type'] == 'limit']
+        requested = sum(o['amount'] for o in limit_orders)
+        filled = sum(o['filled'] for o in limit_orders)
+        lifetimes = [
+            (o['done_at'] - o['timestamp']) / 1000 for o in limit_orders if o['done_at'] is not None
+        ]
+        latencies = {}
+        for ex in self.exchanges.values():
+            for method, values in ex.latencies.items():
+                latencies.setdefault(method, []).extend(values)
+
+        equity_change = sum(ex.equity() - ex.initial_balance for ex in self.exchanges.values())
+        return {
+            'events': len(self.events),
+            'virtual_seconds': round(virtual_seconds, 3),
+            'wall_seconds': round(wall_seconds, 3),
+            'speedup': round(virtual_seconds / wall_seconds, 1) if wall_seconds > 0 else None,
+            'trades': {
+                'checks': bot.stats['total_checks'],
+                'successful': bot.stats['successful_trades'],
+                'failed': bot.stats['failed_trades'],
+                'executor': dict(bot.executor.stats)
+            },
+            'fills': {
+                'limit_orders': len(limit_orders),
+                'market_orders': len(orders) - len(limit_orders),
+                'fill_rate': round(filled / requested, 4) if requested else None,
+                'full_fill_ratio': round(
+                    sum(1 for o in limit_orders if o['status'] == 'closed') / len(limit_orders), 4
+                ) if limit_orders else None
+            },
+            'pnl': {
+                'bot_estimated': float(bot.profits['total']),
+                'mark_to_market': round(equity_change, 6),
+                'fees': round(sum(ex.fees_paid for ex in self.exchanges.values()), 6),
+                'residual_positions': {
+                    ex_id: {s: q for s, q in ex.positions.items() if abs(q) > 1e-12}
+                    for ex_id, ex in self.exchanges.items()
+                },
+                'final_trade_usdt': float(bot.trade_usdt)
+            },
+            'latency_ms': {
+                **{method: _percentiles(values) for method, values in latencies.items()},
+                'order_lifetime': _percentiles(lifetimes)
+            }
+        }
+
+
+def run_backtest(events: List[Dict], **kwargs) -> Dict:
+    """在独立的虚拟时钟事件循环中跑一次回测"""
+    loop = VirtualTimeEventLoop()
+    try:
+        return loop.run_until_complete(ReplayBacktest(events, **kwargs).run())
+    finally:
+        loop.close()
+
+
+def sweep(events: List[Dict], grid: Dict[str, List], **kwargs) -> List[Dict]:
+    """参数网格回测，如 {'min_profit_margin': [...], 'slippage_allowance': [...]}"""
+    results = []
+    keys = list(grid)
+    base_config = kwargs.pop('config', None) or {}
+    for values in itertools.product(*(grid[k] for k in keys)):
+        config = dict(base_config)
+        config.update(zip(keys, values))
+        report = run_backtest(events, config=config, **kwargs)
+        results.append({'params': {k: str(v) for k, v in zip(keys, values)}, 'report': report})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='kua966 套利引擎回放回测')
+    parser.add_argument('events', help='事件文件（JSONL，可.gz）')
+    parser.add_argument('--markets', help='市场缓存文件（MarketCache格式）')
+    parser.add_argument('--min-profit', type=Decimal, nargs='+', default=[Decimal('0.0001')])
+    parser.add_argument('--slippage', type=Decimal, nargs='+', default=[Decimal('0.001')])
+    parser.add_argument('--no-compound', action='store_true')
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--participation', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    events = load_events(args.events)
+    markets = None
+    if args.markets:
+        data = MarketCache(args.markets, max_age=float('inf')).load()
+        if data:
+            markets = {ex_id: {m['symbol']: m for m in ms} for ex_id, ms in data['markets'].items()}
+
+    results = sweep(
+        events,
+        {'min_profit_margin': args.min_profit, 'slippage_allowance': args.slippage},
+        markets=markets,
+        config={'compound_enabled': not args.no_compound},
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        seed=args.seed,
+        participation=args.participation
+    )
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import logging
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_NAMES = ('OKX买入->Binance卖出', 'Binance买入->OKX卖出')
+
+
+class VectorSpreadScanner:
+    """共同交易对批量价差扫描（float64对齐数组，向量化计算双向价差与阈值）"""
+
+    def __init__(self, fees: Dict[str, Dict[str, Decimal]], min_profit_margin: Decimal,
+                 slippage_allowance: Decimal, initial_trade_usdt: Decimal,
+                 min_notional: float = 5.0, max_age: float = 30.0):
+        self.fees = fees
+        self.min_profit_margin = float(min_profit_margin)
+        self.slippage_allowance = float(slippage_allowance)
+        self.initial_trade_usdt = float(initial_trade_usdt)
+        self.min_notional = min_notional
+        self.max_age = max_age
+        self.set_pairs([])
+
+    def set_pairs(self, pairs: List[tuple]):
+        """按共同交易对顺序分配对齐数组"""
+        n = len(pairs)
+        self.pairs = list(pairs)
+        self.index = {
+            'okx': {okx_sym: i for i, (okx_sym, _) in enumerate(pairs)},
+            'binance': {binance_sym: i for i, (_, binance_sym) in enumerate(pairs)}
+        }
+        self.bid = {ex: np.full(n, np.nan) for ex in ('okx', 'binance')}
+        self.ask = {ex: np.full(n, np.nan) for ex in ('okx', 'binance')}
+        self.ts = {ex: np.zeros(n) for ex in ('okx', 'binance')}
+        self.taker = {ex: np.full(n, float(self.fees[ex]['taker'])) for ex in ('okx', 'binance')}
+        self.funding = {ex: np.zeros(n) for ex in ('okx', 'binance')}
+
+    def update_book(self, exchange_id: str, symbol: str, orderbook: Optional[Dict]):
+        """写入单个交易对的最优买卖价（None表示订单簿不可用）"""
+        i = self.index[exchange_id].get(symbol)
+        if i is None:
+            return
+        if orderbook and orderbook['bids'] and orderbook['asks']:
+            self.bid[exchange_id][i] = orderbook['bids'][0][0]
+            self.ask[exchange_id][i] = orderbook['asks'][0][0]
+            self.ts[exchange_id][i] = time.time()
+        else:
+            self.bid[exchange_id][i] = np.nan
+            self.ask[exchange_id][i] = np.nan
+
+    def update_funding(self, exchange_id: str, symbol: str, rate):
+        i = self.index[exchange_id].get(symbol)
+        if i is not None:
+            self.funding[exchange_id][i] = float(rate)
+
+    def set_funding(self, exchange_id: str, rates: np.ndarray):
+        """整列写入资金费率（与set_pairs顺序对齐）"""
+        self.funding[exchange_id][:] = rates
+
+    def load_funding(self, funding_fees: Dict[str, Dict[str, Decimal]]):
+        """批量载入资金费率"""
+        for exchange_id, rates in funding_fees.items():
+            index = self.index.get(exchange_id, {})
+            arr = self.funding.get(exchange_id)
+            for symbol, rate in rates.items():
+                i = index.get(symbol)
+                if i is not None:
+                    arr[i] = float(rate)
+
+    def thresholds(self) -> np.ndarray:
+        """fees + funding_fees + min_profit_margin + slippage_allowance（双向对称）"""
+        return (self.taker['okx'] + self.taker['binance'] +
+                self.funding['okx'] + self.funding['binance'] +
+                self.min_profit_margin + self.slippage_allowance)
+
+    def scan(self, top_k: int = 30) -> List[Dict]:
+        """向量化计算双向价差，返回按利差降序的前K个机会"""
+        if not self.pairs:
+            return []
+        okx_bid, okx_ask = self.bid['okx'], self.ask['okx']
+        bn_bid, bn_ask = self.bid['binance'], self.ask['binance']
+
+        now = time.time()
+        valid = ((now - self.ts['okx'] <= self.max_age) &
+                 (now - self.ts['binance'] <= self.max_age) &
+                 (bn_ask * self.initial_trade_usdt >= self.min_notional))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            spread1 = (bn_bid - okx_ask) / okx_ask   # OKX买入 -> Binance卖出
+            spread2 = (okx_bid - bn_ask) / bn_ask    # Binance买入 -> OKX卖出
+            threshold = self.thresholds()
+            hit1 = valid & (spread1 > threshold)
+            hit2 = valid & (spread2 > threshold)
+            best = np.where(hit1, spread1, -np.inf)
+            best = np.where(hit2 & (spread2 > best), spread2, best)
+
+        direction = (best == spread2) & hit2
+        candidates = np.flatnonzero(best > -np.inf)
+        if candidates.size == 0:
+            return []
+        if candidates.size > top_k:
+            part = np.argpartition(-best[candidates], top_k - 1)[:top_k]
+            candidates = candidates[part]
+        ranked = candidates[np.argsort(-best[candidates])]
+
+        opportunities = []
+        for i in ranked:
+            okx_sym, binance_sym = self.pairs[i]
+            if direction[i]:
+                entry, exit_ = bn_ask[i], okx_bid[i]
+            else:
+                entry, exit_ = okx_ask[i], bn_bid[i]
+            opportunities.append({
+                'okx_symbol': okx_sym,
+                'binance_symbol': binance_sym,
+                'strategy': STRATEGY_NAMES[int(direction[i])],
+                'spread': float(best[i] * 100),
+                'entry_price': float(entry),
+                'exit_price': float(exit_)
+            })
+        return opportunities
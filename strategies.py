@@ -3,67 +3,95 @@ from decimal import Decimal
 from typing import Dict, List, Any
 from bot_core import ArbitrageBot
 from typing import Dict, List, Any, Optional
-import asyncio
+
+from opportunity_queue import OpportunityRanking, OpportunityTrigger
 
 logger = logging.getLogger(__name__)
 
 class ArbitrageStrategy:
     def __init__(self, bot: ArbitrageBot):
         self.bot = bot
+        self.ranking = OpportunityRanking(capacity=30)
+        self.trigger = OpportunityTrigger(self.ranking)
+        self.pair_index: Dict[tuple, tuple] = {}
 
-    async def find_best_arbitrage_opportunity(self) -> Optional[Dict]:
+    def attach(self):
+        """注册订单簿回调，切换为事件驱动模式"""
+        self.rebuild_index()
+        self.bot.book_stream.add_listener(self.on_book_update)
+
+    def rebuild_index(self):
+        """共同交易对变化后重建索引与扫描数组"""
+        self.pair_index = {}
+        for okx_sym, binance_sym in self.bot.common_pairs:
+            self.pair_index[('okx', okx_sym)] = (okx_sym, binance_sym)
+            self.pair_index[('binance', binance_sym)] = (okx_sym, binance_sym)
+        self.ranking.clear()
+        self.bot.scanner.set_pairs(self.bot.common_pairs)
+        self.bot.scanner.load_funding(self.bot.funding_fees)
+        self.bot.funding.set_symbols(self.bot.common_pairs)
+
+    def on_book_update(self, exchange_id: str, symbol: str):
+        pair = self.pair_index.get((exchange_id, symbol))
+        if pair is None:
+            return
+        self.bot.scanner.update_book(exchange_id, symbol, self.bot.book_stream.get_orderbook(exchange_id, symbol))
+        opp = self.evaluate_pair(*pair)
+        if self.ranking.update(pair[0], opp):
+            self.bot.optimal_opportunities = self.ranking.top()
+        if opp:
+            self.trigger.notify()
+
+    async def next_opportunity(self) -> Optional[Dict]:
+        """等待下一条越过阈值的订单簿事件，返回当前最优机会"""
+        opp = await self.trigger.wait_best()
         self.bot.stats['total_checks'] += 1
-        opportunities = []
+        return opp
+
+    def evaluate_pair(self, okx_sym: str, binance_sym: str) -> Optional[Dict]:
+        try:
+            okx_book = self.bot.get_local_orderbook(self.bot.okx_tools.exchange, okx_sym)
+            binance_book = self.bot.get_local_orderbook(self.bot.binance_tools.exchange, binance_sym)
+            if not okx_book or not binance_book:
+                return None
 
-        async def check_pair(okx_sym: str, binance_sym: str):
-            async with self.bot.semaphore:
-                try:
-                    okx_book, binance_book = await asyncio.gather(
-                        self.bot.get_orderbook(self.bot.okx_tools.exchange, okx_sym),
-                        self.bot.get_orderbook(self.bot.binance_tools.exchange, binance_sym)
-                    )
-                    if not okx_book or not binance_book:
-                        return None
+            okx_ask = okx_book['asks'][0][0]
+            binance_bid = binance_book['bids'][0][0]
+            spread1 = (binance_bid - okx_ask) / okx_ask
+            threshold1 = self.bot.calc_dynamic_spread('okx', 'binance', okx_sym, binance_sym)
 
-                    okx_ask = okx_book['asks'][0][0]
-                    binance_bid = binance_book['bids'][0][0]
-                    spread1 = (binance_bid - okx_ask) / okx_ask
-                    threshold1 = self.bot.calc_dynamic_spread('okx', 'binance', okx_sym, binance_sym)
-                    
-                    binance_ask = binance_book['asks'][0][0]
-                    okx_bid = okx_book['bids'][0][0]
-                    spread2 = (okx_bid - binance_ask) / binance_ask
-                    threshold2 = self.bot.calc_dynamic_spread('binance', 'okx', binance_sym, okx_sym)
+            binance_ask = binance_book['asks'][0][0]
+            okx_bid = okx_book['bids'][0][0]
+            spread2 = (okx_bid - binance_ask) / binance_ask
+            threshold2 = self.bot.calc_dynamic_spread('binance', 'okx', binance_sym, okx_sym)
 
-                    best_opp = None
-                    if spread1 > threshold1 + self.bot.trade_config['slippage_allowance']:
-                        best_opp = {
-                            'okx_symbol': okx_sym,
-                            'binance_symbol': binance_sym,
-                            'strategy': 'OKX买入->Binance卖出',
-                            'spread': float(spread1 * 100),
-                            'entry_price': float(okx_ask),
-                            'exit_price': float(binance_bid)
-                        }
-                    if spread2 > threshold2 + self.bot.trade_config['slippage_allowance']:
-                        current_opp = {
-                            'okx_symbol': okx_sym,
-                            'binance_symbol': binance_sym,
-                            'strategy': 'Binance买入->OKX卖出',
-                            'spread': float(spread2 * 100),
-                            'entry_price': float(binance_ask),
-                            'exit_price': float(okx_bid)
-                        }
-                        if not best_opp or current_opp['spread'] > best_opp['spread']:
-                            best_opp = current_opp
-                    return best_opp
-                except Exception as e:
-                    logger.error(f"检查交易对失败: {okx_sym}-{binance_sym} - {str(e)}")
-                    return None
+            best_opp = None
+            if spread1 > threshold1 + self.bot.trade_config['slippage_allowance']:
+                best_opp = {
+                    'okx_symbol': okx_sym,
+                    'binance_symbol': binance_sym,
+                    'strategy': 'OKX买入->Binance卖出',
+                    'spread': float(spread1 * 100),
+                    'entry_price': float(okx_ask),
+                    'exit_price': float(binance_bid)
+                }
+            if spread2 > threshold2 + self.bot.trade_config['slippage_allowance']:
+                current_opp = {
+                    'okx_symbol': okx_sym,
+                    'binance_symbol': binance_sym,
+                    'strategy': 'Binance买入->OKX卖出',
+                    'spread': float(spread2 * 100),
+                    'entry_price': float(binance_ask),
+                    'exit_price': float(okx_bid)
+                }
+                if not best_opp or current_opp['spread'] > best_opp['spread']:
+                    best_opp = current_opp
+            return best_opp
+        except Exception as e:
+            logger.error(f"检查交易对失败: {okx_sym}-{binance_sym} - {str(e)}")
+            return None
 
-        tasks = [check_pair(okx_sym, binance_sym) for okx_sym, binance_sym in self.bot.common_pairs]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        valid_opps = [res for res in results if isinstance(res, dict)]
-        self.bot.optimal_opportunities = sorted(valid_opps, key=lambda x: x['spread'], reverse=True)[:30]
-        return self.bot.optimal_opportunities[0] if self.bot.optimal_opportunities else None
\ No newline at end of file
+    async def find_best_arbitrage_opportunity(self) -> Optional[Dict]:
+        self.bot.stats['total_checks'] += 1
+        self.bot.optimal_opportunities = self.bot.scanner.scan(top_k=30)
+        return self.bot.optimal_opportunities[0] if self.bot.optimal_opportunities else None
@@ -2,6 +2,9 @@ from decimal import Decimal
 from typing import Dict, Optional, Any
 from exchange_tools import CryptoExchangeTools
 from config import TRADE_CONFIG, FEES_CONFIG
+from execution_engine import OrderLeg, TwoLegExecutor
+from utils import to_decimal
+from datetime import datetime
 import asyncio
 import logging
 
@@ -10,25 +13,18 @@ logger = logging.getLogger(__name__)
 class TradingManager:
     def __init__(self, bot):
         self.bot = bot
+        self.executor = TwoLegExecutor(instruments=bot.instruments, tracker=bot.order_tracker)
 
     async def place_order(self, exchange, symbol: str, side: str, amount: Decimal, price: Decimal) -> Optional[Dict]:
         try:
-            market = exchange.market(symbol)
-            precise_amount = exchange.amount_to_precision(symbol, float(amount))
-            precise_price = exchange.price_to_precision(symbol, float(price))
-
-            params = {}
-            if exchange.id == 'binance':
-                if side == 'buy':
-                    params['positionSide'] = 'LONG'
-                else:
-                    params['positionSide'] = 'SHORT'
-                params['timeInForce'] = 'GTC'
-            elif exchange.id == 'okx':
-                if side == 'buy':
-                    params['posSide'] = 'long'
-                else:
-                    params['posSide'] = 'short'
+            inst = self.bot.instruments.get(exchange.id, symbol)
+            if inst is None:
+                logger.error(f"下单失败: 无精度信息 {exchange.id} {symbol}")
+                return None
+            precise_amount = inst.floor_amount(float(amount))
+            precise_price = inst.round_price(float(price))
+
+            params = self._order_params(exchange, side)
 
             order = await exchange.create_order(
                 symbol=symbol,
@@ -55,108 +51,127 @@ class TradingManager:
             logger.error(f"下单失败: {str(e)}")
             return None
 
-    async def execute_arbitrage(self, opp: Dict) -> bool:
-        try:
-            if opp['strategy'] == 'OKX买入->Binance卖出':
-                buy_ex, sell_ex = self.bot.okx_tools.exchange, self.bot.binance_tools.exchange
-                buy_sym, sell_sym = opp['okx_symbol'], opp['binance_symbol']
-            else:
-                buy_ex, sell_ex = self.bot.binance_tools.exchange, self.bot.okx_tools.exchange
-                buy_sym, sell_sym = opp['binance_symbol'], opp['okx_symbol']
+    def _order_params(self, exchange, side: str) -> Dict:
+        params = {}
+        if exchange.id == 'binance':
+            params['positionSide'] = 'LONG' if side == 'buy' else 'SHORT'
+            params['timeInForce'] = 'GTC'
+        elif exchange.id == 'okx':
+            params['posSide'] = 'long' if side == 'buy' else 'short'
+        return params
+
+    def _close_params(self, exchange, side: str) -> Dict:
+        """平掉该腿持仓的参数（双向持仓模式下沿用同一持仓方向）"""
+        params = self._order_params(exchange, side)
+        params.pop('timeInForce', None)
+        return params
+
+    async def prepare_arbitrage(self, opp: Dict) -> Optional[Dict]:
+        if opp['strategy'] == 'OKX买入->Binance卖出':
+            buy_ex, sell_ex = self.bot.okx_tools.exchange, self.bot.binance_tools.exchange
+            buy_sym, sell_sym = opp['okx_symbol'], opp['binance_symbol']
+        else:
+            buy_ex, sell_ex = self.bot.binance_tools.exchange, self.bot.okx_tools.exchange
+            buy_sym, sell_sym = opp['binance_symbol'], opp['okx_symbol']
+
+        buy_book = self.bot.get_local_orderbook(buy_ex, buy_sym)
+        sell_book = self.bot.get_local_orderbook(sell_ex, sell_sym)
+        if not buy_book or not sell_book:
+            buy_book, sell_book = await asyncio.gather(
+                self.bot.get_orderbook(buy_ex, buy_sym),
+                self.bot.get_orderbook(sell_ex, sell_sym)
+            )
 
-            buy_book_task = self.bot.get_orderbook(buy_ex, buy_sym)
-            sell_book_task = self.bot.get_orderbook(sell_ex, sell_sym)
-            buy_book, sell_book = await asyncio.gather(buy_book_task, sell_book_task)
+        if not buy_book or not sell_book or not buy_book['asks'] or not sell_book['bids']:
+            logger.info(f"订单簿为空: {buy_sym} 或 {sell_sym}")
+            return None
 
-            if not buy_book or not sell_book:
-                logger.info(f"订单簿为空: {buy_sym} 或 {sell_sym}")
-                return False
+        buy_ask_price = to_decimal(buy_book['asks'][0][0], 'price')
+        buy_ask_qty = to_decimal(buy_book['asks'][0][1], 'qty')
 
-            if not buy_book['asks'] or not sell_book['bids']:
-                logger.info(f"订单簿为空: {buy_sym} 或 {sell_sym}")
-                return False
+        sell_bid_price = to_decimal(sell_book['bids'][0][0], 'price')
+        sell_bid_qty = to_decimal(sell_book['bids'][0][1], 'qty')
 
-            def to_decimal(value, _type: str):
-                if value is None:
-                    return Decimal('0')
-                try:
-                    if isinstance(value, Decimal):
-                        return value
-                    value_str = str(value).strip()
-                    if not value_str:
-                        return Decimal('0')
-                    decimal_value = Decimal(value_str)
-                    if _type == 'price':
-                        return decimal_value
-                    else:
-                        return decimal_value.quantize(Decimal('1e-8'))
-                except Exception as e:
-                    logger.error(f"数值转换失败: {value} | {str(e)}")
-                    return Decimal('0')
-
-            buy_ask_price = to_decimal(buy_book['asks'][0][0], 'price')
-            buy_ask_qty = to_decimal(buy_book['asks'][0][1], 'qty')
-
-            sell_bid_price = to_decimal(sell_book['bids'][0][0], 'price')
-            sell_bid_qty = to_decimal(sell_book['bids'][0][1], 'qty')
-
-            spread = (sell_bid_price - buy_ask_price) / buy_ask_price
-            threshold = self.bot.calc_dynamic_spread(
-                buy_ex.id, sell_ex.id, 
-                buy_sym, sell_sym
-            )
+        spread = (sell_bid_price - buy_ask_price) / buy_ask_price
+        threshold = self.bot.calc_dynamic_spread(
+            buy_ex.id, sell_ex.id,
+            buy_sym, sell_sym
+        )
 
-            required_spread = threshold + self.bot.trade_config['slippage_allowance']
-            if spread <= required_spread:
-                logger.info(f"利差不足: {spread:.4%} < 要求: {required_spread:.4%}")
-                return False
+        required_spread = threshold + self.bot.trade_config['slippage_allowance']
+        if spread <= required_spread:
+            logger.info(f"利差不足: {spread:.4%} < 要求: {required_spread:.4%}")
+            return None
 
-            await self.bot.update_balances()
-            balance = self.bot.balances[buy_ex.id]
-
-            amount_candidates = [
-                self.bot.trade_usdt / buy_ask_price,
-                buy_ask_qty * Decimal('0.8'),
-                sell_bid_qty * Decimal('0.8'),
-                (balance * self.bot.trade_config['position_risk']) / buy_ask_price
-            ]
-            raw_amount = min(amount_candidates)
-
-            market = buy_ex.market(buy_sym)
-            min_amount = Decimal(str(market['limits']['amount']['min']))
-            if raw_amount < min_amount:
-                raw_amount = min_amount
-
-            precise_amount = buy_ex.amount_to_precision(
-                buy_sym, 
-                float(raw_amount)
-            )
-            final_amount = Decimal(str(precise_amount))
+        balance = self.bot.balances[buy_ex.id]
 
-            if final_amount < min_amount:
-                logger.info(f"交易量过小: {final_amount} < {min_amount}")
-                return False
+        amount_candidates = [
+            self.bot.trade_usdt / buy_ask_price,
+            buy_ask_qty * Decimal('0.8'),
+            sell_bid_qty * Decimal('0.8'),
+            (balance * self.bot.trade_config['position_risk']) / buy_ask_price
+        ]
+        raw_amount = min(amount_candidates)
 
-            buy_order = await self.place_order(
-                buy_ex, buy_sym, 'buy', 
-                final_amount, buy_ask_price
-            )
-            if not buy_order:
-                return False
+        buy_inst = self.bot.instruments.get(buy_ex.id, buy_sym)
+        sell_inst = self.bot.instruments.get(sell_ex.id, sell_sym)
+        if buy_inst is None or sell_inst is None:
+            logger.info(f"无精度信息: {buy_sym} / {sell_sym}")
+            return None
+        min_amount = buy_inst.min_amount
+        final_amount = buy_inst.floor_amount(max(float(raw_amount), min_amount))
+        if final_amount < min_amount:
+            logger.info(f"交易量过小: {final_amount} < {min_amount}")
+            return None
 
-            sell_order = await self.place_order(
-                sell_ex, sell_sym, 'sell', 
-                final_amount, sell_bid_price
-            )
+        return {
+            'buy_leg': OrderLeg(
+                buy_ex, buy_sym, 'buy', final_amount, buy_inst.round_price(float(buy_ask_price)),
+                params=self._order_params(buy_ex, 'buy'),
+                close_params=self._close_params(buy_ex, 'buy')
+            ),
+            'sell_leg': OrderLeg(
+                sell_ex, sell_sym, 'sell', final_amount, sell_inst.round_price(float(sell_bid_price)),
+                params=self._order_params(sell_ex, 'sell'),
+                close_params=self._close_params(sell_ex, 'sell')
+            ),
+            'buy_price': buy_ask_price,
+            'sell_price': sell_bid_price
+        }
 
-            if not sell_order:
-                await buy_ex.cancel_order(buy_order['id'], buy_sym)
+    async def execute_arbitrage(self, opp: Dict) -> bool:
+        try:
+            plan = await self.prepare_arbitrage(opp)
+            if not plan:
+                return False
+            buy_leg, sell_leg = plan['buy_leg'], plan['sell_leg']
+            buy_ask_price, sell_bid_price = plan['buy_price'], plan['sell_price']
+
+            result = await self.executor.execute(buy_leg, sell_leg)
+            for leg, order in ((buy_leg, result['buy_order']), (sell_leg, result['sell_order'])):
+                if order:
+                    self.bot.active_orders.append({
+                        'id': order['id'],
+                        'exchange': leg.exchange.id,
+                        'symbol': leg.symbol,
+                        'side': leg.side,
+                        'amount': Decimal(str(leg.amount)),
+                        'price': Decimal(str(leg.price)),
+                        'status': order.get('status'),
+                        'timestamp': datetime.now().isoformat()
+                    })
+            self.bot.refresh_balances_soon()
+
+            final_amount = Decimal(str(result['filled_amount']))
+            if result['status'] not in ('filled', 'hedged') or final_amount <= 0:
+                logger.info(f"套利未完成: {result['status']}")
+                self.bot.stats['failed_trades'] += 1
                 return False
 
             gross_profit = (sell_bid_price - buy_ask_price) * final_amount
             fee_cost = (
-                (buy_ask_price * final_amount * self.bot.fees_config[buy_ex.id]['taker']) +
-                (sell_bid_price * final_amount * self.bot.fees_config[sell_ex.id]['taker'])
+                (buy_ask_price * final_amount * self.bot.fees_config[buy_leg.exchange.id]['taker']) +
+                (sell_bid_price * final_amount * self.bot.fees_config[sell_leg.exchange.id]['taker'])
             )
             net_profit = gross_profit - fee_cost
 
@@ -184,4 +199,4 @@ class TradingManager:
         except Exception as e:
             logger.error(f"执行失败: {str(e)}", exc_info=True)
             self.bot.stats['failed_trades'] += 1
-            return False
\ No newline at end of file
+            return False
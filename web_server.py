@@ -46,6 +46,7 @@ async def run_web_server(bot: ArbitrageBot, port: int):
                 'okx': float(bot.balances['okx']),
                 'binance': float(bot.balances['binance'])
             },
+            'account': bot.account_state.snapshot(),
             'profits': {
                 'total': float(bot.profits['total']),
                 'today': float(bot.profits['today']),